@@ -0,0 +1,318 @@
+# almacenamiento_compacto.py
+"""
+Formato compacto (.azc) para los históricos de los fondos.
+
+Comparado con el JSON del descargador:
+- Las fechas se guardan como la fecha inicial más diferencias en días (casi siempre 1 a 3).
+- Los precios OHLC se guardan en binario, en float64 o, opcionalmente, en float32.
+- Los eventos (dividendos, splits, ganancias de capital) solo se guardan donde no son cero.
+- Cada columna es un bloque comprimido con zlib tras reordenar sus bytes (byte shuffle),
+  lo que agrupa los bytes más significativos y mejora mucho la compresión.
+
+El encabezado (nombre, símbolo, descripción y tabla de bloques) va sin comprimir al
+inicio del archivo, así que el catálogo se puede leer sin descomprimir los precios.
+
+Para medir tamaños y tiempos de carga convirtiendo toda la carpeta 'Data' en una carpeta
+temporal:
+
+    python almacenamiento_compacto.py [--float32] [--destino carpeta]
+
+`cargar_datos_fondo` prefiere los archivos de 'Data/compacto' cuando son más recientes que
+el JSON, así que solo se escribe ahí con --publicar (y siempre en float64, sin pérdida):
+
+    python almacenamiento_compacto.py --publicar
+"""
+import os
+import sys
+import json
+import glob
+import time
+import zlib
+import shutil
+import struct
+import argparse
+import tempfile
+import numpy as np
+
+from registro_fondos import DIRECTORIO_FRAGMENTOS
+
+
+MAGIA = b"AZC1"
+DIRECTORIO_COMPACTO = os.path.join("Data", "compacto")
+EXTENSION = ".azc"
+
+COLUMNAS_PRECIO = ("Open", "High", "Low", "Close")
+COLUMNAS_EVENTO = ("Dividends", "Stock Splits", "Capital Gains")
+NIVEL_COMPRESION = 6
+
+
+def _revolver(arreglo):
+    # Byte shuffle: primero todos los bytes 0 de cada valor, luego todos los bytes 1, etc.
+    crudo = np.ascontiguousarray(arreglo).view(np.uint8)
+    return crudo.reshape(-1, arreglo.dtype.itemsize).T.tobytes()
+
+
+def _desrevolver(contenido, dtype, n):
+    dtype = np.dtype(dtype)
+    crudo = np.frombuffer(contenido, dtype=np.uint8).reshape(dtype.itemsize, n)
+    return np.ascontiguousarray(crudo.T).view(dtype).reshape(n)
+
+
+def _entero_minimo(valores):
+    if len(valores) == 0:
+        return np.dtype(np.uint8)
+    minimo, maximo = int(valores.min()), int(valores.max())
+    candidatos = (np.int8, np.int16, np.int32, np.int64) if minimo < 0 else (np.uint8, np.uint16, np.uint32, np.uint64)
+    for candidato in candidatos:
+        info = np.iinfo(candidato)
+        if info.min <= minimo and maximo <= info.max:
+            return np.dtype(candidato)
+    return np.dtype(np.int64)
+
+
+def codificar_fondo(datos_fondo, precision="float64"):
+    """
+    Codifica el diccionario de un fondo (como lo escribe `ETFs.py`) en el formato compacto.
+
+    Parámetros:
+    - datos_fondo: Diccionario con nombre, simbolo, descripcion y datos_historicos.
+    - precision: "float64" (sin pérdida) o "float32" para los precios OHLC.
+
+    Retorna:
+    - bytes con el archivo .azc completo.
+    """
+    historicos = datos_fondo["datos_historicos"]
+    columnas = list(historicos[0].keys()) if historicos else ["Date"]
+    n = len(historicos)
+    bloques, cuerpos = [], []
+
+    def agregar(columna, tipo, arreglo, **extra):
+        comprimido = zlib.compress(_revolver(arreglo), NIVEL_COMPRESION)
+        bloques.append({"columna": columna, "tipo": tipo, "dtype": arreglo.dtype.str,
+                        "n": int(arreglo.shape[0]), "bytes": len(comprimido), **extra})
+        cuerpos.append(comprimido)
+
+    fechas = np.array([entry["Date"] for entry in historicos], dtype="datetime64[D]").view(np.int64)
+    fecha_inicial = int(fechas[0]) if n else 0
+    diferencias = np.diff(fechas)
+    agregar("Date", "fecha", diferencias.astype(_entero_minimo(diferencias)), inicial=fecha_inicial)
+
+    for columna in columnas:
+        if columna == "Date":
+            continue
+        valores = np.array([entry.get(columna, np.nan) for entry in historicos], dtype=np.float64)
+
+        if columna in COLUMNAS_EVENTO:
+            # Columnas dispersas: solo las filas con evento
+            indices = np.flatnonzero(np.nan_to_num(valores) != 0)
+            agregar(columna, "evento_indices", indices.astype(_entero_minimo(indices)))
+            agregar(columna, "evento_valores", valores[indices])
+        elif columna in COLUMNAS_PRECIO:
+            agregar(columna, "precio", valores.astype(np.float32 if precision == "float32" else np.float64))
+        elif np.all(np.isfinite(valores)) and np.all(valores == np.round(valores)):
+            enteros = valores.astype(np.int64)
+            agregar(columna, "entero", enteros.astype(_entero_minimo(enteros)))
+        else:
+            agregar(columna, "real", valores)
+
+    encabezado = json.dumps({
+        "nombre": datos_fondo.get("nombre"),
+        "simbolo": datos_fondo.get("simbolo"),
+        "descripcion": datos_fondo.get("descripcion"),
+        "filas": n,
+        "columnas": columnas,
+        "precision": precision,
+        "bloques": bloques,
+    }, ensure_ascii=False).encode("utf-8")
+
+    return MAGIA + struct.pack("<I", len(encabezado)) + encabezado + b"".join(cuerpos)
+
+
+def leer_encabezado_compacto(ruta):
+    """
+    Lee solo el encabezado de un archivo .azc (sin descomprimir los bloques).
+    """
+    with open(ruta, 'rb') as f:
+        return _leer_encabezado(f.read(8), f)[0]
+
+
+def _leer_encabezado(inicio, f=None, contenido=None):
+    if inicio[:4] != MAGIA:
+        raise ValueError("El archivo no tiene el formato compacto .azc")
+    longitud = struct.unpack("<I", inicio[4:8])[0]
+    texto = f.read(longitud) if f is not None else contenido[8:8 + longitud]
+    return json.loads(texto.decode("utf-8")), 8 + longitud
+
+
+def decodificar_columnas(contenido):
+    """
+    Decodifica un archivo .azc a columnas de numpy (la forma más rápida de leerlo).
+
+    Retorna:
+    - (encabezado, columnas): `columnas` mapea cada nombre de columna a un arreglo; "Date"
+      es datetime64[D] y los eventos vuelven a ser columnas densas con ceros.
+    """
+    encabezado, posicion = _leer_encabezado(contenido[:8], contenido=contenido)
+    n = encabezado["filas"]
+    columnas = {}
+
+    for bloque in encabezado["bloques"]:
+        datos = zlib.decompress(contenido[posicion:posicion + bloque["bytes"]])
+        posicion += bloque["bytes"]
+        arreglo = _desrevolver(datos, bloque["dtype"], bloque["n"])
+        columna, tipo = bloque["columna"], bloque["tipo"]
+
+        if tipo == "fecha":
+            fechas = np.empty(n, dtype=np.int64)
+            if n:
+                fechas[0] = bloque["inicial"]
+                np.cumsum(arreglo, out=fechas[1:])
+                fechas[1:] += bloque["inicial"]
+            columnas[columna] = fechas.view("datetime64[D]")
+        elif tipo == "evento_indices":
+            columnas[columna] = np.zeros(n, dtype=np.float64)
+            indices_evento = arreglo.astype(np.int64)
+        elif tipo == "evento_valores":
+            columnas[columna][indices_evento] = arreglo
+        else:
+            columnas[columna] = arreglo
+
+    return encabezado, columnas
+
+
+def decodificar_fondo(contenido):
+    """
+    Decodifica un archivo .azc al mismo diccionario que produce el JSON del descargador,
+    para que las funciones de métricas lo usen sin cambios.
+    """
+    encabezado, columnas = decodificar_columnas(contenido)
+    nombres = encabezado["columnas"]
+    listas = []
+    for nombre in nombres:
+        if nombre == "Date":
+            listas.append(np.datetime_as_string(columnas[nombre], unit="D").tolist())
+        else:
+            listas.append(columnas[nombre].astype(np.float64).tolist() if columnas[nombre].dtype.kind == "f"
+                          else columnas[nombre].tolist())
+
+    return {
+        "nombre": encabezado["nombre"],
+        "simbolo": encabezado["simbolo"],
+        "descripcion": encabezado["descripcion"],
+        "datos_historicos": [dict(zip(nombres, fila)) for fila in zip(*listas)],
+    }
+
+
+def guardar_compacto(datos_fondo, ruta, precision="float64"):
+    """
+    Escribe el fondo en formato compacto de forma atómica.
+    """
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'wb') as f:
+        f.write(codificar_fondo(datos_fondo, precision=precision))
+    os.replace(temporal, ruta)
+
+
+def cargar_compacto(ruta, columnar=False):
+    """
+    Carga un archivo .azc.
+
+    Parámetros:
+    - ruta: Ruta del archivo.
+    - columnar: Si es True regresa (encabezado, columnas numpy); si no, el diccionario tipo JSON.
+    """
+    with open(ruta, 'rb') as f:
+        contenido = f.read()
+    return decodificar_columnas(contenido) if columnar else decodificar_fondo(contenido)
+
+
+def ruta_compacta(ruta_json, directorio=DIRECTORIO_COMPACTO):
+    """
+    Ruta .azc que corresponde a un archivo JSON de 'Data'. Los archivos de un fragmento
+    (Data/fragmentos/<xx>/) van al mismo fragmento dentro de `directorio`.
+    """
+    base = os.path.splitext(os.path.basename(ruta_json))[0]
+    carpeta = os.path.dirname(ruta_json)
+    if os.path.basename(os.path.dirname(carpeta)) == DIRECTORIO_FRAGMENTOS:
+        directorio = os.path.join(directorio, DIRECTORIO_FRAGMENTOS, os.path.basename(carpeta))
+    return os.path.join(directorio, base + EXTENSION)
+
+
+def convertir_directorio(origen="Data", destino=DIRECTORIO_COMPACTO, precision="float64"):
+    """
+    Convierte todos los JSON de fondos de `origen` al formato compacto.
+
+    Retorna:
+    - Lista de (archivo relativo a `origen`, bytes_json, bytes_compacto).
+    """
+    resultados = []
+    archivos = glob.glob(os.path.join(origen, "*.json")) + glob.glob(os.path.join(origen, DIRECTORIO_FRAGMENTOS, "*", "*.json"))
+    for archivo in sorted(archivos):
+        with open(archivo, 'r') as f:
+            datos = json.load(f)
+        if not isinstance(datos, dict) or "datos_historicos" not in datos:
+            continue
+        salida = ruta_compacta(archivo, destino)
+        guardar_compacto(datos, salida, precision=precision)
+        resultados.append((os.path.relpath(archivo, origen), os.path.getsize(archivo), os.path.getsize(salida)))
+    return resultados
+
+
+def _medir_carga(archivos, cargar):
+    inicio = time.perf_counter()
+    for archivo in archivos:
+        cargar(archivo)
+    return (time.perf_counter() - inicio) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convierte 'Data' al formato compacto y reporta tamaños y tiempos.")
+    parser.add_argument("--float32", action="store_true", help="Guardar los precios OHLC en float32.")
+    parser.add_argument("--destino", default=None, help="Carpeta de salida (por defecto una temporal que se borra al terminar).")
+    parser.add_argument("--publicar", action="store_true",
+                        help=f"Escribir en {DIRECTORIO_COMPACTO}, la carpeta que usa la app al cargar los fondos.")
+    argumentos = parser.parse_args()
+
+    if argumentos.publicar and argumentos.destino is not None:
+        parser.error("--publicar escribe en la carpeta de la app; no se combina con --destino.")
+    destino = DIRECTORIO_COMPACTO if argumentos.publicar else argumentos.destino
+    if destino is not None and os.path.abspath(destino) == os.path.abspath(DIRECTORIO_COMPACTO):
+        if not argumentos.publicar:
+            parser.error(f"{DIRECTORIO_COMPACTO} es la carpeta que usa la app; para escribir ahí usa --publicar.")
+        if argumentos.float32:
+            parser.error("La app no debe cargar precios en float32: --float32 no se combina con --publicar.")
+    temporal = destino is None
+    if temporal:
+        destino = tempfile.mkdtemp(prefix="compacto_")
+
+    precision = "float32" if argumentos.float32 else "float64"
+    try:
+        resultados = convertir_directorio(destino=destino, precision=precision)
+        if not resultados:
+            print("No se encontraron archivos de fondos en 'Data'.")
+            sys.exit(1)
+
+        total_json = sum(r[1] for r in resultados)
+        total_compacto = sum(r[2] for r in resultados)
+        print(f"Fondos convertidos: {len(resultados)} ({precision})")
+        print(f"JSON:     {total_json / 1e6:8.2f} MB")
+        print(f"Compacto: {total_compacto / 1e6:8.2f} MB  ({total_json / total_compacto:.1f}x más pequeño)")
+
+        archivos_json = [os.path.join("Data", r[0]) for r in resultados]
+        archivos_azc = [ruta_compacta(a, destino) for a in archivos_json]
+
+        def cargar_json(ruta):
+            with open(ruta, 'r') as f:
+                return json.load(f)
+
+        print(f"Carga JSON (json.load):              {_medir_carga(archivos_json, cargar_json):8.1f} ms")
+        print(f"Carga compacta (mismo diccionario):  {_medir_carga(archivos_azc, cargar_compacto):8.1f} ms")
+        print(f"Carga compacta (columnas numpy):     {_medir_carga(archivos_azc, lambda r: cargar_compacto(r, columnar=True)):8.1f} ms")
+        if not temporal:
+            print(f"Archivos compactos en {destino}")
+    finally:
+        if temporal:
+            shutil.rmtree(destino, ignore_errors=True)
@@ -0,0 +1,515 @@
+# api.py
+"""
+Servicio HTTP sin interfaz para las mismas analíticas del simulador de Streamlit.
+
+Solo usa la biblioteca estándar (asyncio) y los módulos del proyecto, y trabaja sobre
+la caché de fondos en proceso de `functions.py`. Se ejecuta con:
+
+    python api.py --puerto 8000
+
+Endpoints (todas las respuestas son JSON):
+- GET  /salud              Estado del servicio.
+- GET  /fondos             Catálogo de fondos disponibles.
+- GET  /metricas-servicio  Latencias por endpoint, métricas de la caché de optimización y uso de memoria.
+- POST /metricas           {"simbolos": [...], "periodo": "5y", "frecuencia": "D"}  (D, W, M o A)
+- POST /perfil             {"respuestas": [1, 3, 4, ...]}  (también acepta "a".."d")
+- POST /optimizar          {"portafolios": [{"perfil": "Moderado", "simbolos": [...], "n_fondos": 5}, ...],
+                             "covarianza": "ledoit_wolf", "referencia": "SPY"}  (estimador opcional; cada fondo trae su
+                             contribución al riesgo y, con referencia, cada portafolio sus métricas relativas)
+- POST /referencia         {"referencia": "SPY", "simbolos": [...]}  (beta, alfa, tracking error, information ratio, capturas)
+- POST /proyeccion         {"proyecciones": [{"monto_inicial": 100000, "rendimiento": 8.5, "anos": 20,
+                             "aportacion_mensual": 2000, "retiro_mensual": 15000, "anos_retiro": 25}, ...]}
+- POST /metas              {"confianza": 75, "clientes": [{"meta": 3000000, "anos": 25, "rendimiento": 8.5,
+                             "volatilidad": 12, "monto_inicial": 100000, "aportacion_mensual": 2000}, ...]}
+"""
+import json
+import time
+import asyncio
+import argparse
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from functions import (listar_fondos, cargar_datos_fondo, calcular_metricas_fondo, calcular_rendimiento_volatilidad,
+                       determinar_perfil, version_fondos, OPTIMIZADORES_POR_PERFIL)
+from cache_resultados import optimizar_con_cache, cache_optimizador
+import memoria
+from proyeccion import proyectar_flujos
+from metas import (rendimiento_con_confianza, aportacion_requerida, monto_inicial_requerido, anos_requeridos,
+                   rendimiento_requerido)
+from remuestreo import FRECUENCIAS
+from covarianza import ESTIMADORES, obtener_covarianza
+from contribucion_riesgo import analizar_riesgo, matriz_de_pesos
+from metricas_referencia import REFERENCIAS, metricas_fondos, metricas_portafolios
+from vigilante_datos import iniciar_vigilante
+
+
+PUNTOS_RESPUESTA = {"a": 1, "b": 2, "c": 3, "d": 4}
+MENSAJES_HTTP = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                 413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class ErrorSolicitud(Exception):
+    """
+    Error de validación que se responde al cliente con el código HTTP indicado.
+    """
+
+    def __init__(self, mensaje, codigo=400):
+        super().__init__(mensaje)
+        self.codigo = codigo
+
+
+class MetricasLatencia:
+    """
+    Guarda las últimas latencias de cada endpoint para reportar percentiles.
+    """
+
+    def __init__(self, ventana=1000):
+        self.ventana = ventana
+        self._latencias = {}
+        self._conteos = {}
+        self._errores = {}
+
+    def registrar(self, ruta, segundos, error=False):
+        self._latencias.setdefault(ruta, deque(maxlen=self.ventana)).append(segundos)
+        self._conteos[ruta] = self._conteos.get(ruta, 0) + 1
+        if error:
+            self._errores[ruta] = self._errores.get(ruta, 0) + 1
+
+    def resumen(self):
+        resumen = {}
+        for ruta, latencias in self._latencias.items():
+            ordenadas = sorted(latencias)
+            percentil = lambda p: ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))] * 1000
+            resumen[ruta] = {
+                "solicitudes": self._conteos[ruta],
+                "errores": self._errores.get(ruta, 0),
+                "p50_ms": percentil(0.50),
+                "p95_ms": percentil(0.95),
+                "p99_ms": percentil(0.99),
+                "max_ms": ordenadas[-1] * 1000,
+            }
+        return resumen
+
+
+def _json_valido(valor):
+    """
+    Copia de la respuesta con NaN e infinitos como None: JSON no tiene esos valores y
+    `json.dumps` escribiría literales `NaN` que los clientes no pueden leer (por ejemplo,
+    las métricas de un fondo con historial insuficiente).
+    """
+    if isinstance(valor, dict):
+        return {clave: _json_valido(v) for clave, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_json_valido(v) for v in valor]
+    if isinstance(valor, (float, np.floating)):
+        return float(valor) if np.isfinite(valor) else None
+    if isinstance(valor, np.integer):
+        return int(valor)
+    return valor
+
+
+############################ Lógica de cada endpoint ######################################
+
+def _exigir_lista(cuerpo, campo, maximo, tipo=None, vacia=False):
+    # Una cadena no es una lista de símbolos: se recorrería letra por letra
+    valores = cuerpo.get(campo, [] if vacia else None)
+    if not isinstance(valores, list) or not (valores or vacia):
+        raise ErrorSolicitud(f"El campo '{campo}' debe ser una lista{'' if vacia else ' no vacía'}.")
+    if len(valores) > maximo:
+        raise ErrorSolicitud(f"El campo '{campo}' admite como máximo {maximo} elementos.", 413)
+    if tipo is not None and not all(isinstance(valor, tipo) for valor in valores):
+        descripcion = "cadenas" if tipo is str else "objetos"
+        raise ErrorSolicitud(f"Los elementos de '{campo}' deben ser {descripcion}.")
+    return valores
+
+
+def _metricas_fondos(cuerpo, max_lote):
+    periodo = cuerpo.get("periodo", "5y")
+    frecuencia = cuerpo.get("frecuencia", "D")
+    if frecuencia not in FRECUENCIAS:
+        raise ErrorSolicitud(f"Frecuencia inválida: {frecuencia!r}. Usa una de {', '.join(FRECUENCIAS)}.")
+    resultados = {}
+    for simbolo in _exigir_lista(cuerpo, "simbolos", max_lote, str):
+        try:
+            data = cargar_datos_fondo(simbolo)
+            metricas = calcular_metricas_fondo(data["datos_historicos"], periodo=periodo, frecuencia=frecuencia,
+                                               clave=(simbolo, version_fondos([simbolo])))
+            resultados[simbolo] = {"nombre": data["nombre"], **metricas}
+        except (FileNotFoundError, ValueError, KeyError) as e:
+            resultados[simbolo] = {"error": str(e)}
+    return {"fondos": resultados}
+
+
+def _perfil(cuerpo, max_lote):
+    respuestas = _exigir_lista(cuerpo, "respuestas", 8)
+    if len(respuestas) != 8:
+        raise ErrorSolicitud("El cuestionario tiene 8 preguntas; se esperaban 8 respuestas.")
+
+    puntos = []
+    for respuesta in respuestas:
+        if isinstance(respuesta, str) and respuesta.lower() in PUNTOS_RESPUESTA:
+            puntos.append(PUNTOS_RESPUESTA[respuesta.lower()])
+        elif isinstance(respuesta, int) and 1 <= respuesta <= 4:
+            puntos.append(respuesta)
+        else:
+            raise ErrorSolicitud(f"Respuesta inválida: {respuesta!r}. Usa 'a'-'d' o 1-4.")
+
+    perfil, descripcion, puntaje = determinar_perfil(puntos)
+    return {"perfil": perfil, "descripcion": descripcion, "puntaje": puntaje}
+
+
+def _datos_optimizacion(simbolos):
+    """
+    Calcula las métricas que necesitan los optimizadores, igual que la pestaña de Resultados.
+    """
+    fondos_data = []
+    for simbolo in simbolos:
+        data = cargar_datos_fondo(simbolo)
+        if not data.get("datos_historicos"):
+            continue
+        rendimiento, volatilidad = calcular_rendimiento_volatilidad(data["datos_historicos"], periodo="5y")
+        fondos_data.append({
+            "nombre": data["nombre"],
+            "simbolo": data["simbolo"],
+            "rendimiento": float(rendimiento),
+            "volatilidad": float(volatilidad)
+        })
+    return fondos_data
+
+
+def _optimizar(cuerpo, max_lote):
+    estimador = cuerpo.get("covarianza")
+    if estimador is not None and estimador not in ESTIMADORES:
+        raise ErrorSolicitud(f"Estimador de covarianza inválido: {estimador!r}. Usa uno de {', '.join(ESTIMADORES)}.")
+    referencia = cuerpo.get("referencia")
+    if referencia is not None:
+        _validar_referencia(referencia)
+
+    portafolios = _exigir_lista(cuerpo, "portafolios", max_lote, dict)
+    simbolos_portafolios = [_exigir_lista(portafolio, "simbolos", max_lote, str, vacia=True) for portafolio in portafolios]
+
+    resultados = []
+    for portafolio, simbolos in zip(portafolios, simbolos_portafolios):
+        perfil = portafolio.get("perfil")
+        if perfil not in OPTIMIZADORES_POR_PERFIL:
+            resultados.append({"error": f"Perfil desconocido: {perfil!r}."})
+            continue
+        try:
+            fondos_data = _datos_optimizacion(simbolos)
+            covarianza = (obtener_covarianza([fondo["simbolo"] for fondo in fondos_data], metodo=estimador)
+                          if estimador and fondos_data else None)
+            seleccionados, pesos, rendimiento, riesgo = optimizar_con_cache(
+                perfil, fondos_data, n_fondos=int(portafolio.get("n_fondos", 5)), covarianza=covarianza)
+        except (FileNotFoundError, ValueError, TypeError) as e:
+            resultados.append({"error": str(e)})
+            continue
+
+        if not seleccionados or not pesos:
+            resultados.append({"error": "No se pudieron obtener métricas suficientes para optimizar el portafolio."})
+            continue
+
+        resultados.append({
+            "perfil": perfil,
+            "fondos": [
+                {"simbolo": fondo["simbolo"], "nombre": fondo["nombre"], "peso": peso,
+                 "rendimiento": fondo["rendimiento"], "volatilidad": fondo["volatilidad"]}
+                for fondo, peso in zip(seleccionados, pesos)
+            ],
+            "rendimiento": float(rendimiento),
+            "volatilidad": float(riesgo)
+        })
+
+    _agregar_contribuciones(resultados, estimador)
+    if referencia is not None:
+        _agregar_referencia(resultados, referencia)
+    return {"resultados": resultados}
+
+
+def _validar_referencia(referencia):
+    if referencia not in REFERENCIAS:
+        raise ErrorSolicitud(f"Índice de referencia inválido: {referencia!r}. Usa uno de {', '.join(REFERENCIAS)}.")
+
+
+def _agregar_referencia(resultados, referencia):
+    # Métricas relativas de todo el lote en una sola operación de matrices
+    exitosos = [resultado for resultado in resultados if "fondos" in resultado]
+    if not exitosos:
+        return
+
+    universo, pesos = matriz_de_pesos([([f["simbolo"] for f in r["fondos"]], [f["peso"] for f in r["fondos"]])
+                                       for r in exitosos])
+    por_fondo = metricas_fondos(referencia)
+    for resultado, metricas in zip(exitosos, metricas_portafolios(universo, pesos, referencia)):
+        resultado["referencia"] = {"simbolo": referencia, **metricas}
+        for fondo in resultado["fondos"]:
+            fondo["beta"] = por_fondo.get(fondo["simbolo"], {}).get("beta")
+            fondo["tracking_error"] = por_fondo.get(fondo["simbolo"], {}).get("tracking_error")
+
+
+def _referencia(cuerpo, max_lote):
+    referencia = cuerpo.get("referencia", "SPY")
+    _validar_referencia(referencia)
+    por_fondo = metricas_fondos(referencia)
+    simbolos = cuerpo.get("simbolos")
+    if simbolos is not None:
+        simbolos = _exigir_lista(cuerpo, "simbolos", max_lote, str)
+        por_fondo = {simbolo: por_fondo[simbolo] for simbolo in simbolos if simbolo in por_fondo}
+    return {"referencia": referencia, "fondos": por_fondo}
+
+
+def _agregar_contribuciones(resultados, estimador=None):
+    # Contribuciones al riesgo de todo el lote en una sola operación de matrices
+    exitosos = [resultado for resultado in resultados if "fondos" in resultado]
+    if not exitosos:
+        return
+
+    universo, pesos = matriz_de_pesos([([f["simbolo"] for f in r["fondos"]], [f["peso"] for f in r["fondos"]])
+                                       for r in exitosos])
+    if estimador:
+        covarianza = obtener_covarianza(universo, metodo=estimador).matriz * 100 ** 2
+    else:
+        volatilidades = {f["simbolo"]: f["volatilidad"] for r in exitosos for f in r["fondos"]}
+        covarianza = np.array([volatilidades[simbolo] for simbolo in universo])
+    analisis = analizar_riesgo(pesos, covarianza)
+
+    posicion = {simbolo: i for i, simbolo in enumerate(universo)}
+    for fila, resultado in enumerate(exitosos):
+        resultado["razon_diversificacion"] = float(analisis["razon_diversificacion"][fila])
+        for fondo in resultado["fondos"]:
+            columna = posicion[fondo["simbolo"]]
+            fondo["contribucion_marginal"] = float(analisis["contribucion_marginal"][fila, columna])
+            fondo["contribucion_riesgo"] = float(analisis["contribucion_total"][fila, columna])
+            fondo["contribucion_riesgo_pct"] = float(analisis["contribucion_porcentual"][fila, columna] * 100)
+
+
+CAMPOS_PLAN = ("aportacion_mensual", "crecimiento_aportacion", "retiro_mensual", "anos_retiro", "crecimiento_retiro")
+
+
+def _proyeccion(cuerpo, max_lote):
+    planes, resultados = [], []
+    for plan in _exigir_lista(cuerpo, "proyecciones", max_lote, dict):
+        try:
+            # Igual que en el frontend, los rendimientos y crecimientos se reciben en %
+            planes.append({
+                "monto_inicial": float(plan["monto_inicial"]),
+                "rendimiento": float(plan["rendimiento"]) / 100,
+                "anos": int(plan["anos"]),
+                **{campo: float(plan.get(campo, 0)) / (100 if campo.startswith("crecimiento") else 1)
+                   for campo in CAMPOS_PLAN}
+            })
+            resultados.append(None)
+        except (KeyError, TypeError, ValueError):
+            resultados.append({"error": "Cada proyección requiere monto_inicial, rendimiento (%) y anos."})
+
+    if planes:
+        # Todo el lote se proyecta en una sola pasada vectorizada
+        columna = lambda campo: [plan[campo] for plan in planes]
+        proyeccion = proyectar_flujos(columna("monto_inicial"), columna("rendimiento"), columna("anos"),
+                                      **{campo: columna(campo) for campo in CAMPOS_PLAN})
+        validos = iter(range(len(planes)))
+        for posicion, resultado in enumerate(resultados):
+            if resultado is not None:
+                continue
+            i = next(validos)
+            anos_totales = planes[i]["anos"] + int(planes[i]["anos_retiro"])
+            resultados[posicion] = {
+                "valor_proyectado": float(proyeccion["saldo_al_retiro"][i]),
+                "valor_final": float(proyeccion["saldo_final"][i]),
+                "total_aportado": float(proyeccion["total_aportado"][i]),
+                "mes_agotado": int(proyeccion["mes_agotado"][i]),
+                "valores_por_ano": proyeccion["saldos_anuales"][i, :anos_totales + 1].tolist(),
+            }
+    return {"resultados": resultados}
+
+
+def _metas(cuerpo, max_lote):
+    clientes = _exigir_lista(cuerpo, "clientes", max_lote, dict)
+    try:
+        columna = lambda campo, defecto=None: np.array(
+            [float(c[campo] if defecto is None else c.get(campo, defecto)) for c in clientes])
+        meta = columna("meta")
+        monto_inicial = columna("monto_inicial", 0)
+        anos = columna("anos")
+        aportacion = columna("aportacion_mensual", 0)
+        crecimiento = columna("crecimiento_aportacion", 0) / 100
+        # Rendimiento y volatilidad en %, como los regresa /optimizar
+        tasa = rendimiento_con_confianza(columna("rendimiento") / 100, columna("volatilidad", 0) / 100, anos,
+                                         float(cuerpo.get("confianza", 50)) / 100)
+    except (KeyError, TypeError, ValueError):
+        raise ErrorSolicitud("Cada cliente requiere meta, anos y rendimiento (%); volatilidad, monto_inicial, "
+                             "aportacion_mensual y crecimiento_aportacion son opcionales.")
+
+    # Cada incógnita se resuelve para todos los clientes a la vez
+    aportaciones = aportacion_requerida(meta, monto_inicial, tasa, anos, crecimiento)
+    montos = monto_inicial_requerido(meta, tasa, anos, aportacion, crecimiento)
+    anos_meta = anos_requeridos(meta, monto_inicial, tasa, aportacion, crecimiento, max_anos=int(cuerpo.get("max_anos", 60)))
+    tasas_requeridas = rendimiento_requerido(meta, monto_inicial, anos, aportacion, crecimiento)
+
+    return {"resultados": [
+        {"rendimiento_considerado": float(tasa[i]) * 100,
+         "aportacion_mensual_requerida": float(aportaciones[i]),
+         "monto_inicial_requerido": float(montos[i]),
+         "anos_requeridos": int(anos_meta[i]),
+         "rendimiento_requerido": None if np.isnan(tasas_requeridas[i]) else float(tasas_requeridas[i]) * 100}
+        for i in range(len(clientes))
+    ]}
+
+
+############################ Servidor HTTP ######################################
+
+class ServidorAnaliticas:
+    """
+    Servidor HTTP/1.1 mínimo sobre asyncio.
+
+    El trabajo de cálculo se ejecuta en un pool de hilos para no bloquear el ciclo de eventos,
+    y un semáforo limita cuántas solicitudes se procesan a la vez; las que exceden la cola
+    de espera reciben 503 en lugar de acumular latencia.
+
+    Parámetros:
+    - max_concurrencia: Solicitudes que se calculan simultáneamente.
+    - max_en_espera: Solicitudes que pueden esperar turno antes de rechazar con 503.
+    - max_lote: Elementos máximos por lote (portafolios, símbolos o proyecciones).
+    """
+
+    RUTAS_GET = ("/salud", "/metricas-servicio", "/fondos")
+    RUTAS_POST = {
+        "/metricas": _metricas_fondos,
+        "/perfil": _perfil,
+        "/optimizar": _optimizar,
+        "/referencia": _referencia,
+        "/proyeccion": _proyeccion,
+        "/metas": _metas,
+    }
+
+    def __init__(self, max_concurrencia=4, max_en_espera=64, max_lote=500, max_bytes=1_000_000):
+        self.max_concurrencia = max_concurrencia
+        self.max_en_espera = max_en_espera
+        self.max_lote = max_lote
+        self.max_bytes = max_bytes
+        self.metricas = MetricasLatencia()
+        self._semaforo = None
+        self._en_espera = 0
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrencia)
+        self._servidor = None
+
+    async def iniciar(self, host="127.0.0.1", puerto=8000):
+        self._semaforo = asyncio.Semaphore(self.max_concurrencia)
+        self._servidor = await asyncio.start_server(self._atender, host, puerto)
+        return self._servidor.sockets[0].getsockname()[1]
+
+    async def detener(self):
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        self._pool.shutdown(wait=False)
+
+    async def _leer_solicitud(self, reader):
+        linea = (await reader.readline()).decode("latin-1").strip()
+        if not linea:
+            return None
+        metodo, ruta, _ = linea.split(" ", 2)
+        encabezados = {}
+        while True:
+            encabezado = (await reader.readline()).decode("latin-1").strip()
+            if not encabezado:
+                break
+            nombre, _, valor = encabezado.partition(":")
+            encabezados[nombre.strip().lower()] = valor.strip()
+
+        longitud = int(encabezados.get("content-length", 0))
+        if longitud > self.max_bytes:
+            raise ErrorSolicitud("El cuerpo de la solicitud es demasiado grande.", 413)
+        cuerpo = await reader.readexactly(longitud) if longitud else b""
+        return metodo.upper(), ruta.split("?", 1)[0], cuerpo
+
+    async def _despachar(self, metodo, ruta, cuerpo):
+        if ruta == "/salud" and metodo == "GET":
+            return {"estado": "ok"}
+        if ruta == "/metricas-servicio" and metodo == "GET":
+            return {"endpoints": self.metricas.resumen(), "cache_optimizador": cache_optimizador.metricas(),
+                    "en_espera": self._en_espera, "memoria": memoria.resumen()}
+        if ruta == "/fondos" and metodo == "GET":
+            funcion, argumentos = listar_fondos, ()
+        elif ruta in self.RUTAS_POST:
+            if metodo != "POST":
+                raise ErrorSolicitud(f"{ruta} solo acepta POST.", 405)
+            try:
+                datos = json.loads(cuerpo or b"{}")
+            except json.JSONDecodeError:
+                raise ErrorSolicitud("El cuerpo debe ser JSON válido.")
+            if not isinstance(datos, dict):
+                raise ErrorSolicitud("El cuerpo debe ser un objeto JSON.")
+            funcion, argumentos = self.RUTAS_POST[ruta], (datos, self.max_lote)
+        else:
+            raise ErrorSolicitud(f"Ruta no encontrada: {ruta}", 404)
+
+        if self._en_espera >= self.max_en_espera:
+            raise ErrorSolicitud("Servicio saturado, intenta de nuevo más tarde.", 503)
+
+        self._en_espera += 1
+        try:
+            await self._semaforo.acquire()
+        finally:
+            self._en_espera -= 1
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, funcion, *argumentos)
+        finally:
+            self._semaforo.release()
+
+    async def _atender(self, reader, writer):
+        inicio = time.perf_counter()
+        ruta, codigo = "desconocida", 200
+        try:
+            solicitud = await self._leer_solicitud(reader)
+            if solicitud is None:
+                return
+            metodo, ruta, cuerpo = solicitud
+            respuesta = await self._despachar(metodo, ruta, cuerpo)
+        except ErrorSolicitud as e:
+            codigo, respuesta = e.codigo, {"error": str(e)}
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            codigo, respuesta = 400, {"error": f"Solicitud HTTP inválida: {e}"}
+        except Exception as e:
+            codigo, respuesta = 500, {"error": f"Error interno: {e}"}
+
+        contenido = json.dumps(_json_valido(respuesta), ensure_ascii=False, allow_nan=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {codigo} {MENSAJES_HTTP.get(codigo, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(contenido)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + contenido
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+            # Las rutas que no existen se cuentan juntas: una por URL dejaría crecer las métricas sin límite
+            if ruta not in self.RUTAS_GET and ruta not in self.RUTAS_POST:
+                ruta = "desconocida"
+            self.metricas.registrar(ruta, time.perf_counter() - inicio, error=codigo >= 400)
+
+
+async def _servir(host, puerto, max_concurrencia):
+    iniciar_vigilante()
+    servidor = ServidorAnaliticas(max_concurrencia=max_concurrencia)
+    puerto = await servidor.iniciar(host, puerto)
+    print(f"API de analíticas escuchando en http://{host}:{puerto}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await servidor.detener()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API HTTP de analíticas de portafolios")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8000)
+    parser.add_argument("--concurrencia", type=int, default=4)
+    argumentos = parser.parse_args()
+    try:
+        asyncio.run(_servir(argumentos.host, argumentos.puerto, argumentos.concurrencia))
+    except KeyboardInterrupt:
+        pass
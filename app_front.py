@@ -1,13 +1,20 @@
 # app_front.py
 import streamlit as st
-import json
-import glob
-from functions import (mostrar_proyeccion_crecimiento_ponderado, mostrar_proyeccion_geometrica, calcular_rendimiento_ytd, calcular_rendimiento_dividendos, calcular_dividendos_por_accion, calcular_rendimiento_volatilidad, obtener_datos_para_optimizar,optimizar_portafolio_agresivo,optimizar_portafolio_muy_agresivo,optimizar_portafolio_moderado,optimizar_portafolio_conservador,optimizar_portafolio_personalizado)
-import pandas as pd
+from functions import (mostrar_proyeccion_crecimiento_ponderado, mostrar_proyeccion_geometrica, calcular_rendimiento_ytd, calcular_rendimiento_dividendos, calcular_dividendos_por_accion, calcular_rendimiento_volatilidad, obtener_datos_para_optimizar, OPTIMIZADORES_POR_PERFIL, determinar_perfil, cargar_datos_fondo, listar_fondos)
+from cache_resultados import optimizar_con_cache, cache_metricas
+from manifiesto import version_datos
+from proyeccion import proyectar_flujos
+from metas import rendimiento_con_confianza, aportacion_requerida, monto_inicial_requerido, anos_requeridos, rendimiento_requerido
+from trayectoria_objetivo import calcular_trayectoria, proyectar_trayectoria
+from buscador_fondos import obtener_indice, METRICAS, REGIONES, CLASES, CLASE_POR_DEFECTO
+from covarianza import obtener_covarianza
+from editor_pesos import PortafolioIncremental
+from contribucion_riesgo import analizar_riesgo
+from metricas_referencia import REFERENCIAS, metricas_fondos, metricas_portafolios
+from reportes_clientes import preparar_reporte, renderizar_html, renderizar_pdf
+from vigilante_datos import iniciar_vigilante
+import memoria
 import re
-from datetime import datetime, timedelta
-import plotly.express as px
-import numpy as np
 
 ####### NORMALIZAR EL NOMBRE DE LOS ARCHIVOS QUE SE GUARDAN EN JSON #######
 def sanitize_filename(filename):
@@ -44,19 +51,22 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Función para cargar los fondos desde archivos JSON
-@st.cache_data
+# Función para cargar los fondos desde archivos JSON.
+# Solo lee el encabezado de cada archivo: los datos históricos se cargan hasta la pestaña de Resultados.
+# La lista se guarda por versión de los datos en la caché compartida (entre sesiones, reinicios y réplicas).
 def cargar_fondos():
-    fondos = []
-    for file in glob.glob("Data/*.json"):
-        with open(file, 'r') as f:
-            datos = json.load(f)
-            fondos.append({
-                "nombre": datos["nombre"],
-                "simbolo": datos["simbolo"],
-                "descripcion": datos["descripcion"]
-            })
-    return fondos
+    return cache_metricas.obtener_o_calcular(("fondos", (), version_datos()), listar_fondos)
+
+# Invalidar las cachés de los fondos que reescriba el descargador, sin reiniciar el servidor
+iniciar_vigilante()
+
+def id_sesion():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    contexto = get_script_run_ctx()
+    return contexto.session_id if contexto is not None else "local"
+
+# Las mediciones de memoria de esta ejecución se suman a los totales de la sesión
+memoria.iniciar_sesion(id_sesion())
 
 # Cargar los fondos disponibles
 fondos_disponibles = cargar_fondos()
@@ -95,17 +105,55 @@ with tab1:
     unsafe_allow_html=True
     )
 
+    # Plan de ahorro: aportaciones periódicas y retiros después del plan
+    aportacion_mensual = st.sidebar.number_input("Aportación mensual (MXN)", min_value=0, max_value=1000000, value=0, step=500)
+    crecimiento_aportacion = st.sidebar.number_input("Crecimiento anual de la aportación (%)", min_value=0.0, max_value=20.0, value=0.0, step=0.5)
+    with st.sidebar.expander("Retiros después del plan de ahorro"):
+        retiro_mensual = st.number_input("Retiro mensual (MXN)", min_value=0, max_value=1000000, value=0, step=500)
+        anos_retiro = st.number_input("Años de retiro", min_value=0, max_value=50, value=0, step=1)
+        crecimiento_retiro = st.number_input("Crecimiento anual del retiro (%)", min_value=0.0, max_value=20.0, value=0.0, step=0.5)
+
+    # Buscador por métricas (opcional: calcularlas requiere cargar los históricos de todos los fondos)
+    with st.sidebar.expander("Buscador de fondos"):
+        if st.checkbox("Filtrar y ordenar fondos por métricas"):
+            indice = obtener_indice()
+            regiones = st.multiselect("Región", [e for e in REGIONES if e in indice.etiquetas])
+            clases = st.multiselect("Clase de activo", [e for e in list(CLASES) + [CLASE_POR_DEFECTO] if e in indice.etiquetas])
+            rendimiento_minimo = st.number_input("Rendimiento anualizado mínimo (%)", value=None, step=1.0)
+            volatilidad_maxima = st.number_input("Volatilidad anualizada máxima (%)", min_value=0.0, value=None, step=1.0)
+            caida_maxima = st.number_input("Máxima caída permitida (%)", min_value=0.0, max_value=100.0, value=None, step=5.0)
+            ordenar_por = st.selectbox("Ordenar por", list(METRICAS), format_func=METRICAS.get)
+            limite = st.number_input("Número de fondos", min_value=1, max_value=len(indice), value=min(10, len(indice)))
+
+            # Solo se filtra por las métricas que el usuario llenó
+            rangos = {metrica: rango for metrica, rango in (("rendimiento", (rendimiento_minimo, None)),
+                                                            ("volatilidad", (None, volatilidad_maxima)),
+                                                            ("max_drawdown", (None, caida_maxima)))
+                      if any(valor is not None for valor in rango)}
+            encontrados = indice.filtrar(
+                rangos=rangos,
+                regiones=regiones, clases=clases, ordenar_por=ordenar_por,
+                descendente=ordenar_por not in ("volatilidad", "max_drawdown"), limite=int(limite)
+            )
+            st.dataframe([{"Fondo": f["nombre"], METRICAS[ordenar_por]: f[ordenar_por]} for f in encontrados], hide_index=True)
+            st.button("Usar estos fondos", disabled=not encontrados,
+                      on_click=lambda: st.session_state.update(fondos_seleccionados=[f["nombre"] for f in encontrados]))
+
+    # Búsqueda directa por nombre, sin recorrer la lista de fondos en cada opción
+    fondos_por_nombre = {fondo["nombre"]: fondo for fondo in fondos_disponibles}
+
     fondos_seleccionados = st.sidebar.multiselect(
         "Selecciona los Fondos de Inversión", 
-        options=[fondo["nombre"] for fondo in fondos_disponibles],
-        format_func=lambda x: f"{x} ({next(f['simbolo'] for f in fondos_disponibles if f['nombre'] == x)})"
+        options=list(fondos_por_nombre),
+        format_func=lambda x: f"{x} ({fondos_por_nombre[x]['simbolo']})",
+        key="fondos_seleccionados"
     )
 
     # Mostrar información de los fondos seleccionados
     if fondos_seleccionados:
         st.sidebar.subheader("Descripción de los Fondos Seleccionados")
         for fondo_nombre in fondos_seleccionados:
-            fondo_info = next((f for f in fondos_disponibles if f["nombre"] == fondo_nombre), None)
+            fondo_info = fondos_por_nombre.get(fondo_nombre)
             if fondo_info:
                 st.sidebar.write(f"**{fondo_info['nombre']}**")
                 st.sidebar.write(f"*{fondo_info['descripcion']}*")
@@ -194,19 +242,9 @@ with tab1:
                     st.session_state.pregunta_actual += 1
                 else:
                     # Calcular el puntaje total y determinar el perfil
-                    puntaje_total = sum(st.session_state.respuestas)
-                    if 8 <= puntaje_total <= 14:
-                        st.session_state.perfil = "Conservador"
-                        st.session_state.descripcion = "Buscas estabilidad y seguridad. Prefieres evitar pérdidas, incluso a costa de menores rendimientos."
-                    elif 15 <= puntaje_total <= 20:
-                        st.session_state.perfil = "Moderado"
-                        st.session_state.descripcion = "Toleras algo de riesgo para lograr rendimientos superiores, pero priorizas la protección del capital."
-                    elif 21 <= puntaje_total <= 26:
-                        st.session_state.perfil = "Agresivo"
-                        st.session_state.descripcion = "Dispuesto a asumir riesgos significativos para maximizar tus rendimientos."
-                    else:
-                        st.session_state.perfil = "Muy Agresivo"
-                        st.session_state.descripcion = "Alta tolerancia al riesgo, enfocado en maximizar ganancias con alta volatilidad."
+                    perfil, descripcion, _ = determinar_perfil(st.session_state.respuestas)
+                    st.session_state.perfil = perfil
+                    st.session_state.descripcion = descripcion
 
                     # Mostrar un mensaje de éxito
                     st.success(f"Cuestionario completado. Tu perfil es: **{st.session_state.perfil}**. Dirígete a la sección de Resultados para continuar con la elaboración de tu portafolio")
@@ -216,9 +254,72 @@ with tab1:
                     st.session_state.respuestas = [None] * len(preguntas)
 
 
+################## --- Editor de pesos --- ###########################
+# Fragmento: cada edición de la tabla vuelve a ejecutar solo esta función y no toda la
+# pestaña de Resultados (optimizador, métricas de referencia, reporte y simulaciones).
+@st.fragment
+def mostrar_editor_pesos(df_resultados, seleccionados, pesos, covarianza, rendimiento, riesgo, monto_inicial, anos_inversion,
+                         aportacion_mensual, crecimiento_aportacion):
+    with st.expander("Ajustar los pesos manualmente"):
+        simbolos_portafolio = [fondo["simbolo"] for fondo in seleccionados]
+        clave_editor = (tuple(simbolos_portafolio), tuple(pesos), covarianza.clave if covarianza else None)
+        if st.session_state.get("clave_editor") != clave_editor:
+            st.session_state.clave_editor = clave_editor
+            st.session_state.editor_pesos = PortafolioIncremental(
+                simbolos_portafolio,
+                [fondo["rendimiento"] / 100 for fondo in seleccionados],
+                covarianza.submatriz(simbolos_portafolio) if covarianza else [fondo["volatilidad"] / 100 for fondo in seleccionados],
+                pesos
+            )
+        portafolio = st.session_state.editor_pesos
+
+        df_editado = st.data_editor(
+            df_resultados[['Fondo', 'Peso (%)']],
+            disabled=['Fondo'], hide_index=True,
+            column_config={'Peso (%)': st.column_config.NumberColumn(min_value=0.0, max_value=100.0, step=0.5, format="%.2f")},
+            key=f"tabla_pesos_{abs(hash(clave_editor))}"
+        )
+        portafolio.cambiar_pesos(df_editado['Peso (%)'].fillna(0).to_numpy() / 100)
+
+        if abs(portafolio.suma_pesos - 1) > 1e-6:
+            st.caption(f"Los pesos suman {portafolio.suma_pesos * 100:.2f}%; las métricas usan los pesos normalizados a 100%.")
+        col_rendimiento, col_volatilidad, col_var = st.columns(3)
+        col_rendimiento.metric("Rendimiento", f"{portafolio.rendimiento() * 100:.2f}%",
+                               f"{(portafolio.rendimiento() * 100 - rendimiento):+.2f} pts")
+        col_volatilidad.metric("Volatilidad", f"{portafolio.volatilidad() * 100:.2f}%",
+                               f"{(portafolio.volatilidad() * 100 - riesgo):+.2f} pts", delta_color="inverse")
+        col_var.metric("VaR 95% a 1 año", f"${portafolio.var(monto_inicial):,.0f} MXN")
+        saldos_editados = portafolio.proyeccion(monto_inicial, anos_inversion, aportacion_mensual,
+                                                crecimiento_aportacion / 100)
+        st.write(f"Saldo proyectado al retiro con estos pesos: **${saldos_editados[-1]:,.0f} MXN**")
+
+
+################## --- Trayectoria de retiro --- ###########################
+# Las 2000 simulaciones tardan ~100 ms: se guardan por fondos, perfil, horizonte y plan para
+# no repetirlas en cada ejecución de la pestaña. La covarianza entra a la clave por su `clave`.
+@st.cache_data(max_entries=256, show_spinner=False)
+def calcular_trayectoria_retiro(fondos_data, perfil, anos_inversion, anos_transicion, monto_inicial, plan, clave_covarianza,
+                                _covarianza):
+    import numpy as np
+
+    pesos_trayectoria = calcular_trayectoria(fondos_data, perfil, anos_inversion, anos_transicion)
+    if not np.allclose(pesos_trayectoria.sum(axis=1), 1):
+        return pesos_trayectoria, None
+    trayectoria = proyectar_trayectoria(
+        pesos_trayectoria, fondos_data, monto_inicial, anos_inversion, simulaciones=2000, semilla=0,
+        covarianza=_covarianza.submatriz([f["simbolo"] for f in fondos_data]) if _covarianza else None, **plan
+    )
+    return pesos_trayectoria, trayectoria
+
+
 ############################# --- Tab 2: Resultados --- ##################################
 with tab2:
     if "perfil" in st.session_state and st.session_state.perfil:
+        # Dependencias pesadas que solo necesita esta pestaña
+        import numpy as np
+        import pandas as pd
+        import plotly.express as px
+
         st.header("Resultados de la Simulación 📊")
         st.markdown(f"Tu Perfil de Inversión es: **{st.session_state.perfil}**")
         st.write(f"Descripción: *{st.session_state.descripcion}*")
@@ -226,16 +327,14 @@ with tab2:
         datos_fondos=[]
 
         for fondo in fondos_seleccionados:
-            fondo_info = next((f for f in fondos_disponibles if f["nombre"] == fondo), None)
+            fondo_info = fondos_por_nombre.get(fondo)
             if not fondo_info:
                 st.write(f"No se encontraron datos para el fondo: {fondo}")
                 continue
 
             # Obtener datos históricos
-            archivo_fondo = obtener_nombre_archivo(fondo_info)
             try:
-                with open(f"Data/{archivo_fondo}", 'r') as f:
-                    datos_historicos = json.load(f)["datos_historicos"]
+                datos_historicos = cargar_datos_fondo(fondo_info["simbolo"])["datos_historicos"]
             except FileNotFoundError:
                 st.write(f"Archivo de datos no encontrado para el fondo: {fondo}")
                 continue
@@ -267,21 +366,19 @@ with tab2:
         nombres_fondos, rendimientos, volatilidades = [], [], []
 
         for fondo in fondos_seleccionados:
-            fondo_info = next((f for f in fondos_disponibles if f["nombre"] == fondo), None)
-            archivo_fondo = obtener_nombre_archivo(fondo_info)
+            fondo_info = fondos_por_nombre.get(fondo)
             try:
-                with open(f"Data/{archivo_fondo}", 'r') as f:
-                    data = json.load(f)
-                    datos_historicos = data.get("datos_historicos", [])
-                    if not datos_historicos:
-                        st.write(f"El fondo {fondo['nombre']} no tiene datos históricos.")
-                        continue
-
-                    # Calcular rendimiento y volatilidad
-                    rendimiento, volatilidad = calcular_rendimiento_volatilidad(datos_historicos, periodo="5y")
-                    nombres_fondos.append(fondo_info["nombre"])
-                    rendimientos.append(rendimiento)
-                    volatilidades.append(volatilidad)
+                data = cargar_datos_fondo(fondo_info["simbolo"])
+                datos_historicos = data.get("datos_historicos", [])
+                if not datos_historicos:
+                    st.write(f"El fondo {fondo['nombre']} no tiene datos históricos.")
+                    continue
+
+                # Calcular rendimiento y volatilidad
+                rendimiento, volatilidad = calcular_rendimiento_volatilidad(datos_historicos, periodo="5y")
+                nombres_fondos.append(fondo_info["nombre"])
+                rendimientos.append(rendimiento)
+                volatilidades.append(volatilidad)
             except Exception as e:
                 st.write(f"Error al procesar {fondo['nombre']}: {e}")
 
@@ -307,25 +404,24 @@ with tab2:
         fondos_data = []
 
         for fondo in fondos_seleccionados:
-            fondo_info = next((f for f in fondos_disponibles if f["nombre"] == fondo), None)
-            archivo_fondo = obtener_nombre_archivo(fondo_info)
+            fondo_info = fondos_por_nombre.get(fondo)
             try:
-                with open(f"Data/{archivo_fondo}", 'r') as f:
-                    data = json.load(f)
-                    datos_historicos = data.get("datos_historicos", [])
-                    if not datos_historicos:
-                        st.write(f"El fondo {fondo} no tiene datos históricos.")
-                        continue
-
-                    # Calcular rendimiento y volatilidad
-                    rendimiento, volatilidad = calcular_rendimiento_volatilidad(datos_historicos, periodo="5y")
+                data = cargar_datos_fondo(fondo_info["simbolo"])
+                datos_historicos = data.get("datos_historicos", [])
+                if not datos_historicos:
+                    st.write(f"El fondo {fondo} no tiene datos históricos.")
+                    continue
+
+                # Calcular rendimiento y volatilidad
+                rendimiento, volatilidad = calcular_rendimiento_volatilidad(datos_historicos, periodo="5y")
                     
-                    # Guardar los datos necesarios para optimización
-                    fondos_data.append({
-                        "nombre": fondo,
-                        "rendimiento": rendimiento,
-                        "volatilidad": volatilidad
-                    })
+                # Guardar los datos necesarios para optimización
+                fondos_data.append({
+                    "nombre": fondo,
+                    "simbolo": fondo_info["simbolo"],
+                    "rendimiento": rendimiento,
+                    "volatilidad": volatilidad
+                })
             except Exception as e:
                 st.write(f"Error al procesar {fondo}: {e}")
 
@@ -342,26 +438,38 @@ with tab2:
             value=True
         )
 
-        # Decidir la función de optimización según el valor de incluir_todos
+        # Estimador de covarianza para la volatilidad del portafolio (por defecto sin correlaciones)
+        estimadores = {
+            None: "Sin correlaciones entre fondos",
+            "ledoit_wolf": "Ledoit-Wolf (estable con historiales cortos)",
+            "ewma": "Promedio exponencial (pondera más lo reciente)",
+            "muestral": "Covarianza muestral",
+            "factores": "Modelo de factores (componentes principales del universo)",
+        }
+        estimador = st.selectbox("Cálculo del riesgo del portafolio", list(estimadores), format_func=estimadores.get)
+        covarianza = None
+        if estimador and st.session_state.fondos_data:
+            vida_media = st.number_input("Vida media (días)", min_value=5, max_value=750, value=60, step=5) if estimador == "ewma" else 60
+            n_factores = st.number_input("Número de factores", min_value=1, max_value=15, value=5, step=1) if estimador == "factores" else 5
+            covarianza = obtener_covarianza([f["simbolo"] for f in st.session_state.fondos_data], metodo=estimador,
+                                            vida_media=vida_media, n_factores=n_factores)
+            if estimador == "factores":
+                st.caption(f"Los {covarianza.n_factores} factores explican el "
+                           f"{covarianza.varianza_explicada.sum() * 100:.0f}% de la varianza del universo.")
+
+        # Decidir la función de optimización según el valor de incluir_todos.
+        # Los resultados se comparten entre sesiones mediante la caché de optimización.
+        seleccionados, pesos, rendimiento, riesgo = None, None, None, None
         if incluir_todos:
             # Llamar a la optimización flexible que incluye todos los fondos seleccionados
             if "fondos_data" not in st.session_state or not st.session_state.fondos_data:
                 st.error("No se encontraron datos para optimizar. Verifica que seleccionaste fondos y calculaste las métricas.")
             else:
-                seleccionados, pesos, rendimiento, riesgo = optimizar_portafolio_personalizado()
+                seleccionados, pesos, rendimiento, riesgo = optimizar_con_cache("Personalizado", st.session_state.fondos_data, covarianza=covarianza)
 
-        else:
+        elif st.session_state.perfil in OPTIMIZADORES_POR_PERFIL:
             # Llamar a la optimización según el perfil del cliente
-            if st.session_state.perfil == "Conservador":
-                seleccionados, pesos, rendimiento, riesgo = optimizar_portafolio_conservador()
-            elif st.session_state.perfil == "Moderado":
-                seleccionados, pesos, rendimiento, riesgo = optimizar_portafolio_moderado()
-            elif st.session_state.perfil == "Agresivo":
-                seleccionados, pesos, rendimiento, riesgo = optimizar_portafolio_agresivo()
-            elif st.session_state.perfil == "Muy Agresivo":
-                seleccionados, pesos, rendimiento, riesgo = optimizar_portafolio_muy_agresivo()
-            else:
-                seleccionados, pesos, rendimiento, riesgo = None, None, None, None
+            seleccionados, pesos, rendimiento, riesgo = optimizar_con_cache(st.session_state.perfil, st.session_state.fondos_data, covarianza=covarianza)
 
         # Mostrar resultados si la optimización fue exitosa
         if seleccionados and pesos:
@@ -373,6 +481,16 @@ with tab2:
                 'Peso (%)': [peso * 100 for peso in pesos]
             })
 
+            # Qué fondo aporta más riesgo: contribución de cada fondo a la volatilidad del portafolio
+            simbolos_resultado = [fondo["simbolo"] for fondo in seleccionados]
+            analisis_riesgo = analizar_riesgo(
+                pesos,
+                covarianza.submatriz(simbolos_resultado) * 100 ** 2 if covarianza else [fondo["volatilidad"] for fondo in seleccionados],
+                [fondo["rendimiento"] for fondo in seleccionados]
+            )
+            df_resultados['Contribución al Riesgo (%)'] = analisis_riesgo["contribucion_porcentual"][0] * 100
+            df_resultados['Riesgo Marginal'] = analisis_riesgo["contribucion_marginal"][0]
+
             # Mostrar la tabla con los resultados
             st.write("### Portafolio Optimizado")
             st.write(df_resultados)
@@ -380,51 +498,207 @@ with tab2:
             # Mostrar el rendimiento y riesgo total del portafolio
             st.write(f"**Rendimiento Total del Portafolio:** {rendimiento :.2f}%")
             st.write(f"**Volatilidad Total del Portafolio:** {riesgo :.2f}%")
+            st.write(f"**Razón de Diversificación:** {analisis_riesgo['razon_diversificacion'][0]:.2f} "
+                     "(volatilidad promedio ponderada de los fondos entre la volatilidad del portafolio)")
+
+            # Métricas relativas a un índice de referencia del universo (en caché por referencia y versión de datos)
+            simbolos_universo = {fondo["simbolo"] for fondo in fondos_disponibles}
+            referencias = [simbolo for simbolo in REFERENCIAS if simbolo in simbolos_universo]
+            if referencias:
+                referencia = st.selectbox("Índice de referencia", referencias)
+                relativas = metricas_portafolios(simbolos_resultado, pesos, referencia)[0]
+                por_fondo = metricas_fondos(referencia)
+                df_resultados['Beta'] = [por_fondo.get(simbolo, {}).get("beta") for simbolo in simbolos_resultado]
+                df_resultados['Tracking Error (%)'] = [por_fondo.get(simbolo, {}).get("tracking_error") for simbolo in simbolos_resultado]
+                st.write(f"### Comparación contra {referencia}")
+                st.write(df_resultados[['Fondo', 'Beta', 'Tracking Error (%)']])
+                if relativas["beta"] is None:
+                    st.caption("No hay fechas comunes suficientes con el índice de referencia para el portafolio.")
+                else:
+                    col_beta, col_alfa, col_te, col_ir = st.columns(4)
+                    col_beta.metric("Beta", f"{relativas['beta']:.2f}")
+                    col_alfa.metric("Alfa anual", f"{relativas['alfa']:.2f}%")
+                    col_te.metric("Tracking error", f"{relativas['tracking_error']:.2f}%")
+                    col_ir.metric("Information ratio", "-" if relativas["information_ratio"] is None else f"{relativas['information_ratio']:.2f}")
+                    st.write(f"**Captura alcista / bajista:** {relativas['captura_alcista']:.0f}% / {relativas['captura_bajista']:.0f}%")
 
             # Graficar la distribución de los pesos
             st.write("### Distribución del Portafolio")
             st.bar_chart(df_resultados.set_index('Fondo')['Peso (%)'])
+
+            # Editor de pesos: cada edición actualiza las métricas de forma incremental
+            mostrar_editor_pesos(df_resultados, seleccionados, pesos, covarianza, rendimiento, riesgo, monto_inicial,
+                                 edad_retiro - edad_actual, aportacion_mensual, crecimiento_aportacion)
         else:
             st.error("No se pudieron obtener métricas suficientes para optimizar el portafolio.")
 
-        def calcular_proyeccion_inversion(monto_inicial, rendimiento, anos_inversion):
-            """
-            Calcula el valor futuro de una inversión utilizando el gradiente geométrico (crecimiento compuesto).
-            
-            Args:
-                monto_inicial: Monto inicial de la inversión.
-                rendimiento: Rendimiento anualizado de la inversión (como un decimal).
-                anos_inversion: Número de años para proyectar la inversión.
-            
-            Returns:
-                float: Valor proyectado de la inversión.
-            """
-            return monto_inicial * (1 + rendimiento) ** anos_inversion
-
-                # Calcular los años hasta el retiro
+        # Calcular los años hasta el retiro
         anos_inversion = edad_retiro - edad_actual
 
         # Verifica si el rendimiento anualizado está disponible
         if rendimiento:
-            # Calcular la proyección del crecimiento de la inversión
-            valor_proyectado = calcular_proyeccion_inversion(monto_inicial, rendimiento / 100, anos_inversion)
+            # Calcular la proyección del plan de ahorro (monto inicial, aportaciones y retiros)
+            plan = proyectar_flujos(
+                monto_inicial, rendimiento / 100, anos_inversion,
+                aportacion_mensual=aportacion_mensual,
+                crecimiento_aportacion=crecimiento_aportacion / 100,
+                retiro_mensual=retiro_mensual,
+                anos_retiro=anos_retiro,
+                crecimiento_retiro=crecimiento_retiro / 100
+            )
+            valor_proyectado = plan["saldo_al_retiro"][0]
             
             # Mostrar la proyección en la interfaz de usuario
             st.subheader(f"Proyección de Crecimiento de tu Inversión hasta los {edad_retiro} años")
-            st.write(f"Con un rendimiento anualizado del **{rendimiento:.2f}%**, tu inversión de **${monto_inicial:,.0f} MXN** crecería a:")
+            if aportacion_mensual:
+                st.write(f"Con un rendimiento anualizado del **{rendimiento:.2f}%**, tu inversión de **${monto_inicial:,.0f} MXN** más aportaciones mensuales de **${aportacion_mensual:,.0f} MXN** crecería a:")
+            else:
+                st.write(f"Con un rendimiento anualizado del **{rendimiento:.2f}%**, tu inversión de **${monto_inicial:,.0f} MXN** crecería a:")
             st.write(f"**${valor_proyectado:,.0f} MXN** después de **{anos_inversion} años**.^^")
+            if aportacion_mensual:
+                st.write(f"En total habrás aportado **${plan['total_aportado'][0]:,.0f} MXN**.")
+            if retiro_mensual and anos_retiro:
+                if plan["mes_agotado"][0] >= 0:
+                    anos_cubiertos = (plan["mes_agotado"][0] - 12 * anos_inversion) / 12
+                    st.warning(f"Con retiros de ${retiro_mensual:,.0f} MXN al mes, tu saldo se agotaría después de **{anos_cubiertos:.1f} años** de retiro.")
+                else:
+                    st.write(f"Con retiros de ${retiro_mensual:,.0f} MXN al mes durante {anos_retiro} años, te quedarían **${plan['saldo_final'][0]:,.0f} MXN**.")
             st.markdown("*^^Este calculo es el resultado de utilizar el gradiente geométrico basado en el desempeño histórico de los fondos que forman parte del portafolio. Esta proyección no tiene rendimientos garantizados, sin embargo es un cálculo para estimar el crecimiento aproximado de tu capital.*")
 
             # Graficar la proyección de crecimiento año a año
-            anos = list(range(anos_inversion + 1))
-            valores_proyeccion = [calcular_proyeccion_inversion(monto_inicial, rendimiento / 100, i) for i in anos]
+            valores_proyeccion = plan["saldos_anuales"][0]
 
             st.subheader("Gráfica de Proyección del Crecimiento de la Inversión")
             st.line_chart(valores_proyeccion)
+
+            # Reporte descargable con el perfil, las métricas, los pesos y la proyección de esta pestaña
+            cliente = {
+                "nombre": nombre, "edad_actual": edad_actual, "edad_retiro": edad_retiro, "monto_inicial": monto_inicial,
+                "aportacion_mensual": aportacion_mensual, "crecimiento_aportacion": crecimiento_aportacion,
+                "retiro_mensual": retiro_mensual, "anos_retiro": anos_retiro, "crecimiento_retiro": crecimiento_retiro,
+                "perfil": st.session_state.perfil, "simbolos": [f["simbolo"] for f in st.session_state.fondos_data],
+                "misma_ponderacion": incluir_todos,
+                **({"covarianza": estimador, "vida_media": vida_media, "n_factores": n_factores} if covarianza else {})
+            }
+            # El reporte se genera solo al pedirlo y se guarda en la sesión mientras no cambien
+            # los datos del cliente, así mover un control no vuelve a renderizar el HTML y el PDF
+            clave_reporte = (repr(sorted(cliente.items())), version_datos())
+            reporte = st.session_state.get("reporte")
+            if reporte is None or reporte["clave"] != clave_reporte:
+                reporte = None
+                if st.button("Preparar reporte descargable"):
+                    try:
+                        contenido_reporte = preparar_reporte(cliente)
+                        reporte = {"clave": clave_reporte,
+                                   "html": renderizar_html(contenido_reporte, plotly_js="cdn"),
+                                   "pdf": renderizar_pdf(contenido_reporte)}
+                        st.session_state.reporte = reporte
+                    except ValueError as e:
+                        st.caption(f"No se pudo generar el reporte: {e}")
+            if reporte is not None:
+                archivo_reporte = f"reporte_{sanitize_filename(nombre or 'cliente')}"
+                col_html, col_pdf = st.columns(2)
+                col_html.download_button("Descargar reporte (HTML)", reporte["html"],
+                                         file_name=f"{archivo_reporte}.html", mime="text/html")
+                col_pdf.download_button("Descargar reporte (PDF)", reporte["pdf"],
+                                        file_name=f"{archivo_reporte}.pdf", mime="application/pdf")
+
+            # Solucionador de metas: qué hace falta para llegar a un monto objetivo
+            with st.expander("¿Cuánto necesito para llegar a mi meta?"):
+                meta = st.number_input("Monto objetivo al retiro (MXN)", min_value=0, value=5000000, step=50000)
+                confianza = st.slider("Probabilidad de alcanzar la meta (%)", min_value=50, max_value=95, value=50, step=5)
+
+                tasa_meta = float(rendimiento_con_confianza(rendimiento / 100, riesgo / 100, anos_inversion, confianza / 100))
+                aportacion_meta = aportacion_requerida(meta, monto_inicial, tasa_meta, anos_inversion, crecimiento_aportacion / 100)[0]
+                monto_meta = monto_inicial_requerido(meta, tasa_meta, anos_inversion, aportacion_mensual, crecimiento_aportacion / 100)[0]
+                anos_meta = anos_requeridos(meta, monto_inicial, tasa_meta, aportacion_mensual, crecimiento_aportacion / 100,
+                                            max_anos=100 - edad_actual)[0]
+                tasa_requerida = rendimiento_requerido(meta, monto_inicial, anos_inversion, aportacion_mensual, crecimiento_aportacion / 100)[0]
+
+                st.write(f"Rendimiento anual considerado: **{tasa_meta * 100:.2f}%** ({confianza}% de probabilidad de obtener al menos este rendimiento).")
+                st.write(f"- Aportación mensual necesaria con tu monto inicial: **${aportacion_meta:,.0f} MXN**")
+                st.write(f"- Monto inicial necesario con tu aportación mensual actual: **${monto_meta:,.0f} MXN**")
+                if anos_meta >= 0:
+                    st.write(f"- Con tu plan actual llegarías a la meta a los **{edad_actual + anos_meta} años** de edad.")
+                else:
+                    st.write("- Con tu plan actual no llegarías a la meta antes de los 100 años.")
+                if np.isnan(tasa_requerida):
+                    st.write("- Ningún rendimiento razonable alcanza la meta con tu plan actual.")
+                else:
+                    st.write(f"- Rendimiento anual necesario con tu plan actual: **{tasa_requerida * 100:.2f}%**")
+
+            # Trayectoria de retiro: del portafolio del perfil al Conservador conforme se acerca el retiro
+            with st.expander("Trayectoria de retiro (reducir el riesgo conforme se acerca el retiro)"):
+                anos_transicion = anos_inversion
+                if anos_inversion > 1:
+                    anos_transicion = st.slider("Años antes del retiro en los que se reduce el riesgo", min_value=1,
+                                                max_value=anos_inversion, value=anos_inversion)
+                plan_retiro = {
+                    "aportacion_mensual": aportacion_mensual,
+                    "crecimiento_aportacion": crecimiento_aportacion / 100,
+                    "retiro_mensual": retiro_mensual,
+                    "anos_retiro": anos_retiro,
+                    "crecimiento_retiro": crecimiento_retiro / 100,
+                }
+                pesos_trayectoria, trayectoria = calcular_trayectoria_retiro(
+                    st.session_state.fondos_data, st.session_state.perfil, anos_inversion, anos_transicion, monto_inicial,
+                    plan_retiro, covarianza.clave if covarianza else None, covarianza)
+                if trayectoria is None:
+                    st.write("No hay fondos suficientes para construir la trayectoria con tu selección.")
+                else:
+                    st.write(f"Rendimiento esperado: **{trayectoria['rendimientos'][0] * 100:.2f}%** el primer año y "
+                             f"**{trayectoria['rendimientos'][-1] * 100:.2f}%** el último año antes del retiro.")
+                    st.write(f"Saldo proyectado al retiro: **${trayectoria['determinista'][anos_inversion]:,.0f} MXN** "
+                             f"(entre ${trayectoria['percentiles'][10][anos_inversion]:,.0f} y "
+                             f"${trayectoria['percentiles'][90][anos_inversion]:,.0f} MXN en 8 de cada 10 escenarios simulados).")
+                    if retiro_mensual and anos_retiro:
+                        st.write(f"Probabilidad de agotar el saldo durante el retiro: **{trayectoria['probabilidad_agotar'] * 100:.1f}%**")
+
+                    df_pesos = pd.DataFrame(pesos_trayectoria * 100, columns=[f["nombre"] for f in st.session_state.fondos_data],
+                                            index=pd.Index(edad_actual + np.arange(anos_inversion), name="Edad"))
+                    st.area_chart(df_pesos.loc[:, df_pesos.any()])
+                    st.line_chart(pd.DataFrame({
+                        "Escenario pesimista (p10)": trayectoria["percentiles"][10],
+                        "Mediana (p50)": trayectoria["percentiles"][50],
+                        "Escenario optimista (p90)": trayectoria["percentiles"][90],
+                    }, index=pd.Index(edad_actual + np.arange(len(trayectoria["determinista"])), name="Edad")))
         else:
             st.error("No se pudo calcular el rendimiento anualizado. Asegúrate de que todos los fondos seleccionados tengan datos históricos suficientes.")
 
 
-
-
-                
+################## --- Panel de depuración de memoria --- ###########################
+# Solo aparece con MEMORIA_INSTRUMENTAR o MEMORIA_MAX_MB (ver `memoria.py`). Va al final
+# del script para que incluya lo que midió esta ejecución.
+def mostrar_panel_memoria():
+    import pandas as pd
+
+    estado = memoria.resumen()
+    sesion = memoria.resumen_sesion()
+    with st.sidebar.expander("Depuración: memoria"):
+        st.metric("RSS del proceso", f"{estado['rss_mb']:.0f} MB",
+                  help=f"Presupuesto: {estado['presupuesto_mb']:.0f} MB" if estado["presupuesto_mb"] else "Sin presupuesto")
+        if estado["presupuesto_mb"]:
+            st.caption(f"Presupuesto excedido {estado['presupuesto']['excedido']} veces, "
+                       f"{estado['presupuesto']['desalojos']} entradas desalojadas.")
+        if sesion:
+            st.caption(f"Esta sesión: {sesion['ejecuciones']} ejecuciones; la actual midió "
+                       f"{sesion['ejecucion']['llamadas']} llamadas con RSS {sesion['ejecucion']['rss_mb']:+.1f} MB y "
+                       f"{sesion['ejecucion']['asignado_bytes'] / 2 ** 20:+.1f} MB asignados "
+                       f"(total de la sesión: {sesion['total']['asignado_bytes'] / 2 ** 20:+.1f} MB).")
+        if estado["mediciones"]:
+            st.dataframe(pd.DataFrame([
+                {"Función": etiqueta, "Llamadas": t["llamadas"], "ms promedio": t["segundos"] * 1000 / t["llamadas"],
+                 "RSS (MB)": t["rss_mb"], "Asignado (MB)": t["asignado_bytes"] / 2 ** 20,
+                 "Máx. por llamada (MB)": t["max_asignado_bytes"] / 2 ** 20}
+                for etiqueta, t in estado["mediciones"].items()
+            ]).sort_values("RSS (MB)", ascending=False), hide_index=True)
+        st.caption(f"{len(estado['sesiones'])} sesiones con mediciones en este proceso.")
+        if "tracemalloc" in estado:
+            st.caption(f"tracemalloc: {estado['tracemalloc']['actual_mb']:.1f} MB vivos, "
+                       f"pico {estado['tracemalloc']['pico_mb']:.1f} MB")
+            st.dataframe(pd.DataFrame(memoria.principales_asignaciones(10), columns=["Línea", "MB", "Bloques"]),
+                         hide_index=True)
+
+
+if memoria.instrumentacion_activa() or memoria.presupuesto_mb():
+    mostrar_panel_memoria()
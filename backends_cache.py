@@ -0,0 +1,259 @@
+# backends_cache.py
+"""
+Almacenamientos compartidos para `CacheResultados`.
+
+La caché en memoria de cada proceso se pierde al reiniciar y no la ven las demás réplicas
+de la app. Un backend guarda además cada resultado (serializado con pickle) en un lugar
+que sí comparten: archivos en disco, una base SQLite o un servidor compatible con Redis.
+Así una réplica nueva encuentra ya calculados los paneles, métricas y optimizaciones de
+la versión vigente de los datos.
+
+Todos los backends reciben claves de texto "<espacio>/<version>/<resumen>", de modo que
+los resultados de versiones viejas se pueden purgar sin deserializarlos (`purgar`), y
+recuerdan cuándo se escribió cada resultado para borrar los que pasaron su tiempo de vida
+(`purgar_vencidos`; Redis los hace caducar por su cuenta). Los errores del
+almacenamiento (disco lleno, servidor caído) no interrumpen la app: se cuentan en
+`errores` y la consulta se trata como fallo.
+
+Se elige con la variable de entorno CACHE_BACKEND:
+- sin definir o "memoria": solo memoria del proceso.
+- "sqlite:///ruta/cache.db": base SQLite (varias réplicas en el mismo host o volumen).
+- "redis://host:6379/0": servidor Redis o compatible (requiere el paquete `redis`).
+- cualquier otra cosa: carpeta donde guardar un archivo por resultado.
+"""
+import os
+import time
+import sqlite3
+import threading
+
+
+class BackendDirectorio:
+    """
+    Un archivo .pkl por resultado dentro de una carpeta.
+    """
+
+    nombre = "directorio"
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self.errores = 0
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, clave.replace("/", "_") + ".pkl")
+
+    def leer(self, clave):
+        try:
+            with open(self._ruta(clave), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError:
+            self.errores += 1
+            return None
+
+    def escribir(self, clave, datos, ttl_segundos=None):
+        ruta = self._ruta(clave)
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporal, 'wb') as f:
+                f.write(datos)
+            os.replace(temporal, ruta)
+        except OSError:
+            self.errores += 1
+
+    def borrar(self, clave):
+        try:
+            os.remove(self._ruta(clave))
+        except OSError:
+            pass
+
+    def purgar(self, espacio, version_vigente=None):
+        vigente = f"{espacio}_{version_vigente}_"
+        for archivo in os.listdir(self.directorio):
+            if archivo.startswith(f"{espacio}_") and archivo.endswith(".pkl") and \
+                    (version_vigente is None or not archivo.startswith(vigente)):
+                try:
+                    os.remove(os.path.join(self.directorio, archivo))
+                except FileNotFoundError:
+                    pass
+
+    def purgar_vencidos(self, espacio, ttl_segundos):
+        # La fecha de modificación de cada archivo es el momento en que se escribió
+        limite = time.time() - ttl_segundos
+        for archivo in os.listdir(self.directorio):
+            if archivo.startswith(f"{espacio}_") and archivo.endswith(".pkl"):
+                ruta = os.path.join(self.directorio, archivo)
+                try:
+                    if os.stat(ruta).st_mtime < limite:
+                        os.remove(ruta)
+                except FileNotFoundError:
+                    pass
+
+
+class BackendSQLite:
+    """
+    Tabla SQLite con una fila por resultado. El modo WAL permite que varias réplicas lean
+    mientras otra escribe.
+    """
+
+    nombre = "sqlite"
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.errores = 0
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(directorio, exist_ok=True)
+        self._candado = threading.Lock()
+        self._pid = None
+        with self._candado:
+            self._conectada()
+
+    def _conectada(self):
+        # Una conexión por proceso, compartida entre hilos bajo el candado. Un trabajador
+        # creado con fork abre la suya: SQLite no admite usar la conexión del padre.
+        if self._pid != os.getpid():
+            self._conexion = sqlite3.connect(self.ruta, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute("CREATE TABLE IF NOT EXISTS resultados ("
+                                   "clave TEXT PRIMARY KEY, espacio TEXT, version TEXT, datos BLOB, guardado REAL)")
+            columnas = [fila[1] for fila in self._conexion.execute("PRAGMA table_info(resultados)")]
+            if "guardado" not in columnas:  # Base creada antes de que se guardara el momento de escritura
+                self._conexion.execute("ALTER TABLE resultados ADD COLUMN guardado REAL")
+            self._pid = os.getpid()
+        return self._conexion
+
+    def leer(self, clave):
+        try:
+            with self._candado:
+                fila = self._conectada().execute("SELECT datos FROM resultados WHERE clave = ?", (clave,)).fetchone()
+        except sqlite3.Error:
+            self.errores += 1
+            return None
+        return fila[0] if fila else None
+
+    def escribir(self, clave, datos, ttl_segundos=None):
+        espacio, version, _ = clave.split("/", 2)
+        try:
+            with self._candado:
+                self._conectada().execute("INSERT OR REPLACE INTO resultados (clave, espacio, version, datos, guardado) "
+                                          "VALUES (?, ?, ?, ?, ?)", (clave, espacio, version, sqlite3.Binary(datos), time.time()))
+        except sqlite3.Error:
+            self.errores += 1
+
+    def borrar(self, clave):
+        try:
+            with self._candado:
+                self._conectada().execute("DELETE FROM resultados WHERE clave = ?", (clave,))
+        except sqlite3.Error:
+            self.errores += 1
+
+    def purgar(self, espacio, version_vigente=None):
+        try:
+            with self._candado:
+                if version_vigente is None:
+                    self._conectada().execute("DELETE FROM resultados WHERE espacio = ?", (espacio,))
+                else:
+                    self._conectada().execute("DELETE FROM resultados WHERE espacio = ? AND version != ?",
+                                              (espacio, version_vigente))
+        except sqlite3.Error:
+            self.errores += 1
+
+    def purgar_vencidos(self, espacio, ttl_segundos):
+        # Las filas sin momento de escritura (de antes de la columna) se tratan como vencidas
+        try:
+            with self._candado:
+                self._conectada().execute("DELETE FROM resultados WHERE espacio = ? AND (guardado IS NULL OR guardado < ?)",
+                                          (espacio, time.time() - ttl_segundos))
+        except sqlite3.Error:
+            self.errores += 1
+
+
+class BackendRedis:
+    """
+    Servidor Redis o compatible (Valkey, KeyDB, ...). En desarrollo se puede pasar en
+    `cliente` cualquier objeto con la misma interfaz (get, set, delete, scan_iter), por
+    ejemplo uno local en lugar del servidor.
+
+    Parámetros:
+    - url: URL del servidor ("redis://host:6379/0").
+    - prefijo: Prefijo de las claves, para compartir el servidor con otras aplicaciones.
+    - cliente: Cliente ya construido (ignora `url`).
+    """
+
+    nombre = "redis"
+
+    def __init__(self, url=None, prefijo="fondos", cliente=None):
+        if cliente is None:
+            import redis
+            cliente = redis.Redis.from_url(url)
+            self._excepciones = (redis.RedisError, OSError)
+        else:
+            self._excepciones = (Exception,)
+        self.cliente = cliente
+        self.prefijo = prefijo
+        self.errores = 0
+
+    def leer(self, clave):
+        try:
+            return self.cliente.get(f"{self.prefijo}:{clave}")
+        except self._excepciones:
+            self.errores += 1
+            return None
+
+    def escribir(self, clave, datos, ttl_segundos=None):
+        # El servidor también hace caducar la entrada, así no acumula resultados vencidos
+        try:
+            self.cliente.set(f"{self.prefijo}:{clave}", datos, ex=int(ttl_segundos) if ttl_segundos else None)
+        except self._excepciones:
+            self.errores += 1
+
+    def borrar(self, clave):
+        try:
+            self.cliente.delete(f"{self.prefijo}:{clave}")
+        except self._excepciones:
+            self.errores += 1
+
+    def purgar(self, espacio, version_vigente=None):
+        vigente = f"{self.prefijo}:{espacio}/{version_vigente}/".encode()
+        try:
+            obsoletas = [clave for clave in self.cliente.scan_iter(match=f"{self.prefijo}:{espacio}/*", count=500)
+                         if version_vigente is None or not (clave if isinstance(clave, bytes) else clave.encode()).startswith(vigente)]
+            if obsoletas:
+                self.cliente.delete(*obsoletas)
+        except self._excepciones:
+            self.errores += 1
+
+    def purgar_vencidos(self, espacio, ttl_segundos):
+        pass  # El servidor borra cada entrada al vencer su `ex`
+
+
+def crear_backend(url):
+    """
+    Construye el backend indicado por una URL (ver el docstring del módulo).
+
+    Retorna:
+    - Instancia del backend, o None para usar solo memoria.
+    """
+    if not url or url == "memoria":
+        return None
+    if url.startswith("sqlite:///"):
+        return BackendSQLite(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return BackendRedis(url)
+    return BackendDirectorio(url)
+
+
+_backend_compartido = None
+_candado_backend = threading.Lock()
+
+
+def backend_compartido():
+    """
+    Backend configurado en CACHE_BACKEND, uno solo por proceso para todas las cachés.
+    """
+    global _backend_compartido
+    with _candado_backend:
+        if _backend_compartido is None:
+            _backend_compartido = crear_backend(os.environ.get("CACHE_BACKEND")) or False
+        return _backend_compartido or None
@@ -0,0 +1,246 @@
+# base_analitica.py
+"""
+Base analítica embebida con los históricos de todos los fondos.
+
+Las preguntas sobre todo el universo ("rendimientos mensuales de todos los fondos desde
+2020 con volatilidad mayor a 20%") obligaban a leer y parsear el archivo de cada fondo en
+un ciclo de Python. Esta base carga todos los históricos en una sola tabla
+`historicos(simbolo, fecha, open, high, low, close, volume, dividends, stock_splits,
+capital_gains)` de un archivo local, y los filtros de fondos, fechas y columnas se
+resuelven dentro del motor en un solo recorrido.
+
+Motores:
+- SQLite (incluido en Python): la tabla se guarda ordenada por (simbolo, fecha), así que
+  un rango de fechas de un fondo es una lectura contigua.
+- DuckDB (columnar, requiere el paquete `duckdb`): se usa si la ruta termina en ".duckdb".
+
+La base se sincroniza de forma incremental: la tabla `fondos` guarda la versión de cada
+fondo (`version_fondos`) y solo se recargan los fondos cuyo archivo cambió.
+
+Se activa con la variable de entorno BASE_ANALITICA (ruta del archivo, por ejemplo
+"Data/analitica.sqlite"); sin ella el cargador de `functions.py` sigue leyendo los
+archivos de 'Data'.
+
+    python base_analitica.py [--ruta Data/analitica.sqlite] [--desde 2020-01-01] [--min-volatilidad 20]
+"""
+import os
+import time
+import sqlite3
+import argparse
+import threading
+import numpy as np
+
+
+RUTA_BASE = os.path.join("Data", "analitica.sqlite")
+
+# Columna de los archivos de 'Data' -> columna de la tabla
+COLUMNAS_SQL = {
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Volume": "volume",
+    "Dividends": "dividends",
+    "Stock Splits": "stock_splits",
+    "Capital Gains": "capital_gains",
+}
+
+
+class BaseAnalitica:
+    """
+    Parámetros:
+    - ruta: Archivo de la base. Con extensión ".duckdb" se usa DuckDB; con cualquier otra, SQLite.
+    """
+
+    def __init__(self, ruta=RUTA_BASE):
+        self.ruta = ruta
+        self.motor = "duckdb" if ruta.endswith(".duckdb") else "sqlite"
+        self.sincronizaciones = 0
+        self.fondos_recargados = 0
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(directorio, exist_ok=True)
+        self._candado = threading.Lock()
+        columnas = ", ".join(f"{columna} DOUBLE" for columna in COLUMNAS_SQL.values())
+
+        if self.motor == "duckdb":
+            import duckdb
+            self._conexion = duckdb.connect(ruta)
+            self._conexion.execute(f"CREATE TABLE IF NOT EXISTS historicos (simbolo VARCHAR, fecha DATE, {columnas})")
+        else:
+            # Una conexión por proceso, compartida entre hilos bajo el candado
+            self._conexion = sqlite3.connect(ruta, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute(f"CREATE TABLE IF NOT EXISTS historicos (simbolo TEXT, fecha TEXT, {columnas}, "
+                                   "PRIMARY KEY (simbolo, fecha)) WITHOUT ROWID")
+        self._conexion.execute("CREATE TABLE IF NOT EXISTS fondos (simbolo VARCHAR PRIMARY KEY, nombre VARCHAR, "
+                               "descripcion VARCHAR, version VARCHAR, filas INTEGER)")
+
+    def _ejecutar(self, sql, parametros=()):
+        with self._candado:
+            return self._conexion.execute(sql, parametros).fetchall()
+
+    def sincronizar(self, simbolos=None):
+        """
+        Recarga en la base los fondos cuyo archivo cambió desde la última sincronización.
+
+        Parámetros:
+        - simbolos: Fondos a revisar (por defecto todos los de 'Data').
+
+        Retorna:
+        - Lista de símbolos recargados.
+        """
+        from functions import listar_fondos, cargar_datos_fondo, version_fondos
+
+        if simbolos is None:
+            simbolos = [fondo["simbolo"] for fondo in listar_fondos()]
+        versiones = dict(self._ejecutar("SELECT simbolo, version FROM fondos"))
+        recargados = []
+
+        for simbolo in simbolos:
+            version = version_fondos([simbolo])
+            if versiones.get(simbolo) == version:
+                continue
+            try:
+                datos = cargar_datos_fondo(simbolo)
+            except FileNotFoundError:
+                continue
+            filas = [(simbolo, entry["Date"]) + tuple(entry.get(columna) for columna in COLUMNAS_SQL)
+                     for entry in datos["datos_historicos"]]
+            marcas = ", ".join("?" * (len(COLUMNAS_SQL) + 2))
+            with self._candado:
+                self._conexion.execute("BEGIN")
+                try:
+                    self._conexion.execute("DELETE FROM historicos WHERE simbolo = ?", (simbolo,))
+                    self._conexion.executemany(f"INSERT INTO historicos VALUES ({marcas})", filas)
+                    self._conexion.execute("DELETE FROM fondos WHERE simbolo = ?", (simbolo,))
+                    self._conexion.execute("INSERT INTO fondos VALUES (?, ?, ?, ?, ?)",
+                                           (simbolo, datos.get("nombre"), datos.get("descripcion"), version, len(filas)))
+                    self._conexion.execute("COMMIT")
+                except Exception:
+                    self._conexion.execute("ROLLBACK")
+                    raise
+            recargados.append(simbolo)
+
+        self.sincronizaciones += 1
+        self.fondos_recargados += len(recargados)
+        return recargados
+
+    def _filtros(self, simbolos=None, desde=None, hasta=None):
+        condiciones, parametros = [], []
+        if simbolos is not None:
+            simbolos = list(simbolos)
+            condiciones.append(f"simbolo IN ({', '.join('?' * len(simbolos))})" if simbolos else "FALSE")
+            parametros += simbolos
+        if desde is not None:
+            condiciones.append("fecha >= ?")
+            parametros.append(str(desde))
+        if hasta is not None:
+            condiciones.append("fecha <= ?")
+            parametros.append(str(hasta))
+        return (" WHERE " + " AND ".join(condiciones) if condiciones else ""), parametros
+
+    def historicos(self, simbolos=None, desde=None, hasta=None, columnas=None):
+        """
+        Históricos de varios fondos en un solo recorrido de la tabla.
+
+        Parámetros:
+        - simbolos: Fondos a leer (por defecto todos).
+        - desde, hasta: Fechas "AAAA-MM-DD" (inclusivas) del rango a leer.
+        - columnas: Columnas con los nombres de los archivos ("Close", "Dividends", ...);
+          por defecto todas.
+
+        Retorna:
+        - Diccionario {simbolo: datos_historicos} con el mismo formato de filas que los
+          archivos de 'Data' (solo "Date" y las columnas pedidas).
+        """
+        columnas = list(COLUMNAS_SQL) if columnas is None else [columna for columna in columnas if columna != "Date"]
+        desconocidas = [columna for columna in columnas if columna not in COLUMNAS_SQL]
+        if desconocidas:
+            raise ValueError(f"Columnas desconocidas: {desconocidas}")
+
+        where, parametros = self._filtros(simbolos, desde, hasta)
+        seleccion = ", ".join(["simbolo", "fecha"] + [COLUMNAS_SQL[columna] for columna in columnas])
+        filas = self._ejecutar(f"SELECT {seleccion} FROM historicos{where} ORDER BY simbolo, fecha", parametros)
+
+        resultado = {simbolo: [] for simbolo in simbolos} if simbolos is not None else {}
+        for fila in filas:
+            entrada = {"Date": str(fila[1])}
+            # SQLite guarda los NaN como NULL; los archivos de 'Data' los tienen como NaN
+            entrada.update((columna, np.nan if valor is None else valor) for columna, valor in zip(columnas, fila[2:]))
+            resultado.setdefault(fila[0], []).append(entrada)
+        return resultado
+
+    def consultar(self, sql, parametros=()):
+        """
+        Ejecuta una consulta SQL de solo lectura sobre las tablas `historicos` y `fondos`.
+
+        Retorna:
+        - DataFrame de pandas con el resultado.
+        """
+        import pandas as pd
+
+        with self._candado:
+            cursor = self._conexion.execute(sql, parametros)
+            columnas = [descripcion[0] for descripcion in cursor.description]
+            return pd.DataFrame(cursor.fetchall(), columns=columnas)
+
+    def rendimientos_mensuales(self, simbolos=None, desde=None, hasta=None):
+        """
+        Rendimientos mensuales de varios fondos a partir del último cierre de cada mes,
+        agrupados dentro del motor (una fila por fondo y mes en lugar de una por día).
+
+        Retorna:
+        - DataFrame con un renglón por mes ("AAAA-MM") y una columna por fondo.
+        """
+        where, parametros = self._filtros(simbolos, desde, hasta)
+        mes = "strftime(fecha, '%Y-%m')" if self.motor == "duckdb" else "substr(fecha, 1, 7)"
+        cierres = self.consultar(
+            f"SELECT h.simbolo, u.mes, h.close FROM historicos h JOIN ("
+            f"SELECT simbolo, {mes} AS mes, max(fecha) AS ultima FROM historicos{where} "
+            f"GROUP BY simbolo, {mes}) u ON h.simbolo = u.simbolo AND h.fecha = u.ultima",
+            parametros)
+        tabla = cierres.pivot(index="mes", columns="simbolo", values="close").sort_index()
+        return tabla.pct_change(fill_method=None).iloc[1:]
+
+    def cerrar(self):
+        with self._candado:
+            self._conexion.close()
+
+
+_base = None
+_candado_base = threading.Lock()
+
+
+def base_analitica():
+    """
+    Base configurada en BASE_ANALITICA, una sola por proceso. Regresa None si la variable
+    no está definida.
+    """
+    global _base
+    with _candado_base:
+        if _base is None:
+            ruta = os.environ.get("BASE_ANALITICA")
+            _base = BaseAnalitica(ruta) if ruta else False
+        return _base or None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sincroniza la base analítica y consulta rendimientos mensuales.")
+    parser.add_argument("--ruta", default=os.environ.get("BASE_ANALITICA", RUTA_BASE), help="Archivo de la base.")
+    parser.add_argument("--desde", default="2020-01-01", help="Fecha inicial de la consulta de ejemplo.")
+    parser.add_argument("--min-volatilidad", type=float, default=20.0, help="Volatilidad anualizada mínima (%%).")
+    argumentos = parser.parse_args()
+
+    base = BaseAnalitica(argumentos.ruta)
+    inicio = time.perf_counter()
+    recargados = base.sincronizar()
+    print(f"Sincronización ({base.motor}): {len(recargados)} fondos recargados en {time.perf_counter() - inicio:.2f} s")
+
+    inicio = time.perf_counter()
+    mensuales = base.rendimientos_mensuales(desde=argumentos.desde)
+    volatilidad = mensuales.std() * np.sqrt(12) * 100
+    seleccion = mensuales.loc[:, volatilidad > argumentos.min_volatilidad]
+    print(f"Rendimientos mensuales desde {argumentos.desde} con volatilidad > {argumentos.min_volatilidad}%: "
+          f"{seleccion.shape[1]} fondos, {seleccion.shape[0]} meses en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    for simbolo in seleccion.columns:
+        print(f"  {simbolo:<18}{volatilidad[simbolo]:>8.1f}%")
@@ -0,0 +1,118 @@
+# benchmarks/bench_arranque.py
+"""
+Benchmark de arranque en frío.
+
+Mide, en procesos nuevos, el tiempo de importar los módulos del proyecto y verifica que
+no arrastren dependencias pesadas (streamlit, plotly, pandas, yfinance). Después mide el
+primer pintado de `app_front.py` con la API de pruebas de Streamlit y verifica que la
+primera pantalla se dibuje sin cargar datos históricos de ningún fondo.
+
+Se ejecuta desde la raíz del repositorio:
+
+    python benchmarks/bench_arranque.py --max-import-ms 400 --max-primer-pintado-ms 3000
+
+Termina con código 1 si algún límite se excede, para usarlo como control en CI.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULOS_PESADOS = ("streamlit", "plotly", "pandas", "yfinance")
+
+# Módulo del proyecto -> dependencias pesadas que tiene permitido cargar al importarse
+MODULOS_A_MEDIR = {
+    "functions": (),
+    "ETFs": (),
+    "cache_resultados": (),
+    "api": (),
+}
+
+CODIGO_IMPORTACION = """
+import sys, time, json
+inicio = time.perf_counter()
+import {modulo}
+duracion = time.perf_counter() - inicio
+pesados = [m for m in {pesados!r} if m in sys.modules]
+print(json.dumps({{"ms": duracion * 1000, "pesados": pesados}}))
+"""
+
+
+def medir_importacion(modulo, repeticiones=3):
+    """
+    Importa el módulo en un intérprete nuevo varias veces y regresa la mediana en ms
+    junto con las dependencias pesadas que quedaron cargadas.
+    """
+    tiempos, pesados = [], []
+    for _ in range(repeticiones):
+        salida = subprocess.run(
+            [sys.executable, "-c", CODIGO_IMPORTACION.format(modulo=modulo, pesados=MODULOS_PESADOS)],
+            cwd=RAIZ, capture_output=True, text=True, check=True
+        )
+        resultado = json.loads(salida.stdout.strip().splitlines()[-1])
+        tiempos.append(resultado["ms"])
+        pesados = resultado["pesados"]
+    tiempos.sort()
+    return tiempos[len(tiempos) // 2], pesados
+
+
+def medir_primer_pintado():
+    """
+    Ejecuta la primera corrida de la app y regresa (ms, fondos_con_historicos_cargados, widgets).
+    """
+    os.chdir(RAIZ)
+    sys.path.insert(0, RAIZ)
+    from streamlit.testing.v1 import AppTest
+    import functions
+
+    app = AppTest.from_file(os.path.join(RAIZ, "app_front.py"), default_timeout=60)
+    inicio = time.perf_counter()
+    app.run()
+    duracion = (time.perf_counter() - inicio) * 1000
+
+    if app.exception:
+        raise RuntimeError(f"La app falló en el primer pintado: {app.exception[0].value}")
+
+    return duracion, len(functions._cache_fondos), len(app.sidebar.multiselect)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-import-ms", type=float, default=None, help="Límite para importar cada módulo.")
+    parser.add_argument("--max-primer-pintado-ms", type=float, default=None, help="Límite para la primera corrida de la app.")
+    parser.add_argument("--sin-app", action="store_true", help="No medir el primer pintado (no requiere streamlit).")
+    argumentos = parser.parse_args()
+
+    fallas = []
+    print(f"{'Módulo':<20}{'Importación (ms)':>18}  Dependencias pesadas")
+    for modulo, permitidos in MODULOS_A_MEDIR.items():
+        ms, pesados = medir_importacion(modulo)
+        print(f"{modulo:<20}{ms:>18.1f}  {', '.join(pesados) or '-'}")
+        no_permitidos = [m for m in pesados if m not in permitidos]
+        if no_permitidos:
+            fallas.append(f"{modulo} importa {', '.join(no_permitidos)} al cargarse")
+        if argumentos.max_import_ms is not None and ms > argumentos.max_import_ms:
+            fallas.append(f"{modulo} tardó {ms:.1f} ms en importarse (límite {argumentos.max_import_ms} ms)")
+
+    if not argumentos.sin_app:
+        ms, fondos_cargados, selectores = medir_primer_pintado()
+        print(f"\nPrimer pintado de app_front.py: {ms:.1f} ms "
+              f"({selectores} selector(es) en la barra lateral, {fondos_cargados} fondos con históricos cargados)")
+        if fondos_cargados:
+            fallas.append(f"el primer pintado cargó los históricos de {fondos_cargados} fondos")
+        if argumentos.max_primer_pintado_ms is not None and ms > argumentos.max_primer_pintado_ms:
+            fallas.append(f"el primer pintado tardó {ms:.1f} ms (límite {argumentos.max_primer_pintado_ms} ms)")
+
+    if fallas:
+        print("\nRegresiones de arranque:")
+        for falla in fallas:
+            print(f"- {falla}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# benchmarks/carga_streamlit.py
+"""
+Prueba de carga de `app_front.py` con varios asesores simultáneos.
+
+Cada sesión simulada recorre el flujo completo con la API de pruebas de Streamlit, sin
+navegador ni servidor: primer pintado, llenar la barra lateral (nombre, edades, monto y
+N fondos), contestar las 8 preguntas del cuestionario y abrir Resultados.
+
+`AppTest` reemplaza estado global del runtime de Streamlit mientras corre, así que dos
+sesiones no pueden ejecutarse en hilos del mismo proceso. Cada sesión simultánea corre
+en un proceso trabajador; las sesiones compiten por CPU y disco como en una réplica. Las
+cachés en proceso no se comparten entre trabajadores: para medir con cachés compartidas
+se define CACHE_BACKEND (por ejemplo sqlite:///...), ver `backends_cache.py`.
+
+Para cada nivel de concurrencia se reporta la latencia de cada corrida del script
+(p50/p95/p99, en total y por etapa), el rendimiento (sesiones y corridas por segundo) y
+la memoria: lo que crece el RSS del trabajador durante una sesión y el RSS pico.
+
+Se ejecuta desde la raíz del repositorio:
+
+    python benchmarks/carga_streamlit.py --concurrencia 1,4,8 --sesiones 16 --fondos 5 --max-p95-ms 5000
+
+Termina con código 1 si alguna sesión falla o si el p95 de Resultados excede el límite.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ETAPAS = ("primer_pintado", "barra_lateral", "cuestionario", "resultados")
+PERCENTILES = (50, 95, 99)
+
+
+def rss_mb():
+    """
+    Memoria residente actual del proceso en MB (Linux), o el pico si /proc no existe.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _inicializar_trabajador():
+    os.chdir(RAIZ)
+    sys.path[:0] = [RAIZ, os.path.dirname(os.path.abspath(__file__))]
+    import streamlit.testing.v1  # noqa: F401  (la importación no cuenta en la primera sesión)
+
+
+def _listo(_):
+    return os.getpid()
+
+
+def _por_etiqueta(widgets, etiqueta):
+    return next(widget for widget in widgets if widget.label.startswith(etiqueta))
+
+
+def ejecutar_sesion(semilla, n_fondos, timeout):
+    """
+    Recorre el flujo de un asesor y regresa la latencia de cada corrida del script.
+
+    Retorna:
+    - (tiempos, memoria): lista de (etapa, segundos) y diccionario con el RSS del trabajador
+      antes y después de la sesión, en MB.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rss_antes = rss_mb()
+    aleatorio = random.Random(semilla)
+    app = AppTest.from_file(os.path.join(RAIZ, "app_front.py"), default_timeout=timeout)
+    tiempos = []
+
+    def correr(etapa):
+        inicio = time.perf_counter()
+        app.run()
+        tiempos.append((etapa, time.perf_counter() - inicio))
+        if app.exception:
+            raise RuntimeError(f"{etapa}: {app.exception[0].value}")
+
+    correr("primer_pintado")
+
+    barra = app.sidebar
+    _por_etiqueta(barra.text_input, "Nombre").input(f"Asesor {semilla}")
+    edad = aleatorio.randint(25, 55)
+    _por_etiqueta(barra.number_input, "Edad actual").set_value(edad)
+    _por_etiqueta(barra.number_input, "Edad a la que").set_value(aleatorio.randint(edad + 5, 70))
+    _por_etiqueta(barra.slider, "Monto").set_value(aleatorio.randrange(100000, 5000000, 5000))
+    opciones = app.multiselect(key="fondos_seleccionados").options
+    app.multiselect(key="fondos_seleccionados").set_value(aleatorio.sample(opciones, min(n_fondos, len(opciones))))
+    correr("barra_lateral")
+
+    for pregunta in range(8):
+        # El clic en "Siguiente" avanza la pregunta durante la corrida, así que la siguiente
+        # pregunta aparece hasta la corrida posterior (igual que en el navegador)
+        if not any(radio.key == f"radio_pregunta_{pregunta}" for radio in app.radio):
+            correr("cuestionario")
+        app.radio(key=f"radio_pregunta_{pregunta}").set_value(aleatorio.choice("abcd"))
+        _por_etiqueta(app.button, "Siguiente").click()
+        # La última respuesta determina el perfil y la misma corrida dibuja Resultados
+        correr("resultados" if pregunta == 7 else "cuestionario")
+
+    if "perfil" not in app.session_state:
+        raise RuntimeError("El cuestionario terminó sin perfil")
+    # Se mide con la sesión todavía viva, como la tendría el servidor
+    return tiempos, {"antes": rss_antes, "despues": rss_mb()}
+
+
+def medir_nivel(concurrencia, sesiones, n_fondos, timeout, semilla=0):
+    """
+    Ejecuta `sesiones` sesiones con `concurrencia` sesiones simultáneas.
+
+    Retorna:
+    - Diccionario con latencias por etapa, rendimiento, memoria y errores.
+    """
+    # AppTest deja app_front.py como '__main__', así que las funciones se envían por el
+    # nombre de este módulo y no como '__main__.ejecutar_sesion'
+    import carga_streamlit as modulo
+
+    tiempos, memorias, errores = [], [], []
+    with ProcessPoolExecutor(max_workers=concurrencia, initializer=modulo._inicializar_trabajador) as pool:
+        # Los trabajadores arrancan (e importan streamlit) antes de empezar a medir
+        list(pool.map(modulo._listo, range(concurrencia)))
+        inicio = time.perf_counter()
+        futuros = [pool.submit(modulo.ejecutar_sesion, semilla + i, n_fondos, timeout) for i in range(sesiones)]
+        for futuro in futuros:
+            try:
+                tiempos_sesion, memoria = futuro.result()
+                tiempos.extend(tiempos_sesion)
+                memorias.append(memoria)
+            except Exception as e:
+                errores.append(str(e))
+        duracion = time.perf_counter() - inicio
+
+    def resumen(valores):
+        if not valores:
+            return {}
+        ms = np.array(valores) * 1000
+        return {f"p{p}": float(np.percentile(ms, p)) for p in PERCENTILES} | {"max": float(ms.max()), "n": len(ms)}
+
+    return {
+        "concurrencia": concurrencia,
+        "sesiones": sesiones,
+        "errores": errores,
+        "duracion_s": duracion,
+        "sesiones_por_s": (sesiones - len(errores)) / duracion,
+        "corridas_por_s": len(tiempos) / duracion,
+        "latencia_ms": resumen([t for _, t in tiempos]),
+        "etapas_ms": {etapa: resumen([t for nombre, t in tiempos if nombre == etapa]) for etapa in ETAPAS},
+        "mb_por_sesion": float(np.median([m["despues"] - m["antes"] for m in memorias])) if memorias else None,
+        "rss_pico_mb": max((m["despues"] for m in memorias), default=None),
+    }
+
+
+def imprimir_nivel(nivel):
+    print(f"\nConcurrencia {nivel['concurrencia']}: {nivel['sesiones']} sesiones en {nivel['duracion_s']:.1f} s "
+          f"({nivel['sesiones_por_s']:.2f} sesiones/s, {nivel['corridas_por_s']:.1f} corridas/s), "
+          f"memoria por sesión {nivel['mb_por_sesion'] or 0:.1f} MB, RSS pico por trabajador {nivel['rss_pico_mb'] or 0:.0f} MB")
+    print(f"  {'Etapa':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'máx ms':>10}")
+    for etapa, valores in list(nivel["etapas_ms"].items()) + [("todas", nivel["latencia_ms"])]:
+        if valores:
+            print(f"  {etapa:<16}{valores['p50']:>10.0f}{valores['p95']:>10.0f}{valores['p99']:>10.0f}{valores['max']:>10.0f}")
+    for error in nivel["errores"][:5]:
+        print(f"  Error: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrencia", default="1,4", help="Niveles de concurrencia separados por comas.")
+    parser.add_argument("--sesiones", type=int, default=8, help="Sesiones por nivel de concurrencia.")
+    parser.add_argument("--fondos", type=int, default=5, help="Fondos que selecciona cada sesión.")
+    parser.add_argument("--timeout", type=float, default=120, help="Segundos máximos por corrida del script.")
+    parser.add_argument("--calentar", action="store_true", help="Ejecutar una sesión antes de medir (cachés calientes).")
+    parser.add_argument("--max-p95-ms", type=float, default=None, help="Límite para el p95 de la etapa de Resultados.")
+    parser.add_argument("--salida", help="Archivo JSON para guardar los resultados.")
+    argumentos = parser.parse_args()
+
+    os.chdir(RAIZ)
+    sys.path.insert(0, RAIZ)
+    if argumentos.calentar:
+        ejecutar_sesion(-1, argumentos.fondos, argumentos.timeout)
+
+    niveles, fallas = [], []
+    for concurrencia in [int(valor) for valor in argumentos.concurrencia.split(",")]:
+        nivel = medir_nivel(concurrencia, argumentos.sesiones, argumentos.fondos, argumentos.timeout)
+        imprimir_nivel(nivel)
+        niveles.append(nivel)
+        if nivel["errores"]:
+            fallas.append(f"{len(nivel['errores'])} sesiones fallaron con concurrencia {concurrencia}")
+        p95 = nivel["etapas_ms"]["resultados"].get("p95")
+        if argumentos.max_p95_ms is not None and p95 is not None and p95 > argumentos.max_p95_ms:
+            fallas.append(f"p95 de Resultados de {p95:.0f} ms con concurrencia {concurrencia} (límite {argumentos.max_p95_ms} ms)")
+
+    if argumentos.salida:
+        with open(argumentos.salida, 'w') as f:
+            json.dump(niveles, f, indent=4)
+
+    if fallas:
+        print("\nLímites excedidos:")
+        for falla in fallas:
+            print(f"- {falla}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# benchmarks/universo_grande.py
+"""
+Benchmark del universo de fondos con miles de símbolos.
+
+Genera en una carpeta temporal un universo sintético (registro CSV y un archivo JSON
+pequeño por fondo) con la carpeta plana anterior y con los fragmentos por símbolo, y mide:
+
+- buscar el archivo de cada fondo: `glob("Data/{ticker}_*.json")` sobre la carpeta plana
+  contra `registro_fondos.rutas_fondo` (listado de la carpeta en caché + bisección) en
+  ambos layouts,
+- listar el universo: encabezado de cada archivo contra el registro,
+- seleccionar los mejores fondos: `sorted(...)[:k]` contra el montículo de
+  `functions._mejores_fondos`.
+
+Se ejecuta desde la raíz del repositorio:
+
+    python benchmarks/universo_grande.py [--fondos 5000] [--dias 30] [--k 5]
+"""
+import os
+import sys
+import json
+import glob
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from registro_fondos import MARGEN_LISTADO_NS
+
+
+def generar_universo(directorio, n_fondos, dias, fragmentado):
+    """
+    Escribe el registro y un JSON por fondo en `directorio`/Data.
+
+    Retorna:
+    - Lista de símbolos.
+    """
+    from registro_fondos import guardar_registro, ruta_datos_fondo, nombre_archivo
+
+    generador = random.Random(0)
+    fondos = [{"simbolo": f"F{i:05d}.{generador.choice(['MX', 'L', 'AS'])}", "nombre": f"Fondo sintetico {i}",
+               "descripcion": "Fondo generado para el benchmark."} for i in range(n_fondos)]
+    datos = os.path.join(directorio, "Data")
+    os.makedirs(datos, exist_ok=True)
+    guardar_registro(fondos, os.path.join(datos, "registro_fondos.csv"))
+
+    for fondo in fondos:
+        precio, historicos = 100.0, []
+        for dia in range(dias):
+            precio *= 1 + generador.gauss(0.0003, 0.01)
+            historicos.append({"Date": f"2024-01-{dia % 28 + 1:02d}", "Close": precio})
+        if fragmentado:
+            ruta = os.path.join(directorio, ruta_datos_fondo(fondo["simbolo"], fondo["nombre"]))
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        else:
+            ruta = os.path.join(datos, nombre_archivo(fondo["simbolo"], fondo["nombre"]) + ".json")
+        with open(ruta, 'w') as f:
+            json.dump(dict(fondo, datos_historicos=historicos), f)
+    return [fondo["simbolo"] for fondo in fondos]
+
+
+def _medir(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return (time.perf_counter() - inicio) * 1000, resultado
+
+
+def medir_busquedas(simbolos, muestra, fragmentado):
+    """
+    Tiempo (ms) de localizar el archivo de `muestra` fondos con glob (solo en la carpeta
+    plana, None en la fragmentada) y con `rutas_fondo`.
+    """
+    from functions import sanitize_filename
+    from registro_fondos import rutas_fondo
+
+    elegidos = random.Random(1).sample(simbolos, min(muestra, len(simbolos)))
+    con_glob = None
+    if not fragmentado:
+        con_glob, _ = _medir(lambda: [glob.glob(f"Data/{sanitize_filename(s)}_*.json") for s in elegidos])
+    rutas_fondo(elegidos[0])  # Primer listado de la carpeta plana
+    con_fragmentos, encontrados = _medir(lambda: [rutas_fondo(s)[0] for s in elegidos])
+    assert all(encontrados), "Hay fondos sin archivo"
+    return con_glob, con_fragmentos, len(elegidos)
+
+
+def medir_seleccion(n_fondos, k, repeticiones=20):
+    """
+    Tiempo (ms) de elegir los k fondos de mayor rendimiento ordenando todo y con montículo.
+    """
+    from functions import _mejores_fondos
+
+    generador = random.Random(2)
+    datos = [{"simbolo": f"F{i}", "rendimiento": generador.gauss(8, 10), "volatilidad": abs(generador.gauss(15, 5))}
+             for i in range(n_fondos)]
+    clave = lambda x: x["rendimiento"]
+    ordenando, esperado = _medir(lambda: [sorted(datos, key=clave, reverse=True)[:k] for _ in range(repeticiones)])
+    con_monticulo, obtenido = _medir(lambda: [_mejores_fondos(datos, k, clave) for _ in range(repeticiones)])
+    assert obtenido[0] == esperado[0]
+    return ordenando / repeticiones, con_monticulo / repeticiones
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de búsqueda, listado y selección con miles de fondos.")
+    parser.add_argument("--fondos", type=int, default=5000, help="Número de fondos sintéticos.")
+    parser.add_argument("--dias", type=int, default=30, help="Días de históricos por fondo.")
+    parser.add_argument("--k", type=int, default=5, help="Fondos a seleccionar.")
+    parser.add_argument("--muestra", type=int, default=500, help="Fondos a localizar en la medición de búsquedas.")
+    argumentos = parser.parse_args()
+
+    directorio = tempfile.mkdtemp(prefix="universo_")
+    original = os.getcwd()
+    try:
+        for fragmentado in (False, True):
+            carpeta = os.path.join(directorio, "fragmentado" if fragmentado else "plano")
+            os.makedirs(carpeta)
+            simbolos = generar_universo(carpeta, argumentos.fondos, argumentos.dias, fragmentado)
+            time.sleep(MARGEN_LISTADO_NS / 1e9)  # Las carpetas recién escritas no se guardan en caché
+            os.chdir(carpeta)
+            con_glob, con_fragmentos, muestra = medir_busquedas(simbolos, argumentos.muestra, fragmentado)
+            print(f"Layout {'fragmentado' if fragmentado else 'plano':<12}({argumentos.fondos} fondos), localizar {muestra} fondos: "
+                  + (f"glob {con_glob:8.1f} ms | " if con_glob is not None else "")
+                  + f"rutas_fondo {con_fragmentos:8.1f} ms")
+            os.chdir(original)
+
+        os.chdir(os.path.join(directorio, "fragmentado"))
+        from functions import listar_fondos, leer_encabezado_fondo
+        encabezados, _ = _medir(lambda: [leer_encabezado_fondo(r) for r in glob.glob("Data/fragmentos/*/*.json")])
+        registro, fondos = _medir(listar_fondos)
+        print(f"Listar {len(fondos)} fondos: encabezados {encabezados:8.1f} ms | registro {registro:8.1f} ms")
+        os.chdir(original)
+
+        ordenando, con_monticulo = medir_seleccion(argumentos.fondos, argumentos.k)
+        print(f"Top-{argumentos.k} de {argumentos.fondos} fondos: sorted {ordenando:6.2f} ms | heapq {con_monticulo:6.2f} ms")
+    finally:
+        os.chdir(original)
+        shutil.rmtree(directorio, ignore_errors=True)
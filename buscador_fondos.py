@@ -0,0 +1,209 @@
+# buscador_fondos.py
+"""
+Buscador de fondos: filtra y ordena el universo por métricas y etiquetas.
+
+Las métricas de todos los fondos se calculan una vez por versión de los datos y se
+guardan en columnas de numpy junto con un índice ordenado por métrica (argsort). Un
+filtro por rango es entonces una búsqueda binaria sobre el índice, las etiquetas se
+comparan como máscaras de bits y el ranking es recorrer el índice ya ordenado, así que
+cada consulta toma microsegundos aunque el universo crezca a miles de fondos.
+"""
+import re
+import threading
+import numpy as np
+
+from functions import listar_fondos, cargar_datos_fondo, calcular_metricas_fondo, calcular_max_drawdown, version_fondos
+from manifiesto import version_datos
+from cache_resultados import cache_metricas
+
+
+METRICAS = {
+    "rendimiento": "Rendimiento anualizado (%)",
+    "volatilidad": "Volatilidad anualizada (%)",
+    "sharpe": "Sharpe (rendimiento / volatilidad)",
+    "rendimiento_dividendos": "Rendimiento de dividendos (%)",
+    "max_drawdown": "Máxima caída (%)",
+}
+
+# Etiquetas por palabras clave en el nombre y la descripción de cada fondo
+REGIONES = {
+    "Estados Unidos": ("ee.uu", "s&p 500", "nasdaq", "russell", "dow jones"),
+    "México": ("méxico", "mexicana", "mexicano"),
+    "Europa": ("europeo", "alemania", "francia", "reino unido", "emu"),
+    "Asia": ("asia", "asiático", "china", "chinas", "japón", "japan", "hong kong", "corea", "taiwán"),
+    "América Latina": ("brasil", "brasileño", "latin america", "américa latina"),
+    "Canadá y Australia": ("canadá", "australia"),
+    "Emergentes": ("emergentes", "bric"),
+    "Global": ("mundial",),
+}
+CLASES = {
+    "Renta fija": ("bonos", "cetes", "deuda", "udis"),
+    "Materias primas": ("oro", "plata"),
+    "Sectorial": ("sector",),
+}
+CLASE_POR_DEFECTO = "Renta variable"
+
+
+def etiquetar_fondo(fondo):
+    """
+    Asigna etiquetas de región y clase de activo a un fondo según su nombre y descripción.
+
+    Retorna:
+    - (regiones, clases): listas de etiquetas; si ninguna clase coincide se usa "Renta variable".
+    """
+    texto = f"{fondo.get('nombre', '')} {fondo.get('descripcion', '')}".lower()
+    coincide = lambda palabras: any(re.search(rf"(?<!\w){re.escape(p)}(?!\w)", texto) for p in palabras)
+
+    regiones = [region for region, palabras in REGIONES.items() if coincide(palabras)]
+    clases = [clase for clase, palabras in CLASES.items() if coincide(palabras)]
+    if not set(clases) & {"Renta fija", "Materias primas"}:
+        clases.append(CLASE_POR_DEFECTO)
+    return regiones, clases
+
+
+class IndiceFondos:
+    """
+    Métricas del universo de fondos con un índice ordenado por métrica.
+
+    Atributos:
+    - fondos: Lista de diccionarios (nombre, simbolo, descripcion, regiones, clases).
+    - valores: {metrica: arreglo (n_fondos,)} con NaN donde la métrica no está disponible.
+    - orden: {metrica: posiciones de los fondos ordenadas de menor a mayor, NaN al final}.
+    - version: Versión de los datos con la que se construyó.
+    """
+
+    def __init__(self, fondos, metricas, version=None):
+        self.fondos = list(fondos)
+        self.version = version
+        self.valores, self.orden, self._ordenados = {}, {}, {}
+        for metrica in METRICAS:
+            valores = np.array([m.get(metrica) if m.get(metrica) is not None else np.nan for m in metricas],
+                               dtype=np.float64)
+            orden = np.argsort(valores, kind="stable")
+            self.valores[metrica] = valores
+            self.orden[metrica] = orden
+            # Solo la parte sin NaN, para las búsquedas binarias
+            self._ordenados[metrica] = valores[orden][:int(np.count_nonzero(~np.isnan(valores)))]
+
+        # Una posición de bit por etiqueta
+        self.etiquetas = {}
+        for fondo in self.fondos:
+            for etiqueta in fondo["regiones"] + fondo["clases"]:
+                self.etiquetas.setdefault(etiqueta, len(self.etiquetas))
+        self._mascaras = np.array([sum(1 << self.etiquetas[e] for e in fondo["regiones"] + fondo["clases"])
+                                   for fondo in self.fondos], dtype=np.uint64)
+        self.por_nombre = {fondo["nombre"]: i for i, fondo in enumerate(self.fondos)}
+
+    def __len__(self):
+        return len(self.fondos)
+
+    def _mascara(self, etiquetas):
+        return np.uint64(sum(1 << self.etiquetas[e] for e in etiquetas if e in self.etiquetas))
+
+    def filtrar(self, rangos=None, regiones=None, clases=None, ordenar_por="sharpe", descendente=True, limite=None):
+        """
+        Filtra y ordena los fondos.
+
+        Parámetros:
+        - rangos: {metrica: (minimo, maximo)}; cualquiera de los extremos puede ser None.
+          Los fondos sin valor en una métrica filtrada quedan fuera.
+        - regiones, clases: Listas de etiquetas; el fondo debe tener al menos una de cada lista.
+        - ordenar_por: Métrica del ranking (los fondos sin valor van al final).
+        - descendente: Ordenar de mayor a menor.
+        - limite: Máximo de fondos a regresar.
+
+        Retorna:
+        - Lista de diccionarios del fondo con sus métricas, en el orden del ranking.
+        """
+        n = len(self.fondos)
+        seleccion = np.ones(n, dtype=bool)
+
+        for metrica, (minimo, maximo) in (rangos or {}).items():
+            ordenados = self._ordenados[metrica]
+            inicio = 0 if minimo is None else int(np.searchsorted(ordenados, minimo, side="left"))
+            fin = len(ordenados) if maximo is None else int(np.searchsorted(ordenados, maximo, side="right"))
+            dentro = np.zeros(n, dtype=bool)
+            dentro[self.orden[metrica][inicio:fin]] = True
+            seleccion &= dentro
+
+        for etiquetas in (regiones, clases):
+            if etiquetas:
+                seleccion &= (self._mascaras & self._mascara(etiquetas)) != 0
+
+        orden = self.orden[ordenar_por]
+        validos = len(self._ordenados[ordenar_por])
+        if descendente:
+            orden = np.concatenate([orden[:validos][::-1], orden[validos:]])
+        posiciones = orden[seleccion[orden]][:limite]
+        return [self.fila(i) for i in posiciones]
+
+    def fila(self, posicion):
+        """
+        Diccionario con los datos y las métricas del fondo en `posicion`.
+        """
+        fila = dict(self.fondos[posicion])
+        for metrica, valores in self.valores.items():
+            valor = valores[posicion]
+            fila[metrica] = None if np.isnan(valor) else float(valor)
+        return fila
+
+
+def _metricas_buscador(simbolo, periodo):
+    datos_historicos = cargar_datos_fondo(simbolo)["datos_historicos"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metricas_fondo = calcular_metricas_fondo(datos_historicos, periodo=periodo)
+    volatilidad = metricas_fondo["volatilidad"]
+    metricas_fondo["sharpe"] = metricas_fondo["rendimiento"] / volatilidad if volatilidad > 0 else None
+    metricas_fondo["max_drawdown"] = calcular_max_drawdown(datos_historicos)
+    return metricas_fondo
+
+
+def calcular_metricas_universo(fondos=None, periodo="5y"):
+    """
+    Calcula las métricas del buscador para todos los fondos.
+
+    Las métricas de cada fondo se guardan en `cache_metricas` con la versión de su archivo,
+    así que después de una actualización solo se recalculan las de los fondos que cambiaron.
+
+    Parámetros:
+    - fondos: Lista de fondos como la de `listar_fondos` (por defecto todos los de 'Data').
+
+    Retorna:
+    - (fondos_etiquetados, metricas): listas paralelas de diccionarios.
+    """
+    fondos = listar_fondos() if fondos is None else fondos
+    fondos_etiquetados, metricas = [], []
+    for fondo in fondos:
+        simbolo = fondo["simbolo"]
+        clave = ("buscador", (simbolo,), version_fondos([simbolo]), periodo)
+        try:
+            metricas_fondo = dict(cache_metricas.obtener_o_calcular(clave, lambda: _metricas_buscador(simbolo, periodo)))
+        except FileNotFoundError:
+            continue
+
+        regiones, clases = etiquetar_fondo(fondo)
+        fondos_etiquetados.append({**fondo, "regiones": regiones, "clases": clases})
+        metricas.append(metricas_fondo)
+    return fondos_etiquetados, metricas
+
+
+_indices = {}
+_candado_indices = threading.Lock()
+
+
+def obtener_indice():
+    """
+    Índice del buscador para la versión vigente de los datos.
+
+    Se construye una sola vez por versión y se comparte entre sesiones del mismo proceso;
+    cuando los datos cambian se construye uno nuevo y se descarta el anterior. Las métricas
+    por fondo salen de `cache_metricas`: una réplica nueva no las recalcula y una
+    actualización solo recalcula las de los fondos que cambiaron.
+    """
+    version = version_datos()
+    with _candado_indices:
+        if version not in _indices:
+            fondos, metricas = calcular_metricas_universo()
+            _indices.clear()
+            _indices[version] = IndiceFondos(fondos, metricas, version=version)
+        return _indices[version]
@@ -0,0 +1,323 @@
+# cache_resultados.py
+import os
+import copy
+import time
+import pickle
+import hashlib
+import weakref
+import threading
+from collections import OrderedDict
+
+from functions import OPTIMIZADORES_POR_PERFIL, version_fondos
+from backends_cache import BackendDirectorio, backend_compartido
+from memoria import instrumentar
+
+
+_instancias = weakref.WeakSet()  # Todas las cachés del proceso, para invalidarlas juntas
+
+# Tiempo de vida de los resultados que dependen de fondos concretos: sus claves cambian
+# cuando cambia un archivo, así que las entradas viejas solo se dejan de usar y este plazo
+# es el que las saca del backend compartido.
+TTL_RESULTADOS_FONDOS = 7 * 24 * 3600
+
+
+class CacheResultados:
+    """
+    Caché LRU con caducidad (TTL) para resultados de optimización.
+
+    Una sola instancia vive a nivel de módulo, así que la comparten todas las sesiones
+    de Streamlit del mismo proceso. Si se indica un backend (ver `backends_cache.py`),
+    cada resultado también se guarda ahí para sobrevivir reinicios del servidor y para
+    que lo reutilicen las demás réplicas.
+
+    Las claves son tuplas (tipo, símbolos, versión de los datos, parámetros...). La versión
+    es la de los fondos de la clave (`version_fondos`), o la de todo 'Data' cuando los
+    símbolos son () porque el resultado depende del universo completo. Así, reescribir un
+    fondo solo deja obsoletos los resultados que lo incluyen.
+
+    Parámetros:
+    - max_entradas: Número máximo de resultados en memoria antes de desalojar el menos usado
+      (0 para no guardar nada en memoria y usar solo el backend).
+    - ttl_segundos: Tiempo de vida de cada resultado (None para que no caduque).
+    - directorio: Carpeta para persistir los resultados (atajo de `backend=BackendDirectorio(directorio)`).
+    - backend: Almacenamiento compartido (None para usar solo memoria).
+    - espacio: Nombre que separa las claves de esta caché de las demás en el mismo backend.
+    - universo: True si todas las claves son del universo completo (símbolos ()); con cada
+      actualización de 'Data' se purgan del backend las versiones anteriores
+      (`invalidar_universo`).
+    """
+
+    def __init__(self, max_entradas=256, ttl_segundos=3600, directorio=None, backend=None, espacio="resultados",
+                 universo=False):
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self.backend = BackendDirectorio(directorio) if directorio else backend
+        self.espacio = espacio
+        self.universo = universo
+        self._entradas = OrderedDict()  # clave -> (momento_guardado, valor, último uso), del menos al más usado
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.aciertos_compartidos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        _instancias.add(self)
+
+    def _vigente(self, momento_guardado):
+        return self.ttl_segundos is None or time.time() - momento_guardado < self.ttl_segundos
+
+    def _clave_backend(self, clave):
+        # La versión de datos va en la clave para poder purgar las entradas obsoletas sin abrirlas
+        version = clave[2] if len(clave) > 2 else "sin_version"
+        resumen = hashlib.sha1(repr(clave).encode()).hexdigest()
+        return f"{self.espacio}/{version}/{resumen}"
+
+    def obtener(self, clave):
+        """
+        Busca un resultado en memoria y, si no está, en el backend compartido.
+
+        Retorna:
+        - (encontrado, valor): `encontrado` es False si no hay resultado vigente.
+        """
+        with self._candado:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and self._vigente(entrada[0]):
+                self._entradas[clave] = (entrada[0], entrada[1], time.monotonic())
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return True, entrada[1]
+            if entrada is not None:
+                del self._entradas[clave]
+
+        if self.backend is not None:
+            clave_backend = self._clave_backend(clave)
+            datos = self.backend.leer(clave_backend)
+            if datos is not None:
+                try:
+                    momento_guardado, valor = pickle.loads(datos)
+                except (EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+                    momento_guardado = None  # Entrada corrupta o de otra versión del código
+                if momento_guardado is not None and self._vigente(momento_guardado):
+                    with self._candado:
+                        self._insertar(clave, momento_guardado, valor)
+                        self.aciertos += 1
+                        self.aciertos_compartidos += 1
+                    return True, valor
+                self.backend.borrar(clave_backend)
+
+        with self._candado:
+            self.fallos += 1
+        return False, None
+
+    def guardar(self, clave, valor):
+        """
+        Guarda un resultado en memoria (y en el backend si la caché es compartida).
+        """
+        momento_guardado = time.time()
+        with self._candado:
+            self._insertar(clave, momento_guardado, valor)
+
+        if self.backend is not None:
+            self.backend.escribir(self._clave_backend(clave), pickle.dumps((momento_guardado, valor), protocol=pickle.HIGHEST_PROTOCOL),
+                                  self.ttl_segundos)
+
+    def obtener_o_calcular(self, clave, calcular):
+        """
+        Regresa el resultado guardado o lo calcula con `calcular()` y lo guarda.
+        """
+        encontrado, valor = self.obtener(clave)
+        if not encontrado:
+            valor = calcular()
+            self.guardar(clave, valor)
+        return valor
+
+    def _insertar(self, clave, momento_guardado, valor):
+        if self.max_entradas == 0:
+            return
+        self._entradas[clave] = (momento_guardado, valor, time.monotonic())
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.max_entradas:
+            self._entradas.popitem(last=False)
+            self.desalojos += 1
+
+    def __len__(self):
+        with self._candado:
+            return len(self._entradas)
+
+    def uso_mas_antiguo(self):
+        """
+        Momento (`time.monotonic`) del último uso del resultado menos usado, o None si la
+        caché está vacía. Con él `memoria.desalojar_lru` ordena las entradas de todas las cachés.
+        """
+        with self._candado:
+            for entrada in self._entradas.values():
+                return entrada[2]
+        return None
+
+    def desalojar_mas_antiguo(self):
+        """
+        Saca de la memoria el resultado menos usado (si hay backend compartido, sigue ahí).
+
+        Retorna:
+        - True si había algo que desalojar.
+        """
+        with self._candado:
+            if not self._entradas:
+                return False
+            self._entradas.popitem(last=False)
+            self.desalojos += 1
+            return True
+
+    def invalidar(self, version_vigente=None):
+        """
+        Elimina los resultados calculados con una versión de datos distinta a `version_vigente`.
+        Sin argumento se vacía toda la caché.
+        """
+        with self._candado:
+            for clave in list(self._entradas):
+                if version_vigente is None or clave[2] != version_vigente:
+                    del self._entradas[clave]
+
+        if self.backend is not None:
+            self.backend.purgar(self.espacio, version_vigente)
+
+    def invalidar_fondos(self, simbolos):
+        """
+        Elimina los resultados que dependen de alguno de los fondos indicados: los que los
+        incluyen en su clave y los calculados sobre todo el universo. Los demás siguen en caché.
+
+        En el backend se borran las entradas que este proceso conoce; las que solo estén ahí
+        ya no coinciden con ninguna clave nueva (la versión de los fondos cambió) y salen con
+        `purgar_vencidos()` al pasar su tiempo de vida, o con `invalidar()` en las cachés del
+        universo.
+
+        Retorna:
+        - Número de resultados eliminados de la memoria.
+        """
+        simbolos = set(simbolos)
+        with self._candado:
+            afectadas = [clave for clave in self._entradas
+                         if len(clave) > 1 and isinstance(clave[1], tuple) and (not clave[1] or simbolos.intersection(clave[1]))]
+            for clave in afectadas:
+                del self._entradas[clave]
+
+        if self.backend is not None:
+            for clave in afectadas:
+                self.backend.borrar(self._clave_backend(clave))
+        return len(afectadas)
+
+    def purgar_vencidos(self):
+        """
+        Borra del backend compartido los resultados que ya pasaron su tiempo de vida. Los
+        que siguen en memoria caducan al consultarlos.
+        """
+        if self.backend is not None and self.ttl_segundos is not None:
+            self.backend.purgar_vencidos(self.espacio, self.ttl_segundos)
+
+    def metricas(self):
+        """
+        Retorna:
+        - Diccionario con aciertos (y cuántos vinieron del backend), fallos, tasa de aciertos,
+          desalojos, entradas en memoria y el backend en uso.
+        """
+        with self._candado:
+            consultas = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "aciertos_compartidos": self.aciertos_compartidos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                "desalojos": self.desalojos,
+                "entradas": len(self._entradas),
+                "backend": self.backend.nombre if self.backend is not None else "memoria",
+                "errores_backend": self.backend.errores if self.backend is not None else 0,
+            }
+
+
+def instancias():
+    """
+    Todas las cachés de resultados vivas en el proceso.
+    """
+    return list(_instancias)
+
+
+def invalidar_fondos(simbolos):
+    """
+    Elimina de todas las cachés del proceso los resultados que dependen de los fondos indicados.
+
+    Retorna:
+    - Número total de resultados eliminados.
+    """
+    return sum(cache.invalidar_fondos(simbolos) for cache in list(_instancias))
+
+
+def invalidar_universo(version_vigente):
+    """
+    Después de una actualización de 'Data': elimina de las cachés del universo (memoria y
+    backend) los resultados de versiones anteriores y purga del backend los resultados
+    vencidos de todas las cachés.
+    """
+    for cache in list(_instancias):
+        if cache.universo:
+            cache.invalidar(version_vigente)
+        cache.purgar_vencidos()
+
+
+# Cachés compartidas por todas las sesiones y, con CACHE_BACKEND, por todas las réplicas.
+# CACHE_OPTIMIZADOR_DIR sigue persistiendo solo los resultados del optimizador en una carpeta.
+cache_optimizador = CacheResultados(directorio=os.environ.get("CACHE_OPTIMIZADOR_DIR"), backend=backend_compartido(),
+                                    espacio="optimizador")
+cache_metricas = CacheResultados(max_entradas=4096, ttl_segundos=TTL_RESULTADOS_FONDOS, backend=backend_compartido(),
+                                 espacio="metricas")
+# El panel vive en memoria compartida (`panel_fondos.obtener_panel_compartido`): esta caché
+# solo lo trae del backend para publicarlo, sin quedarse con una copia privada.
+cache_paneles = CacheResultados(max_entradas=0, ttl_segundos=None, backend=backend_compartido(), espacio="panel", universo=True)
+
+
+def clave_optimizacion(perfil, datos_fondos, version, n_fondos=5, covarianza=None):
+    """
+    Construye la clave de caché: (perfil, símbolos ordenados, versión de datos, parámetros).
+    """
+    simbolos = tuple(sorted(fondo.get("simbolo", fondo["nombre"]) for fondo in datos_fondos))
+    parametros = (("n_fondos", n_fondos),) if perfil != "Personalizado" else ()
+    if covarianza is not None:
+        parametros += (("covarianza", covarianza.clave),)
+    return (perfil, simbolos, version, parametros)
+
+
+@instrumentar
+def optimizar_con_cache(perfil, datos_fondos, n_fondos=5, cache=None, covarianza=None):
+    """
+    Ejecuta el optimizador del perfil reutilizando resultados previos de cualquier sesión.
+
+    La clave lleva la versión de los archivos de los fondos (`version_fondos`): si el
+    descargador reescribe alguno, el resultado se recalcula; los de otros fondos se conservan.
+
+    Parámetros:
+    - perfil: "Conservador", "Moderado", "Agresivo", "Muy Agresivo" o "Personalizado".
+    - datos_fondos: Lista de diccionarios con nombre, simbolo, rendimiento y volatilidad.
+    - n_fondos: Número de fondos que eligen los optimizadores por perfil.
+    - cache: Instancia de `CacheResultados` (por defecto la compartida).
+    - covarianza: MatrizCovarianza para la volatilidad del portafolio (ver `covarianza.py`).
+
+    Retorna:
+    - (seleccionados, pesos, rendimiento, volatilidad), igual que los optimizadores.
+    """
+    if not datos_fondos:
+        return None, None, None, None
+
+    cache = cache if cache is not None else cache_optimizador
+    version = version_fondos(fondo.get("simbolo", fondo["nombre"]) for fondo in datos_fondos)
+    clave = clave_optimizacion(perfil, datos_fondos, version, n_fondos, covarianza)
+    encontrado, resultado = cache.obtener(clave)
+    if not encontrado:
+        optimizador = OPTIMIZADORES_POR_PERFIL[perfil]
+        # Se optimiza sobre una copia para no alterar los datos de la sesión que llama
+        datos = copy.deepcopy(datos_fondos)
+        if perfil == "Personalizado":
+            resultado = optimizador(datos, covarianza=covarianza)
+        else:
+            resultado = optimizador(datos, n_fondos=n_fondos, covarianza=covarianza)
+        cache.guardar(clave, resultado)
+
+    # Cada sesión recibe su propia copia para que nadie modifique el resultado compartido
+    return copy.deepcopy(resultado)
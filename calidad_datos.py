@@ -0,0 +1,208 @@
+# calidad_datos.py
+"""
+Validación de la calidad de los históricos antes de guardarlos.
+
+Cada revisión es una operación vectorizada sobre las columnas de la serie (fechas,
+cierres, splits), sin ciclos por día, así que validar todo el universo en cada
+actualización toma milisegundos:
+
+- fechas: orden creciente estricto (sin fechas repetidas ni desordenadas).
+- huecos: días hábiles faltantes entre dos fechas consecutivas, más allá de los que
+  explica un feriado (calendario lunes a viernes, con feriados opcionales).
+- precios: cierres NaN, cero o negativos.
+- atípicos: rendimientos diarios con puntaje z robusto (mediana y MAD) muy alto.
+- picos: un salto grande que se revierte casi por completo al día siguiente (tick erróneo).
+- splits: saltos que coinciden con una razón de split común (2:1, 3:1, 1:10, ...), señal
+  de que el precio no está ajustado.
+
+El resultado es un reporte por fondo con estado "ok", "advertencia" o "cuarentena". El
+descargador (`ETFs.py`) lo registra en el manifiesto y no publica en 'Data' las series en
+cuarentena.
+
+    python calidad_datos.py [--manifiesto]
+"""
+import sys
+import argparse
+import numpy as np
+
+
+MIN_OBSERVACIONES = 20          # Cierres válidos mínimos para usar la serie
+MAX_HABILES_FALTANTES = 3       # Días hábiles seguidos que puede explicar un feriado
+Z_ATIPICO = 15.0                # Puntaje z robusto a partir del cual un rendimiento es atípico
+MIN_SALTO_ATIPICO = 0.1         # Rendimiento logarítmico mínimo para considerarlo atípico
+MIN_SALTO_PICO = 0.2            # Salto mínimo de ida y de vuelta de un pico
+MAX_RESIDUO_PICO = 0.25         # Fracción del salto que puede quedar sin revertir en un pico
+MAX_FRACCION_NAN = 0.2          # Fracción de cierres NaN a partir de la cual la serie va a cuarentena
+RAZONES_SPLIT = np.array([2, 3, 4, 5, 8, 10, 20, 1.5])
+TOLERANCIA_SPLIT = 0.02         # Distancia (en log) entre el salto y la razón de split
+MAX_FECHAS_REPORTE = 10         # Fechas de ejemplo que se guardan por revisión
+
+
+def _fechas_ejemplo(fechas, mascara):
+    return [str(fecha) for fecha in fechas[mascara][:MAX_FECHAS_REPORTE]]
+
+
+def validar_serie(fechas, cierres, splits=None, feriados=()):
+    """
+    Valida una serie diaria de precios.
+
+    Parámetros:
+    - fechas: Arreglo datetime64[D] (o convertible) con la fecha de cada fila.
+    - cierres: Arreglo de precios de cierre.
+    - splits: Arreglo con la razón de split registrada en cada fila (0 si no hubo).
+    - feriados: Fechas que no cuentan como días hábiles faltantes.
+
+    Retorna:
+    - Diccionario con el estado ("ok", "advertencia" o "cuarentena"), los motivos y el
+      conteo (más fechas de ejemplo) de cada revisión.
+    """
+    fechas = np.asarray(fechas, dtype="datetime64[D]")
+    cierres = np.asarray(cierres, dtype=np.float64)
+    splits = np.zeros(len(cierres)) if splits is None else np.nan_to_num(np.asarray(splits, dtype=np.float64))
+    reporte = {"observaciones": int(len(cierres))}
+    cuarentena, advertencias = [], []
+
+    # Fechas estrictamente crecientes
+    pasos = np.diff(fechas).astype(np.int64)
+    reporte["fechas_repetidas"] = int(np.sum(pasos == 0))
+    reporte["fechas_desordenadas"] = int(np.sum(pasos < 0))
+    if reporte["fechas_repetidas"] or reporte["fechas_desordenadas"]:
+        cuarentena.append("fechas repetidas o desordenadas")
+
+    # Precios inválidos
+    nan = ~np.isfinite(cierres)
+    no_positivos = np.isfinite(cierres) & (cierres <= 0)
+    reporte["cierres_nan"] = int(nan.sum())
+    reporte["cierres_no_positivos"] = int(no_positivos.sum())
+    reporte["fechas_no_positivos"] = _fechas_ejemplo(fechas, no_positivos)
+    if reporte["cierres_no_positivos"]:
+        cuarentena.append("cierres en cero o negativos")
+    if len(cierres) and reporte["cierres_nan"] / len(cierres) > MAX_FRACCION_NAN:
+        cuarentena.append("demasiados cierres sin dato")
+    elif reporte["cierres_nan"]:
+        advertencias.append("cierres sin dato")
+
+    validos = np.isfinite(cierres) & (cierres > 0)
+    reporte["cierres_validos"] = int(validos.sum())
+    if reporte["cierres_validos"] < MIN_OBSERVACIONES:
+        cuarentena.append(f"menos de {MIN_OBSERVACIONES} cierres válidos")
+
+    # Las revisiones de huecos y rendimientos usan solo las filas válidas y en orden
+    crecientes = np.concatenate([[True], fechas[1:] > np.maximum.accumulate(fechas)[:-1]]) if len(fechas) else validos
+    usar = validos & crecientes
+    fechas_v, cierres_v, splits_v = fechas[usar], cierres[usar], splits[usar]
+
+    # Huecos contra el calendario hábil
+    if len(fechas_v) > 1:
+        faltantes = np.busday_count(fechas_v[:-1] + 1, fechas_v[1:], holidays=list(feriados))
+    else:
+        faltantes = np.zeros(0, dtype=np.int64)
+    huecos = faltantes > MAX_HABILES_FALTANTES
+    esperados = int(np.busday_count(fechas_v[0], fechas_v[-1] + 1, holidays=list(feriados))) if len(fechas_v) else 0
+    reporte["huecos"] = int(huecos.sum())
+    reporte["mayor_hueco_habiles"] = int(faltantes.max()) if len(faltantes) else 0
+    reporte["fechas_huecos"] = _fechas_ejemplo(fechas_v[1:], huecos)
+    reporte["cobertura_habiles"] = round(len(fechas_v) / esperados, 4) if esperados else 0.0
+    if reporte["huecos"]:
+        advertencias.append("huecos en el calendario")
+
+    # Rendimientos atípicos y picos
+    rendimientos = np.log(cierres_v[1:] / cierres_v[:-1]) if len(cierres_v) > 1 else np.zeros(0)
+    if len(rendimientos):
+        mediana = np.median(rendimientos)
+        mad = np.median(np.abs(rendimientos - mediana)) * 1.4826
+        z = np.abs(rendimientos - mediana) / mad if mad > 0 else np.zeros(len(rendimientos))
+        atipicos = (z > Z_ATIPICO) & (np.abs(rendimientos) > MIN_SALTO_ATIPICO)
+    else:
+        atipicos = np.zeros(0, dtype=bool)
+    ida, vuelta = rendimientos[:-1], rendimientos[1:]
+    picos = ((np.abs(ida) > MIN_SALTO_PICO) & (np.abs(vuelta) > MIN_SALTO_PICO)
+             & (np.abs(ida + vuelta) < MAX_RESIDUO_PICO * np.abs(ida)))
+    reporte["rendimientos_atipicos"] = int(atipicos.sum())
+    reporte["fechas_atipicos"] = _fechas_ejemplo(fechas_v[1:], atipicos)
+    reporte["picos"] = int(picos.sum())
+    reporte["fechas_picos"] = _fechas_ejemplo(fechas_v[1:-1], picos)
+    if reporte["picos"]:
+        cuarentena.append("picos que se revierten al día siguiente")
+    elif reporte["rendimientos_atipicos"]:
+        advertencias.append("rendimientos atípicos")
+
+    # Saltos con razón de split (precio sin ajustar)
+    distancia = np.abs(np.abs(rendimientos)[:, None] - np.log(RAZONES_SPLIT)[None, :]).min(axis=1) if len(rendimientos) else np.zeros(0)
+    saltos = distancia < TOLERANCIA_SPLIT
+    reporte["saltos_split"] = int(saltos.sum())
+    reporte["saltos_split_registrados"] = int((saltos & (splits_v[1:] > 0)).sum())
+    reporte["fechas_saltos_split"] = _fechas_ejemplo(fechas_v[1:], saltos)
+    if reporte["saltos_split"]:
+        cuarentena.append("saltos con razón de split (precio sin ajustar)")
+
+    reporte["estado"] = "cuarentena" if cuarentena else "advertencia" if advertencias else "ok"
+    reporte["motivos"] = cuarentena + advertencias
+    return reporte
+
+
+def validar_historicos(datos_historicos, feriados=()):
+    """
+    Valida la lista de filas diarias con el formato de los archivos de 'Data'.
+    """
+    fechas = np.array([entry["Date"] for entry in datos_historicos], dtype="datetime64[D]")
+    cierres = np.array([entry.get("Close", np.nan) for entry in datos_historicos], dtype=np.float64)
+    splits = np.array([entry.get("Stock Splits", 0.0) or 0.0 for entry in datos_historicos], dtype=np.float64)
+    return validar_serie(fechas, cierres, splits, feriados)
+
+
+def validar_dataframe(datos, feriados=()):
+    """
+    Valida el DataFrame que regresa `yfinance` (índice de fechas, columnas Close y Stock Splits).
+    """
+    indice = datos.index
+    if getattr(indice, "tz", None) is not None:
+        indice = indice.tz_localize(None)
+    fechas = np.asarray(indice, dtype="datetime64[D]") if len(datos) else np.array([], dtype="datetime64[D]")
+    splits = datos["Stock Splits"].to_numpy() if "Stock Splits" in datos else None
+    return validar_serie(fechas, datos["Close"].to_numpy(), splits, feriados)
+
+
+def validar_universo(fondos=None):
+    """
+    Valida los históricos guardados de todos los fondos.
+
+    Retorna:
+    - Diccionario {simbolo: reporte}.
+    """
+    from functions import listar_fondos, cargar_datos_fondo
+
+    fondos = listar_fondos() if fondos is None else fondos
+    reportes = {}
+    for fondo in fondos:
+        try:
+            datos_historicos = cargar_datos_fondo(fondo["simbolo"])["datos_historicos"]
+        except FileNotFoundError:
+            continue
+        reportes[fondo["simbolo"]] = validar_historicos(datos_historicos)
+    return reportes
+
+
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description="Valida la calidad de los históricos guardados en 'Data'.")
+    parser.add_argument("--manifiesto", action="store_true", help="Guarda los reportes en el manifiesto.")
+    argumentos = parser.parse_args()
+
+    inicio = time.perf_counter()
+    reportes = validar_universo()
+    duracion = time.perf_counter() - inicio
+
+    for simbolo, reporte in reportes.items():
+        if reporte["estado"] != "ok":
+            print(f"{simbolo:<18}{reporte['estado']:<13}{'; '.join(reporte['motivos'])}")
+    estados = [reporte["estado"] for reporte in reportes.values()]
+    print(f"\n{len(reportes)} fondos validados en {duracion * 1000:.1f} ms: "
+          f"{estados.count('ok')} ok, {estados.count('advertencia')} con advertencias, "
+          f"{estados.count('cuarentena')} en cuarentena")
+
+    if argumentos.manifiesto:
+        from manifiesto import registrar_calidad
+        registrar_calidad(reportes)
+    sys.exit(1 if "cuarentena" in estados else 0)
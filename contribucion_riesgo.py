@@ -0,0 +1,83 @@
+# contribucion_riesgo.py
+"""
+Contribución de cada fondo al riesgo y al rendimiento de uno o muchos portafolios.
+
+Los portafolios se expresan como una matriz de pesos (portafolios x fondos) sobre un
+mismo universo, con cero en los fondos que no tienen. Todo el lote se resuelve con un
+solo producto W·Σ, así que analizar cientos de portafolios cuesta casi lo mismo que uno.
+
+Para un portafolio con pesos w, covarianza Σ y volatilidad σ = sqrt(wᵀΣw):
+- contribución marginal al riesgo: ∂σ/∂w_i = (Σw)_i / σ
+- contribución total al riesgo:    w_i·(Σw)_i / σ  (suman σ)
+- razón de diversificación:        Σ_i w_i·σ_i / σ  (1 = sin beneficio de diversificar)
+"""
+import numpy as np
+
+
+def analizar_riesgo(pesos, covarianza, rendimientos=None):
+    """
+    Calcula las contribuciones al riesgo y al rendimiento de un lote de portafolios.
+
+    Parámetros:
+    - pesos: Matriz (portafolios x fondos) o vector (fondos,) de pesos.
+    - covarianza: Matriz (fondos x fondos) de covarianza anual, o vector de volatilidades
+      (fondos sin correlación). Mismas unidades que se quieran en el resultado.
+    - rendimientos: Vector (fondos,) de rendimientos esperados (opcional).
+
+    Retorna:
+    - Diccionario con arreglos (una fila por portafolio):
+      - "volatilidad": (P,)
+      - "contribucion_marginal", "contribucion_total", "contribucion_porcentual": (P, n)
+      - "razon_diversificacion": (P,)
+      - con rendimientos: "rendimiento" (P,), "contribucion_rendimiento" (P, n) y
+        "sensibilidad_rendimiento" (P, n), el cambio del rendimiento al subir el peso de un
+        fondo financiándolo proporcionalmente con el resto (μ_i - rendimiento).
+    """
+    pesos = np.atleast_2d(np.asarray(pesos, dtype=np.float64))
+    covarianza = np.asarray(covarianza, dtype=np.float64)
+    if covarianza.ndim == 1:
+        covarianza = np.diag(covarianza ** 2)
+
+    sigma_w = pesos @ covarianza                                  # (P, n), el único producto de matrices
+    varianzas = np.einsum("pi,pi->p", pesos, sigma_w)
+    volatilidades = np.sqrt(np.maximum(varianzas, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        marginal = np.where(volatilidades[:, None] > 0, sigma_w / volatilidades[:, None], 0.0)
+        total = pesos * marginal
+        porcentual = np.where(volatilidades[:, None] > 0, total / volatilidades[:, None], 0.0)
+        diversificacion = np.where(volatilidades > 0, np.abs(pesos) @ np.sqrt(np.diag(covarianza)) / volatilidades, 1.0)
+
+    resultado = {
+        "volatilidad": volatilidades,
+        "contribucion_marginal": marginal,
+        "contribucion_total": total,
+        "contribucion_porcentual": porcentual,
+        "razon_diversificacion": diversificacion,
+    }
+
+    if rendimientos is not None:
+        rendimientos = np.asarray(rendimientos, dtype=np.float64)
+        rendimiento = pesos @ rendimientos
+        resultado["rendimiento"] = rendimiento
+        resultado["contribucion_rendimiento"] = pesos * rendimientos[None, :]
+        resultado["sensibilidad_rendimiento"] = rendimientos[None, :] - rendimiento[:, None]
+
+    return resultado
+
+
+def matriz_de_pesos(portafolios):
+    """
+    Arma la matriz de pesos de un lote de portafolios sobre la unión de sus fondos.
+
+    Parámetros:
+    - portafolios: Lista de (simbolos, pesos).
+
+    Retorna:
+    - (universo, matriz): lista de símbolos y matriz (portafolios x fondos).
+    """
+    universo = list(dict.fromkeys(simbolo for simbolos, _ in portafolios for simbolo in simbolos))
+    posicion = {simbolo: i for i, simbolo in enumerate(universo)}
+    matriz = np.zeros((len(portafolios), len(universo)))
+    for fila, (simbolos, pesos) in enumerate(portafolios):
+        matriz[fila, [posicion[simbolo] for simbolo in simbolos]] = pesos
+    return universo, matriz
@@ -0,0 +1,232 @@
+# covarianza.py
+"""
+Estimadores de la matriz de covarianza de los fondos sobre el panel alineado de rendimientos.
+
+Los historiales de 'Data' no están alineados (calendarios de distintas bolsas, fondos con
+pocos meses de datos), así que todos los estimadores trabajan por pares completos: cada
+covarianza usa solo las fechas en que ambos fondos tienen rendimiento. Los momentos de
+todos los pares salen de unos cuantos productos de matrices, sin ciclos sobre fondos.
+
+Estimadores:
+- "muestral": covarianza muestral por pares completos.
+- "ledoit_wolf": encogimiento de Ledoit-Wolf hacia una matriz diagonal escalada, que
+  estabiliza la matriz cuando hay muchos fondos y pocas observaciones.
+- "ewma": promedio móvil exponencial con vida media configurable (en días), que da más
+  peso a los rendimientos recientes.
+- "factores": modelo de factores PCA de todo el universo (ver `modelo_factores.py`),
+  con riesgo de portafolio en O(n·k).
+
+Las matrices se guardan en caché por versión de datos, fondos y configuración.
+"""
+import numpy as np
+
+from cache_resultados import CacheResultados, TTL_RESULTADOS_FONDOS
+from backends_cache import backend_compartido
+from functions import version_fondos
+from panel_fondos import construir_panel
+
+
+ESTIMADORES = ("muestral", "ledoit_wolf", "ewma", "factores")
+DIAS_POR_ANO = 252
+
+cache_covarianzas = CacheResultados(max_entradas=64, ttl_segundos=TTL_RESULTADOS_FONDOS, backend=backend_compartido(),
+                                    espacio="covarianza")
+
+
+class MatrizCovarianza:
+    """
+    Covarianza anualizada (en decimales) de un conjunto de fondos.
+
+    Atributos:
+    - simbolos: Símbolos en el orden de filas y columnas.
+    - matriz: Matriz (n x n) simétrica y semidefinida positiva.
+    - metodo, configuracion: Estimador y parámetros con los que se calculó.
+    - observaciones: Matriz (n x n) con el número de fechas comunes de cada par.
+    """
+
+    def __init__(self, simbolos, matriz, metodo, configuracion=(), version=None, observaciones=None):
+        self.simbolos = list(simbolos)
+        self.matriz = matriz
+        self.metodo = metodo
+        self.configuracion = tuple(configuracion)
+        self.version = version
+        self.observaciones = observaciones
+        self._indice = {simbolo: i for i, simbolo in enumerate(self.simbolos)}
+
+    @property
+    def clave(self):
+        # Identifica el estimador (y sobre qué fondos se estimó) en las claves de caché de los optimizadores
+        return (self.metodo, tuple(sorted(self.simbolos))) + self.configuracion
+
+    def submatriz(self, simbolos):
+        """
+        Covarianza de un subconjunto de fondos, en el orden indicado.
+        """
+        indices = [self._indice[simbolo] for simbolo in simbolos]
+        return self.matriz[np.ix_(indices, indices)]
+
+    def volatilidades(self):
+        """
+        Volatilidad anualizada de cada fondo (decimal).
+        """
+        return np.sqrt(np.diag(self.matriz))
+
+    def correlaciones(self):
+        volatilidades = self.volatilidades()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.nan_to_num(self.matriz / np.outer(volatilidades, volatilidades))
+
+
+def _momentos_por_pares(rendimientos, pesos=None):
+    # Medias y covarianzas (sesgadas) por pares completos, con pesos opcionales por fecha.
+    validos = np.isfinite(rendimientos)
+    X = np.where(validos, rendimientos, 0.0)
+    V = validos.astype(np.float64)
+    if pesos is None:
+        pesos = np.ones(len(X))
+    Xp, Vp = X * pesos[:, None], V * pesos[:, None]
+
+    totales = Vp.T @ V     # peso total de las fechas comunes de cada par
+    sumas = Xp.T @ V       # sumas[i, j]: suma de los rendimientos de i en las fechas comunes con j
+    cruzados = Xp.T @ X
+    with np.errstate(divide="ignore", invalid="ignore"):
+        medias = sumas / totales
+        covarianza = cruzados / totales - medias * medias.T
+    return np.nan_to_num(covarianza), V.T @ V
+
+
+def _cercana_semidefinida(matriz, relativo=1e-8):
+    # Los pares completos pueden dar una matriz no semidefinida; los eigenvalores se recortan
+    # a una fracción de la varianza promedio para que la matriz siga siendo invertible
+    matriz = (matriz + matriz.T) / 2
+    minimo = relativo * max(np.trace(matriz) / max(len(matriz), 1), np.finfo(np.float64).tiny)
+    valores, vectores = np.linalg.eigh(matriz)
+    if valores.min() >= minimo:
+        return matriz
+    return (vectores * np.maximum(valores, minimo)) @ vectores.T
+
+
+def _sin_pares_cortos(covarianza, observaciones, min_observaciones):
+    # Los pares con muy pocas fechas comunes no aportan correlación (se dejan en cero)
+    cortos = observaciones < min_observaciones
+    np.fill_diagonal(cortos, False)
+    return np.where(cortos, 0.0, covarianza)
+
+
+def covarianza_muestral(rendimientos, min_observaciones=60):
+    """
+    Covarianza muestral (diaria) por pares completos.
+
+    Parámetros:
+    - rendimientos: Matriz (fechas x fondos) de rendimientos con NaN donde no hay dato.
+    - min_observaciones: Fechas comunes mínimas para estimar la covarianza de un par.
+
+    Retorna:
+    - (covarianza, observaciones)
+    """
+    covarianza, observaciones = _momentos_por_pares(rendimientos)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covarianza = np.nan_to_num(covarianza * observaciones / (observaciones - 1))
+    return _cercana_semidefinida(_sin_pares_cortos(covarianza, observaciones, min_observaciones)), observaciones
+
+
+def covarianza_ledoit_wolf(rendimientos, min_observaciones=60):
+    """
+    Covarianza (diaria) con encogimiento de Ledoit-Wolf hacia m·I, donde m es la varianza promedio.
+
+    La intensidad óptima δ = min(b², d²) / d² se estima con los pares completos:
+    d² = ||S - m·I||² y b² = Σ_ij Σ_t (x_ti·x_tj - S_ij)² / n_ij².
+
+    Retorna:
+    - (covarianza, observaciones)
+    """
+    S, observaciones = _momentos_por_pares(rendimientos)
+    S = _sin_pares_cortos(S, observaciones, min_observaciones)
+
+    validos = np.isfinite(rendimientos)
+    centrados = np.where(validos, rendimientos - np.nanmean(np.where(validos, rendimientos, np.nan), axis=0), 0.0)
+    cuadrados = centrados ** 2
+    desviaciones = cuadrados.T @ cuadrados - 2 * S * (centrados.T @ centrados) + observaciones * S ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        b2 = np.nansum(np.where(observaciones >= min_observaciones, desviaciones / observaciones ** 2, 0.0))
+
+    # Se encoge la versión semidefinida de S, así los eigenvalores quedan por arriba de δ·m
+    S = _cercana_semidefinida(S)
+    m = np.trace(S) / len(S)
+    objetivo = m * np.eye(len(S))
+    d2 = np.sum((S - objetivo) ** 2)
+    delta = min(b2, d2) / d2 if d2 > 0 else 1.0
+    return delta * objetivo + (1 - delta) * S, observaciones
+
+
+def covarianza_ewma(rendimientos, vida_media=60, min_observaciones=60):
+    """
+    Covarianza (diaria) con promedio móvil exponencial.
+
+    Parámetros:
+    - vida_media: Días en los que el peso de una observación se reduce a la mitad.
+
+    Retorna:
+    - (covarianza, observaciones)
+    """
+    decaimiento = 0.5 ** (1 / vida_media)
+    pesos = decaimiento ** np.arange(len(rendimientos) - 1, -1, -1, dtype=np.float64)
+    covarianza, observaciones = _momentos_por_pares(rendimientos, pesos)
+    return _cercana_semidefinida(_sin_pares_cortos(covarianza, observaciones, min_observaciones)), observaciones
+
+
+def estimar_covarianza(panel, simbolos=None, metodo="ledoit_wolf", vida_media=60, min_observaciones=60):
+    """
+    Estima la covarianza anualizada sobre el panel de rendimientos.
+
+    Parámetros:
+    - panel: PanelFondos (ver `panel_fondos.py`).
+    - simbolos: Fondos a incluir (por defecto todos los del panel).
+    - metodo: "muestral", "ledoit_wolf" o "ewma".
+    - vida_media: Vida media en días para "ewma".
+    - min_observaciones: Fechas comunes mínimas para estimar la covarianza de un par.
+
+    Retorna:
+    - MatrizCovarianza
+    """
+    simbolos = panel.simbolos if simbolos is None else list(simbolos)
+    rendimientos = panel.rendimientos[:, panel.columnas(simbolos)]
+
+    if metodo == "muestral":
+        covarianza, observaciones = covarianza_muestral(rendimientos, min_observaciones)
+        configuracion = (("min_observaciones", min_observaciones),)
+    elif metodo == "ledoit_wolf":
+        covarianza, observaciones = covarianza_ledoit_wolf(rendimientos, min_observaciones)
+        configuracion = (("min_observaciones", min_observaciones),)
+    elif metodo == "ewma":
+        covarianza, observaciones = covarianza_ewma(rendimientos, vida_media, min_observaciones)
+        configuracion = (("vida_media", vida_media), ("min_observaciones", min_observaciones))
+    else:
+        raise ValueError(f"Estimador desconocido: {metodo}. Usa uno de {ESTIMADORES}")
+
+    return MatrizCovarianza(simbolos, covarianza * DIAS_POR_ANO, metodo, configuracion,
+                            version=panel.version, observaciones=observaciones)
+
+
+def obtener_covarianza(simbolos, metodo="ledoit_wolf", vida_media=60, min_observaciones=60, cache=None, n_factores=5):
+    """
+    Covarianza de los fondos indicados, reutilizando la de cualquier sesión (o réplica, con
+    un backend compartido) si ya se calculó con la misma versión de datos y configuración.
+
+    Retorna:
+    - MatrizCovarianza (compartida: no se debe modificar), o ModeloFactores con metodo="factores".
+    """
+    if metodo == "factores":
+        # El modelo se ajusta una vez sobre todo el universo; cada consulta toma sus filas
+        from modelo_factores import obtener_modelo_factores
+        return obtener_modelo_factores(n_factores, min_observaciones, cache).subconjunto(list(simbolos))
+
+    cache = cache if cache is not None else cache_covarianzas
+    version = version_fondos(simbolos)
+    configuracion = (("vida_media", vida_media),) if metodo == "ewma" else ()
+    clave = (metodo, tuple(simbolos), version, configuracion + (("min_observaciones", min_observaciones),))
+
+    resultado = cache.obtener_o_calcular(clave, lambda: estimar_covarianza(
+        construir_panel(list(simbolos)), metodo=metodo, vida_media=vida_media, min_observaciones=min_observaciones))
+    resultado.matriz.flags.writeable = False
+    return resultado
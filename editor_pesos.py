@@ -0,0 +1,115 @@
+# editor_pesos.py
+"""
+Recalculo incremental de un portafolio cuando el usuario edita sus pesos.
+
+El portafolio guarda el producto Σw y los totales w·μ, wᵀΣw y Σw_i. Cambiar un peso en
+d es una actualización de rango uno (Σw += d·Σ[:, i]), así que cada edición cuesta O(n)
+en lugar de O(n²), y el rendimiento, la volatilidad, el VaR y la proyección se obtienen
+de esos totales sin volver a multiplicar matrices.
+
+Los pesos editados no tienen que sumar 1: las métricas se reportan sobre los pesos
+normalizados (dividir entre la suma escala el rendimiento y la volatilidad por igual).
+"""
+from statistics import NormalDist
+import numpy as np
+
+from metas import valor_futuro
+
+
+class PortafolioIncremental:
+    """
+    Parámetros:
+    - simbolos: Símbolos de los fondos, en orden.
+    - rendimientos: Rendimiento anual esperado de cada fondo (decimal).
+    - covarianza: Matriz de covarianza anual (decimal), o un vector de volatilidades para
+      suponer fondos sin correlación.
+    - pesos: Pesos iniciales (por ejemplo, los del optimizador).
+    """
+
+    def __init__(self, simbolos, rendimientos, covarianza, pesos):
+        self.simbolos = list(simbolos)
+        self.rendimientos = np.asarray(rendimientos, dtype=np.float64)
+        covarianza = np.asarray(covarianza, dtype=np.float64)
+        self.covarianza = np.diag(covarianza ** 2) if covarianza.ndim == 1 else covarianza
+        self.reiniciar(pesos)
+
+    def reiniciar(self, pesos):
+        """
+        Fija todos los pesos y recalcula los productos desde cero (O(n²)).
+        """
+        self.pesos = np.array(pesos, dtype=np.float64)
+        self._sigma_w = self.covarianza @ self.pesos
+        self._rendimiento = float(self.rendimientos @ self.pesos)
+        self._varianza = float(self.pesos @ self._sigma_w)
+        self._suma = float(self.pesos.sum())
+
+    def cambiar_peso(self, indice, peso):
+        """
+        Cambia un solo peso con una actualización de rango uno (O(n)).
+        """
+        delta = peso - self.pesos[indice]
+        if delta == 0:
+            return
+        columna = self.covarianza[:, indice]
+        # (w + d·e_i)ᵀ Σ (w + d·e_i) = wᵀΣw + 2d·(Σw)_i + d²·Σ_ii
+        self._varianza += 2 * delta * self._sigma_w[indice] + delta ** 2 * columna[indice]
+        self._sigma_w += delta * columna
+        self._rendimiento += delta * self.rendimientos[indice]
+        self._suma += delta
+        self.pesos[indice] = peso
+
+    def cambiar_pesos(self, pesos):
+        """
+        Aplica una tabla de pesos completa, actualizando solo los que cambiaron.
+
+        Retorna:
+        - Índices de los pesos que cambiaron.
+        """
+        pesos = np.asarray(pesos, dtype=np.float64)
+        cambiados = np.flatnonzero(pesos != self.pesos)
+        if len(cambiados) > len(self.pesos) // 2:
+            self.reiniciar(pesos)  # Muchos cambios: sale más barato recalcular
+        else:
+            for indice in cambiados:
+                self.cambiar_peso(indice, pesos[indice])
+        return cambiados
+
+    @property
+    def suma_pesos(self):
+        return self._suma
+
+    def pesos_normalizados(self):
+        return self.pesos / self._suma if self._suma else self.pesos
+
+    def rendimiento(self):
+        """
+        Rendimiento anual esperado del portafolio normalizado (decimal).
+        """
+        return self._rendimiento / self._suma if self._suma else 0.0
+
+    def volatilidad(self):
+        """
+        Volatilidad anual del portafolio normalizado (decimal).
+        """
+        return float(np.sqrt(max(self._varianza, 0.0))) / abs(self._suma) if self._suma else 0.0
+
+    def var(self, monto, confianza=0.95, horizonte_anos=1.0):
+        """
+        Valor en riesgo paramétrico (normal): pérdida que no se supera con la confianza indicada.
+
+        Retorna:
+        - Pérdida en pesos (0 si el rendimiento esperado cubre el escenario adverso).
+        """
+        z = NormalDist().inv_cdf(confianza)
+        rendimiento_adverso = self.rendimiento() * horizonte_anos - z * self.volatilidad() * np.sqrt(horizonte_anos)
+        return max(-rendimiento_adverso, 0.0) * monto
+
+    def proyeccion(self, monto_inicial, anos, aportacion_mensual=0.0, crecimiento_aportacion=0.0):
+        """
+        Saldo al final de cada año con el rendimiento actual del portafolio (fórmula cerrada).
+
+        Retorna:
+        - Arreglo (anos + 1,) con el saldo al inicio y al final de cada año.
+        """
+        return valor_futuro(monto_inicial, self.rendimiento(), np.arange(anos + 1), aportacion_mensual,
+                            crecimiento_aportacion)
@@ -1,15 +1,23 @@
 # Functions.py
-import pandas as pd
+# streamlit, plotly y pandas se importan dentro de las funciones que los usan: este módulo
+# también lo cargan la API y los procesos por lotes, que no deben pagar ese costo de arranque.
 import numpy as np
-import plotly.graph_objects as go
-import streamlit as st
 import json
 import os
 import glob
 from datetime import datetime
 import re
+import hashlib
+import math
+import time
+import heapq
+import threading
+from collections import OrderedDict
 from datetime import timedelta
 
+from registro_fondos import cargar_registro, rutas_fondo, fondos_con_datos, nombre_archivo
+from memoria import instrumentar
+
 
 
 #####################################################################################################
@@ -25,9 +33,7 @@ def obtener_ruta_fondo(fondo_ticker):
     """
     Obtiene la ruta del archivo JSON para un fondo, manejando caracteres especiales en el nombre del archivo.
     """
-    ticker_normalizado = sanitize_filename(fondo_ticker)
-    patron_archivo = f"Data/{ticker_normalizado}_*.json"
-    archivos = glob.glob(patron_archivo)
+    archivos, _ = rutas_fondo(fondo_ticker)
     
     if not archivos:
         raise FileNotFoundError(f"Archivo de datos no encontrado para el fondo: {fondo_ticker}. Asegúrate de que el archivo esté en la carpeta 'Data' y tenga el formato correcto.")
@@ -35,6 +41,253 @@ def obtener_ruta_fondo(fondo_ticker):
     return archivos[0]
 
 
+# Caché en proceso de los archivos de fondos, compartida por sesiones, hilos y la API:
+# ruta -> (fecha de modificación, contenido del JSON, último uso), del menos al más usado
+# para que el presupuesto de memoria (ver `memoria.py`) desaloje primero lo más antiguo
+_cache_fondos = OrderedDict()
+_candado_fondos = threading.Lock()
+
+
+def obtener_ruta_datos_fondo(fondo_ticker):
+    """
+    Obtiene el archivo de datos más reciente de un fondo: su JSON o su versión compacta
+    (.azc en 'Data/compacto'). Si ambos tienen la misma fecha se prefiere el compacto.
+
+    Solo se consulta el listado del fragmento del fondo (ver `registro_fondos.py`), no el
+    de toda la carpeta 'Data'.
+    """
+    archivos_json, compactos = rutas_fondo(fondo_ticker)
+    candidatos = archivos_json + compactos
+
+    if not candidatos:
+        raise FileNotFoundError(f"Archivo de datos no encontrado para el fondo: {fondo_ticker}. Asegúrate de que el archivo esté en la carpeta 'Data' y tenga el formato correcto.")
+
+    return max(candidatos, key=lambda ruta: (os.stat(ruta).st_mtime_ns, ruta.endswith(".azc")))
+
+
+@instrumentar
+def cargar_datos_fondo(fondo_ticker):
+    """
+    Carga el JSON completo de un fondo usando la caché en proceso.
+    El archivo solo se vuelve a leer si cambió su fecha de modificación.
+
+    Parámetros:
+    - fondo_ticker: Ticker del fondo.
+
+    Retorna:
+    - Diccionario con nombre, simbolo, descripcion y datos_historicos.
+    """
+    filepath = obtener_ruta_datos_fondo(fondo_ticker)
+    modificado = os.stat(filepath).st_mtime_ns
+
+    with _candado_fondos:
+        entrada = _cache_fondos.get(filepath)
+        if entrada is not None and entrada[0] == modificado:
+            _cache_fondos[filepath] = (modificado, entrada[1], time.monotonic())
+            _cache_fondos.move_to_end(filepath)
+            return entrada[1]
+
+    if filepath.endswith(".azc"):
+        from almacenamiento_compacto import cargar_compacto
+        data = cargar_compacto(filepath)
+    else:
+        with open(filepath, 'r') as f:
+            data = json.load(f)
+
+    with _candado_fondos:
+        _cache_fondos[filepath] = (modificado, data, time.monotonic())
+        _cache_fondos.move_to_end(filepath)
+    return data
+
+
+@instrumentar
+def cargar_historicos(simbolos, desde=None, hasta=None, columnas=None):
+    """
+    Carga los históricos de varios fondos filtrados por fechas y columnas.
+
+    Si la base analítica está configurada (BASE_ANALITICA, ver `base_analitica.py`) los
+    filtros se resuelven dentro de la base en una sola consulta; si no, se leen los
+    archivos de 'Data' con la caché en proceso y se filtran aquí.
+
+    Parámetros:
+    - simbolos: Lista de tickers.
+    - desde, hasta: Fechas "AAAA-MM-DD" (inclusivas); None para no limitar.
+    - columnas: Columnas a conservar además de "Date" (por ejemplo ["Close"]); None para todas.
+
+    Retorna:
+    - Diccionario {simbolo: datos_historicos}. Los fondos sin datos quedan con lista vacía.
+    """
+    from base_analitica import base_analitica
+
+    base = base_analitica()
+    if base is not None:
+        base.sincronizar(simbolos)
+        return base.historicos(simbolos, desde, hasta, columnas)
+
+    resultado = {}
+    for simbolo in simbolos:
+        try:
+            datos_historicos = cargar_datos_fondo(simbolo)["datos_historicos"]
+        except FileNotFoundError:
+            resultado[simbolo] = []
+            continue
+        if desde is not None or hasta is not None:
+            desde_texto, hasta_texto = str(desde or ""), str(hasta or "9999")
+            datos_historicos = [entry for entry in datos_historicos if desde_texto <= entry["Date"] <= hasta_texto]
+        if columnas is not None:
+            datos_historicos = [{"Date": entry["Date"], **{columna: entry.get(columna) for columna in columnas if columna != "Date"}}
+                                for entry in datos_historicos]
+        resultado[simbolo] = datos_historicos
+    return resultado
+
+
+def descartar_archivos(rutas):
+    """
+    Saca de la caché en proceso los archivos indicados (los reescribió el descargador).
+
+    Retorna:
+    - Lista con el contenido que tenía cada archivo descartado.
+    """
+    with _candado_fondos:
+        return [entrada[1] for entrada in (_cache_fondos.pop(ruta, None) for ruta in rutas) if entrada is not None]
+
+
+def archivos_en_cache():
+    with _candado_fondos:
+        return len(_cache_fondos)
+
+
+def uso_mas_antiguo_archivos():
+    """
+    Momento (`time.monotonic`) del último uso del archivo cargado menos usado, o None si
+    la caché está vacía.
+    """
+    with _candado_fondos:
+        for entrada in _cache_fondos.values():
+            return entrada[2]
+    return None
+
+
+def desalojar_archivo_mas_antiguo():
+    """
+    Saca de la caché en proceso el archivo menos usado (se vuelve a leer si se pide).
+
+    Retorna:
+    - Contenido del archivo desalojado, o None si la caché está vacía.
+    """
+    with _candado_fondos:
+        if not _cache_fondos:
+            return None
+        return _cache_fondos.popitem(last=False)[1][1]
+
+
+def version_fondos(simbolos):
+    """
+    Versión corta de los datos de un conjunto de fondos.
+
+    Solo cambia cuando se reescribe el archivo de alguno de esos fondos, así que los
+    resultados en caché de otros fondos siguen vigentes después de una actualización parcial.
+
+    Retorna:
+    - Cadena hexadecimal.
+    """
+    firma = hashlib.sha1()
+    for simbolo in sorted(simbolos):
+        try:
+            ruta = obtener_ruta_datos_fondo(simbolo)
+            estado = os.stat(ruta)
+            firma.update(f"{simbolo}:{os.path.basename(ruta)}:{estado.st_size}:{estado.st_mtime_ns};".encode())
+        except FileNotFoundError:
+            firma.update(f"{simbolo}:-;".encode())
+    return firma.hexdigest()[:16]
+
+
+def leer_encabezado_fondo(filepath, tamano_bloque=4096):
+    """
+    Lee solo el encabezado (nombre, simbolo, descripcion) del JSON de un fondo.
+
+    El descargador escribe esos campos antes de "datos_historicos", así que basta leer
+    los primeros bytes del archivo en lugar de parsear años de precios diarios.
+
+    Parámetros:
+    - filepath: Ruta del archivo JSON.
+    - tamano_bloque: Bytes que se leen en cada intento.
+
+    Retorna:
+    - Diccionario con el encabezado del archivo (o su contenido completo si el formato es otro).
+    """
+    texto = ""
+    with open(filepath, 'r') as f:
+        while True:
+            bloque = f.read(tamano_bloque)
+            if not bloque:
+                break
+            texto += bloque
+            corte = texto.find('"datos_historicos"')
+            if corte == -1:
+                continue
+            try:
+                encabezado = json.loads(texto[:corte].rstrip().rstrip(',') + "}")
+            except json.JSONDecodeError:
+                break
+            if "simbolo" in encabezado:
+                return encabezado
+            break
+
+    # Formato inesperado (campos en otro orden, reportes, etc.): leer el archivo completo
+    with open(filepath, 'r') as f:
+        return json.load(f)
+
+
+def listar_fondos():
+    """
+    Lista los fondos disponibles en la carpeta 'Data'.
+
+    Si existe el registro de fondos (ver `registro_fondos.py`) se toman de ahí los fondos
+    que tienen archivo de datos, sin abrir ninguno. Sin registro se lee el encabezado de
+    cada archivo de 'Data'.
+
+    Retorna:
+    - Lista de diccionarios con nombre, simbolo y descripcion de cada fondo.
+    """
+    try:
+        registro = cargar_registro()
+    except FileNotFoundError:
+        registro = None
+    if registro is not None:
+        fondos = fondos_con_datos(registro)
+        # Mismo orden que el listado de archivos de 'Data'
+        return sorted(fondos, key=lambda fondo: nombre_archivo(fondo["simbolo"], fondo["nombre"]))
+
+    fondos = []
+    for file in sorted(glob.glob("Data/*.json") + glob.glob("Data/fragmentos/*/*.json"), key=os.path.basename):
+        datos = leer_encabezado_fondo(file)
+        if not isinstance(datos, dict) or "simbolo" not in datos:
+            continue  # Reportes como fondos_no_disponibles.json no son fondos
+        if fondos and fondos[-1]["simbolo"] == datos["simbolo"]:
+            continue  # Mismo fondo en la carpeta plana y en su fragmento (nombres de archivo iguales)
+        fondos.append({
+            "nombre": datos["nombre"],
+            "simbolo": datos["simbolo"],
+            "descripcion": datos["descripcion"]
+        })
+
+    # Fondos que solo se distribuyeron en formato compacto
+    compactos = sorted(glob.glob("Data/compacto/*.azc") + glob.glob("Data/compacto/fragmentos/*/*.azc"), key=os.path.basename)
+    if compactos:
+        from almacenamiento_compacto import leer_encabezado_compacto
+        simbolos = {fondo["simbolo"] for fondo in fondos}
+        for file in compactos:
+            datos = leer_encabezado_compacto(file)
+            if datos["simbolo"] not in simbolos:
+                fondos.append({
+                    "nombre": datos["nombre"],
+                    "simbolo": datos["simbolo"],
+                    "descripcion": datos["descripcion"]
+                })
+    return fondos
+
+
 def obtener_rendimiento_logaritmico_json(fondo_ticker):
     """
     Calcula el rendimiento logarítmico histórico de un fondo a partir de su archivo JSON.
@@ -45,11 +298,7 @@ def obtener_rendimiento_logaritmico_json(fondo_ticker):
     Retorna:
     - Rendimiento logarítmico anual del fondo.
     """
-    # Obtener la ruta correcta del archivo
-    filepath = obtener_ruta_fondo(fondo_ticker)
-
-    with open(filepath, 'r') as f:
-        data = json.load(f)
+    data = cargar_datos_fondo(fondo_ticker)
 
     precios_cierre = [entry["Close"] for entry in data["datos_historicos"] if "Close" in entry]
     
@@ -75,10 +324,7 @@ def obtener_rendimiento_geometrico_json(fondo_ticker):
     Retorna:
     - Rendimiento geométrico anual del fondo.
     """
-    filepath = obtener_ruta_fondo(fondo_ticker)
-
-    with open(filepath, 'r') as f:
-        data = json.load(f)
+    data = cargar_datos_fondo(fondo_ticker)
 
     precios_cierre = [entry["Close"] for entry in data["datos_historicos"] if "Close" in entry]
     
@@ -155,6 +401,8 @@ def proyectar_crecimiento_inversion_ponderado(monto_inicial, tasa_retorno, años
     Retorna:
     - DataFrame con el crecimiento anual del monto invertido.
     """
+    import pandas as pd
+
     # Calcular el crecimiento proyectado utilizando la fórmula de interés compuesto
     valores = [monto_inicial * np.exp(tasa_retorno * año) for año in range(años + 1)]
     df_proyeccion = pd.DataFrame({
@@ -171,6 +419,9 @@ def mostrar_proyeccion_crecimiento_ponderado(monto_inicial, fondos_seleccionados
     Retorna:
     - tasa_retorno: La tasa de retorno promedio ponderada.
     """
+    import streamlit as st
+    import plotly.graph_objects as go
+
     # Calcular la tasa de retorno ponderada
     tasa_retorno = calcular_tasa_retorno_ponderada(fondos_seleccionados)
     
@@ -219,6 +470,10 @@ def mostrar_proyeccion_geometrica(monto_inicial, fondos_seleccionados):
     Retorna:
     - La tasa de rendimiento geométrica promedio.
     """
+    import pandas as pd
+    import streamlit as st
+    import plotly.graph_objects as go
+
     # Calcular la tasa de rendimiento geométrica ponderada
     tasa_geometrica = calcular_tasa_geometrica_ponderada(fondos_seleccionados)
     años = 5
@@ -318,18 +573,50 @@ def calcular_dividendos_por_accion(datos_historicos):
     dividendos_totales = sum(entry.get("Dividends", 0) for entry in datos_historicos)
     return dividendos_totales
 
+#Calcular la máxima caída (drawdown)
+def calcular_max_drawdown(datos_historicos):
+    """
+    Calcula la máxima caída de un fondo desde un máximo previo.
 
-def calcular_rendimiento_volatilidad(datos_historicos, periodo="5y"):
+    Parámetros:
+    - datos_historicos: Lista de precios históricos (debe incluir el campo 'Close').
+
+    Retorna:
+    - Máxima caída en porcentaje (positivo), o None si no hay precios suficientes.
+    """
+    precios_cierre = np.array([entry.get("Close", np.nan) for entry in datos_historicos], dtype=np.float64)
+    precios_cierre = precios_cierre[np.isfinite(precios_cierre) & (precios_cierre > 0)]
+    if len(precios_cierre) < 2:
+        return None
+
+    maximos = np.maximum.accumulate(precios_cierre)
+    return float(np.max(1 - precios_cierre / maximos) * 100)
+
+
+@instrumentar
+def calcular_rendimiento_volatilidad(datos_historicos, periodo="5y", frecuencia="D", clave=None):
     """
     Calcula el rendimiento y la volatilidad anualizada para un periodo dado.
     
     Parámetros:
     - datos_historicos: Lista de precios históricos (debe incluir el campo 'Close').
     - periodo: Periodo para el cálculo (por defecto "5y").
+    - frecuencia: Frecuencia de los rendimientos: "D" (diaria), "W" (semanal), "M" (mensual)
+      o "A" (anual). Las frecuencias bajas usan los históricos remuestreados (en caché si se
+      da `clave`) y se anualizan con 52, 12 o 1 periodos por año, sin depender del calendario
+      de la bolsa.
+    - clave: Identificador estable de los históricos para guardar el remuestreo en caché,
+      por ejemplo (simbolo, version_fondos([simbolo])) (ver `remuestreo.py`).
     
     Retorna:
     - rendimiento_anualizado, volatilidad_anualizada en porcentaje.
     """
+    if frecuencia != "D":
+        from remuestreo import cierres, PERIODOS_POR_ANO
+        rendimientos = np.diff(np.log(cierres(datos_historicos, frecuencia, clave)))
+        periodos = PERIODOS_POR_ANO[frecuencia]
+        return np.mean(rendimientos) * periodos * 100, np.std(rendimientos) * np.sqrt(periodos) * 100
+
     # Extraer precios de cierre
     precios_cierre = [entry["Close"] for entry in datos_historicos if "Close" in entry]
     
@@ -343,8 +630,35 @@ def calcular_rendimiento_volatilidad(datos_historicos, periodo="5y"):
     return rendimiento_anualizado, volatilidad_anualizada
 
 
+@instrumentar
+def calcular_metricas_fondo(datos_historicos, periodo="5y", frecuencia="D", clave=None):
+    """
+    Reúne en un diccionario todas las métricas de un fondo que muestra el frontend.
+
+    Parámetros:
+    - datos_historicos: Lista de precios históricos.
+    - periodo: Periodo para el rendimiento y la volatilidad (por defecto "5y").
+    - frecuencia, clave: Frecuencia de los rendimientos y clave de caché del remuestreo
+      (ver `calcular_rendimiento_volatilidad`).
+
+    Retorna:
+    - Diccionario con rendimiento YTD, rendimiento de dividendos, dividendos por acción,
+      rendimiento anualizado y volatilidad anualizada.
+    """
+    rendimiento_anualizado, volatilidad_anualizada = calcular_rendimiento_volatilidad(datos_historicos, periodo=periodo, frecuencia=frecuencia,
+                                                                                      clave=clave)
+    return {
+        "rendimiento_ytd": calcular_rendimiento_ytd(datos_historicos),
+        "rendimiento_dividendos": calcular_rendimiento_dividendos(datos_historicos),
+        "dividendos_por_accion": calcular_dividendos_por_accion(datos_historicos),
+        "rendimiento": float(rendimiento_anualizado),
+        "volatilidad": float(volatilidad_anualizada)
+    }
+
+
 ############################ Optimizacion de portafolios ######################################
 
+@instrumentar
 def obtener_datos_para_optimizar(fondos_seleccionados):
     """
     Genera una lista con las métricas necesarias para optimizar el portafolio.
@@ -360,17 +674,17 @@ def obtener_datos_para_optimizar(fondos_seleccionados):
 
     for fondo in fondos_seleccionados:
         try:
-            # Obtener el archivo correspondiente
-            archivo_fondo = obtener_ruta_fondo(fondo)
-            with open(archivo_fondo, 'r') as f:
-                datos_historicos = json.load(f)["datos_historicos"]
+            # Obtener los datos desde la caché en proceso
+            data = cargar_datos_fondo(fondo)
+            datos_historicos = data["datos_historicos"]
 
             # Calcular métricas
             rendimiento_anualizado, volatilidad_anualizada = calcular_rendimiento_volatilidad(datos_historicos)
 
             # Agregar los resultados a la lista
             datos_para_optimizar.append({
-                "nombre": fondo,
+                "nombre": data.get("nombre", fondo),
+                "simbolo": fondo,
                 "rendimiento": rendimiento_anualizado,
                 "volatilidad": volatilidad_anualizada
             })
@@ -391,21 +705,88 @@ def normalizar_pesos(pesos):
     return [peso / suma for peso in pesos]
 
 
+def _datos_para_optimizar(datos_fondos):
+    """
+    Regresa las métricas a optimizar: las recibidas como argumento o, si no se pasan,
+    las que el frontend dejó en `st.session_state.fondos_data`.
+    """
+    if datos_fondos:
+        return datos_fondos
+
+    # Solo los llamados desde el frontend necesitan streamlit
+    import streamlit as st
+
+    if datos_fondos is None:
+        datos_fondos = st.session_state.get("fondos_data")
+
+    if not datos_fondos:
+        st.error("No se encontraron datos para optimizar. Verifica que seleccionaste fondos y calculaste las métricas.")
+        return None
+
+    return datos_fondos
+
+
+def volatilidad_portafolio(seleccionados, pesos, covarianza=None):
+    """
+    Calcula la volatilidad anualizada (en %) de un portafolio.
+
+    Parámetros:
+    - seleccionados: Fondos del portafolio (con simbolo y volatilidad en %).
+    - pesos: Pesos de cada fondo.
+    - covarianza: MatrizCovarianza (ver `covarianza.py`) o ModeloFactores (ver
+      `modelo_factores.py`) con correlaciones entre fondos. Sin ella se supone que los
+      fondos no están correlacionados.
+
+    Retorna:
+    - Volatilidad del portafolio en porcentaje.
+    """
+    if covarianza is None:
+        return np.sqrt(sum((fondo["volatilidad"] ** 2) * (peso ** 2) for fondo, peso in zip(seleccionados, pesos)))
+
+    pesos = np.asarray(pesos, dtype=np.float64)
+    if hasattr(covarianza, "volatilidad_portafolio"):
+        # Modelo de factores: O(n·k) sin armar la matriz completa
+        return float(covarianza.volatilidad_portafolio([fondo["simbolo"] for fondo in seleccionados], pesos) * 100)
+    matriz = covarianza.submatriz([fondo["simbolo"] for fondo in seleccionados])
+    return float(np.sqrt(pesos @ matriz @ pesos) * 100)
+
+
+def _mejores_fondos(datos_fondos, n_fondos, clave, mayores=True, filtro=None):
+    """
+    Selecciona los `n_fondos` mejores fondos según `clave` con un montículo
+    (`heapq.nlargest` / `nsmallest`): O(n log k) en lugar de ordenar toda la lista, y con
+    el mismo resultado que `sorted(...)[:n_fondos]`, empates incluidos.
+
+    Antes se descartan en un solo recorrido los fondos con rendimiento o volatilidad no
+    finitos (sin ellos el orden queda indefinido) y los que no pasan `filtro`.
+
+    Retorna:
+    - Lista de hasta `n_fondos` fondos, del mejor al peor.
+    """
+    candidatos = (fondo for fondo in datos_fondos
+                  if math.isfinite(fondo["rendimiento"]) and math.isfinite(fondo["volatilidad"])
+                  and (filtro is None or filtro(fondo)))
+    seleccionar = heapq.nlargest if mayores else heapq.nsmallest
+    return seleccionar(n_fondos, candidatos, key=clave)
+
+
 # Funciones de optimización (son 5)
 
 #Minimiza la volatilidad asignando más peso a los fondos con menor volatilidad.
-def optimizar_portafolio_conservador():
+@instrumentar
+def optimizar_portafolio_conservador(datos_fondos=None, n_fondos=5, covarianza=None):
     """
     Optimiza un portafolio conservador basado en mínima volatilidad.
     """
-    if "fondos_data" not in st.session_state or not st.session_state.fondos_data:
-        st.error("No se encontraron datos para optimizar. Verifica que seleccionaste fondos y calculaste las métricas.")
+    datos_fondos = _datos_para_optimizar(datos_fondos)
+    if not datos_fondos:
         return None, None, None, None
 
-    datos_fondos = st.session_state.fondos_data
-    datos_fondos = sorted(datos_fondos, key=lambda x: x["volatilidad"])  # Ordenar por volatilidad
-
-    seleccionados = datos_fondos[:5]  # Seleccionar los 5 con menor volatilidad
+    # Seleccionar los n_fondos con menor volatilidad (positiva, para poder usar su inverso)
+    seleccionados = _mejores_fondos(datos_fondos, n_fondos, lambda x: x["volatilidad"], mayores=False,
+                                    filtro=lambda x: x["volatilidad"] > 0)
+    if not seleccionados:
+        return None, None, None, None
 
     # Pesos dinámicos: inverso de la volatilidad
     pesos_iniciales = [1 / fondo["volatilidad"] for fondo in seleccionados]
@@ -413,27 +794,26 @@ def optimizar_portafolio_conservador():
 
     # Calcular rendimiento y volatilidad del portafolio
     rendimiento = sum(fondo["rendimiento"] * peso for fondo, peso in zip(seleccionados, pesos))
-    volatilidad = np.sqrt(sum((fondo["volatilidad"] ** 2) * (peso ** 2) for fondo, peso in zip(seleccionados, pesos)))
+    volatilidad = volatilidad_portafolio(seleccionados, pesos, covarianza)
 
     return seleccionados, pesos, rendimiento, volatilidad
 
 #Balancea rendimiento y riesgo utilizando el ratio de Sharpe.
-def optimizar_portafolio_moderado():
+@instrumentar
+def optimizar_portafolio_moderado(datos_fondos=None, n_fondos=5, covarianza=None):
     """
     Optimiza un portafolio moderado balanceando riesgo y rendimiento.
     """
-    if "fondos_data" not in st.session_state or not st.session_state.fondos_data:
-        st.error("No se encontraron datos para optimizar. Verifica que seleccionaste fondos y calculaste las métricas.")
+    datos_fondos = _datos_para_optimizar(datos_fondos)
+    if not datos_fondos:
         return None, None, None, None
 
-    datos_fondos = st.session_state.fondos_data
-
-    # Calcular ratio de Sharpe (rendimiento / volatilidad) y ordenar
+    # Calcular ratio de Sharpe (rendimiento / volatilidad)
     for fondo in datos_fondos:
         fondo["sharpe"] = fondo["rendimiento"] / fondo["volatilidad"] if fondo["volatilidad"] > 0 else 0
-    datos_fondos = sorted(datos_fondos, key=lambda x: x["sharpe"], reverse=True)
-
-    seleccionados = datos_fondos[:5]  # Seleccionar los 5 mejores Sharpe ratios
+    seleccionados = _mejores_fondos(datos_fondos, n_fondos, lambda x: x["sharpe"])  # Seleccionar los n_fondos mejores Sharpe ratios
+    if not seleccionados:
+        return None, None, None, None
 
     # Pesos dinámicos: basado en el ratio de Sharpe
     pesos_iniciales = [fondo["sharpe"] for fondo in seleccionados]
@@ -441,23 +821,23 @@ def optimizar_portafolio_moderado():
 
     # Calcular rendimiento y volatilidad del portafolio
     rendimiento = sum(fondo["rendimiento"] * peso for fondo, peso in zip(seleccionados, pesos))
-    volatilidad = np.sqrt(sum((fondo["volatilidad"] ** 2) * (peso ** 2) for fondo, peso in zip(seleccionados, pesos)))
+    volatilidad = volatilidad_portafolio(seleccionados, pesos, covarianza)
 
     return seleccionados, pesos, rendimiento, volatilidad
 
 # Maximiza el rendimiento esperado priorizando los fondos con mayor rendimiento.
-def optimizar_portafolio_agresivo():
+@instrumentar
+def optimizar_portafolio_agresivo(datos_fondos=None, n_fondos=5, covarianza=None):
     """
     Optimiza un portafolio agresivo priorizando máximo rendimiento.
     """
-    if "fondos_data" not in st.session_state or not st.session_state.fondos_data:
-        st.error("No se encontraron datos para optimizar. Verifica que seleccionaste fondos y calculaste las métricas.")
+    datos_fondos = _datos_para_optimizar(datos_fondos)
+    if not datos_fondos:
         return None, None, None, None
 
-    datos_fondos = st.session_state.fondos_data
-    datos_fondos = sorted(datos_fondos, key=lambda x: x["rendimiento"], reverse=True)  # Ordenar por rendimiento
-
-    seleccionados = datos_fondos[:5]  # Seleccionar los 5 con mayor rendimiento
+    seleccionados = _mejores_fondos(datos_fondos, n_fondos, lambda x: x["rendimiento"])  # Seleccionar los n_fondos con mayor rendimiento
+    if not seleccionados:
+        return None, None, None, None
 
     # Pesos dinámicos: basado en rendimiento
     pesos_iniciales = [fondo["rendimiento"] for fondo in seleccionados]
@@ -465,25 +845,24 @@ def optimizar_portafolio_agresivo():
 
     # Calcular rendimiento y volatilidad del portafolio
     rendimiento = sum(fondo["rendimiento"] * peso for fondo, peso in zip(seleccionados, pesos))
-    volatilidad = np.sqrt(sum((fondo["volatilidad"] ** 2) * (peso ** 2) for fondo, peso in zip(seleccionados, pesos)))
+    volatilidad = volatilidad_portafolio(seleccionados, pesos, covarianza)
 
     return seleccionados, pesos, rendimiento, volatilidad
 
 # Maximiza rendimiento priorizando fondos con alta volatilidad y rendimiento.
-def optimizar_portafolio_muy_agresivo():
+@instrumentar
+def optimizar_portafolio_muy_agresivo(datos_fondos=None, n_fondos=5, covarianza=None):
     """
     Optimiza un portafolio muy agresivo priorizando rendimiento y alta volatilidad.
     """
-    if "fondos_data" not in st.session_state or not st.session_state.fondos_data:
-        st.error("No se encontraron datos para optimizar. Verifica que seleccionaste fondos y calculaste las métricas.")
+    datos_fondos = _datos_para_optimizar(datos_fondos)
+    if not datos_fondos:
         return None, None, None, None
 
-    datos_fondos = st.session_state.fondos_data
-
-    # Ordenar por rendimiento y volatilidad
-    datos_fondos = sorted(datos_fondos, key=lambda x: (x["rendimiento"], x["volatilidad"]), reverse=True)
-
-    seleccionados = datos_fondos[:5]  # Seleccionar los 5 mejores combinados
+    # Seleccionar los n_fondos mejores combinados por rendimiento y volatilidad
+    seleccionados = _mejores_fondos(datos_fondos, n_fondos, lambda x: (x["rendimiento"], x["volatilidad"]))
+    if not seleccionados:
+        return None, None, None, None
 
     # Pesos dinámicos: rendimiento * volatilidad
     pesos_iniciales = [fondo["rendimiento"] * fondo["volatilidad"] for fondo in seleccionados]
@@ -491,29 +870,82 @@ def optimizar_portafolio_muy_agresivo():
 
     # Calcular rendimiento y volatilidad del portafolio
     rendimiento = sum(fondo["rendimiento"] * peso for fondo, peso in zip(seleccionados, pesos))
-    volatilidad = np.sqrt(sum((fondo["volatilidad"] ** 2) * (peso ** 2) for fondo, peso in zip(seleccionados, pesos)))
+    volatilidad = volatilidad_portafolio(seleccionados, pesos, covarianza)
 
     return seleccionados, pesos, rendimiento, volatilidad
 
 # Sigue las instrucciones del cliente de incluir todos los fondos, aunque en menor proporción
-def optimizar_portafolio_personalizado():
+@instrumentar
+def optimizar_portafolio_personalizado(datos_fondos=None, covarianza=None):
     """
     Optimiza un portafolio basado en los fondos seleccionados sin restricciones estrictas.
     """
-    if "fondos_data" not in st.session_state or not st.session_state.fondos_data:
-        st.error("No se encontraron datos para optimizar. Verifica que seleccionaste fondos y calculaste las métricas.")
+    datos_fondos = _datos_para_optimizar(datos_fondos)
+    if not datos_fondos:
         return None, None, None, None
 
-    datos_fondos = st.session_state.fondos_data
-
     # Pesos igualitarios para todos los fondos seleccionados
     pesos_iniciales = [1 for _ in datos_fondos]
     pesos = normalizar_pesos(pesos_iniciales)
 
     # Calcular rendimiento y volatilidad del portafolio
     rendimiento = sum(fondo["rendimiento"] * peso for fondo, peso in zip(datos_fondos, pesos))
-    volatilidad = np.sqrt(sum((fondo["volatilidad"] ** 2) * (peso ** 2) for fondo, peso in zip(datos_fondos, pesos)))
+    volatilidad = volatilidad_portafolio(datos_fondos, pesos, covarianza)
 
     return datos_fondos, pesos, rendimiento, volatilidad
 
 
+# Optimizador que corresponde a cada perfil del cuestionario
+OPTIMIZADORES_POR_PERFIL = {
+    "Conservador": optimizar_portafolio_conservador,
+    "Moderado": optimizar_portafolio_moderado,
+    "Agresivo": optimizar_portafolio_agresivo,
+    "Muy Agresivo": optimizar_portafolio_muy_agresivo,
+    "Personalizado": optimizar_portafolio_personalizado,
+}
+
+
+############################ Perfil del cliente y proyección ######################################
+
+# Rangos de puntaje del cuestionario (8 preguntas de 1 a 4 puntos) y su perfil
+PERFILES = [
+    (8, 14, "Conservador", "Buscas estabilidad y seguridad. Prefieres evitar pérdidas, incluso a costa de menores rendimientos."),
+    (15, 20, "Moderado", "Toleras algo de riesgo para lograr rendimientos superiores, pero priorizas la protección del capital."),
+    (21, 26, "Agresivo", "Dispuesto a asumir riesgos significativos para maximizar tus rendimientos."),
+    (27, 32, "Muy Agresivo", "Alta tolerancia al riesgo, enfocado en maximizar ganancias con alta volatilidad."),
+]
+
+
+def determinar_perfil(respuestas):
+    """
+    Determina el perfil de inversión a partir de las respuestas del cuestionario.
+
+    Parámetros:
+    - respuestas: Lista con los puntos de cada respuesta (1 = a, 2 = b, 3 = c, 4 = d).
+
+    Retorna:
+    - (perfil, descripcion, puntaje_total)
+    """
+    puntaje_total = sum(respuestas)
+    for minimo, maximo, perfil, descripcion in PERFILES:
+        if minimo <= puntaje_total <= maximo:
+            return perfil, descripcion, puntaje_total
+
+    # Igual que en el cuestionario original, cualquier puntaje fuera de rango cae en el último perfil
+    _, _, perfil, descripcion = PERFILES[-1]
+    return perfil, descripcion, puntaje_total
+
+
+def calcular_proyeccion_inversion(monto_inicial, rendimiento, anos_inversion):
+    """
+    Calcula el valor futuro de una inversión utilizando el gradiente geométrico (crecimiento compuesto).
+
+    Args:
+        monto_inicial: Monto inicial de la inversión.
+        rendimiento: Rendimiento anualizado de la inversión (como un decimal).
+        anos_inversion: Número de años para proyectar la inversión.
+
+    Returns:
+        float: Valor proyectado de la inversión.
+    """
+    return monto_inicial * (1 + rendimiento) ** anos_inversion
@@ -0,0 +1,157 @@
+# manifiesto.py
+import json
+import os
+import hashlib
+from datetime import datetime
+
+from registro_fondos import archivos_datos
+
+
+DIRECTORIO_DATOS = "Data"
+# El manifiesto empieza con punto para que `glob("Data/*.json")` no lo confunda con un fondo
+RUTA_MANIFIESTO = os.path.join(DIRECTORIO_DATOS, ".manifest.json")
+
+
+def leer_manifiesto(ruta=RUTA_MANIFIESTO):
+    """
+    Lee el manifiesto de datos que escribe el descargador (`ETFs.py`).
+
+    Retorna:
+    - Diccionario con la generación actual y la información por fondo. Si el archivo
+      no existe se regresa un manifiesto vacío con generación 0.
+    """
+    try:
+        with open(ruta, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"generacion": 0, "fondos": {}}
+
+
+def guardar_manifiesto(manifiesto, ruta=RUTA_MANIFIESTO):
+    """
+    Guarda el manifiesto de forma atómica (escribe a un temporal y lo renombra),
+    para que ningún lector vea un archivo a medio escribir.
+    """
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'w') as f:
+        json.dump(manifiesto, f, indent=4)
+    os.replace(temporal, ruta)
+
+
+def registrar_actualizacion(simbolos_actualizados, ruta=RUTA_MANIFIESTO, calidad=None, cuarentena=None):
+    """
+    Incrementa la generación del manifiesto y registra qué fondos se refrescaron.
+    La llama el descargador al terminar de escribir los archivos de `Data/`.
+
+    Parámetros:
+    - simbolos_actualizados: Diccionario {simbolo: ruta_del_archivo} de los fondos escritos.
+    - calidad: Diccionario {simbolo: reporte} de la validación (ver `calidad_datos.py`).
+    - cuarentena: Diccionario {simbolo: ruta_del_archivo} de las series que no se publicaron.
+
+    Retorna:
+    - El manifiesto actualizado.
+    """
+    calidad = calidad or {}
+    manifiesto = leer_manifiesto(ruta)
+    manifiesto["generacion"] = manifiesto.get("generacion", 0) + 1
+    fondos = manifiesto.setdefault("fondos", {})
+    en_cuarentena = manifiesto.setdefault("cuarentena", {})
+    ahora = datetime.now().isoformat(timespec="seconds")
+
+    for simbolo, archivo in simbolos_actualizados.items():
+        fondos[simbolo] = {
+            "archivo": os.path.basename(archivo),
+            "actualizado": ahora,
+            "generacion": manifiesto["generacion"]
+        }
+        if simbolo in calidad:
+            fondos[simbolo]["calidad"] = calidad[simbolo]
+        en_cuarentena.pop(simbolo, None)
+
+    # Las series en cuarentena no reemplazan al archivo publicado (si existe), solo se registran
+    for simbolo, archivo in (cuarentena or {}).items():
+        en_cuarentena[simbolo] = {
+            "archivo": os.path.relpath(archivo, os.path.dirname(ruta)),
+            "fecha": ahora,
+            "generacion": manifiesto["generacion"],
+            "calidad": calidad.get(simbolo)
+        }
+
+    guardar_manifiesto(manifiesto, ruta)
+    return manifiesto
+
+
+def registrar_calidad(reportes, ruta=RUTA_MANIFIESTO):
+    """
+    Guarda los reportes de calidad de los fondos ya publicados, sin cambiar la generación
+    (los datos no cambiaron, así que las cachés siguen vigentes).
+
+    Parámetros:
+    - reportes: Diccionario {simbolo: reporte} (ver `calidad_datos.validar_universo`).
+    """
+    manifiesto = leer_manifiesto(ruta)
+    fondos = manifiesto.setdefault("fondos", {})
+    for simbolo, reporte in reportes.items():
+        fondos.setdefault(simbolo, {})["calidad"] = reporte
+    guardar_manifiesto(manifiesto, ruta)
+    return manifiesto
+
+
+# Versión de cada carpeta que publica el vigilante de datos mientras corre ({directorio: version})
+_versiones_vigiladas = {}
+
+
+def firma_datos(generacion, estados):
+    """
+    Versión corta a partir de la generación del manifiesto y del estado de los archivos.
+
+    Parámetros:
+    - generacion: Generación del manifiesto.
+    - estados: Diccionario {ruta: (tamaño, fecha de modificación en ns)} de los archivos de datos.
+
+    Retorna:
+    - Cadena hexadecimal que identifica la versión de los datos.
+    """
+    firma = hashlib.sha1(str(generacion).encode())
+    for archivo in sorted(estados):
+        tamano, modificacion = estados[archivo]
+        firma.update(f"{os.path.basename(archivo)}:{tamano}:{modificacion}".encode())
+    return firma.hexdigest()[:16]
+
+
+def publicar_version(directorio, version):
+    """
+    Registra la versión vigente de una carpeta (la llama el vigilante de datos cada vez que
+    detecta un cambio). Con `version=None` se retira y `version_datos` vuelve a calcularla.
+    """
+    if version is None:
+        _versiones_vigiladas.pop(os.path.normpath(directorio), None)
+    else:
+        _versiones_vigiladas[os.path.normpath(directorio)] = version
+
+
+def version_datos(directorio=DIRECTORIO_DATOS):
+    """
+    Calcula una versión corta de los datos almacenados.
+
+    Combina la generación del manifiesto con el tamaño y la fecha de modificación de cada
+    archivo de `Data/` (JSON y compactos, también los fragmentados), de modo que la versión cambia tanto cuando el
+    descargador registra una actualización como cuando alguien reescribe un archivo a mano.
+
+    Revisar todos los archivos cuesta O(número de fondos), así que mientras el vigilante de
+    datos corre (ver `vigilante_datos.py`) se usa la versión que publicó con su última
+    revisión, y la firma completa solo se recalcula cuando el vigilante detecta un cambio.
+
+    Retorna:
+    - Cadena hexadecimal que identifica la versión de los datos.
+    """
+    vigilada = _versiones_vigiladas.get(os.path.normpath(directorio))
+    if vigilada is not None:
+        return vigilada
+
+    manifiesto = leer_manifiesto(os.path.join(directorio, ".manifest.json"))
+    estados = {}
+    for archivo in archivos_datos(directorio):
+        estado = os.stat(archivo)
+        estados[archivo] = (estado.st_size, estado.st_mtime_ns)
+    return firma_datos(manifiesto.get("generacion", 0), estados)
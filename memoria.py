@@ -0,0 +1,422 @@
+# memoria.py
+"""
+Instrumentación del uso de memoria y presupuesto de memoria por proceso.
+
+Cada ejecución de `app_front.py` carga históricos, arma listas de diccionarios y
+DataFrames por fondo, y las cachés de resultados guardan lo calculado; con muchas
+sesiones en la misma réplica la memoria crece hasta que el proceso se queda sin ella.
+
+Instrumentación (variable de entorno MEMORIA_INSTRUMENTAR):
+- "rss": mide el RSS del proceso antes y después de cada cargador, función de métricas
+  y optimizador decorado con `@instrumentar` (o de cada bloque `with medir(...)`).
+- "tracemalloc": además mide los bytes que Python deja asignados (más lento: solo para
+  depurar).
+Los totales se acumulan por etiqueta y por sesión de Streamlit (`iniciar_sesion`), se
+escriben en el logger "memoria" y se muestran en el panel de depuración de la app.
+
+Presupuesto (MEMORIA_MAX_MB): cuando el RSS del proceso lo excede se desalojan de la
+memoria los datos en caché menos usados primero (archivos de fondos cargados y
+resultados de todas las instancias de `CacheResultados`, en un solo orden LRU global)
+hasta volver a estar por debajo. Los resultados desalojados siguen en el backend
+compartido si lo hay. El presupuesto funciona aunque la instrumentación esté apagada.
+"""
+import os
+import gc
+import time
+import logging
+import functools
+import threading
+import contextlib
+import contextvars
+import tracemalloc
+from collections import OrderedDict
+
+
+MODOS = ("rss", "tracemalloc")
+MAX_SESIONES = 256            # Sesiones cuyos totales se conservan (las más recientes)
+INTERVALO_PRESUPUESTO = 1.0   # Segundos mínimos entre revisiones del presupuesto
+FRACCION_DESALOJO = 0.25      # Fracción de las entradas en caché que se desaloja en cada ronda
+
+logger = logging.getLogger("memoria")
+
+_modo = None
+_presupuesto_mb = None
+_candado = threading.Lock()
+_mediciones = {}                 # etiqueta -> totales
+_sesiones = OrderedDict()        # id de sesión -> totales (la más reciente al final)
+_presupuesto = {"revisiones": 0, "excedido": 0, "desalojos": 0, "ultimo_rss_mb": None}
+_ultima_revision = 0.0
+
+_sesion_actual = contextvars.ContextVar("memoria_sesion", default=None)
+_profundidad = contextvars.ContextVar("memoria_profundidad", default=0)
+
+
+def rss_mb():
+    """
+    Memoria residente actual del proceso en MB (Linux), o el pico si /proc no existe.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def configurar(modo=None, presupuesto_mb=None):
+    """
+    Activa la instrumentación y/o el presupuesto de memoria.
+
+    Parámetros:
+    - modo: None (apagada), "rss" o "tracemalloc".
+    - presupuesto_mb: RSS máximo del proceso antes de desalojar cachés (None: sin límite).
+    """
+    global _modo, _presupuesto_mb
+    if modo is not None and modo not in MODOS:
+        raise ValueError(f"Modo de instrumentación desconocido: {modo!r}. Usa uno de {MODOS}")
+    if modo == "tracemalloc" and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _modo, _presupuesto_mb = modo, presupuesto_mb
+
+    # Sin configuración de logging en el proceso, los mensajes de nivel INFO se perderían
+    if modo is not None and not logger.handlers and not logging.getLogger().handlers:
+        manejador = logging.StreamHandler()
+        manejador.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s"))
+        logger.addHandler(manejador)
+        logger.setLevel(logging.INFO)
+
+
+def configurar_desde_entorno():
+    """
+    Configura la instrumentación con MEMORIA_INSTRUMENTAR y MEMORIA_MAX_MB.
+
+    Se llama al importar el módulo, así que un valor inválido no debe impedir que la app
+    arranque: se reporta con una advertencia y esa parte queda apagada.
+    """
+    modo = os.environ.get("MEMORIA_INSTRUMENTAR", "").strip().lower() or None
+    if modo is not None and modo not in MODOS:
+        logger.warning("MEMORIA_INSTRUMENTAR=%r no es un modo conocido (%s); la instrumentación queda apagada",
+                       modo, ", ".join(MODOS))
+        modo = None
+
+    texto = os.environ.get("MEMORIA_MAX_MB", "").strip()
+    presupuesto = None
+    if texto:
+        try:
+            presupuesto = float(texto)
+        except ValueError:
+            pass
+        if presupuesto is None or not presupuesto > 0:
+            logger.warning("MEMORIA_MAX_MB=%r no es un número de MB positivo; el presupuesto queda apagado", texto)
+            presupuesto = None
+
+    configurar(modo, presupuesto)
+
+
+def instrumentacion_activa():
+    return _modo is not None
+
+
+def presupuesto_mb():
+    return _presupuesto_mb
+
+
+############################ Mediciones ######################################
+
+def _nuevos_totales():
+    return {"llamadas": 0, "segundos": 0.0, "rss_mb": 0.0, "asignado_bytes": 0, "max_asignado_bytes": 0}
+
+
+def _acumular(totales, segundos, delta_rss, asignado):
+    totales["llamadas"] += 1
+    totales["segundos"] += segundos
+    totales["rss_mb"] += delta_rss
+    totales["asignado_bytes"] += asignado
+    totales["max_asignado_bytes"] = max(totales["max_asignado_bytes"], asignado)
+
+
+@contextlib.contextmanager
+def medir(etiqueta):
+    """
+    Mide el tiempo, el cambio de RSS y (con tracemalloc) los bytes que deja asignados el
+    bloque. Solo el bloque más externo suma a los totales de la sesión, así que los
+    cargadores que se llaman dentro de un optimizador no se cuentan dos veces.
+
+    Con la instrumentación apagada solo revisa el presupuesto de memoria.
+    """
+    if _modo is None:
+        try:
+            yield
+        finally:
+            revisar_presupuesto()
+        return
+
+    profundidad = _profundidad.get()
+    marca = _profundidad.set(profundidad + 1)
+    rastreando = _modo == "tracemalloc" and tracemalloc.is_tracing()
+    asignado_inicio = tracemalloc.get_traced_memory()[0] if rastreando else 0
+    rss_inicio = rss_mb()
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        rss_fin = rss_mb()
+        asignado = tracemalloc.get_traced_memory()[0] - asignado_inicio if rastreando else 0
+        _profundidad.reset(marca)
+        sesion = _sesion_actual.get()
+
+        with _candado:
+            _acumular(_mediciones.setdefault(etiqueta, _nuevos_totales()), segundos, rss_fin - rss_inicio, asignado)
+            if sesion is not None and profundidad == 0 and sesion in _sesiones:
+                for totales in (_sesiones[sesion]["total"], _sesiones[sesion]["ejecucion"]):
+                    _acumular(totales, segundos, rss_fin - rss_inicio, asignado)
+                _sesiones[sesion]["rss_mb"] = rss_fin
+
+        logger.debug("%s: %.1f ms, RSS %.1f MB (%+.2f MB), %+.1f KB asignados%s", etiqueta, segundos * 1000,
+                     rss_fin, rss_fin - rss_inicio, asignado / 1024, f" [sesión {sesion}]" if sesion else "")
+        if profundidad == 0:
+            revisar_presupuesto(rss_fin)
+
+
+def instrumentar(funcion=None, etiqueta=None):
+    """
+    Decorador que mide cada llamada de la función con `medir` (etiqueta: su nombre).
+    Con la instrumentación y el presupuesto apagados la llamada pasa directo.
+
+        @instrumentar
+        def cargar_datos_fondo(...): ...
+    """
+    if funcion is None:
+        return lambda funcion: instrumentar(funcion, etiqueta)
+    etiqueta = etiqueta or funcion.__name__
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if _modo is None and _presupuesto_mb is None:
+            return funcion(*args, **kwargs)
+        with medir(etiqueta):
+            return funcion(*args, **kwargs)
+    return envoltura
+
+
+############################ Sesiones ######################################
+
+def iniciar_sesion(id_sesion):
+    """
+    Marca el inicio de una ejecución de la app para la sesión indicada: las mediciones
+    siguientes del mismo hilo (o tarea) se suman a sus totales. Registra en el log los
+    totales de la ejecución anterior de la sesión.
+    """
+    _sesion_actual.set(id_sesion)
+    if _modo is None:
+        revisar_presupuesto()
+        return
+
+    with _candado:
+        sesion = _sesiones.get(id_sesion)
+        if sesion is None:
+            sesion = _sesiones[id_sesion] = {"total": _nuevos_totales(), "ejecucion": _nuevos_totales(),
+                                             "ejecuciones": 0, "rss_mb": None, "inicio": time.time()}
+        _sesiones.move_to_end(id_sesion)
+        while len(_sesiones) > MAX_SESIONES:
+            _sesiones.popitem(last=False)
+        anterior, sesion["ejecucion"] = sesion["ejecucion"], _nuevos_totales()
+        sesion["ejecuciones"] += 1
+
+    if anterior["llamadas"]:
+        logger.info("sesión %s: %d llamadas medidas, %.0f ms, RSS %+.1f MB, %+.1f MB asignados en la ejecución anterior",
+                    id_sesion, anterior["llamadas"], anterior["segundos"] * 1000, anterior["rss_mb"],
+                    anterior["asignado_bytes"] / 2 ** 20)
+    revisar_presupuesto()
+
+
+def resumen_sesion(id_sesion=None):
+    """
+    Retorna:
+    - Copia de los totales de la sesión (la actual por defecto): "total" de todas sus
+      ejecuciones, "ejecucion" en curso, número de ejecuciones y último RSS medido; None
+      si la sesión no tiene mediciones.
+    """
+    id_sesion = id_sesion if id_sesion is not None else _sesion_actual.get()
+    with _candado:
+        sesion = _sesiones.get(id_sesion)
+        if sesion is None:
+            return None
+        return {"total": dict(sesion["total"]), "ejecucion": dict(sesion["ejecucion"]),
+                "ejecuciones": sesion["ejecuciones"], "rss_mb": sesion["rss_mb"]}
+
+
+def resumen():
+    """
+    Estado de la memoria del proceso para el panel de depuración y la API.
+
+    Retorna:
+    - Diccionario con el RSS actual, el modo de instrumentación, el presupuesto y sus
+      desalojos, los totales por etiqueta y por sesión, y (con tracemalloc) la memoria
+      rastreada actual y pico.
+    """
+    with _candado:
+        resultado = {
+            "rss_mb": rss_mb(),
+            "modo": _modo,
+            "presupuesto_mb": _presupuesto_mb,
+            "presupuesto": dict(_presupuesto),
+            "mediciones": {etiqueta: dict(totales) for etiqueta, totales in _mediciones.items()},
+            "sesiones": {id_sesion: {"total": dict(sesion["total"]), "ejecuciones": sesion["ejecuciones"],
+                                     "rss_mb": sesion["rss_mb"]}
+                         for id_sesion, sesion in _sesiones.items()},
+        }
+    if tracemalloc.is_tracing():
+        actual, pico = tracemalloc.get_traced_memory()
+        resultado["tracemalloc"] = {"actual_mb": actual / 2 ** 20, "pico_mb": pico / 2 ** 20}
+    return resultado
+
+
+def principales_asignaciones(n=10):
+    """
+    Líneas de código con más memoria asignada viva según tracemalloc.
+
+    Retorna:
+    - Lista de (archivo:línea, MB, bloques); vacía si tracemalloc no está activo.
+    """
+    if not tracemalloc.is_tracing():
+        return []
+    estadisticas = tracemalloc.take_snapshot().statistics("lineno")[:n]
+    return [(f"{e.traceback[0].filename}:{e.traceback[0].lineno}", e.size / 2 ** 20, e.count) for e in estadisticas]
+
+
+def reiniciar():
+    """
+    Borra los totales acumulados (no toca las cachés).
+    """
+    with _candado:
+        _mediciones.clear()
+        _sesiones.clear()
+        _presupuesto.update(revisiones=0, excedido=0, desalojos=0, ultimo_rss_mb=None)
+
+
+############################ Presupuesto ######################################
+
+class _ArchivosFondos:
+    """
+    Adapta la caché de archivos de `functions.py` a la interfaz de desalojo de
+    `CacheResultados` (`__len__`, `uso_mas_antiguo`, `desalojar_mas_antiguo`).
+    """
+    espacio = "archivos"
+
+    def __len__(self):
+        from functions import archivos_en_cache
+        return archivos_en_cache()
+
+    def uso_mas_antiguo(self):
+        from functions import uso_mas_antiguo_archivos
+        return uso_mas_antiguo_archivos()
+
+    def desalojar_mas_antiguo(self):
+        from functions import desalojar_archivo_mas_antiguo
+        import remuestreo
+
+        contenido = desalojar_archivo_mas_antiguo()
+        if contenido is None:
+            return False
+        # Sus remuestreos ocupan memoria del mismo presupuesto: se liberan con el archivo
+        remuestreo.descartar([contenido.get("simbolo")])
+        return True
+
+
+def _fuentes():
+    from cache_resultados import instancias
+    return [_ArchivosFondos()] + instancias()
+
+
+def desalojar_lru(n, fuentes=None):
+    """
+    Desaloja hasta `n` entradas de las cachés en memoria, siempre la de uso más antiguo
+    entre todas las fuentes.
+
+    Retorna:
+    - Número de entradas desalojadas.
+    """
+    fuentes = fuentes if fuentes is not None else _fuentes()
+    desalojadas = 0
+    while desalojadas < n:
+        candidatas = [(uso, i) for i, uso in enumerate(fuente.uso_mas_antiguo() for fuente in fuentes) if uso is not None]
+        if not candidatas:
+            break
+        if fuentes[min(candidatas)[1]].desalojar_mas_antiguo():
+            desalojadas += 1
+    return desalojadas
+
+
+def _devolver_memoria():
+    # glibc no devuelve al sistema la memoria liberada hasta que se le pide
+    try:
+        import ctypes
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def aplicar_presupuesto(presupuesto=None, max_rondas=8):
+    """
+    Si el RSS del proceso excede el presupuesto, desaloja por rondas una fracción de las
+    entradas en caché (las de uso más antiguo) hasta volver a estar dentro.
+
+    Parámetros:
+    - presupuesto: MB (por defecto el configurado).
+    - max_rondas: Rondas máximas de desalojo.
+
+    Retorna:
+    - Número de entradas desalojadas.
+    """
+    limite = presupuesto if presupuesto is not None else _presupuesto_mb
+    if limite is None:
+        return 0
+    rss_inicial = rss = rss_mb()
+    with _candado:
+        _presupuesto["revisiones"] += 1
+        _presupuesto["ultimo_rss_mb"] = rss
+    if rss <= limite:
+        return 0
+
+    desalojadas = 0
+    fuentes = _fuentes()
+    for _ in range(max_rondas):
+        entradas = sum(len(fuente) for fuente in fuentes)
+        if not entradas:
+            break
+        desalojadas += desalojar_lru(max(1, int(entradas * FRACCION_DESALOJO)), fuentes)
+        gc.collect()
+        _devolver_memoria()
+        rss = rss_mb()
+        if rss <= limite:
+            break
+
+    with _candado:
+        _presupuesto["excedido"] += 1
+        _presupuesto["desalojos"] += desalojadas
+        _presupuesto["ultimo_rss_mb"] = rss
+    nivel = logging.WARNING if rss > limite else logging.INFO
+    logger.log(nivel, "presupuesto de %.0f MB excedido (RSS %.1f MB): %d entradas desalojadas, RSS %.1f MB",
+               limite, rss_inicial, desalojadas, rss)
+    return desalojadas
+
+
+def revisar_presupuesto(rss=None):
+    """
+    Aplica el presupuesto a lo más una vez por INTERVALO_PRESUPUESTO segundos (la llaman
+    `medir` y `iniciar_sesion`). `rss` evita volver a leerlo si ya se midió y está dentro.
+    """
+    global _ultima_revision
+    if _presupuesto_mb is None or (rss is not None and rss <= _presupuesto_mb):
+        return 0
+    ahora = time.monotonic()
+    with _candado:
+        if ahora - _ultima_revision < INTERVALO_PRESUPUESTO:
+            return 0
+        _ultima_revision = ahora
+    return aplicar_presupuesto()
+
+
+configurar_desde_entorno()
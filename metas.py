@@ -0,0 +1,149 @@
+# metas.py
+"""
+Solucionador de metas: dado un monto objetivo al retiro, calcula la aportación mensual,
+el monto inicial, los años (edad de retiro) o el rendimiento necesarios.
+
+Todas las funciones reciben escalares o arreglos (un valor por cliente) y resuelven a
+todos los clientes a la vez. Mientras no haya aportaciones extraordinarias se usa la
+fórmula cerrada del valor futuro; con ellas se recurre al motor de `proyeccion.py`,
+aprovechando que el saldo es lineal en la aportación y en el monto inicial.
+"""
+from statistics import NormalDist
+import numpy as np
+
+from proyeccion import proyectar_flujos
+
+
+def rendimiento_con_confianza(rendimiento, volatilidad, anos, confianza=0.5):
+    """
+    Rendimiento anual efectivo que se alcanza con la probabilidad indicada.
+
+    Supone rendimientos logarítmicos anuales normales con media `rendimiento` y desviación
+    `volatilidad` (como los que calcula `calcular_rendimiento_volatilidad`, en decimal): el
+    rendimiento promedio del horizonte tiene desviación volatilidad / sqrt(años).
+
+    Parámetros:
+    - rendimiento, volatilidad: En decimal (0.08 = 8%).
+    - anos: Horizonte en años.
+    - confianza: Probabilidad de obtener al menos este rendimiento (0.5 = mediana).
+
+    Retorna:
+    - Rendimiento anual simple (decimal) por cliente.
+    """
+    z = NormalDist().inv_cdf(1 - confianza) if confianza != 0.5 else 0.0
+    anos = np.maximum(np.asarray(anos, dtype=np.float64), 1.0)
+    media_log = np.asarray(rendimiento, dtype=np.float64)
+    return np.expm1(media_log + z * np.asarray(volatilidad, dtype=np.float64) / np.sqrt(anos))
+
+
+def _factor_mensual(tasa):
+    # Valor al final del año de 1 peso aportado al final de cada mes, con la tasa mensual equivalente
+    mensual = (1 + tasa) ** (1 / 12) - 1
+    con_tasa = np.abs(mensual) > 1e-12
+    return np.where(con_tasa, np.expm1(12 * np.log1p(mensual)) / np.where(con_tasa, mensual, 1.0), 12.0)
+
+
+def valor_futuro(monto_inicial, rendimiento, anos, aportacion_mensual=0.0, crecimiento_aportacion=0.0):
+    """
+    Fórmula cerrada del saldo al retiro, equivalente a `proyectar_flujos` sin retiros ni extraordinarias:
+
+        VF = M (1+R)^n + A s(R) [(1+R)^n - (1+g)^n] / (R - g)
+
+    donde s(R) es el valor al cierre del año de 12 aportaciones mensuales de 1 peso.
+    """
+    R = np.asarray(rendimiento, dtype=np.float64)
+    g = np.asarray(crecimiento_aportacion, dtype=np.float64)
+    n = np.asarray(anos, dtype=np.float64)
+    crecimiento = (1 + R) ** n
+    diferencia = R - g
+    casi_iguales = np.abs(diferencia) < 1e-10
+    serie = np.where(casi_iguales, n * (1 + R) ** np.maximum(n - 1, 0),
+                     (crecimiento - (1 + g) ** n) / np.where(casi_iguales, 1.0, diferencia))
+    aportaciones = np.asarray(aportacion_mensual, dtype=np.float64) * _factor_mensual(R) * serie
+    return np.asarray(monto_inicial, dtype=np.float64) * crecimiento + aportaciones
+
+
+def aportacion_requerida(meta, monto_inicial, rendimiento, anos, crecimiento_aportacion=0.0,
+                         aportaciones_extraordinarias=None):
+    """
+    Aportación mensual necesaria para llegar a `meta` al terminar `anos`.
+
+    Retorna:
+    - Aportación mensual por cliente (0 si el monto inicial ya alcanza la meta).
+    """
+    if aportaciones_extraordinarias is None:
+        base = valor_futuro(monto_inicial, rendimiento, anos)
+        unitario = valor_futuro(0.0, rendimiento, anos, 1.0, crecimiento_aportacion)
+    else:
+        base = proyectar_flujos(monto_inicial, rendimiento, anos,
+                                aportaciones_extraordinarias=aportaciones_extraordinarias)["saldo_al_retiro"]
+        unitario = proyectar_flujos(0.0, rendimiento, anos, aportacion_mensual=1.0,
+                                    crecimiento_aportacion=crecimiento_aportacion)["saldo_al_retiro"]
+    faltante = np.asarray(meta, dtype=np.float64) - base
+    return np.atleast_1d(np.maximum(faltante, 0) / np.where(unitario > 0, unitario, np.inf))
+
+
+def monto_inicial_requerido(meta, rendimiento, anos, aportacion_mensual=0.0, crecimiento_aportacion=0.0,
+                            aportaciones_extraordinarias=None):
+    """
+    Monto inicial necesario para llegar a `meta` con las aportaciones indicadas.
+
+    Retorna:
+    - Monto inicial por cliente (0 si las aportaciones ya alcanzan la meta).
+    """
+    if aportaciones_extraordinarias is None:
+        flujos = valor_futuro(0.0, rendimiento, anos, aportacion_mensual, crecimiento_aportacion)
+    else:
+        flujos = proyectar_flujos(0.0, rendimiento, anos, aportacion_mensual=aportacion_mensual,
+                                  crecimiento_aportacion=crecimiento_aportacion,
+                                  aportaciones_extraordinarias=aportaciones_extraordinarias)["saldo_al_retiro"]
+    crecimiento = (1 + np.asarray(rendimiento, dtype=np.float64)) ** np.asarray(anos, dtype=np.float64)
+    return np.atleast_1d(np.maximum(np.asarray(meta, dtype=np.float64) - flujos, 0) / crecimiento)
+
+
+def anos_requeridos(meta, monto_inicial, rendimiento, aportacion_mensual=0.0, crecimiento_aportacion=0.0,
+                    max_anos=60):
+    """
+    Años mínimos (enteros) de ahorro para llegar a `meta`.
+
+    Evalúa la fórmula cerrada para todos los horizontes de 0 a `max_anos` en una sola
+    matriz (clientes x años) y toma el primero que alcanza la meta.
+
+    Retorna:
+    - Años por cliente; -1 si la meta no se alcanza dentro de `max_anos`.
+    """
+    horizontes = np.arange(max_anos + 1, dtype=np.float64)[None, :]
+    columna = lambda valor: np.atleast_1d(np.asarray(valor, dtype=np.float64))[:, None]
+    saldos = valor_futuro(columna(monto_inicial), columna(rendimiento), horizontes,
+                          columna(aportacion_mensual), columna(crecimiento_aportacion))
+    alcanza = saldos >= columna(meta)
+    return np.where(alcanza.any(axis=1), alcanza.argmax(axis=1), -1)
+
+
+def rendimiento_requerido(meta, monto_inicial, anos, aportacion_mensual=0.0, crecimiento_aportacion=0.0,
+                          minimo=-0.5, maximo=1.0, iteraciones=60):
+    """
+    Rendimiento anual necesario para llegar a `meta`, por bisección vectorizada.
+
+    El saldo crece con el rendimiento, así que cada iteración reduce a la mitad el
+    intervalo de todos los clientes a la vez.
+
+    Retorna:
+    - Rendimiento anual (decimal) por cliente; NaN si la meta no se alcanza ni con `maximo`.
+    """
+    meta = np.atleast_1d(np.asarray(meta, dtype=np.float64))
+    forma = np.broadcast(meta, np.asarray(monto_inicial), np.asarray(anos), np.asarray(aportacion_mensual)).shape
+    bajo = np.full(forma, float(minimo))
+    alto = np.full(forma, float(maximo))
+
+    saldo = lambda tasa: valor_futuro(monto_inicial, tasa, anos, aportacion_mensual, crecimiento_aportacion)
+    alcanzable = saldo(alto) >= meta
+    ya_alcanzada = saldo(bajo) >= meta
+
+    for _ in range(iteraciones):
+        medio = (bajo + alto) / 2
+        suficiente = saldo(medio) >= meta
+        alto = np.where(suficiente, medio, alto)
+        bajo = np.where(suficiente, bajo, medio)
+
+    return np.where(ya_alcanzada, minimo, np.where(alcanzable, alto, np.nan))
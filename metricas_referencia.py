@@ -0,0 +1,157 @@
+# metricas_referencia.py
+"""
+Métricas de cada fondo y de cada portafolio relativas a un índice de referencia.
+
+El universo ya incluye referencias naturales (SPY, ACWI, AGG, ILCTRAC.MX). Sobre el panel
+alineado de rendimientos diarios se calculan, para todas las columnas a la vez y usando
+solo las fechas en que la columna y la referencia tienen dato:
+
+- beta:             cov(r, b) / var(b)
+- alfa:             (media(r) - beta·media(b)) anualizada, en % (Jensen, tasa libre = 0)
+- tracking error:   desviación estándar anualizada de r - b, en %
+- information ratio: media anualizada de r - b entre el tracking error
+- captura alcista / bajista: rendimiento promedio de la columna en los días en que la
+  referencia sube (o baja) entre el de la referencia en esos días, en %
+- correlacion con la referencia
+
+Los rendimientos son simples (no logarítmicos). Los portafolios se rebalancean a diario y
+solo cuentan las fechas en que todos sus fondos tienen dato. Los resultados de todo el
+universo se guardan en caché por referencia y versión de los datos.
+"""
+import numpy as np
+
+from cache_resultados import CacheResultados
+from backends_cache import backend_compartido
+from manifiesto import version_datos
+from panel_fondos import obtener_panel_compartido
+
+
+REFERENCIAS = ("SPY", "ACWI", "AGG", "ILCTRAC.MX")
+DIAS_POR_ANO = 252
+MIN_OBSERVACIONES = 60
+METRICAS = ("beta", "alfa", "tracking_error", "information_ratio", "captura_alcista", "captura_bajista",
+            "correlacion", "observaciones")
+
+cache_referencias = CacheResultados(max_entradas=64, ttl_segundos=None, backend=backend_compartido(), espacio="referencia",
+                                    universo=True)
+
+
+def calcular_metricas_referencia(rendimientos, referencia, min_observaciones=MIN_OBSERVACIONES):
+    """
+    Métricas relativas de cada columna de `rendimientos` contra el vector `referencia`.
+
+    Parámetros:
+    - rendimientos: Matriz (fechas x columnas) de rendimientos simples diarios, con NaN
+      donde no hay dato.
+    - referencia: Vector (fechas,) de rendimientos simples del índice de referencia.
+    - min_observaciones: Fechas comunes mínimas; las columnas con menos quedan en NaN.
+
+    Retorna:
+    - Diccionario {metrica: arreglo (columnas,)} con las métricas de METRICAS.
+    """
+    rendimientos = np.asarray(rendimientos, dtype=np.float64)
+    referencia = np.asarray(referencia, dtype=np.float64)
+    validos = np.isfinite(rendimientos) & np.isfinite(referencia)[:, None]
+    R = np.where(validos, rendimientos, 0.0)
+    B = np.where(validos, referencia[:, None], 0.0)
+    A = R - B
+    n = validos.sum(axis=0).astype(np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        media_r, media_b, media_a = R.sum(axis=0) / n, B.sum(axis=0) / n, A.sum(axis=0) / n
+        # Momentos centrales muestrales por columna
+        correccion = n / (n - 1)
+        var_r = ((R * R).sum(axis=0) / n - media_r ** 2) * correccion
+        var_b = ((B * B).sum(axis=0) / n - media_b ** 2) * correccion
+        cov_rb = ((R * B).sum(axis=0) / n - media_r * media_b) * correccion
+        var_a = np.maximum(((A * A).sum(axis=0) / n - media_a ** 2) * correccion, 0.0)
+
+        beta = cov_rb / var_b
+        tracking_error = np.sqrt(var_a * DIAS_POR_ANO)
+        sube, baja = validos & (B > 0), validos & (B < 0)
+        captura_alcista = (np.where(sube, R, 0).sum(axis=0) / np.where(sube, B, 0).sum(axis=0)) * 100
+        captura_bajista = (np.where(baja, R, 0).sum(axis=0) / np.where(baja, B, 0).sum(axis=0)) * 100
+
+        metricas = {
+            "beta": beta,
+            "alfa": (media_r - beta * media_b) * DIAS_POR_ANO * 100,
+            "tracking_error": tracking_error * 100,
+            "information_ratio": np.where(tracking_error > 0, media_a * DIAS_POR_ANO / tracking_error, np.nan),
+            "captura_alcista": captura_alcista,
+            "captura_bajista": captura_bajista,
+            "correlacion": cov_rb / np.sqrt(var_r * var_b),
+            "observaciones": n,
+        }
+
+    insuficientes = n < min_observaciones
+    for nombre in METRICAS:
+        if nombre != "observaciones":
+            metricas[nombre] = np.where(insuficientes | ~np.isfinite(metricas[nombre]), np.nan, metricas[nombre])
+    return metricas
+
+
+def _panel_universo():
+    return obtener_panel_compartido()[0]
+
+
+def _rendimientos_simples(panel):
+    return np.expm1(panel.rendimientos)
+
+
+def _a_diccionarios(simbolos, metricas):
+    # {simbolo: {metrica: float o None}}
+    return {simbolo: {nombre: (None if np.isnan(metricas[nombre][i]) else float(metricas[nombre][i]))
+                      for nombre in METRICAS}
+            for i, simbolo in enumerate(simbolos)}
+
+
+def metricas_fondos(referencia="SPY"):
+    """
+    Métricas de todos los fondos del universo contra `referencia`, en caché por referencia
+    y versión de los datos.
+
+    Retorna:
+    - Diccionario {simbolo: {metrica: valor}} (None donde no hay observaciones suficientes).
+    """
+    version = version_datos()
+
+    def calcular():
+        panel = _panel_universo()
+        if referencia not in panel.simbolos:
+            raise ValueError(f"El índice de referencia {referencia!r} no está en 'Data'.")
+        rendimientos = _rendimientos_simples(panel)
+        metricas = calcular_metricas_referencia(rendimientos, rendimientos[:, panel.columnas([referencia])[0]])
+        return _a_diccionarios(panel.simbolos, metricas)
+
+    return cache_referencias.obtener_o_calcular(("fondos", (), version, referencia), calcular)
+
+
+def metricas_portafolios(universo, pesos, referencia="SPY"):
+    """
+    Métricas de un lote de portafolios contra `referencia`.
+
+    Parámetros:
+    - universo: Lista de símbolos de las columnas de `pesos`.
+    - pesos: Matriz (portafolios x fondos) o vector de pesos (ver `contribucion_riesgo.matriz_de_pesos`).
+    - referencia: Símbolo del índice de referencia.
+
+    Retorna:
+    - Lista con un diccionario {metrica: valor} por portafolio.
+    """
+    pesos = np.atleast_2d(np.asarray(pesos, dtype=np.float64))
+    clave = ("portafolios", (), version_datos(), referencia, tuple(universo), pesos.round(10).tobytes())
+
+    def calcular():
+        panel = _panel_universo()
+        if referencia not in panel.simbolos:
+            raise ValueError(f"El índice de referencia {referencia!r} no está en 'Data'.")
+        rendimientos = _rendimientos_simples(panel)
+        columnas = rendimientos[:, panel.columnas(universo)]
+        faltantes = ~np.isfinite(columnas)
+        # Rendimiento diario de todos los portafolios en un producto; NaN si falta algún fondo con peso
+        cartera = np.where(faltantes, 0.0, columnas) @ pesos.T
+        cartera[(faltantes.astype(np.float64) @ (pesos != 0).T) > 0] = np.nan
+        metricas = calcular_metricas_referencia(cartera, rendimientos[:, panel.columnas([referencia])[0]])
+        return list(_a_diccionarios(range(len(pesos)), metricas).values())
+
+    return cache_referencias.obtener_o_calcular(clave, calcular)
@@ -0,0 +1,182 @@
+# modelo_factores.py
+"""
+Modelo estadístico de factores (PCA) del universo de fondos.
+
+Los fondos de renta variable, deuda y materias primas del universo están muy
+correlacionados, así que unos pocos componentes principales explican casi toda su
+covarianza y el resto de la matriz completa es ruido de estimación. El modelo se ajusta
+una sola vez por versión de los datos sobre el panel alineado de rendimientos:
+
+    Σ ≈ B·Bᵀ + D
+
+- B (fondos x k): exposiciones de cada fondo a los k factores, los eigenvectores de la
+  covarianza muestral por pares completos escalados por la raíz de su eigenvalor (así
+  los factores tienen varianza 1 y no están correlacionados).
+- D: varianza específica de cada fondo, lo que los factores no explican.
+
+Con esta forma la varianza de un portafolio es ||Bᵀw||² + Σ_i d_i·w_i², que cuesta
+O(n·k) en lugar de O(n²) y no requiere armar la matriz completa. `ModeloFactores` tiene
+la misma interfaz que `MatrizCovarianza` (clave, submatriz, volatilidades), así que los
+optimizadores y las métricas de riesgo lo aceptan como estimador "factores".
+"""
+import numpy as np
+
+from covarianza import covarianza_muestral, DIAS_POR_ANO
+from cache_resultados import CacheResultados
+from backends_cache import backend_compartido
+from manifiesto import version_datos
+from panel_fondos import obtener_panel_compartido
+
+
+N_FACTORES = 5
+MIN_VARIANZA_ESPECIFICA = 1e-4  # Fracción de la varianza de cada fondo que se deja como específica
+
+# Modelos del universo completo: cada actualización de 'Data' purga las versiones anteriores
+cache_factores = CacheResultados(max_entradas=8, ttl_segundos=None, backend=backend_compartido(), espacio="factores",
+                                 universo=True)
+
+
+class ModeloFactores:
+    """
+    Covarianza anualizada (en decimales) de la forma B·Bᵀ + diag(d).
+
+    Atributos:
+    - simbolos: Símbolos en el orden de las filas de `exposiciones`.
+    - exposiciones: Matriz (n x k) de exposiciones a los factores.
+    - especificas: Vector (n,) de varianzas específicas.
+    - varianza_explicada: Fracción de la varianza total del universo que explica cada factor.
+    - metodo, configuracion: "factores" y ((n_factores, k), (min_observaciones, m)).
+    """
+
+    metodo = "factores"
+
+    def __init__(self, simbolos, exposiciones, especificas, varianza_explicada, configuracion=(), version=None):
+        self.simbolos = list(simbolos)
+        self.exposiciones = exposiciones
+        self.especificas = especificas
+        self.varianza_explicada = varianza_explicada
+        self.configuracion = tuple(configuracion)
+        self.version = version
+        self.observaciones = None
+        self._indice = {simbolo: i for i, simbolo in enumerate(self.simbolos)}
+
+    @property
+    def n_factores(self):
+        return self.exposiciones.shape[1]
+
+    @property
+    def clave(self):
+        # Mismo papel que MatrizCovarianza.clave en las claves de caché de los optimizadores
+        return (self.metodo, tuple(sorted(self.simbolos))) + self.configuracion
+
+    @property
+    def matriz(self):
+        """
+        Matriz completa (n x n). Solo para quien la necesite densa; el riesgo de los
+        portafolios se calcula sin ella (ver `volatilidad_portafolio`).
+        """
+        return self.exposiciones @ self.exposiciones.T + np.diag(self.especificas)
+
+    def subconjunto(self, simbolos):
+        """
+        Modelo restringido a los fondos indicados, en ese orden (mismos factores).
+        """
+        indices = [self._indice[simbolo] for simbolo in simbolos]
+        return ModeloFactores(simbolos, self.exposiciones[indices], self.especificas[indices],
+                              self.varianza_explicada, self.configuracion, self.version)
+
+    def submatriz(self, simbolos):
+        """
+        Covarianza densa de un subconjunto de fondos, en el orden indicado.
+        """
+        indices = [self._indice[simbolo] for simbolo in simbolos]
+        exposiciones = self.exposiciones[indices]
+        return exposiciones @ exposiciones.T + np.diag(self.especificas[indices])
+
+    def volatilidades(self):
+        """
+        Volatilidad anualizada de cada fondo (decimal).
+        """
+        return np.sqrt(np.einsum("ik,ik->i", self.exposiciones, self.exposiciones) + self.especificas)
+
+    def correlaciones(self):
+        volatilidades = self.volatilidades()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.nan_to_num(self.matriz / np.outer(volatilidades, volatilidades))
+
+    def volatilidad_portafolio(self, simbolos, pesos):
+        """
+        Volatilidad anualizada (decimal) de uno o muchos portafolios en O(n·k).
+
+        Parámetros:
+        - simbolos: Fondos de las columnas de `pesos`.
+        - pesos: Vector (n,) o matriz (portafolios x n).
+
+        Retorna:
+        - Escalar para un vector de pesos, o arreglo (portafolios,) para una matriz.
+        """
+        indices = [self._indice[simbolo] for simbolo in simbolos]
+        pesos = np.asarray(pesos, dtype=np.float64)
+        factores = pesos @ self.exposiciones[indices]          # (P, k): exposición del portafolio a cada factor
+        varianzas = np.sum(factores ** 2, axis=-1) + (pesos ** 2) @ self.especificas[indices]
+        return np.sqrt(np.maximum(varianzas, 0.0))
+
+    def exposiciones_portafolio(self, simbolos, pesos):
+        """
+        Exposición de un portafolio a cada factor (Bᵀw).
+        """
+        return np.asarray(pesos, dtype=np.float64) @ self.exposiciones[[self._indice[simbolo] for simbolo in simbolos]]
+
+
+def ajustar_modelo_factores(panel, n_factores=N_FACTORES, min_observaciones=60):
+    """
+    Ajusta el modelo de factores sobre los rendimientos del panel.
+
+    Parámetros:
+    - panel: PanelFondos (ver `panel_fondos.py`).
+    - n_factores: Número de componentes principales (se recorta al número de fondos).
+    - min_observaciones: Fechas comunes mínimas para estimar la covarianza de un par.
+
+    Retorna:
+    - ModeloFactores
+    """
+    covarianza, _ = covarianza_muestral(panel.rendimientos, min_observaciones)
+    covarianza = covarianza * DIAS_POR_ANO
+    k = max(1, min(n_factores, len(covarianza)))
+
+    valores, vectores = np.linalg.eigh(covarianza)
+    orden = np.argsort(valores)[::-1][:k]
+    valores, vectores = np.maximum(valores[orden], 0.0), vectores[:, orden]
+    exposiciones = vectores * np.sqrt(valores)
+
+    varianzas = np.diag(covarianza)
+    especificas = np.maximum(varianzas - np.einsum("ik,ik->i", exposiciones, exposiciones),
+                             MIN_VARIANZA_ESPECIFICA * varianzas)
+    total = np.trace(covarianza)
+    explicada = valores / total if total > 0 else np.zeros(k)
+
+    configuracion = (("n_factores", n_factores), ("min_observaciones", min_observaciones))
+    return ModeloFactores(panel.simbolos, exposiciones, especificas, explicada, configuracion, version=panel.version)
+
+
+def obtener_modelo_factores(n_factores=N_FACTORES, min_observaciones=60, cache=None):
+    """
+    Modelo de factores de todo el universo para la versión vigente de los datos. Se ajusta
+    una vez por versión y configuración y se comparte entre sesiones (y réplicas, con un
+    backend compartido).
+
+    Retorna:
+    - ModeloFactores (compartido: no se debe modificar).
+    """
+    cache = cache if cache is not None else cache_factores
+    version = version_datos()
+    clave = ("factores", (), version, (("n_factores", n_factores), ("min_observaciones", min_observaciones)))
+
+    def calcular():
+        panel = obtener_panel_compartido()[0]
+        return ajustar_modelo_factores(panel, n_factores, min_observaciones)
+
+    modelo = cache.obtener_o_calcular(clave, calcular)
+    modelo.exposiciones.flags.writeable = False
+    modelo.especificas.flags.writeable = False
+    return modelo
@@ -0,0 +1,332 @@
+# panel_fondos.py
+import os
+import sys
+import json
+import atexit
+import uuid
+import threading
+import numpy as np
+from multiprocessing import shared_memory
+
+from functions import cargar_historicos, listar_fondos, version_fondos
+from base_analitica import base_analitica
+from manifiesto import version_datos
+from cache_resultados import cache_paneles
+from memoria import instrumentar
+
+
+class PanelFondos:
+    """
+    Panel alineado de precios de cierre: una fila por fecha y una columna por fondo.
+
+    Las fechas son la unión de los calendarios de todos los fondos; cuando un fondo no
+    cotiza en una fecha su precio queda en NaN. Los rendimientos de cada fondo se calculan
+    sobre sus propias fechas (de un cierre al siguiente) y se colocan en la fila de la fecha
+    en que se observan, así que los días sin cotización quedan en NaN sin perder el
+    movimiento del precio: la suma de cada columna es log(último cierre / primer cierre).
+
+    Atributos:
+    - fechas: Arreglo datetime64[D] con las fechas del panel.
+    - simbolos: Lista de símbolos, en el orden de las columnas.
+    - precios: Matriz (n_fechas x n_fondos) de precios de cierre.
+    - rendimientos: Matriz (n_fechas - 1 x n_fondos) de rendimientos logarítmicos diarios.
+    - version: Versión de los datos con la que se construyó el panel.
+    """
+
+    def __init__(self, fechas, simbolos, precios, rendimientos=None, version=None, _recurso=None):
+        self.fechas = fechas
+        self.simbolos = list(simbolos)
+        self.precios = precios
+        if rendimientos is None:
+            rendimientos = rendimientos_por_fondo(precios)
+        self.rendimientos = rendimientos
+        self.version = version
+        # Referencia al segmento de memoria compartida o al memmap para que no se libere
+        self._recurso = _recurso
+        self._indice = {simbolo: i for i, simbolo in enumerate(self.simbolos)}
+
+    def columnas(self, simbolos):
+        """
+        Retorna los índices de columna de los símbolos indicados.
+        """
+        return [self._indice[simbolo] for simbolo in simbolos]
+
+    def nbytes(self):
+        return self.fechas.nbytes + self.precios.nbytes + self.rendimientos.nbytes
+
+
+def rendimientos_por_fondo(precios):
+    """
+    Rendimientos logarítmicos de cada columna calculados entre sus cierres disponibles.
+
+    Parámetros:
+    - precios: Matriz (n_fechas x n_fondos) con NaN en las fechas sin cotización.
+
+    Retorna:
+    - Matriz (n_fechas - 1 x n_fondos): la fila i tiene el rendimiento desde el cierre
+      anterior del fondo hasta la fecha i + 1, o NaN si el fondo no cotizó ese día.
+    """
+    rendimientos = np.full((max(len(precios) - 1, 0),) + precios.shape[1:], np.nan)
+    for columna in range(precios.shape[1]):
+        filas = np.flatnonzero(np.isfinite(precios[:, columna]))
+        cierres = precios[filas, columna]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rendimientos[filas[1:] - 1, columna] = np.log(cierres[1:] / cierres[:-1])
+    return rendimientos
+
+
+@instrumentar
+def construir_panel(simbolos=None):
+    """
+    Construye el panel alineado con los cierres de los fondos (`cargar_historicos`: de la
+    base analítica si está configurada, o de la caché en proceso).
+
+    Parámetros:
+    - simbolos: Lista de símbolos a incluir (por defecto todos los fondos de 'Data').
+
+    Retorna:
+    - PanelFondos con los precios de cierre alineados por fecha. Su versión es la de todo
+      'Data' para el universo completo, o la de los fondos indicados (`version_fondos`).
+    """
+    if simbolos is None:
+        version = version_datos()
+        simbolos = [fondo["simbolo"] for fondo in listar_fondos()]
+    else:
+        version = version_fondos(simbolos)
+
+    # Con la base analítica (BASE_ANALITICA) los cierres de todos los fondos salen de una sola
+    # consulta; sin ella se usan tal cual las listas de la caché en proceso, porque quedarse
+    # solo con "Close" ahí costaría copiar cada fila.
+    columnas = ["Close"] if base_analitica() is not None else None
+    historicos_fondos = cargar_historicos(simbolos, columnas=columnas)
+
+    series = []
+    for simbolo in simbolos:
+        historicos = historicos_fondos[simbolo]
+        fechas = np.array([entry["Date"] for entry in historicos], dtype="datetime64[D]")
+        cierres = np.array([entry.get("Close", np.nan) for entry in historicos], dtype=np.float64)
+        series.append((fechas, cierres))
+
+    fechas_panel = np.unique(np.concatenate([fechas for fechas, _ in series])) if series else np.array([], dtype="datetime64[D]")
+    precios = np.full((len(fechas_panel), len(simbolos)), np.nan)
+    for columna, (fechas, cierres) in enumerate(series):
+        precios[np.searchsorted(fechas_panel, fechas), columna] = cierres
+
+    return PanelFondos(fechas_panel, simbolos, precios, version=version)
+
+
+############################ Publicación en memoria compartida ######################################
+
+def _arreglos(panel):
+    # Orden fijo de los arreglos dentro del búfer compartido
+    return [("fechas", panel.fechas.astype("datetime64[D]").view(np.int64)),
+            ("precios", np.ascontiguousarray(panel.precios, dtype=np.float64)),
+            ("rendimientos", np.ascontiguousarray(panel.rendimientos, dtype=np.float64))]
+
+
+def publicar_panel(panel, modo="shm", directorio=None):
+    """
+    Copia el panel una sola vez a memoria compartida (o a un archivo mapeado en memoria)
+    y regresa un descriptor pequeño y serializable en JSON para que otros hilos o procesos
+    se adjunten sin copiar los datos.
+
+    Parámetros:
+    - panel: PanelFondos a publicar.
+    - modo: "shm" para `multiprocessing.shared_memory` o "mmap" para un archivo mapeado.
+    - directorio: Carpeta del archivo cuando modo="mmap" (por defecto 'Data/.panel').
+
+    Retorna:
+    - Descriptor (diccionario) con el nombre del recurso, desplazamientos, formas y símbolos.
+    """
+    arreglos = _arreglos(panel)
+    bloques, desplazamiento = {}, 0
+    for nombre, arreglo in arreglos:
+        bloques[nombre] = {"desplazamiento": desplazamiento, "forma": list(arreglo.shape)}
+        desplazamiento += arreglo.nbytes
+    total = max(desplazamiento, 1)
+
+    descriptor = {
+        "modo": modo,
+        "simbolos": panel.simbolos,
+        "version": panel.version,
+        "bloques": bloques,
+        "bytes": total,
+    }
+
+    if modo == "shm":
+        segmento = shared_memory.SharedMemory(create=True, size=total, name=f"panel_{uuid.uuid4().hex[:12]}")
+        bufer = segmento.buf
+        descriptor["recurso"] = segmento.name
+    elif modo == "mmap":
+        directorio = directorio or os.path.join("Data", ".panel")
+        os.makedirs(directorio, exist_ok=True)
+        ruta = os.path.join(directorio, f"panel_{panel.version}_{uuid.uuid4().hex[:8]}.bin")
+        segmento = np.memmap(ruta, dtype=np.uint8, mode="w+", shape=(total,))
+        bufer = segmento
+        descriptor["recurso"] = os.path.abspath(ruta)
+    else:
+        raise ValueError(f"Modo de publicación desconocido: {modo}")
+
+    for nombre, arreglo in arreglos:
+        inicio = bloques[nombre]["desplazamiento"]
+        destino = np.ndarray(arreglo.shape, dtype=arreglo.dtype, buffer=bufer, offset=inicio)
+        destino[...] = arreglo
+
+    if modo == "mmap":
+        segmento.flush()
+        del segmento
+    else:
+        _publicados[segmento.name] = segmento  # El proceso que publica conserva el segmento vivo
+
+    return descriptor
+
+
+def adjuntar_panel(descriptor):
+    """
+    Se adjunta de solo lectura al panel publicado por `publicar_panel`, sin copiar datos.
+
+    Parámetros:
+    - descriptor: Diccionario regresado por `publicar_panel` (o su JSON ya decodificado).
+
+    Retorna:
+    - PanelFondos cuyos arreglos apuntan directamente al búfer compartido.
+    """
+    if descriptor["modo"] == "shm":
+        recurso = _publicados.get(descriptor["recurso"]) or _abrir_segmento(descriptor["recurso"])
+        bufer = recurso.buf
+    else:
+        recurso = np.memmap(descriptor["recurso"], dtype=np.uint8, mode="r", shape=(descriptor["bytes"],))
+        bufer = recurso
+
+    vistas = {}
+    for nombre, dtype in (("fechas", np.int64), ("precios", np.float64), ("rendimientos", np.float64)):
+        bloque = descriptor["bloques"][nombre]
+        vista = np.ndarray(tuple(bloque["forma"]), dtype=dtype, buffer=bufer, offset=bloque["desplazamiento"])
+        vista.flags.writeable = False
+        vistas[nombre] = vista
+
+    return PanelFondos(vistas["fechas"].view("datetime64[D]"), descriptor["simbolos"], vistas["precios"],
+                       rendimientos=vistas["rendimientos"], version=descriptor["version"], _recurso=recurso)
+
+
+def _abrir_segmento(nombre):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=nombre, track=False)
+
+    segmento = shared_memory.SharedMemory(name=nombre)
+    # Antes de Python 3.13 el resource_tracker borra el segmento cuando termina cualquier
+    # proceso que solo se adjuntó; el único dueño debe ser el proceso que lo publicó.
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(segmento._name, "shared_memory")
+    except Exception:
+        pass
+    return segmento
+
+
+def liberar_panel(descriptor):
+    """
+    Libera el recurso de un panel publicado. Solo debe llamarlo el proceso que lo publicó,
+    cuando ningún lector lo siga usando.
+    """
+    if descriptor["modo"] == "shm":
+        segmento = _publicados.pop(descriptor["recurso"], None)
+        if segmento is not None:
+            try:
+                segmento.close()
+            except BufferError:
+                pass  # Aún hay vistas vivas; la memoria se libera cuando el último lector la suelta
+            segmento.unlink()
+    else:
+        try:
+            os.remove(descriptor["recurso"])
+        except FileNotFoundError:
+            pass
+
+
+############################ Panel compartido del proceso ######################################
+
+_publicados = {}  # nombre del segmento -> SharedMemory que este proceso creó
+_candado_panel = threading.Lock()
+_panel_actual = None
+_descriptor_actual = None
+_pid_actual = None  # proceso que publicó `_descriptor_actual`
+_panel_trabajador = None
+
+
+def obtener_panel_compartido(modo="shm"):
+    """
+    Regresa el panel de todo el universo para la versión vigente de los datos.
+
+    La primera llamada lo construye y lo publica; las demás sesiones e hilos del proceso
+    reciben el mismo objeto. Cuando la versión de los datos cambia, el panel se vuelve a
+    publicar y el anterior se libera.
+
+    Retorna:
+    - (panel, descriptor): el descriptor se puede pasar a procesos trabajadores.
+    """
+    global _panel_actual, _descriptor_actual, _pid_actual
+
+    version = version_datos()
+    with _candado_panel:
+        if _panel_actual is not None and _panel_actual.version == version:
+            return _panel_actual, _descriptor_actual
+
+        anterior = _descriptor_actual
+        # Con un backend compartido, una réplica nueva toma el panel ya construido en lugar de
+        # leer 'Data'. `cache_paneles` no guarda copia en memoria: la única es la publicada.
+        panel = cache_paneles.obtener_o_calcular(("universo", (), version), construir_panel)
+        descriptor = publicar_panel(panel, modo=modo)
+        del panel
+        _panel_actual = adjuntar_panel(descriptor)
+        _descriptor_actual = descriptor
+        _pid_actual = os.getpid()
+
+        if anterior is not None:
+            # Los lectores que aún tengan el panel anterior conservan su vista del segmento
+            # hasta soltarla; aquí solo se retira el nombre del sistema.
+            liberar_panel(anterior)
+
+        return _panel_actual, _descriptor_actual
+
+
+@atexit.register
+def _liberar_al_salir():
+    # El segmento publicado sobrevive al proceso si nadie lo retira (queda en /dev/shm y el
+    # resource_tracker lo reporta como fuga). Un hijo creado con fork no debe retirarlo.
+    global _descriptor_actual
+    with _candado_panel:
+        if _descriptor_actual is not None and _pid_actual == os.getpid():
+            liberar_panel(_descriptor_actual)
+            _descriptor_actual = None
+
+
+def guardar_descriptor(descriptor, ruta):
+    """
+    Escribe el descriptor en un archivo JSON para que otros procesos lo encuentren.
+    """
+    with open(ruta, 'w') as f:
+        json.dump(descriptor, f)
+
+
+def inicializar_trabajador(descriptor):
+    """
+    Inicializador para `ProcessPoolExecutor`: cada trabajador se adjunta al panel una vez.
+
+    Ejemplo:
+        ProcessPoolExecutor(initializer=inicializar_trabajador, initargs=(descriptor,))
+    """
+    global _panel_trabajador
+    if isinstance(descriptor, str):
+        with open(descriptor, 'r') as f:
+            descriptor = json.load(f)
+    _panel_trabajador = adjuntar_panel(descriptor)
+
+
+def panel_del_trabajador():
+    """
+    Retorna el panel adjuntado por `inicializar_trabajador` en el proceso actual.
+    """
+    if _panel_trabajador is None:
+        raise RuntimeError("El trabajador no tiene panel; usa inicializar_trabajador como initializer del pool.")
+    return _panel_trabajador
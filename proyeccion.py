@@ -0,0 +1,124 @@
+# proyeccion.py
+import numpy as np
+
+
+def _por_plan(valor, n_planes):
+    # Convierte un escalar o una lista en un arreglo (n_planes,)
+    return np.broadcast_to(np.asarray(valor, dtype=np.float64), (n_planes,)).copy()
+
+
+def _matriz_anual(valor, n_planes, n_anos):
+    # Escalar, (n_planes,) o (n_planes | 1, años) -> (n_planes, n_anos); si faltan años se repite el último
+    arreglo = np.asarray(valor, dtype=np.float64)
+    if arreglo.ndim < 2:
+        arreglo = np.reshape(arreglo, (-1, 1))
+    elif 0 < arreglo.shape[1] < n_anos:
+        arreglo = np.concatenate([arreglo, np.repeat(arreglo[:, -1:], n_anos - arreglo.shape[1], axis=1)], axis=1)
+    return np.broadcast_to(arreglo[:, :max(n_anos, 1)], (n_planes, max(n_anos, 1)))[:, :n_anos].copy()
+
+
+def proyectar_flujos(monto_inicial, rendimiento_anual, anos_aportacion, aportacion_mensual=0.0,
+                     crecimiento_aportacion=0.0, aportaciones_extraordinarias=None, retiro_mensual=0.0,
+                     anos_retiro=0, crecimiento_retiro=0.0):
+    """
+    Proyecta mes a mes el saldo de muchos planes de ahorro a la vez.
+
+    Todos los parámetros numéricos aceptan un escalar (igual para todos los planes) o un
+    arreglo con un valor por plan. El cálculo completo se hace con operaciones de arreglos
+    (productos y sumas acumuladas), sin ciclos de Python sobre planes ni meses:
+
+        saldo_t = G_t * (monto_inicial + Σ_{k<=t} flujo_k / G_k),   G_t = Π_{k<=t} (1 + r_k)
+
+    Parámetros:
+    - monto_inicial: Monto invertido al inicio.
+    - rendimiento_anual: Rendimiento anual como decimal. Puede ser un valor por plan o una
+      matriz (n_planes o 1, n_anos) con un rendimiento por año (por ejemplo, una trayectoria
+      que reduce el riesgo con el tiempo); si tiene menos años se repite el último.
+    - anos_aportacion: Años de ahorro (hasta la edad de retiro).
+    - aportacion_mensual: Aportación al final de cada mes durante los años de ahorro.
+    - crecimiento_aportacion: Crecimiento anual de la aportación mensual (decimal).
+    - aportaciones_extraordinarias: Montos únicos al inicio de cada año. Diccionario
+      {año: monto} común a todos los planes o matriz (n_planes, n_anos).
+    - retiro_mensual: Retiro al final de cada mes a partir del retiro (en pesos del primer año de retiro).
+    - anos_retiro: Años durante los que se retira después de los años de ahorro.
+    - crecimiento_retiro: Crecimiento anual del retiro (por ejemplo, la inflación).
+
+    Retorna:
+    - Diccionario con:
+      - "saldos_mensuales": (n_planes, n_meses + 1)
+      - "saldos_anuales": (n_planes, n_anos + 1)
+      - "saldo_al_retiro": saldo al terminar los años de ahorro, por plan
+      - "saldo_final": saldo al terminar el horizonte de cada plan
+      - "total_aportado" y "total_retirado": flujos acumulados por plan
+      - "mes_agotado": mes en que el saldo se agotó (-1 si nunca se agotó)
+    """
+    montos = np.atleast_1d(np.asarray(monto_inicial, dtype=np.float64))
+    rendimientos = np.asarray(rendimiento_anual, dtype=np.float64)
+    n_planes = max(montos.shape[0], rendimientos.shape[0] if rendimientos.ndim else 1,
+                   *(np.atleast_1d(np.asarray(v)).shape[0] for v in (anos_aportacion, aportacion_mensual,
+                                                                     crecimiento_aportacion, retiro_mensual,
+                                                                     anos_retiro, crecimiento_retiro)))
+
+    montos = _por_plan(monto_inicial, n_planes)
+    anos_ahorro = _por_plan(anos_aportacion, n_planes).astype(np.int64)
+    anos_retiro = _por_plan(anos_retiro, n_planes).astype(np.int64)
+    n_anos = int((anos_ahorro + anos_retiro).max()) if n_planes else 0
+    n_meses = 12 * n_anos
+
+    # Rendimiento mensual equivalente, año por año
+    tasas_anuales = _matriz_anual(rendimientos, n_planes, n_anos)
+    tasas_mensuales = np.repeat((1 + tasas_anuales) ** (1 / 12) - 1, 12, axis=1)
+
+    meses = np.arange(1, n_meses + 1)
+    ahorro = meses[None, :] <= 12 * anos_ahorro[:, None]
+    horizonte = meses[None, :] <= 12 * (anos_ahorro + anos_retiro)[:, None]
+    en_retiro = horizonte & ~ahorro
+
+    # Aportaciones mensuales que crecen cada año (las potencias se calculan por año, no por mes)
+    anos = np.arange(n_anos)
+    factor_aportacion = (1 + _por_plan(crecimiento_aportacion, n_planes)[:, None]) ** anos[None, :]
+    aportaciones = _por_plan(aportacion_mensual, n_planes)[:, None] * np.repeat(factor_aportacion, 12, axis=1) * ahorro
+
+    # Retiros mensuales que crecen cada año a partir del primer año de retiro
+    anos_desde_retiro = np.maximum(anos[None, :] - anos_ahorro[:, None], 0)
+    factor_retiro = (1 + _por_plan(crecimiento_retiro, n_planes)[:, None]) ** anos_desde_retiro
+    retiros = _por_plan(retiro_mensual, n_planes)[:, None] * np.repeat(factor_retiro, 12, axis=1) * en_retiro
+
+    # Aportaciones extraordinarias al inicio de cada año (el año 0 se suma al monto inicial)
+    extraordinarias = np.zeros((n_planes, n_anos + 1))
+    if isinstance(aportaciones_extraordinarias, dict):
+        for ano, monto in aportaciones_extraordinarias.items():
+            if 0 <= int(ano) <= n_anos:
+                extraordinarias[:, int(ano)] += monto
+    elif aportaciones_extraordinarias is not None:
+        matriz = np.asarray(aportaciones_extraordinarias, dtype=np.float64)
+        matriz = np.broadcast_to(matriz, (n_planes, matriz.shape[-1]))
+        columnas = min(matriz.shape[1], n_anos + 1)
+        extraordinarias[:, :columnas] += matriz[:, :columnas]
+
+    flujos = aportaciones - retiros
+    # La extraordinaria del año y (y >= 1) entra al cierre del mes 12y, antes de crecer en el año y
+    flujos[:, 11::12] += extraordinarias[:, 1:n_anos + 1] * (12 * np.arange(1, n_anos + 1)[None, :]
+                                                             <= 12 * (anos_ahorro + anos_retiro)[:, None])
+    montos = montos + extraordinarias[:, 0]
+
+    # Factores de crecimiento acumulado y saldo sin restricción
+    crecimiento = np.cumprod(1 + tasas_mensuales * horizonte, axis=1)
+    saldos = crecimiento * (montos[:, None] + np.cumsum(flujos / crecimiento, axis=1))
+    saldos = np.concatenate([montos[:, None], saldos], axis=1)
+
+    # Solo los retiros pueden volver negativo el saldo: desde ese mes el plan queda agotado
+    agotado = np.maximum.accumulate(saldos < 0, axis=1)
+    saldos = np.where(agotado, 0.0, saldos)
+    mes_agotado = np.where(agotado.any(axis=1), agotado.argmax(axis=1), -1)
+
+    indice_plan = np.arange(n_planes)
+    return {
+        "saldos_mensuales": saldos,
+        "saldos_anuales": saldos[:, ::12],
+        "saldo_al_retiro": saldos[indice_plan, 12 * anos_ahorro],
+        "saldo_final": saldos[indice_plan, 12 * (anos_ahorro + anos_retiro)],
+        "total_aportado": montos + (aportaciones.sum(axis=1) + extraordinarias[:, 1:].sum(axis=1)),
+        "total_retirado": (retiros * ~agotado[:, 1:]).sum(axis=1),
+        "mes_agotado": mes_agotado,
+    }
@@ -0,0 +1,269 @@
+# registro_fondos.py
+"""
+Registro externo del universo de fondos y almacenamiento fragmentado por símbolo.
+
+Registro: la lista de fondos (simbolo, nombre, descripcion) vive en un archivo CSV
+(Data/registro_fondos.csv, o el indicado en la variable de entorno REGISTRO_FONDOS) en
+lugar de estar escrita en `ETFs.py`. El descargador lo recorre y `listar_fondos` lo usa
+para saber qué fondos existen sin abrir el archivo de cada uno.
+
+Fragmentos: con miles de fondos, buscar el archivo de un fondo con
+`glob("Data/{ticker}_*.json")` recorre toda la carpeta en cada llamada. Los archivos
+nuevos se guardan en `Data/fragmentos/<xx>/`, donde <xx> son los dos primeros dígitos
+hexadecimales del SHA-1 del ticker (256 carpetas de tamaño parecido). El listado de cada
+carpeta se lee solo cuando se busca un fondo que cae en ella, se guarda ordenado y se
+vuelve a leer únicamente si la carpeta cambió; la búsqueda por prefijo es una bisección.
+Los archivos que siguen directamente en 'Data' (el formato anterior) se encuentran igual.
+
+Para mover los archivos existentes a sus fragmentos:
+
+    python registro_fondos.py --migrar [--directorio Data]
+"""
+import os
+import re
+import csv
+import glob
+import time
+import bisect
+import hashlib
+import argparse
+import threading
+
+
+DIRECTORIO_DATOS = "Data"
+DIRECTORIO_FRAGMENTOS = "fragmentos"
+RUTA_REGISTRO = os.path.join(DIRECTORIO_DATOS, "registro_fondos.csv")
+CAMPOS_REGISTRO = ("simbolo", "nombre", "descripcion")
+# Un listado de carpeta se guarda solo si la carpeta no cambió en este lapso: dentro de la
+# resolución de la fecha de modificación un archivo nuevo podría no cambiarla
+MARGEN_LISTADO_NS = 1_000_000_000
+
+
+_CARACTERES_ESPECIALES = re.compile(r'[^\w\s]')
+
+
+def sanitize_filename(filename):
+    """
+    Reemplaza caracteres especiales y espacios en un nombre de archivo por guiones bajos.
+    """
+    return _CARACTERES_ESPECIALES.sub('_', filename).replace(' ', '_')
+
+
+def nombre_archivo(simbolo, nombre):
+    """
+    Nombre base (sin extensión) del archivo de datos de un fondo.
+    """
+    return f"{sanitize_filename(simbolo)}_{sanitize_filename(nombre)}"
+
+
+def fragmento(simbolo):
+    """
+    Carpeta de fragmento ("00" a "ff") que le corresponde a un ticker.
+    """
+    return _fragmento_normalizado(sanitize_filename(simbolo))
+
+
+def _fragmento_normalizado(ticker_normalizado):
+    return hashlib.sha1(ticker_normalizado.encode()).hexdigest()[:2]
+
+
+def ruta_datos_fondo(simbolo, nombre, directorio=DIRECTORIO_DATOS, extension=".json"):
+    """
+    Ruta donde el descargador guarda los datos de un fondo (dentro de su fragmento).
+    """
+    return os.path.join(directorio, DIRECTORIO_FRAGMENTOS, fragmento(simbolo), nombre_archivo(simbolo, nombre) + extension)
+
+
+############################ Registro ######################################
+
+def ruta_registro():
+    return os.environ.get("REGISTRO_FONDOS", RUTA_REGISTRO)
+
+
+# ruta -> (fecha de modificación, fondos)
+_registros = {}
+_candado_registros = threading.Lock()
+
+
+def cargar_registro(ruta=None):
+    """
+    Lee el registro de fondos. El archivo solo se vuelve a leer si cambió.
+
+    Parámetros:
+    - ruta: Archivo CSV con las columnas simbolo, nombre y descripcion (por defecto el de
+      REGISTRO_FONDOS o Data/registro_fondos.csv).
+
+    Retorna:
+    - Lista de diccionarios con nombre, simbolo y descripcion, en el orden del archivo.
+    """
+    ruta = ruta or ruta_registro()
+    modificado = os.stat(ruta).st_mtime_ns
+
+    with _candado_registros:
+        entrada = _registros.get(ruta)
+    if entrada is None or entrada[0] != modificado:
+        fondos, vistos = [], set()
+        with open(ruta, 'r', encoding="utf-8", newline="") as f:
+            lector = csv.DictReader(f)
+            faltantes = [campo for campo in CAMPOS_REGISTRO if campo not in (lector.fieldnames or [])]
+            if faltantes:
+                raise ValueError(f"El registro {ruta} no tiene las columnas {faltantes}.")
+            for linea, fila in enumerate(lector, start=2):
+                simbolo = (fila["simbolo"] or "").strip()
+                if not simbolo:
+                    raise ValueError(f"Fondo sin símbolo en la línea {linea} de {ruta}.")
+                if simbolo in vistos:
+                    raise ValueError(f"El fondo {simbolo} aparece más de una vez en {ruta} (línea {linea}).")
+                vistos.add(simbolo)
+                fondos.append({"nombre": (fila["nombre"] or simbolo).strip(), "simbolo": simbolo,
+                               "descripcion": (fila["descripcion"] or "").strip()})
+        entrada = (modificado, fondos)
+        with _candado_registros:
+            _registros[ruta] = entrada
+
+    return [dict(fondo) for fondo in entrada[1]]
+
+
+def guardar_registro(fondos, ruta=None):
+    """
+    Escribe el registro de fondos (por ejemplo, para agregar los de otro proveedor).
+    """
+    ruta = ruta or ruta_registro()
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'w', encoding="utf-8", newline="") as f:
+        escritor = csv.DictWriter(f, fieldnames=CAMPOS_REGISTRO, extrasaction="ignore", lineterminator="\n")
+        escritor.writeheader()
+        escritor.writerows(fondos)
+    os.replace(temporal, ruta)
+
+
+############################ Fragmentos ######################################
+
+# carpeta -> (fecha de modificación, nombres ordenados)
+_listados = {}
+_candado_listados = threading.Lock()
+
+
+def _listado(directorio):
+    """
+    Nombres de archivo de una carpeta, ordenados. Se lee la carpeta la primera vez que se
+    usa y de nuevo solo cuando cambia su fecha de modificación.
+    """
+    try:
+        modificado = os.stat(directorio).st_mtime_ns
+    except FileNotFoundError:
+        return []
+
+    with _candado_listados:
+        entrada = _listados.get(directorio)
+    if entrada is not None and entrada[0] == modificado:
+        return entrada[1]
+
+    nombres = sorted(nombre for nombre in os.listdir(directorio) if not nombre.startswith("."))
+    if time.time_ns() - modificado > MARGEN_LISTADO_NS:
+        with _candado_listados:
+            _listados[directorio] = (modificado, nombres)
+    return nombres
+
+
+def _buscar(directorio, prefijo, extension, listado=_listado):
+    nombres = listado(directorio)
+    rutas = []
+    for i in range(bisect.bisect_left(nombres, prefijo), len(nombres)):
+        if not nombres[i].startswith(prefijo):
+            break
+        if nombres[i].endswith(extension):
+            rutas.append(os.path.join(directorio, nombres[i]))
+    return rutas
+
+
+def rutas_fondo(simbolo, directorio=DIRECTORIO_DATOS, listado=_listado):
+    """
+    Archivos de datos de un fondo: en su fragmento y en la carpeta plana anterior.
+
+    Solo se lee el listado de las carpetas del fragmento del fondo (y el de la carpeta
+    plana, una vez), no el de todo 'Data'.
+
+    Retorna:
+    - Tupla (rutas JSON, rutas compactas .azc).
+    """
+    ticker_normalizado = sanitize_filename(simbolo)
+    prefijo = ticker_normalizado + "_"
+    carpeta = os.path.join(DIRECTORIO_FRAGMENTOS, _fragmento_normalizado(ticker_normalizado))
+    compacto = os.path.join(directorio, "compacto")
+    archivos_json = (_buscar(os.path.join(directorio, carpeta), prefijo, ".json", listado)
+                     + _buscar(directorio, prefijo, ".json", listado))
+    compactos = (_buscar(os.path.join(compacto, carpeta), prefijo, ".azc", listado)
+                 + _buscar(compacto, prefijo, ".azc", listado))
+    return archivos_json, compactos
+
+
+def fondos_con_datos(fondos, directorio=DIRECTORIO_DATOS):
+    """
+    Filtra los fondos (diccionarios con "simbolo") que tienen algún archivo de datos.
+    Cada carpeta se consulta una sola vez aunque tenga cientos de fondos del registro.
+    """
+    listados = {}
+
+    def listado(carpeta):
+        if carpeta not in listados:
+            listados[carpeta] = _listado(carpeta)
+        return listados[carpeta]
+
+    return [fondo for fondo in fondos if any(rutas_fondo(fondo["simbolo"], directorio, listado))]
+
+
+def archivos_datos(directorio=DIRECTORIO_DATOS):
+    """
+    Todos los archivos de datos de 'Data' (JSON y compactos, planos y fragmentados). Lo
+    usan el manifiesto y el vigilante, que sí necesitan recorrer todo el universo.
+    """
+    compacto = os.path.join(directorio, "compacto")
+    return (glob.glob(os.path.join(directorio, "*.json"))
+            + glob.glob(os.path.join(directorio, DIRECTORIO_FRAGMENTOS, "*", "*.json"))
+            + glob.glob(os.path.join(compacto, "*.azc"))
+            + glob.glob(os.path.join(compacto, DIRECTORIO_FRAGMENTOS, "*", "*.azc")))
+
+
+def migrar_a_fragmentos(directorio=DIRECTORIO_DATOS):
+    """
+    Mueve los archivos de fondos de la carpeta plana (y de 'compacto') a sus fragmentos.
+    Los reportes sin símbolo (fondos_no_disponibles.json, etc.) se quedan donde están.
+
+    Retorna:
+    - Lista de (ruta anterior, ruta nueva).
+    """
+    from functions import leer_encabezado_fondo
+    from almacenamiento_compacto import leer_encabezado_compacto
+
+    movidos = []
+    compacto = os.path.join(directorio, "compacto")
+    for origen, leer_encabezado in ((directorio, leer_encabezado_fondo), (compacto, leer_encabezado_compacto)):
+        extension = ".azc" if origen == compacto else ".json"
+        for ruta in sorted(glob.glob(os.path.join(origen, "*" + extension))):
+            encabezado = leer_encabezado(ruta)
+            if not isinstance(encabezado, dict) or "simbolo" not in encabezado:
+                continue
+            destino = os.path.join(origen, DIRECTORIO_FRAGMENTOS, fragmento(encabezado["simbolo"]), os.path.basename(ruta))
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            os.replace(ruta, destino)
+            movidos.append((ruta, destino))
+    return movidos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Registro de fondos y almacenamiento fragmentado de 'Data'.")
+    parser.add_argument("--directorio", default=DIRECTORIO_DATOS, help="Carpeta de datos.")
+    parser.add_argument("--migrar", action="store_true", help="Mueve los archivos planos a sus fragmentos.")
+    argumentos = parser.parse_args()
+
+    if argumentos.migrar:
+        movidos = migrar_a_fragmentos(argumentos.directorio)
+        print(f"{len(movidos)} archivos movidos a sus fragmentos")
+
+    fondos = cargar_registro()
+    con_datos = fondos_con_datos(fondos, argumentos.directorio)
+    print(f"Registro {ruta_registro()}: {len(fondos)} fondos, {len(con_datos)} con datos en '{argumentos.directorio}'")
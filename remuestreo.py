@@ -0,0 +1,180 @@
+# remuestreo.py
+"""
+Remuestreo de los históricos diarios a frecuencia semanal, mensual o anual.
+
+Cada periodo agrega las filas diarias con operaciones `reduceat` de numpy (sin ciclos de
+Python): OHLC (primer Open, máximo High, mínimo Low, último Close), volumen, dividendos y
+ganancias de capital sumados, splits multiplicados, rendimiento total y número de días con
+precio. Los cierres que guarda el descargador ya vienen ajustados por dividendos y splits
+(`history()` de yfinance usa auto_adjust=True), así que el rendimiento total sale solo de
+ellos; sumarles las distribuciones las contaría dos veces.
+
+Los resultados se guardan en caché solo cuando quien llama da una clave estable de los
+históricos, por ejemplo (simbolo, version_fondos([simbolo])): la caché no guarda las
+listas, así que no mantiene vivos históricos que ya nadie usa, y las listas temporales
+(filtros de `cargar_historicos`, la base analítica) simplemente no se guardan. Una clave
+con versión vieja deja de pedirse y sale de la caché por antigüedad.
+"""
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+FRECUENCIAS = ("D", "W", "M", "A")
+
+# Periodos por año para anualizar. Semanas, meses y años no dependen del calendario de
+# la bolsa; para datos diarios se conserva la convención de 252 días hábiles.
+PERIODOS_POR_ANO = {"D": 252, "W": 52, "M": 12, "A": 1}
+
+MAX_ENTRADAS = 512
+
+_cache = OrderedDict()
+_candado = threading.Lock()
+
+
+def _etiquetas_periodo(fechas, frecuencia):
+    # Un entero por fila que identifica su periodo (las filas vienen ordenadas por fecha)
+    dias = fechas.astype("datetime64[D]").view(np.int64)
+    if frecuencia == "D":
+        return dias
+    if frecuencia == "W":
+        return (dias + 3) // 7  # Semanas de lunes a domingo (el 1970-01-01 fue jueves)
+    if frecuencia == "M":
+        return fechas.astype("datetime64[M]").view(np.int64)
+    if frecuencia == "A":
+        return fechas.astype("datetime64[Y]").view(np.int64)
+    raise ValueError(f"Frecuencia desconocida: {frecuencia}. Usa una de {FRECUENCIAS}")
+
+
+def columnas_diarias(datos_historicos, clave=None):
+    """
+    Convierte la lista de filas diarias en columnas de numpy.
+
+    Las filas sin precio de cierre válido se descartan, porque no aportan a ningún periodo.
+    Con `clave` el resultado se guarda en caché (ver el docstring del módulo).
+
+    Retorna:
+    - Diccionario con "Date" (datetime64[D]) y una columna float64 por campo.
+    """
+    def cacheado():
+        campos = ("Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits", "Capital Gains")
+        columnas = {"Date": np.array([entry["Date"] for entry in datos_historicos], dtype="datetime64[D]")}
+        for campo in campos:
+            columnas[campo] = np.array([entry.get(campo, np.nan) for entry in datos_historicos], dtype=np.float64)
+
+        validas = np.isfinite(columnas["Close"]) & (columnas["Close"] > 0)
+        return {campo: valores[validas] for campo, valores in columnas.items()}
+
+    return _en_cache(clave, "diario", cacheado)
+
+
+def remuestrear(datos_historicos, frecuencia="M", clave=None):
+    """
+    Agrega los históricos diarios de un fondo a la frecuencia indicada.
+
+    Parámetros:
+    - datos_historicos: Lista de filas diarias (como las de `cargar_datos_fondo`).
+    - frecuencia: "D" (diaria), "W" (semanal), "M" (mensual) o "A" (anual).
+    - clave: Tupla estable que identifica los históricos y empieza con el símbolo, por
+      ejemplo (simbolo, version_fondos([simbolo])), para guardar el resultado en caché;
+      None para no guardarlo.
+
+    Retorna:
+    - Diccionario de columnas numpy, una fila por periodo:
+      - "Date": última fecha con precio del periodo
+      - "Open", "High", "Low", "Close": OHLC del periodo
+      - "Volume", "Dividends", "Capital Gains": sumas del periodo
+      - "Stock Splits": factor de split acumulado del periodo (1 si no hubo)
+      - "rendimiento_total": rendimiento del periodo con dividendos reinvertidos (decimal),
+        a partir de los cierres ajustados
+      - "indice_total": valor de 1 peso invertido al primer cierre con dividendos reinvertidos
+      - "dias": filas diarias que forman el periodo
+    """
+    def cacheado():
+        diario = columnas_diarias(datos_historicos, clave)
+        n = len(diario["Close"])
+        if n == 0:
+            return {campo: valores[:0] for campo, valores in diario.items()}
+
+        etiquetas = _etiquetas_periodo(diario["Date"], frecuencia)
+        inicios = np.concatenate([[0], np.flatnonzero(np.diff(etiquetas)) + 1])
+        finales = np.concatenate([inicios[1:], [n]]) - 1
+
+        # Los cierres ya están ajustados: el índice de rendimiento total es el cierre normalizado
+        cierres = diario["Close"]
+        indice_total = cierres / cierres[0]
+
+        splits = np.nan_to_num(diario["Stock Splits"])
+        splits = np.where(splits > 0, splits, 1.0)
+
+        indice_periodo = indice_total[finales]
+        indice_anterior = np.concatenate([[1.0], indice_periodo[:-1]])
+        return {
+            "Date": diario["Date"][finales],
+            "Open": diario["Open"][inicios],
+            "High": np.fmax.reduceat(diario["High"], inicios),
+            "Low": np.fmin.reduceat(diario["Low"], inicios),
+            "Close": cierres[finales],
+            "Volume": np.add.reduceat(np.nan_to_num(diario["Volume"]), inicios),
+            "Dividends": np.add.reduceat(np.nan_to_num(diario["Dividends"]), inicios),
+            "Capital Gains": np.add.reduceat(np.nan_to_num(diario["Capital Gains"]), inicios),
+            "Stock Splits": np.multiply.reduceat(splits, inicios),
+            "rendimiento_total": indice_periodo / indice_anterior - 1,
+            "indice_total": indice_periodo,
+            "dias": finales - inicios + 1,
+        }
+
+    if frecuencia not in FRECUENCIAS:
+        raise ValueError(f"Frecuencia desconocida: {frecuencia}. Usa una de {FRECUENCIAS}")
+    return _en_cache(clave, frecuencia, cacheado)
+
+
+def cierres(datos_historicos, frecuencia="D", clave=None):
+    """
+    Precios de cierre a la frecuencia indicada (el último cierre de cada periodo).
+    """
+    if frecuencia == "D":
+        return columnas_diarias(datos_historicos, clave)["Close"]
+    return remuestrear(datos_historicos, frecuencia, clave)["Close"]
+
+
+def _en_cache(clave, tipo, calcular):
+    # Sin clave estable no se guarda nada: una lista temporal nunca se volvería a pedir
+    if clave is None:
+        return calcular()
+
+    clave = (clave, tipo)
+    with _candado:
+        resultado = _cache.get(clave)
+        if resultado is not None:
+            _cache.move_to_end(clave)
+            return resultado
+
+    resultado = calcular()
+    for arreglo in resultado.values():
+        arreglo.flags.writeable = False  # Compartidos entre llamadas: solo lectura
+    with _candado:
+        _cache[clave] = resultado
+        _cache.move_to_end(clave)
+        while len(_cache) > MAX_ENTRADAS:
+            _cache.popitem(last=False)
+    return resultado
+
+
+def descartar(simbolos):
+    """
+    Elimina los remuestreos de los fondos indicados (claves cuyo primer elemento es uno de
+    los símbolos), por ejemplo porque el descargador los reescribió.
+    """
+    simbolos = set(simbolos)
+    with _candado:
+        for clave in [clave for clave in _cache if clave[0][0] in simbolos]:
+            del _cache[clave]
+
+
+def limpiar_cache():
+    """
+    Vacía la caché de remuestreos.
+    """
+    with _candado:
+        _cache.clear()
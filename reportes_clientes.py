@@ -0,0 +1,633 @@
+# reportes_clientes.py
+"""
+Reportes de cliente descargables (HTML, PDF y Excel) y generación masiva en procesos.
+
+Un reporte reúne lo que la pestaña de Resultados de `app_front.py` muestra en pantalla:
+datos del cliente, perfil del cuestionario, métricas de los fondos, pesos del portafolio
+optimizado y la proyección del plan de ahorro.
+
+- HTML: tablas más dos gráficas de Plotly. Las plantillas de las figuras (su layout) se
+  serializan una sola vez por proceso; cada reporte solo agrega sus datos. En un lote,
+  plotly.js se copia una vez a la carpeta de salida y todos los reportes lo comparten.
+- PDF: escrito directamente (tablas y gráficas vectoriales) sin dependencias adicionales.
+- Excel: una hoja por tabla; requiere `openpyxl` o `xlsxwriter` (opcionales).
+
+Los reportes se preparan con las cachés compartidas: métricas por fondo en `cache_metricas`
+y optimizaciones en `cache_optimizador`. En un lote, el proceso principal calienta esas
+cachés y la de archivos antes de crear el pool, y el pool se crea con el método "fork"
+(no el predeterminado de la plataforma, que es spawn en macOS y Windows y forkserver
+desde Python 3.14 en Linux) para que los trabajadores las hereden sin releer 'Data'.
+Donde fork no existe, cada trabajador las calienta al arrancar. Con CACHE_BACKEND además
+comparten lo que calcula cada uno.
+
+    python reportes_clientes.py clientes.jsonl --salida reportes --formatos html,pdf --procesos 4
+    python reportes_clientes.py --ejemplo 2000 --salida /tmp/reportes      (clientes sintéticos)
+
+Cada línea de clientes.jsonl es un objeto con: nombre, edad_actual, edad_retiro,
+monto_inicial, simbolos y respuestas (8, en puntos 1-4 o letras a-d) o perfil; opcionales:
+aportacion_mensual, crecimiento_aportacion, retiro_mensual, anos_retiro,
+crecimiento_retiro (los crecimientos en %), n_fondos, misma_ponderacion y covarianza.
+"""
+import os
+import re
+import json
+import time
+import zlib
+import html
+import random
+import argparse
+import multiprocessing
+from string import Template
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from functions import (cargar_datos_fondo, calcular_metricas_fondo, determinar_perfil, listar_fondos, version_fondos,
+                       sanitize_filename, PERFILES)
+from cache_resultados import optimizar_con_cache, cache_metricas
+from proyeccion import proyectar_flujos
+
+
+FORMATOS = ("html", "pdf", "xlsx")
+PUNTOS_RESPUESTA = {"a": 1, "b": 2, "c": 3, "d": 4}
+ARCHIVO_PLOTLY = "plotly.min.js"
+COLORES = ("#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf")
+
+
+############################ Contenido del reporte ######################################
+
+def _metricas_fondo(simbolo):
+    # Métricas de un fondo en la caché compartida, con la versión de su archivo
+    clave = ("reporte", (simbolo,), version_fondos([simbolo]), "5y")
+
+    def calcular():
+        data = cargar_datos_fondo(simbolo)
+        return {"nombre": data.get("nombre", simbolo), "simbolo": simbolo,
+                **calcular_metricas_fondo(data["datos_historicos"], periodo="5y")}
+
+    return dict(cache_metricas.obtener_o_calcular(clave, calcular))
+
+
+def preparar_reporte(cliente):
+    """
+    Calcula el contenido de un reporte.
+
+    Parámetros:
+    - cliente: Diccionario con los datos del cliente (ver el docstring del módulo).
+
+    Retorna:
+    - Diccionario con cliente, perfil, fondos (métricas), portafolio (pesos), rendimiento,
+      volatilidad y proyeccion (edades y saldos anuales).
+    """
+    if cliente.get("perfil"):
+        perfil = cliente["perfil"]
+        descripcion = next((d for _, _, p, d in PERFILES if p == perfil), "")
+    else:
+        respuestas = [PUNTOS_RESPUESTA.get(r, r) if isinstance(r, str) else int(r) for r in cliente["respuestas"]]
+        if len(respuestas) != 8:
+            raise ValueError("El cuestionario tiene 8 preguntas; se esperaban 8 respuestas.")
+        perfil, descripcion, _ = determinar_perfil(respuestas)
+
+    fondos = []
+    for simbolo in cliente["simbolos"]:
+        try:
+            metricas = _metricas_fondo(simbolo)
+        except (FileNotFoundError, KeyError, ValueError):
+            continue
+        # Un fondo con cierres sin dato no tiene rendimiento ni volatilidad: no entra al portafolio
+        if np.isfinite(metricas["rendimiento"]) and np.isfinite(metricas["volatilidad"]):
+            fondos.append(metricas)
+    if not fondos:
+        raise ValueError("Ninguno de los fondos del cliente tiene datos históricos.")
+
+    covarianza = None
+    if cliente.get("covarianza"):
+        from covarianza import obtener_covarianza
+        covarianza = obtener_covarianza([f["simbolo"] for f in fondos], metodo=cliente["covarianza"],
+                                        vida_media=cliente.get("vida_media", 60), n_factores=cliente.get("n_factores", 5))
+    datos = [{k: f[k] for k in ("nombre", "simbolo", "rendimiento", "volatilidad")} for f in fondos]
+    perfil_optimizacion = "Personalizado" if cliente.get("misma_ponderacion") else perfil
+    seleccionados, pesos, rendimiento, volatilidad = optimizar_con_cache(
+        perfil_optimizacion, datos, n_fondos=int(cliente.get("n_fondos", 5)), covarianza=covarianza)
+    if not seleccionados or not pesos:
+        raise ValueError("No se pudieron obtener métricas suficientes para optimizar el portafolio.")
+
+    edad_actual, edad_retiro = int(cliente["edad_actual"]), int(cliente["edad_retiro"])
+    anos_retiro = int(cliente.get("anos_retiro", 0))
+    plan = proyectar_flujos(
+        float(cliente["monto_inicial"]), rendimiento / 100, edad_retiro - edad_actual,
+        aportacion_mensual=float(cliente.get("aportacion_mensual", 0)),
+        crecimiento_aportacion=float(cliente.get("crecimiento_aportacion", 0)) / 100,
+        retiro_mensual=float(cliente.get("retiro_mensual", 0)),
+        anos_retiro=anos_retiro,
+        crecimiento_retiro=float(cliente.get("crecimiento_retiro", 0)) / 100
+    )
+    saldos = plan["saldos_anuales"][0]
+
+    return {
+        "cliente": cliente,
+        "fecha": date.today().isoformat(),
+        "perfil": perfil,
+        "descripcion": descripcion,
+        "fondos": fondos,
+        "portafolio": [{"nombre": f["nombre"], "simbolo": f["simbolo"], "peso": float(peso) * 100,
+                        "rendimiento": float(f["rendimiento"]), "volatilidad": float(f["volatilidad"])}
+                       for f, peso in zip(seleccionados, pesos)],
+        "rendimiento": float(rendimiento),
+        "volatilidad": float(volatilidad),
+        "proyeccion": {
+            "edades": list(range(edad_actual, edad_actual + len(saldos))),
+            "saldos": saldos.tolist(),
+            "saldo_al_retiro": float(plan["saldo_al_retiro"][0]),
+            "total_aportado": float(plan["total_aportado"][0]),
+            "saldo_final": float(plan["saldo_final"][0]),
+            "mes_agotado": int(plan["mes_agotado"][0]),
+        },
+    }
+
+
+def _porcentaje(valor):
+    return "-" if valor is None else f"{valor:.2f}%"
+
+
+def _filas_metricas(contenido):
+    return [[f["nombre"], _porcentaje(f["rendimiento_ytd"]), _porcentaje(f["rendimiento_dividendos"]),
+             _porcentaje(f["rendimiento"]), _porcentaje(f["volatilidad"])] for f in contenido["fondos"]]
+
+
+def _filas_portafolio(contenido):
+    return [[f["nombre"], f"{f['peso']:.2f}%", _porcentaje(f["rendimiento"]), _porcentaje(f["volatilidad"])]
+            for f in contenido["portafolio"]]
+
+
+def _resumen(contenido):
+    cliente, proyeccion = contenido["cliente"], contenido["proyeccion"]
+    lineas = [
+        ("Cliente", cliente.get("nombre") or "-"),
+        ("Edad actual / fin del plan", f"{cliente['edad_actual']} / {cliente['edad_retiro']} años"),
+        ("Monto inicial", f"${float(cliente['monto_inicial']):,.0f} MXN"),
+        ("Perfil", contenido["perfil"]),
+        ("Rendimiento del portafolio", _porcentaje(contenido["rendimiento"])),
+        ("Volatilidad del portafolio", _porcentaje(contenido["volatilidad"])),
+        (f"Saldo proyectado a los {cliente['edad_retiro']} años", f"${proyeccion['saldo_al_retiro']:,.0f} MXN"),
+    ]
+    if float(cliente.get("aportacion_mensual", 0)):
+        lineas.append(("Total aportado", f"${proyeccion['total_aportado']:,.0f} MXN"))
+    if float(cliente.get("retiro_mensual", 0)) and int(cliente.get("anos_retiro", 0)):
+        lineas.append(("Saldo al final del retiro", f"${proyeccion['saldo_final']:,.0f} MXN"))
+    return lineas
+
+
+ENCABEZADOS_METRICAS = ["Fondo", "Rendimiento YTD", "Dividendos", "Rendimiento anualizado", "Volatilidad anualizada"]
+ENCABEZADOS_PORTAFOLIO = ["Fondo", "Peso", "Rendimiento anualizado", "Volatilidad anualizada"]
+
+
+############################ HTML ######################################
+
+# Layout de cada figura: se serializa una vez por proceso y lo reutilizan todos los reportes
+PLANTILLAS_FIGURAS = {
+    "pesos": {"title": {"text": "Distribución del portafolio"}, "template": "plotly_white", "height": 360,
+              "yaxis": {"title": {"text": "Peso (%)"}}, "margin": {"t": 50, "b": 80}},
+    "proyeccion": {"title": {"text": "Proyección del saldo"}, "template": "plotly_white", "height": 360,
+                   "xaxis": {"title": {"text": "Edad"}}, "yaxis": {"title": {"text": "Saldo (MXN)"}, "tickformat": ",.0f"},
+                   "margin": {"t": 50}},
+}
+_layouts_json = None
+
+PLANTILLA_HTML = Template("""<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><title>Reporte de inversión - $nombre</title>
+<style>
+body { font-family: "Source Sans Pro", Arial, sans-serif; color: #262730; max-width: 960px; margin: 2em auto; }
+table { border-collapse: collapse; margin: 1em 0; width: 100%; }
+th, td { border-bottom: 1px solid #ddd; padding: 6px 10px; text-align: left; }
+th { background: #f0f2f6; }
+.nota { color: #666; font-size: 0.85em; }
+</style>
+<script src="$plotly_js"></script>
+</head><body>
+<h1>Reporte de inversión</h1>
+<p class="nota">Generado el $fecha</p>
+$resumen
+<h2>Perfil $perfil</h2>
+<p>$descripcion</p>
+<h2>Portafolio optimizado</h2>
+$portafolio
+<div id="figura_pesos"></div>
+<h2>Métricas de los fondos seleccionados</h2>
+$metricas
+<h2>Proyección del plan de ahorro</h2>
+<div id="figura_proyeccion"></div>
+<p class="nota">La proyección usa el rendimiento histórico anualizado del portafolio; no es un rendimiento garantizado.</p>
+<script>
+if (window.Plotly) {
+  var layouts = $layouts;
+  var datos = $datos;
+  for (var nombre in datos) { Plotly.newPlot("figura_" + nombre, datos[nombre], layouts[nombre], {displayModeBar: false}); }
+}
+</script>
+</body></html>
+""")
+
+
+def _tabla_html(encabezados, filas):
+    cabeza = "".join(f"<th>{html.escape(str(e))}</th>" for e in encabezados)
+    cuerpo = "".join("<tr>" + "".join(f"<td>{html.escape(str(c))}</td>" for c in fila) + "</tr>" for fila in filas)
+    return f"<table><tr>{cabeza}</tr>{cuerpo}</table>"
+
+
+def renderizar_html(contenido, plotly_js=ARCHIVO_PLOTLY):
+    """
+    Reporte en HTML.
+
+    Parámetros:
+    - contenido: Resultado de `preparar_reporte`.
+    - plotly_js: Ruta o URL de plotly.js ("cdn" para la del CDN de Plotly). Sin plotly.js
+      el reporte muestra solo las tablas.
+
+    Retorna:
+    - Texto HTML.
+    """
+    global _layouts_json
+    if _layouts_json is None:
+        _layouts_json = json.dumps(PLANTILLAS_FIGURAS)
+    if plotly_js == "cdn":
+        from plotly.offline import get_plotlyjs_version
+        plotly_js = f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+
+    portafolio, proyeccion = contenido["portafolio"], contenido["proyeccion"]
+    datos = {
+        "pesos": [{"type": "bar", "x": [f["nombre"] for f in portafolio], "y": [round(f["peso"], 2) for f in portafolio],
+                   "marker": {"color": list(COLORES[:len(portafolio)])}}],
+        "proyeccion": [{"type": "scatter", "mode": "lines+markers", "x": proyeccion["edades"],
+                        "y": [round(s, 2) for s in proyeccion["saldos"]], "name": "Saldo"}],
+    }
+    resumen = _tabla_html(["Concepto", "Valor"], _resumen(contenido))
+    return PLANTILLA_HTML.substitute(
+        nombre=html.escape(str(contenido["cliente"].get("nombre") or "")),
+        fecha=contenido["fecha"],
+        plotly_js=html.escape(plotly_js),
+        resumen=resumen,
+        perfil=html.escape(contenido["perfil"]),
+        descripcion=html.escape(contenido["descripcion"]),
+        portafolio=_tabla_html(ENCABEZADOS_PORTAFOLIO, _filas_portafolio(contenido)),
+        metricas=_tabla_html(ENCABEZADOS_METRICAS, _filas_metricas(contenido)),
+        layouts=_layouts_json,
+        datos=json.dumps(datos).replace("</", "<\\/"),
+    )
+
+
+############################ PDF ######################################
+
+class _DocumentoPDF:
+    """
+    Escritor mínimo de PDF (A4, Helvetica) con texto, líneas y rectángulos. Lleva un cursor
+    vertical y abre otra página cuando el contenido no cabe.
+    """
+
+    ANCHO, ALTO, MARGEN = 595, 842, 50
+
+    def __init__(self):
+        self.paginas = []
+        self.nueva_pagina()
+
+    def nueva_pagina(self):
+        self.operaciones = []
+        self.paginas.append(self.operaciones)
+        self.y = self.ALTO - self.MARGEN
+
+    def espacio(self, alto):
+        if self.y - alto < self.MARGEN:
+            self.nueva_pagina()
+
+    @staticmethod
+    def _cadena(texto):
+        crudo = str(texto).encode("cp1252", errors="replace")
+        return "(" + crudo.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)").decode("latin-1") + ")"
+
+    def texto(self, x, y, texto, tamano=10, negrita=False, color=(0, 0, 0)):
+        self.operaciones.append(f"{color[0]} {color[1]} {color[2]} rg BT /{'F2' if negrita else 'F1'} {tamano} Tf "
+                                f"{x:.1f} {y:.1f} Td {self._cadena(texto)} Tj ET")
+
+    def linea(self, puntos, grosor=1, color=(0, 0, 0)):
+        trazo = " ".join(f"{x:.1f} {y:.1f} {'m' if i == 0 else 'l'}" for i, (x, y) in enumerate(puntos))
+        self.operaciones.append(f"{color[0]} {color[1]} {color[2]} RG {grosor} w {trazo} S")
+
+    def rectangulo(self, x, y, ancho, alto, color):
+        self.operaciones.append(f"{color[0]} {color[1]} {color[2]} rg {x:.1f} {y:.1f} {ancho:.1f} {alto:.1f} re f")
+
+    def parrafo(self, texto, tamano=10, negrita=False, caracteres=95):
+        palabras, linea = str(texto).split(), ""
+        for palabra in palabras + [None]:
+            if palabra is None or len(linea) + len(palabra) + 1 > caracteres:
+                self.espacio(tamano + 4)
+                self.y -= tamano + 4
+                self.texto(self.MARGEN, self.y, linea, tamano, negrita)
+                linea = palabra or ""
+            else:
+                linea = f"{linea} {palabra}".strip()
+
+    def tabla(self, encabezados, filas, anchos):
+        for i, fila in enumerate([encabezados] + filas):
+            self.espacio(18)
+            self.y -= 16
+            if i == 0:
+                self.rectangulo(self.MARGEN, self.y - 4, sum(anchos), 16, (0.94, 0.95, 0.96))
+            x = self.MARGEN
+            for celda, ancho in zip(fila, anchos):
+                celda = str(celda)
+                limite = int(ancho / 5)
+                self.texto(x + 3, self.y, celda if len(celda) <= limite else celda[:limite - 1] + ".", 9, negrita=(i == 0))
+                x += ancho
+        self.y -= 10
+
+    def grafica(self, etiquetas, valores, titulo, barras=False, alto=200):
+        """
+        Gráfica de barras o de línea con ejes y escala vertical.
+        """
+        self.espacio(alto + 40)
+        self.y -= 20
+        self.texto(self.MARGEN, self.y, titulo, 11, negrita=True)
+        x0, y0 = self.MARGEN + 60, self.y - alto
+        ancho = self.ANCHO - 2 * self.MARGEN - 70
+        valores = np.asarray(valores, dtype=np.float64)
+        maximo = float(valores.max()) if len(valores) and valores.max() > 0 else 1.0
+        self.linea([(x0, y0 + alto), (x0, y0), (x0 + ancho, y0)], 0.8, (0.4, 0.4, 0.4))
+        for fraccion in (0.25, 0.5, 0.75, 1.0):
+            yy = y0 + alto * fraccion * 0.9
+            self.linea([(x0, yy), (x0 + ancho, yy)], 0.3, (0.85, 0.85, 0.85))
+            self.texto(self.MARGEN, yy - 3, f"{maximo * fraccion:,.0f}" if maximo >= 100 else f"{maximo * fraccion:.1f}", 7)
+
+        escala = alto * 0.9 / maximo
+        if barras:
+            paso = ancho / max(len(valores), 1)
+            for i, (etiqueta, valor) in enumerate(zip(etiquetas, valores)):
+                color = tuple(int(COLORES[i % len(COLORES)][j:j + 2], 16) / 255 for j in (1, 3, 5))
+                self.rectangulo(x0 + i * paso + paso * 0.15, y0, paso * 0.7, max(valor, 0) * escala, tuple(round(c, 3) for c in color))
+                self.texto(x0 + i * paso + paso * 0.15, y0 - 12, str(etiqueta)[:int(paso / 4.5)], 7)
+        else:
+            paso = ancho / max(len(valores) - 1, 1)
+            self.linea([(x0 + i * paso, y0 + max(v, 0) * escala) for i, v in enumerate(valores)], 1.5, (0.12, 0.47, 0.71))
+            marcas = max(1, len(etiquetas) // 10)
+            for i in range(0, len(etiquetas), marcas):
+                self.texto(x0 + i * paso - 5, y0 - 12, etiquetas[i], 7)
+        self.y = y0 - 25
+
+    def bytes(self):
+        objetos = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+                   "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+                   "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>"]
+        paginas = []
+        for operaciones in self.paginas:
+            contenido = zlib.compress("\n".join(operaciones).encode("latin-1"))
+            objetos.append((f"<< /Length {len(contenido)} /Filter /FlateDecode >>", contenido))
+            objetos.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.ANCHO} {self.ALTO}] "
+                           f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {len(objetos)} 0 R >>")
+            paginas.append(len(objetos))
+        objetos[1] = f"<< /Type /Pages /Kids [{' '.join(f'{n} 0 R' for n in paginas)}] /Count {len(paginas)} >>"
+
+        salida, desplazamientos = bytearray(b"%PDF-1.4\n"), []
+        for numero, objeto in enumerate(objetos, start=1):
+            desplazamientos.append(len(salida))
+            if isinstance(objeto, tuple):
+                salida += f"{numero} 0 obj\n{objeto[0]}\nstream\n".encode() + objeto[1] + b"\nendstream\nendobj\n"
+            else:
+                salida += f"{numero} 0 obj\n{objeto}\nendobj\n".encode("latin-1")
+        inicio_xref = len(salida)
+        salida += f"xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n".encode()
+        salida += "".join(f"{d:010d} 00000 n \n" for d in desplazamientos).encode()
+        salida += f"trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n".encode()
+        return bytes(salida)
+
+
+def renderizar_pdf(contenido):
+    """
+    Reporte en PDF.
+
+    Retorna:
+    - bytes del archivo PDF.
+    """
+    documento = _DocumentoPDF()
+    documento.y -= 10
+    documento.texto(documento.MARGEN, documento.y, "Reporte de inversión", 18, negrita=True)
+    documento.y -= 16
+    documento.texto(documento.MARGEN, documento.y, f"Generado el {contenido['fecha']}", 8, color=(0.4, 0.4, 0.4))
+    documento.y -= 6
+    documento.tabla(["Concepto", "Valor"], [list(linea) for linea in _resumen(contenido)], [240, 255])
+
+    documento.parrafo(f"Perfil {contenido['perfil']}", 13, negrita=True)
+    documento.parrafo(contenido["descripcion"], 9, caracteres=110)
+    documento.y -= 6
+    documento.parrafo("Portafolio optimizado", 13, negrita=True)
+    documento.tabla(ENCABEZADOS_PORTAFOLIO, _filas_portafolio(contenido), [215, 70, 105, 105])
+    documento.grafica([f["simbolo"] for f in contenido["portafolio"]], [f["peso"] for f in contenido["portafolio"]],
+                      "Distribución del portafolio (%)", barras=True, alto=150)
+
+    documento.parrafo("Métricas de los fondos seleccionados", 13, negrita=True)
+    documento.tabla(ENCABEZADOS_METRICAS, _filas_metricas(contenido), [175, 80, 70, 85, 85])
+    proyeccion = contenido["proyeccion"]
+    documento.grafica(proyeccion["edades"], proyeccion["saldos"], "Proyección del saldo (MXN) por edad", alto=200)
+    documento.parrafo("La proyección usa el rendimiento histórico anualizado del portafolio; no es un rendimiento "
+                      "garantizado.", 8, caracteres=120)
+    return documento.bytes()
+
+
+############################ Excel ######################################
+
+def _motor_excel():
+    for motor in ("xlsxwriter", "openpyxl"):
+        try:
+            __import__(motor)
+            return motor
+        except ImportError:
+            continue
+    raise ImportError("El formato xlsx requiere el paquete openpyxl o xlsxwriter.")
+
+
+def renderizar_excel(contenido, destino):
+    """
+    Reporte en Excel: hojas Resumen, Portafolio, Métricas y Proyección.
+
+    Parámetros:
+    - destino: Ruta del archivo o búfer binario (por ejemplo io.BytesIO).
+    """
+    import pandas as pd
+
+    proyeccion = contenido["proyeccion"]
+    with pd.ExcelWriter(destino, engine=_motor_excel()) as escritor:
+        pd.DataFrame(_resumen(contenido) + [("Descripción del perfil", contenido["descripcion"])],
+                     columns=["Concepto", "Valor"]).to_excel(escritor, sheet_name="Resumen", index=False)
+        pd.DataFrame([{"Fondo": f["nombre"], "Símbolo": f["simbolo"], "Peso (%)": f["peso"],
+                       "Rendimiento anualizado (%)": f["rendimiento"], "Volatilidad anualizada (%)": f["volatilidad"]}
+                      for f in contenido["portafolio"]]).to_excel(escritor, sheet_name="Portafolio", index=False)
+        pd.DataFrame([{"Fondo": f["nombre"], "Símbolo": f["simbolo"], "Rendimiento YTD (%)": f["rendimiento_ytd"],
+                       "Dividendos (%)": f["rendimiento_dividendos"], "Dividendos por acción": f["dividendos_por_accion"],
+                       "Rendimiento anualizado (%)": f["rendimiento"], "Volatilidad anualizada (%)": f["volatilidad"]}
+                      for f in contenido["fondos"]]).to_excel(escritor, sheet_name="Métricas", index=False)
+        pd.DataFrame({"Edad": proyeccion["edades"], "Saldo (MXN)": proyeccion["saldos"]}).to_excel(
+            escritor, sheet_name="Proyección", index=False)
+
+
+############################ Generación masiva ######################################
+
+def _nombre_archivo(cliente, indice):
+    nombre = sanitize_filename(str(cliente.get("nombre") or "cliente"))[:60]
+    return f"{indice:06d}_{re.sub('_+', '_', nombre)}"
+
+
+def _escribir_reporte(cliente, indice, directorio, formatos, plotly_js):
+    contenido = preparar_reporte(cliente)
+    base = os.path.join(directorio, _nombre_archivo(cliente, indice))
+    if "html" in formatos:
+        with open(f"{base}.html", 'w', encoding="utf-8") as f:
+            f.write(renderizar_html(contenido, plotly_js))
+    if "pdf" in formatos:
+        with open(f"{base}.pdf", 'wb') as f:
+            f.write(renderizar_pdf(contenido))
+    if "xlsx" in formatos:
+        renderizar_excel(contenido, f"{base}.xlsx")
+
+
+def _generar_lote(lote, directorio, formatos, plotly_js):
+    # Tarea de cada trabajador: varios clientes por envío para amortizar la comunicación
+    resultados = []
+    for indice, cliente in lote:
+        inicio = time.perf_counter()
+        try:
+            _escribir_reporte(cliente, indice, directorio, formatos, plotly_js)
+            resultados.append((indice, None, time.perf_counter() - inicio))
+        except Exception as e:
+            resultados.append((indice, f"{type(e).__name__}: {e}", time.perf_counter() - inicio))
+    return resultados
+
+
+def calentar_caches(clientes):
+    """
+    Carga en el proceso actual los archivos y las métricas de todos los fondos del lote,
+    para que los trabajadores creados después (fork) los hereden.
+    """
+    _calentar_fondos({simbolo for cliente in clientes for simbolo in cliente.get("simbolos", [])})
+
+
+def _calentar_fondos(simbolos):
+    for simbolo in sorted(simbolos):
+        try:
+            _metricas_fondo(simbolo)
+        except (FileNotFoundError, KeyError, ValueError):
+            continue
+
+
+def _opciones_pool(clientes):
+    # Con fork los trabajadores heredan las cachés que calentó `calentar_caches`; sin fork
+    # (Windows) cada trabajador nuevo calienta las suyas antes de recibir clientes
+    if "fork" in multiprocessing.get_all_start_methods():
+        return {"mp_context": multiprocessing.get_context("fork")}
+    simbolos = {simbolo for cliente in clientes for simbolo in cliente.get("simbolos", [])}
+    return {"initializer": _calentar_fondos, "initargs": (simbolos,)}
+
+
+def generar_reportes(clientes, directorio="reportes", formatos=("html",), procesos=None, tamano_lote=25,
+                     plotly_js=None):
+    """
+    Genera los reportes de muchos clientes en paralelo.
+
+    Parámetros:
+    - clientes: Lista de diccionarios de cliente.
+    - directorio: Carpeta de salida.
+    - formatos: Formatos a generar ("html", "pdf", "xlsx").
+    - procesos: Procesos trabajadores (por defecto uno por CPU; 1 para generar en serie).
+    - tamano_lote: Clientes que se envían juntos a un trabajador.
+    - plotly_js: Ruta o URL de plotly.js para los HTML. Por defecto se copia una sola vez a
+      la carpeta de salida.
+
+    Retorna:
+    - Diccionario con reportes, errores [(indice, mensaje)], duracion_s, reportes_por_s y
+      latencia_ms (p50/p95) por reporte.
+    """
+    formatos = tuple(formatos)
+    desconocidos = [formato for formato in formatos if formato not in FORMATOS]
+    if desconocidos:
+        raise ValueError(f"Formatos desconocidos: {desconocidos}. Usa {', '.join(FORMATOS)}.")
+    if "xlsx" in formatos:
+        _motor_excel()  # Falla antes de repartir el trabajo si no hay con qué escribir Excel
+
+    os.makedirs(directorio, exist_ok=True)
+    if "html" in formatos and plotly_js is None:
+        import plotly.offline
+        with open(os.path.join(directorio, ARCHIVO_PLOTLY), 'w', encoding="utf-8") as f:
+            f.write(plotly.offline.get_plotlyjs())
+        plotly_js = ARCHIVO_PLOTLY
+
+    inicio = time.perf_counter()
+    calentar_caches(clientes)
+    numerados = list(enumerate(clientes))
+    lotes = [numerados[i:i + tamano_lote] for i in range(0, len(numerados), tamano_lote)]
+    procesos = procesos or os.cpu_count() or 1
+
+    resultados = []
+    if procesos == 1:
+        for lote in lotes:
+            resultados.extend(_generar_lote(lote, directorio, formatos, plotly_js))
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, **_opciones_pool(clientes)) as pool:
+            futuros = [pool.submit(_generar_lote, lote, directorio, formatos, plotly_js) for lote in lotes]
+            for futuro in as_completed(futuros):
+                resultados.extend(futuro.result())
+    duracion = time.perf_counter() - inicio
+
+    errores = sorted((indice, error) for indice, error, _ in resultados if error)
+    tiempos = np.array([segundos for _, _, segundos in resultados]) * 1000
+    return {
+        "reportes": len(resultados) - len(errores),
+        "errores": errores,
+        "duracion_s": duracion,
+        "reportes_por_s": (len(resultados) - len(errores)) / duracion if duracion else 0.0,
+        "latencia_ms": {"p50": float(np.percentile(tiempos, 50)), "p95": float(np.percentile(tiempos, 95))} if len(tiempos) else {},
+    }
+
+
+def clientes_de_ejemplo(n, semilla=0):
+    """
+    Clientes sintéticos (edades, montos, respuestas y 3 a 8 fondos al azar) para probar lotes.
+    """
+    aleatorio = random.Random(semilla)
+    simbolos = [fondo["simbolo"] for fondo in listar_fondos()]
+    clientes = []
+    for i in range(n):
+        edad = aleatorio.randint(22, 60)
+        clientes.append({
+            "nombre": f"Cliente {i + 1}",
+            "edad_actual": edad,
+            "edad_retiro": aleatorio.randint(edad + 5, 75),
+            "monto_inicial": aleatorio.randrange(100000, 5000000, 5000),
+            "aportacion_mensual": aleatorio.choice([0, 1000, 2500, 5000]),
+            "respuestas": [aleatorio.randint(1, 4) for _ in range(8)],
+            "simbolos": aleatorio.sample(simbolos, aleatorio.randint(3, min(8, len(simbolos)))),
+        })
+    return clientes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera reportes de clientes en paralelo.")
+    parser.add_argument("clientes", nargs="?", help="Archivo JSONL con un cliente por línea.")
+    parser.add_argument("--ejemplo", type=int, default=0, help="Generar N clientes sintéticos en lugar de leer el archivo.")
+    parser.add_argument("--salida", default="reportes", help="Carpeta de salida.")
+    parser.add_argument("--formatos", default="html,pdf", help=f"Formatos separados por comas ({', '.join(FORMATOS)}).")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos trabajadores (por defecto uno por CPU).")
+    parser.add_argument("--tamano-lote", type=int, default=25, help="Clientes por envío a cada trabajador.")
+    argumentos = parser.parse_args()
+
+    if argumentos.ejemplo:
+        clientes = clientes_de_ejemplo(argumentos.ejemplo)
+    elif argumentos.clientes:
+        with open(argumentos.clientes, 'r', encoding="utf-8") as f:
+            clientes = [json.loads(linea) for linea in f if linea.strip()]
+    else:
+        parser.error("Indica un archivo de clientes o --ejemplo N.")
+
+    resumen = generar_reportes(clientes, argumentos.salida, argumentos.formatos.split(","), argumentos.procesos,
+                               argumentos.tamano_lote)
+    print(f"{resumen['reportes']} reportes en {resumen['duracion_s']:.1f} s ({resumen['reportes_por_s']:.1f} por segundo; "
+          f"p50 {resumen['latencia_ms'].get('p50', 0):.1f} ms, p95 {resumen['latencia_ms'].get('p95', 0):.1f} ms por reporte)")
+    for indice, error in resumen["errores"][:10]:
+        print(f"  Cliente {indice}: {error}")
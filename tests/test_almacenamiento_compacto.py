@@ -0,0 +1,67 @@
+# tests/test_almacenamiento_compacto.py
+import json
+import math
+
+import numpy as np
+
+from almacenamiento_compacto import (codificar_fondo, decodificar_fondo, decodificar_columnas, guardar_compacto,
+                                     leer_encabezado_compacto)
+from functions import obtener_ruta_datos_fondo
+
+
+def _fondo(historicos):
+    return {"nombre": "Fondo de prueba", "simbolo": "PRUEBA.MX", "descripcion": "Fondo sintético", "datos_historicos": historicos}
+
+
+def _iguales(a, b):
+    return a == b or (isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b))
+
+
+def _mismos_historicos(originales, decodificados):
+    assert len(originales) == len(decodificados)
+    for original, decodificado in zip(originales, decodificados):
+        assert list(original) == list(decodificado)
+        assert all(_iguales(original[columna], decodificado[columna]) for columna in original)
+
+
+def test_ida_y_vuelta_exacta_en_float64():
+    generador = np.random.default_rng(0)
+    fechas = np.datetime64("2020-01-01") + np.cumsum(generador.integers(1, 4, 300))
+    historicos = []
+    for i, fecha in enumerate(fechas):
+        cierre = float(100 * np.exp(generador.normal(0, 0.01)))
+        historicos.append({"Date": str(fecha), "Open": cierre * 0.999, "High": cierre * 1.01, "Low": cierre * 0.99,
+                           "Close": float("nan") if i == 7 else cierre, "Volume": int(generador.integers(0, 10 ** 9)),
+                           "Dividends": 0.37 if i % 90 == 0 else 0.0, "Stock Splits": 2.0 if i == 150 else 0.0,
+                           "Capital Gains": 0.0})
+    datos = _fondo(historicos)
+
+    decodificado = decodificar_fondo(codificar_fondo(datos))
+    assert {campo: decodificado[campo] for campo in ("nombre", "simbolo", "descripcion")} == \
+           {campo: datos[campo] for campo in ("nombre", "simbolo", "descripcion")}
+    _mismos_historicos(historicos, decodificado["datos_historicos"])
+
+
+def test_ida_y_vuelta_de_un_fondo_de_data(tmp_path):
+    with open(obtener_ruta_datos_fondo("SPY"), 'r') as f:
+        datos = json.load(f)
+    ruta = tmp_path / "SPY.azc"
+    guardar_compacto(datos, str(ruta))
+
+    assert leer_encabezado_compacto(str(ruta))["simbolo"] == datos["simbolo"]
+    _mismos_historicos(datos["datos_historicos"], decodificar_fondo(ruta.read_bytes())["datos_historicos"])
+
+
+def test_historial_vacio():
+    contenido = codificar_fondo(_fondo([]))
+    assert decodificar_fondo(contenido)["datos_historicos"] == []
+    encabezado, columnas = decodificar_columnas(contenido)
+    assert encabezado["filas"] == 0 and len(columnas["Date"]) == 0
+
+
+def test_float32_solo_redondea_los_precios():
+    historicos = [{"Date": f"2024-01-{dia:02d}", "Close": 100 / 3 + dia, "Volume": 1000 + dia} for dia in range(1, 20)]
+    decodificado = decodificar_fondo(codificar_fondo(_fondo(historicos), precision="float32"))["datos_historicos"]
+    for original, entrada in zip(historicos, decodificado):
+        assert entrada["Date"] == original["Date"] and entrada["Volume"] == original["Volume"]
+        assert entrada["Close"] == float(np.float32(original["Close"]))
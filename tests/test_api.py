@@ -0,0 +1,153 @@
+# tests/test_api.py
+import json
+import math
+import asyncio
+import threading
+import http.client
+
+import numpy as np
+import pytest
+
+from api import ServidorAnaliticas, _json_valido
+from proyeccion import proyectar_flujos
+
+
+SIMBOLOS = ["SPY", "AGG", "GLD", "QQQ", "EEM", "SHY"]
+
+
+@pytest.fixture(scope="module")
+def servidor():
+    """
+    Levanta servidores en un ciclo de eventos aparte, cada uno en un puerto efímero.
+    Regresa una función que crea el servidor con los parámetros indicados y su puerto.
+    """
+    loop = asyncio.new_event_loop()
+    hilo = threading.Thread(target=loop.run_forever, daemon=True)
+    hilo.start()
+    servidores = []
+
+    def crear(**parametros):
+        instancia = ServidorAnaliticas(**parametros)
+        puerto = asyncio.run_coroutine_threadsafe(instancia.iniciar("127.0.0.1", 0), loop).result(10)
+        servidores.append(instancia)
+        return instancia, puerto
+
+    yield crear
+
+    for instancia in servidores:
+        asyncio.run_coroutine_threadsafe(instancia.detener(), loop).result(10)
+    loop.call_soon_threadsafe(loop.stop)
+    hilo.join(10)
+
+
+def _pedir(puerto, metodo, ruta, cuerpo=None):
+    conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=60)
+    datos = cuerpo if isinstance(cuerpo, (bytes, type(None))) else json.dumps(cuerpo).encode()
+    conexion.request(metodo, ruta, body=datos, headers={"Content-Type": "application/json"} if datos else {})
+    respuesta = conexion.getresponse()
+    contenido = respuesta.read()
+    conexion.close()
+    return respuesta.status, json.loads(contenido)
+
+
+def test_json_valido_reemplaza_no_finitos():
+    valor = {"a": float("nan"), "b": [np.float64(1.5), np.inf, (np.int64(2), -math.inf)], "c": "texto"}
+    limpio = _json_valido(valor)
+    assert limpio == {"a": None, "b": [1.5, None, [2, None]], "c": "texto"}
+    json.dumps(limpio, allow_nan=False)
+
+
+def test_rutas_get(servidor):
+    _, puerto = servidor()
+    assert _pedir(puerto, "GET", "/salud") == (200, {"estado": "ok"})
+    codigo, fondos = _pedir(puerto, "GET", "/fondos")
+    assert codigo == 200 and {"SPY", "AGG"} <= {fondo["simbolo"] for fondo in fondos}
+
+
+def test_ruta_desconocida_y_metodo(servidor):
+    instancia, puerto = servidor()
+    for i in range(5):
+        codigo, respuesta = _pedir(puerto, "GET", f"/no-existe/{i}")
+        assert codigo == 404 and "error" in respuesta
+    codigo, _ = _pedir(puerto, "GET", "/metricas")
+    assert codigo == 405
+
+    # Las rutas inexistentes se cuentan juntas, no una entrada por URL
+    _, metricas = _pedir(puerto, "GET", "/metricas-servicio")
+    endpoints = metricas["endpoints"]
+    assert endpoints["desconocida"]["solicitudes"] == 5
+    assert endpoints["desconocida"]["errores"] == 5
+    assert not any(ruta.startswith("/no-existe") for ruta in endpoints)
+    assert instancia.metricas.resumen()["/metricas"]["errores"] == 1
+
+
+def test_cuerpos_invalidos(servidor):
+    _, puerto = servidor()
+    assert _pedir(puerto, "POST", "/metricas", b"{no es json")[0] == 400
+    assert _pedir(puerto, "POST", "/metricas", [1, 2])[0] == 400
+    # Una cadena no se recorre letra por letra
+    codigo, respuesta = _pedir(puerto, "POST", "/metricas", {"simbolos": "SPY"})
+    assert codigo == 400 and "simbolos" in respuesta["error"]
+    assert _pedir(puerto, "POST", "/metricas", {"simbolos": ["SPY", 3]})[0] == 400
+    assert _pedir(puerto, "POST", "/metricas", {"simbolos": ["SPY"], "frecuencia": "X"})[0] == 400
+    assert _pedir(puerto, "POST", "/optimizar", {"portafolios": ["Moderado"]})[0] == 400
+    assert _pedir(puerto, "POST", "/optimizar", {"portafolios": [{"perfil": "Moderado", "simbolos": "SPY"}]})[0] == 400
+    assert _pedir(puerto, "POST", "/perfil", {"respuestas": [1, 2, 3]})[0] == 400
+
+
+def test_limites(servidor):
+    _, puerto = servidor(max_lote=3, max_bytes=200)
+    assert _pedir(puerto, "POST", "/metricas", {"simbolos": ["A", "B", "C", "D"]})[0] == 413
+    assert _pedir(puerto, "POST", "/metricas", {"simbolos": ["X" * 300]})[0] == 413
+
+    _, saturado = servidor(max_en_espera=0)
+    assert _pedir(saturado, "POST", "/perfil", {"respuestas": ["a"] * 8})[0] == 503
+
+
+def test_metricas_y_perfil(servidor):
+    _, puerto = servidor()
+    codigo, respuesta = _pedir(puerto, "POST", "/metricas", {"simbolos": ["SPY", "NOEXISTE"], "frecuencia": "M"})
+    assert codigo == 200
+    assert {"rendimiento", "volatilidad", "nombre"} <= set(respuesta["fondos"]["SPY"])
+    assert "error" in respuesta["fondos"]["NOEXISTE"]
+
+    codigo, respuesta = _pedir(puerto, "POST", "/perfil", {"respuestas": ["d", 4, "D", 4, 4, 4, 4, 4]})
+    assert codigo == 200 and respuesta["perfil"] == "Muy Agresivo" and respuesta["puntaje"] == 32
+
+
+def test_optimizar_en_lote(servidor):
+    _, puerto = servidor()
+    codigo, respuesta = _pedir(puerto, "POST", "/optimizar", {
+        "portafolios": [{"perfil": "Moderado", "simbolos": SIMBOLOS, "n_fondos": 4},
+                        {"perfil": "Inexistente", "simbolos": SIMBOLOS},
+                        {"perfil": "Conservador", "simbolos": SIMBOLOS}],
+        "referencia": "SPY"})
+    assert codigo == 200
+    moderado, desconocido, conservador = respuesta["resultados"]
+    assert "error" in desconocido
+    for resultado in (moderado, conservador):
+        pesos = [fondo["peso"] for fondo in resultado["fondos"]]
+        assert np.isclose(sum(pesos), 1) and min(pesos) >= -1e-9
+        assert np.isclose(sum(fondo["contribucion_riesgo_pct"] for fondo in resultado["fondos"]), 100)
+        assert resultado["referencia"]["simbolo"] == "SPY"
+    assert len(moderado["fondos"]) <= 4
+
+
+def test_proyeccion_y_metas(servidor):
+    _, puerto = servidor()
+    codigo, respuesta = _pedir(puerto, "POST", "/proyeccion", {"proyecciones": [
+        {"monto_inicial": 100000, "rendimiento": 8.5, "anos": 20, "aportacion_mensual": 2000},
+        {"monto_inicial": 100000}]})
+    assert codigo == 200
+    valido, invalido = respuesta["resultados"]
+    esperado = proyectar_flujos(100000, 0.085, 20, aportacion_mensual=2000)["saldo_al_retiro"][0]
+    assert np.isclose(valido["valor_proyectado"], esperado)
+    assert len(valido["valores_por_ano"]) == 21
+    assert "error" in invalido
+
+    codigo, respuesta = _pedir(puerto, "POST", "/metas", {"clientes": [
+        {"meta": 1e12, "anos": 5, "rendimiento": 8, "monto_inicial": 1000}]})
+    assert codigo == 200
+    # Sin rendimiento alcanzable el valor es null, no NaN
+    assert respuesta["resultados"][0]["rendimiento_requerido"] is None
+    assert _pedir(puerto, "POST", "/metas", {"clientes": [{"anos": 5}]})[0] == 400
@@ -0,0 +1,117 @@
+# tests/test_backends_cache.py
+import os
+import time
+import fnmatch
+
+import pytest
+
+import backends_cache
+from backends_cache import BackendDirectorio, BackendSQLite, BackendRedis, crear_backend
+from cache_resultados import CacheResultados
+
+
+class ClienteRedisLocal:
+    """
+    Cliente en memoria con la parte de la interfaz de Redis que usa `BackendRedis`.
+    """
+
+    def __init__(self):
+        self.datos, self.caducidad = {}, {}
+
+    def get(self, clave):
+        return self.datos.get(clave)
+
+    def set(self, clave, valor, ex=None):
+        self.datos[clave], self.caducidad[clave] = valor, ex
+
+    def delete(self, *claves):
+        for clave in claves:  # Como Redis, acepta claves en bytes o texto
+            self.datos.pop(clave.decode() if isinstance(clave, bytes) else clave, None)
+
+    def scan_iter(self, match, count=None):
+        return [clave.encode() for clave in list(self.datos) if fnmatch.fnmatch(clave, match)]
+
+
+@pytest.fixture(params=["directorio", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "directorio":
+        return BackendDirectorio(str(tmp_path / "cache"))
+    if request.param == "sqlite":
+        return BackendSQLite(str(tmp_path / "cache.db"))
+    return BackendRedis(cliente=ClienteRedisLocal())
+
+
+def test_ida_y_vuelta(backend):
+    assert backend.leer("metricas/v1/abc") is None
+    backend.escribir("metricas/v1/abc", b"\x00datos\xff", 60)
+    assert backend.leer("metricas/v1/abc") == b"\x00datos\xff"
+    backend.escribir("metricas/v1/abc", b"nuevo", 60)
+    assert backend.leer("metricas/v1/abc") == b"nuevo"
+    backend.borrar("metricas/v1/abc")
+    assert backend.leer("metricas/v1/abc") is None
+    assert backend.errores == 0
+
+
+def test_purgar_versiones(backend):
+    for clave in ("panel/v1/a", "panel/v2/b", "metricas/v1/c"):
+        backend.escribir(clave, clave.encode())
+    backend.purgar("panel", "v2")
+    assert backend.leer("panel/v1/a") is None
+    assert backend.leer("panel/v2/b") == b"panel/v2/b"
+    assert backend.leer("metricas/v1/c") == b"metricas/v1/c"  # Otro espacio no se toca
+    backend.purgar("panel")
+    assert backend.leer("panel/v2/b") is None
+
+
+def test_purgar_vencidos(backend, monkeypatch):
+    backend.escribir("metricas/v1/viejo", b"viejo", 60)
+    if isinstance(backend, BackendRedis):
+        backend.purgar_vencidos("metricas", 60)
+        assert backend.cliente.caducidad["fondos:metricas/v1/viejo"] == 60  # Redis lo hace caducar solo
+        return
+    if isinstance(backend, BackendDirectorio):
+        antes = time.time() - 120
+        os.utime(backend._ruta("metricas/v1/viejo"), (antes, antes))
+    else:
+        real = time.time
+        monkeypatch.setattr(backends_cache.time, "time", lambda: real() + 120)
+    backend.escribir("metricas/v1/nuevo", b"nuevo", 60)
+    backend.purgar_vencidos("metricas", 60)
+    assert backend.leer("metricas/v1/viejo") is None
+    assert backend.leer("metricas/v1/nuevo") == b"nuevo"
+
+
+def test_sqlite_agrega_la_columna_a_una_base_anterior(tmp_path):
+    import sqlite3
+    ruta = str(tmp_path / "anterior.db")
+    conexion = sqlite3.connect(ruta)
+    conexion.execute("CREATE TABLE resultados (clave TEXT PRIMARY KEY, espacio TEXT, version TEXT, datos BLOB)")
+    conexion.execute("INSERT INTO resultados VALUES ('panel/v1/a', 'panel', 'v1', x'00')")
+    conexion.commit()
+    conexion.close()
+
+    backend = BackendSQLite(ruta)
+    assert backend.leer("panel/v1/a") == b"\x00"
+    backend.purgar_vencidos("panel", 3600)  # Sin momento de escritura se considera vencida
+    assert backend.leer("panel/v1/a") is None
+
+
+def test_cache_compartida_entre_instancias(tmp_path):
+    backend = BackendSQLite(str(tmp_path / "compartida.db"))
+    primera = CacheResultados(backend=backend, espacio="prueba")
+    primera.guardar(("perfil", ("SPY",), "v1"), {"pesos": [1.0]})
+
+    # Otra réplica (otra instancia) encuentra el resultado en el backend
+    segunda = CacheResultados(backend=backend, espacio="prueba")
+    assert segunda.obtener(("perfil", ("SPY",), "v1")) == (True, {"pesos": [1.0]})
+    assert segunda.metricas()["aciertos_compartidos"] == 1
+
+    # Sin memoria: cada consulta va al backend
+    solo_backend = CacheResultados(max_entradas=0, backend=backend, espacio="prueba")
+    assert solo_backend.obtener(("perfil", ("SPY",), "v1"))[0] and len(solo_backend) == 0
+
+
+def test_crear_backend(tmp_path):
+    assert crear_backend(None) is None and crear_backend("memoria") is None
+    assert isinstance(crear_backend(f"sqlite:///{tmp_path}/c.db"), BackendSQLite)
+    assert isinstance(crear_backend(str(tmp_path / "carpeta")), BackendDirectorio)
@@ -0,0 +1,86 @@
+# tests/test_buscador_fondos.py
+import numpy as np
+
+from buscador_fondos import IndiceFondos, METRICAS, etiquetar_fondo, obtener_indice
+
+
+def _universo(n=300, semilla=0):
+    generador = np.random.default_rng(semilla)
+    etiquetas = (["Asia"], ["Europa"], ["México", "Global"], [])
+    fondos, metricas = [], []
+    for i in range(n):
+        fondos.append({"nombre": f"Fondo {i}", "simbolo": f"F{i}", "regiones": list(etiquetas[i % 4]),
+                       "clases": ["Renta fija"] if i % 3 == 0 else ["Renta variable"]})
+        metricas.append({metrica: (None if generador.random() < 0.1 else float(generador.normal(5, 10)))
+                         for metrica in METRICAS})
+    return fondos, metricas
+
+
+def _filtrar_a_mano(fondos, metricas, rangos, regiones, clases, ordenar_por, descendente):
+    # Referencia: recorre todos los fondos y ordena con sorted
+    seleccion = []
+    for i, (fondo, metrica) in enumerate(zip(fondos, metricas)):
+        if any(metrica[m] is None or (minimo is not None and metrica[m] < minimo) or
+               (maximo is not None and metrica[m] > maximo) for m, (minimo, maximo) in rangos.items()):
+            continue
+        if regiones and not set(regiones) & set(fondo["regiones"]):
+            continue
+        if clases and not set(clases) & set(fondo["clases"]):
+            continue
+        seleccion.append(i)
+    con_valor = [i for i in seleccion if metricas[i][ordenar_por] is not None]
+    sin_valor = [i for i in seleccion if metricas[i][ordenar_por] is None]
+    con_valor.sort(key=lambda i: metricas[i][ordenar_por], reverse=descendente)
+    return [fondos[i]["simbolo"] for i in con_valor + sin_valor]
+
+
+def test_filtros_y_ranking_contra_recorrido_completo():
+    fondos, metricas = _universo()
+    indice = IndiceFondos(fondos, metricas)
+    generador = np.random.default_rng(1)
+    consultas = [
+        ({}, None, None, "sharpe", True),
+        ({"rendimiento": (0, None)}, ["Asia"], None, "volatilidad", False),
+        ({"volatilidad": (None, 8), "sharpe": (-5, 15)}, None, ["Renta fija"], "rendimiento", True),
+        ({"max_drawdown": (2, 2)}, ["México", "Europa"], ["Renta variable"], "sharpe", False),
+    ]
+    for _ in range(20):
+        metrica = generador.choice(list(METRICAS))
+        minimo, maximo = sorted(generador.normal(5, 10, 2))
+        consultas.append(({metrica: (minimo, maximo)}, None, None, generador.choice(list(METRICAS)), bool(generador.random() < 0.5)))
+
+    for rangos, regiones, clases, ordenar_por, descendente in consultas:
+        esperado = _filtrar_a_mano(fondos, metricas, rangos, regiones, clases, ordenar_por, descendente)
+        filas = indice.filtrar(rangos, regiones, clases, ordenar_por=ordenar_por, descendente=descendente)
+        obtenido = [fila["simbolo"] for fila in filas]
+        # Los empates pueden salir en otro orden: se comparan los valores y el conjunto
+        assert sorted(obtenido) == sorted(esperado)
+        valores = [metricas[int(s[1:])][ordenar_por] for s in obtenido]
+        assert valores == [metricas[int(s[1:])][ordenar_por] for s in esperado]
+
+
+def test_limite_y_filas():
+    fondos, metricas = _universo()
+    indice = IndiceFondos(fondos, metricas)
+    filas = indice.filtrar(ordenar_por="rendimiento", limite=5)
+    assert len(filas) == 5
+    rendimientos = [fila["rendimiento"] for fila in filas]
+    assert rendimientos == sorted(rendimientos, reverse=True)
+    assert rendimientos[0] == max(m["rendimiento"] for m in metricas if m["rendimiento"] is not None)
+    # Las etiquetas desconocidas no coinciden con ningún fondo
+    assert indice.filtrar(regiones=["Marte"]) == []
+
+
+def test_etiquetas():
+    assert etiquetar_fondo({"nombre": "iShares MSCI Japan", "descripcion": "Acciones de Japón"}) == (["Asia"], ["Renta variable"])
+    regiones, clases = etiquetar_fondo({"nombre": "Bonos M5", "descripcion": "Deuda gubernamental mexicana"})
+    assert regiones == ["México"] and clases == ["Renta fija"]
+    # "oro" no coincide dentro de otra palabra
+    assert etiquetar_fondo({"nombre": "Fondo decoro", "descripcion": ""})[1] == ["Renta variable"]
+
+
+def test_indice_de_los_datos():
+    indice = obtener_indice()
+    assert len(indice) > 0 and obtener_indice() is indice
+    filas = indice.filtrar(ordenar_por="sharpe", limite=3)
+    assert len(filas) == 3 and all(fila["sharpe"] is not None for fila in filas)
@@ -0,0 +1,78 @@
+# tests/test_cache_resultados.py
+import cache_resultados
+from cache_resultados import CacheResultados, clave_optimizacion, optimizar_con_cache
+
+
+FONDOS = [
+    {"nombre": "SPDR S&P 500", "simbolo": "SPY", "rendimiento": 12.0, "volatilidad": 18.0},
+    {"nombre": "iShares Core US Aggregate Bond", "simbolo": "AGG", "rendimiento": 2.0, "volatilidad": 5.0},
+    {"nombre": "SPDR Gold", "simbolo": "GLD", "rendimiento": 7.0, "volatilidad": 14.0},
+    {"nombre": "Invesco QQQ", "simbolo": "QQQ", "rendimiento": 16.0, "volatilidad": 22.0},
+]
+
+
+def test_clave_no_depende_del_orden_de_los_fondos():
+    clave = clave_optimizacion("Moderado", FONDOS, "v1", n_fondos=3)
+    assert clave == clave_optimizacion("Moderado", FONDOS[::-1], "v1", n_fondos=3)
+    assert clave != clave_optimizacion("Moderado", FONDOS, "v1", n_fondos=2)
+    assert clave != clave_optimizacion("Moderado", FONDOS, "v2", n_fondos=3)
+    # El optimizador personalizado no usa n_fondos, así que no separa sus resultados por él
+    assert clave_optimizacion("Personalizado", FONDOS, "v1", 3) == clave_optimizacion("Personalizado", FONDOS, "v1", 2)
+
+
+def test_optimizar_con_cache_reutiliza_y_copia():
+    cache = CacheResultados(max_entradas=8)
+    primero = optimizar_con_cache("Moderado", FONDOS, n_fondos=3, cache=cache)
+    assert cache.metricas()["fallos"] == 1
+
+    primero[1][0] = -99  # La sesión que recibe el resultado no altera el compartido
+    segundo = optimizar_con_cache("Moderado", FONDOS[::-1], n_fondos=3, cache=cache)
+    assert cache.metricas()["aciertos"] == 1
+    assert segundo[1][0] != -99
+    assert abs(sum(segundo[1]) - 1) < 1e-9
+
+
+def test_caducidad(monkeypatch):
+    ahora = [1000.0]
+    monkeypatch.setattr(cache_resultados.time, "time", lambda: ahora[0])
+    cache = CacheResultados(ttl_segundos=60)
+    cache.guardar(("perfil", ("SPY",), "v1"), "resultado")
+
+    ahora[0] += 59
+    assert cache.obtener(("perfil", ("SPY",), "v1")) == (True, "resultado")
+    ahora[0] += 2
+    assert cache.obtener(("perfil", ("SPY",), "v1")) == (False, None)
+    assert len(cache) == 0
+
+
+def test_desaloja_el_menos_usado():
+    cache = CacheResultados(max_entradas=2)
+    cache.guardar(("p", ("A",), "v"), 1)
+    cache.guardar(("p", ("B",), "v"), 2)
+    cache.obtener(("p", ("A",), "v"))  # A pasa a ser la más reciente
+    cache.guardar(("p", ("C",), "v"), 3)
+    assert cache.obtener(("p", ("B",), "v"))[0] is False
+    assert cache.obtener(("p", ("A",), "v")) == (True, 1)
+    assert cache.metricas()["desalojos"] == 1
+
+
+def test_invalidar_fondos_solo_afecta_a_los_que_los_incluyen():
+    cache = CacheResultados()
+    cache.guardar(("p", ("AGG", "SPY"), "v"), "con SPY")
+    cache.guardar(("p", ("AGG", "GLD"), "v"), "sin SPY")
+    cache.guardar(("fondos", (), "v"), "universo")
+
+    assert cache.invalidar_fondos({"SPY"}) == 2
+    assert cache.obtener(("p", ("AGG", "GLD"), "v")) == (True, "sin SPY")
+    assert cache.obtener(("p", ("AGG", "SPY"), "v"))[0] is False
+    assert cache.obtener(("fondos", (), "v"))[0] is False
+
+
+def test_invalidar_conserva_la_version_vigente():
+    cache = CacheResultados()
+    cache.guardar(("panel", (), "vieja"), 1)
+    cache.guardar(("panel", (), "nueva"), 2)
+    cache.invalidar("nueva")
+    assert len(cache) == 1 and cache.obtener(("panel", (), "nueva")) == (True, 2)
+    cache.invalidar()
+    assert len(cache) == 0
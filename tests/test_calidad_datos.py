@@ -0,0 +1,93 @@
+# tests/test_calidad_datos.py
+import numpy as np
+import pandas as pd
+
+from calidad_datos import validar_serie, validar_dataframe, validar_historicos, MIN_OBSERVACIONES
+
+
+def _serie(n=250, semilla=0):
+    generador = np.random.default_rng(semilla)
+    fechas = np.array(pd.bdate_range("2023-01-02", periods=n), dtype="datetime64[D]")
+    cierres = 100 * np.exp(np.cumsum(generador.normal(0, 0.01, n)))
+    return fechas, cierres
+
+
+def test_serie_limpia():
+    reporte = validar_serie(*_serie())
+    assert reporte["estado"] == "ok" and reporte["motivos"] == []
+    assert reporte["cobertura_habiles"] == 1.0
+
+
+def test_fechas_repetidas_o_desordenadas():
+    fechas, cierres = _serie()
+    fechas[50] = fechas[49]
+    fechas[100], fechas[101] = fechas[101], fechas[100]
+    reporte = validar_serie(fechas, cierres)
+    assert reporte["fechas_repetidas"] == 1 and reporte["fechas_desordenadas"] == 1
+    assert reporte["estado"] == "cuarentena"
+
+
+def test_precios_invalidos():
+    fechas, cierres = _serie()
+    cierres[10] = 0.0
+    reporte = validar_serie(fechas, cierres)
+    assert reporte["cierres_no_positivos"] == 1 and reporte["fechas_no_positivos"] == [str(fechas[10])]
+    assert reporte["estado"] == "cuarentena"
+
+    fechas, cierres = _serie()
+    cierres[[5, 6]] = np.nan
+    reporte = validar_serie(fechas, cierres)
+    assert reporte["cierres_nan"] == 2 and reporte["estado"] == "advertencia"
+
+    cierres[:100] = np.nan  # Más del 20% sin dato
+    assert "demasiados cierres sin dato" in validar_serie(fechas, cierres)["motivos"]
+
+    fechas, cierres = _serie(MIN_OBSERVACIONES - 1)
+    assert validar_serie(fechas, cierres)["estado"] == "cuarentena"
+
+
+def test_huecos_y_feriados():
+    fechas, cierres = _serie()
+    sin_semana = np.concatenate([np.arange(0, 100), np.arange(105, 250)])
+    reporte = validar_serie(fechas[sin_semana], cierres[sin_semana])
+    assert reporte["huecos"] == 1 and reporte["mayor_hueco_habiles"] == 5
+    assert reporte["fechas_huecos"] == [str(fechas[105])]
+    assert reporte["estado"] == "advertencia"
+
+    # Un día faltante que es feriado no cuenta
+    sin_dia = np.delete(np.arange(250), 30)
+    assert validar_serie(fechas[sin_dia], cierres[sin_dia], feriados=[fechas[30]])["mayor_hueco_habiles"] == 0
+
+
+def test_picos_atipicos_y_splits():
+    fechas, cierres = _serie()
+    con_pico = cierres.copy()
+    con_pico[80] *= 1.6  # Tick erróneo que se revierte al día siguiente
+    reporte = validar_serie(fechas, con_pico)
+    assert reporte["picos"] == 1 and reporte["fechas_picos"] == [str(fechas[80])]
+    assert reporte["estado"] == "cuarentena"
+
+    con_salto = cierres.copy()
+    con_salto[150:] *= 1.3  # Salto permanente: atípico pero no pico
+    reporte = validar_serie(fechas, con_salto)
+    assert reporte["picos"] == 0 and reporte["rendimientos_atipicos"] == 1
+    assert reporte["estado"] == "advertencia"
+
+    sin_ajustar = cierres.copy()
+    sin_ajustar[200:] /= 2  # Split 2:1 sin ajustar el precio
+    splits = np.zeros(250)
+    splits[200] = 2.0
+    reporte = validar_serie(fechas, sin_ajustar, splits)
+    assert reporte["saltos_split"] == 1 and reporte["saltos_split_registrados"] == 1
+    assert reporte["estado"] == "cuarentena"
+
+
+def test_formatos_de_entrada():
+    fechas, cierres = _serie()
+    filas = [{"Date": str(fecha), "Close": float(cierre), "Stock Splits": 0.0} for fecha, cierre in zip(fechas, cierres)]
+    datos = pd.DataFrame({"Close": cierres, "Stock Splits": 0.0},
+                         index=pd.DatetimeIndex(fechas).tz_localize("America/New_York"))
+    esperado = validar_serie(fechas, cierres)
+    assert validar_historicos(filas) == esperado
+    assert validar_dataframe(datos) == esperado
+    assert validar_dataframe(datos.iloc[:0])["estado"] == "cuarentena"
@@ -0,0 +1,56 @@
+# tests/test_contribucion_riesgo.py
+import numpy as np
+
+from contribucion_riesgo import analizar_riesgo, matriz_de_pesos
+
+
+def _covarianza(n=8, semilla=0):
+    generador = np.random.default_rng(semilla)
+    factores = generador.normal(0, 0.1, (n, 3))
+    return factores @ factores.T + np.diag(generador.uniform(0.001, 0.02, n))
+
+
+def test_contribuciones_suman_la_volatilidad():
+    covarianza = _covarianza()
+    pesos = np.random.default_rng(1).dirichlet(np.ones(8), size=50)
+    analisis = analizar_riesgo(pesos, covarianza)
+
+    volatilidades = np.sqrt(np.einsum("pi,ij,pj->p", pesos, covarianza, pesos))
+    assert np.allclose(analisis["volatilidad"], volatilidades)
+    assert np.allclose(analisis["contribucion_total"].sum(axis=1), volatilidades)
+    assert np.allclose(analisis["contribucion_porcentual"].sum(axis=1), 1)
+    assert np.all(analisis["razon_diversificacion"] >= 1 - 1e-12)
+
+
+def test_contribucion_marginal_es_la_derivada():
+    covarianza = _covarianza()
+    pesos = np.random.default_rng(2).dirichlet(np.ones(8))
+    marginal = analizar_riesgo(pesos, covarianza)["contribucion_marginal"][0]
+    volatilidad = lambda w: np.sqrt(w @ covarianza @ w)
+    paso = 1e-6
+    for i in range(len(pesos)):
+        desplazados = pesos.copy()
+        desplazados[i] += paso
+        assert np.isclose((volatilidad(desplazados) - volatilidad(pesos)) / paso, marginal[i], rtol=1e-4)
+
+
+def test_volatilidades_sin_correlacion_y_rendimientos():
+    volatilidades = np.array([10.0, 20.0])
+    analisis = analizar_riesgo([0.5, 0.5], volatilidades, rendimientos=[4.0, 8.0])
+    assert np.isclose(analisis["volatilidad"][0], np.sqrt(0.25 * 100 + 0.25 * 400))
+    assert np.allclose(analisis["rendimiento"], [6.0])
+    assert np.allclose(analisis["contribucion_rendimiento"], [[2.0, 4.0]])
+    assert np.allclose(analisis["sensibilidad_rendimiento"], [[-2.0, 2.0]])
+
+
+def test_portafolio_sin_riesgo():
+    analisis = analizar_riesgo(np.zeros((1, 3)), _covarianza(3))
+    assert analisis["volatilidad"][0] == 0
+    assert np.all(analisis["contribucion_marginal"] == 0)
+    assert analisis["razon_diversificacion"][0] == 1
+
+
+def test_matriz_de_pesos():
+    universo, matriz = matriz_de_pesos([(["SPY", "AGG"], [0.6, 0.4]), (["GLD", "SPY"], [0.3, 0.7])])
+    assert universo == ["SPY", "AGG", "GLD"]
+    assert np.allclose(matriz, [[0.6, 0.4, 0.0], [0.7, 0.0, 0.3]])
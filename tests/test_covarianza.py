@@ -0,0 +1,73 @@
+# tests/test_covarianza.py
+import numpy as np
+import pytest
+
+from covarianza import ESTIMADORES, covarianza_muestral, covarianza_ledoit_wolf, covarianza_ewma, estimar_covarianza
+from modelo_factores import ajustar_modelo_factores
+from panel_fondos import PanelFondos
+
+
+def _rendimientos(n_fechas=400, n_fondos=6, semilla=0):
+    generador = np.random.default_rng(semilla)
+    factor = generador.normal(0, 0.01, (n_fechas, 1))
+    rendimientos = factor * generador.uniform(0.5, 1.5, n_fondos) + generador.normal(0, 0.005, (n_fechas, n_fondos))
+    # Historias de distinta longitud y días sin cotización, como en el panel de 'Data'
+    rendimientos[:150, 4] = np.nan
+    rendimientos[generador.random((n_fechas, n_fondos)) < 0.05] = np.nan
+    return rendimientos
+
+
+def _es_semidefinida(matriz):
+    assert np.allclose(matriz, matriz.T)
+    assert np.linalg.eigvalsh(matriz).min() >= -1e-12 * np.trace(matriz)
+
+
+@pytest.mark.parametrize("estimador", [covarianza_muestral, covarianza_ledoit_wolf, covarianza_ewma])
+def test_forma_y_semidefinida(estimador):
+    rendimientos = _rendimientos()
+    covarianza, observaciones = estimador(rendimientos)
+    assert covarianza.shape == observaciones.shape == (6, 6)
+    assert np.all(np.isfinite(covarianza))
+    assert np.all(np.diag(covarianza) > 0)
+    _es_semidefinida(covarianza)
+
+
+def test_muestral_sin_huecos_coincide_con_numpy():
+    rendimientos = np.random.default_rng(1).normal(0, 0.01, (300, 4))
+    covarianza, observaciones = covarianza_muestral(rendimientos)
+    assert np.allclose(covarianza, np.cov(rendimientos, rowvar=False))
+    assert np.all(observaciones == 300)
+
+
+def test_pares_con_pocas_fechas_comunes_no_se_correlacionan():
+    rendimientos = _rendimientos()
+    rendimientos[:-20, 5] = np.nan  # Solo 20 fechas, menos que min_observaciones
+    covarianza, _ = covarianza_muestral(rendimientos, min_observaciones=60)
+    assert np.allclose(covarianza[5, :5], 0, atol=1e-12 * np.trace(covarianza))
+
+
+@pytest.mark.parametrize("metodo", [metodo for metodo in ESTIMADORES if metodo != "factores"])
+def test_estimar_covarianza_sobre_el_panel(metodo):
+    rendimientos = _rendimientos()
+    precios = 100 * np.exp(np.nancumsum(np.vstack([np.zeros((1, 6)), rendimientos]), axis=0))
+    precios[1:][np.isnan(rendimientos)] = np.nan
+    simbolos = [f"F{i}" for i in range(6)]
+    panel = PanelFondos(np.arange(len(precios)).astype("datetime64[D]"), simbolos, precios)
+
+    matriz = estimar_covarianza(panel, simbolos[::-1], metodo=metodo)
+    assert matriz.simbolos == simbolos[::-1]
+    assert matriz.submatriz(simbolos[:3]).shape == (3, 3)
+    _es_semidefinida(matriz.matriz)
+
+
+def test_modelo_de_factores():
+    rendimientos = _rendimientos()
+    precios = 100 * np.exp(np.nancumsum(np.vstack([np.zeros((1, 6)), rendimientos]), axis=0))
+    simbolos = [f"F{i}" for i in range(6)]
+    panel = PanelFondos(np.arange(len(precios)).astype("datetime64[D]"), simbolos, precios)
+
+    modelo = ajustar_modelo_factores(panel, n_factores=2)
+    assert modelo.exposiciones.shape == (6, 2)
+    assert modelo.submatriz(simbolos[:3]).shape == (3, 3)
+    _es_semidefinida(modelo.matriz)
+    assert np.all(modelo.especificas > 0)
@@ -0,0 +1,35 @@
+# tests/test_functions.py
+import math
+import random
+
+import pytest
+
+from functions import _mejores_fondos
+
+
+def _fondos(n=500, semilla=0):
+    generador = random.Random(semilla)
+    fondos = [{"simbolo": f"F{i}", "rendimiento": generador.uniform(-5, 20),
+               "volatilidad": generador.choice([0.0, 5.0, 10.0, generador.uniform(1, 30)])} for i in range(n)]
+    fondos[3]["rendimiento"] = math.nan
+    fondos[7]["volatilidad"] = math.inf
+    return fondos
+
+
+@pytest.mark.parametrize("n_fondos", [0, 1, 5, 50, 1000])
+@pytest.mark.parametrize("mayores", [True, False])
+def test_mejores_fondos_igual_que_ordenar(n_fondos, mayores):
+    fondos = _fondos()
+    clave = lambda fondo: fondo["volatilidad"]  # Con muchos empates
+    filtro = lambda fondo: fondo["volatilidad"] > 0
+
+    validos = [fondo for fondo in fondos
+               if math.isfinite(fondo["rendimiento"]) and math.isfinite(fondo["volatilidad"]) and filtro(fondo)]
+    esperado = sorted(validos, key=clave, reverse=mayores)[:n_fondos]
+    assert _mejores_fondos(fondos, n_fondos, clave, mayores=mayores, filtro=filtro) == esperado
+
+
+def test_mejores_fondos_descarta_no_finitos():
+    seleccionados = _mejores_fondos(_fondos(), 1000, lambda fondo: fondo["rendimiento"])
+    assert {"F3", "F7"}.isdisjoint(fondo["simbolo"] for fondo in seleccionados)
+    assert len(seleccionados) == 498
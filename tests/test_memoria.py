@@ -0,0 +1,61 @@
+# tests/test_memoria.py
+import logging
+
+import pytest
+
+import memoria
+from cache_resultados import CacheResultados
+
+
+def _llenar(caches, orden):
+    # Inserta en `orden` las claves (indice de caché, nombre); la primera es la de uso más antiguo
+    for i, nombre in orden:
+        caches[i].guardar(("prueba", (nombre,), "v"), nombre)
+
+
+def _claves(cache):
+    return [clave[1][0] for clave in cache._entradas]
+
+
+def test_desalojar_lru_sigue_el_orden_global():
+    caches = [CacheResultados(), CacheResultados()]
+    _llenar(caches, [(0, "a"), (1, "b"), (0, "c"), (1, "d"), (1, "e")])
+    caches[0].obtener(("prueba", ("a",), "v"))  # "a" pasa a ser la más reciente: b, c, d, e, a
+
+    assert memoria.desalojar_lru(2, caches) == 2
+    assert _claves(caches[0]) == ["a"] and _claves(caches[1]) == ["d", "e"]
+    assert memoria.desalojar_lru(1, caches) == 1
+    assert _claves(caches[0]) == ["a"] and _claves(caches[1]) == ["e"]
+
+    # Sin más entradas se detiene aunque se pidan más
+    assert memoria.desalojar_lru(10, caches) == 2
+    assert len(caches[0]) == len(caches[1]) == 0
+    assert memoria.desalojar_lru(1, caches) == 0
+
+
+def test_aplicar_presupuesto_desaloja_si_se_excede(monkeypatch):
+    caches = [CacheResultados(), CacheResultados()]
+    _llenar(caches, [(0, "a"), (1, "b"), (0, "c"), (1, "d")])
+    monkeypatch.setattr(memoria, "_fuentes", lambda: caches)
+
+    assert memoria.aplicar_presupuesto(presupuesto=10 ** 6) == 0
+    assert sum(len(cache) for cache in caches) == 4
+    # Un presupuesto imposible desaloja todo lo que hay, por rondas
+    assert memoria.aplicar_presupuesto(presupuesto=0.001) == 4
+    assert sum(len(cache) for cache in caches) == 0
+
+
+@pytest.mark.parametrize("modo, maximo", [("rss", "mucho"), ("rss", "-5"), ("nada", "512")])
+def test_configuracion_invalida_no_impide_importar(monkeypatch, caplog, modo, maximo):
+    monkeypatch.setenv("MEMORIA_INSTRUMENTAR", modo)
+    monkeypatch.setenv("MEMORIA_MAX_MB", maximo)
+    try:
+        with caplog.at_level(logging.WARNING, logger="memoria"):
+            memoria.configurar_desde_entorno()
+        assert caplog.records
+        if modo in memoria.MODOS:
+            assert memoria.instrumentacion_activa() and memoria.presupuesto_mb() is None
+        else:
+            assert not memoria.instrumentacion_activa() and memoria.presupuesto_mb() == 512
+    finally:
+        memoria.configurar(None, None)
@@ -0,0 +1,74 @@
+# tests/test_metas.py
+import numpy as np
+
+from metas import (valor_futuro, aportacion_requerida, monto_inicial_requerido, anos_requeridos,
+                   rendimiento_requerido)
+from proyeccion import proyectar_flujos
+
+
+def _planes(n=200, semilla=0):
+    generador = np.random.default_rng(semilla)
+    return (generador.uniform(0, 500_000, n),      # monto inicial
+            generador.uniform(-0.03, 0.15, n),     # rendimiento
+            generador.integers(1, 41, n),           # años
+            generador.uniform(0, 20_000, n),        # aportación mensual
+            generador.uniform(0, 0.08, n))          # crecimiento de la aportación
+
+
+def test_valor_futuro_coincide_con_proyectar_flujos():
+    monto, rendimiento, anos, aportacion, crecimiento = _planes()
+    # Incluye el caso rendimiento == crecimiento, donde la fórmula cerrada cambia de rama
+    crecimiento[:10] = rendimiento[:10]
+    esperado = proyectar_flujos(monto, rendimiento, anos, aportacion, crecimiento)["saldo_al_retiro"]
+    assert np.allclose(valor_futuro(monto, rendimiento, anos, aportacion, crecimiento), esperado, rtol=1e-9)
+
+
+def test_aportacion_requerida_alcanza_la_meta():
+    monto, rendimiento, anos, _, crecimiento = _planes()
+    meta = np.full(len(monto), 3_000_000.0)
+    aportacion = aportacion_requerida(meta, monto, rendimiento, anos, crecimiento)
+    saldo = valor_futuro(monto, rendimiento, anos, aportacion, crecimiento)
+    assert np.allclose(np.where(aportacion > 0, saldo, meta), meta, rtol=1e-9)
+    assert np.all(saldo >= meta * (1 - 1e-9))
+
+
+def test_aportacion_requerida_con_extraordinarias():
+    extraordinarias = {5: 100_000, 10: 50_000}
+    aportacion = aportacion_requerida(2_000_000, 50_000, 0.07, 20, 0.03, aportaciones_extraordinarias=extraordinarias)
+    saldo = proyectar_flujos(50_000, 0.07, 20, aportacion, 0.03,
+                             aportaciones_extraordinarias=extraordinarias)["saldo_al_retiro"]
+    assert np.allclose(saldo, 2_000_000, rtol=1e-9)
+
+
+def test_monto_inicial_requerido_alcanza_la_meta():
+    _, rendimiento, anos, aportacion, crecimiento = _planes()
+    meta = np.full(len(rendimiento), 5_000_000.0)
+    monto = monto_inicial_requerido(meta, rendimiento, anos, aportacion, crecimiento)
+    saldo = valor_futuro(monto, rendimiento, anos, aportacion, crecimiento)
+    assert np.all(saldo >= meta * (1 - 1e-9))
+    assert np.allclose(saldo[monto > 0], meta[monto > 0], rtol=1e-9)
+
+
+def test_anos_requeridos_es_el_minimo():
+    monto, rendimiento, _, aportacion, crecimiento = _planes()
+    meta = 4_000_000.0
+    anos = anos_requeridos(meta, monto, rendimiento, aportacion, crecimiento, max_anos=60)
+    alcanzados = anos >= 0
+    assert alcanzados.any()
+    assert np.all(valor_futuro(monto, rendimiento, anos, aportacion, crecimiento)[alcanzados] >= meta)
+    anteriores = np.maximum(anos - 1, 0)
+    assert np.all(valor_futuro(monto, rendimiento, anteriores, aportacion, crecimiento)[alcanzados & (anos > 0)] < meta)
+    assert np.all(valor_futuro(monto, rendimiento, 60, aportacion, crecimiento)[~alcanzados] < meta)
+
+
+def test_rendimiento_requerido_alcanza_la_meta():
+    monto, _, anos, aportacion, crecimiento = _planes()
+    meta = 2 * valor_futuro(monto, 0.0, anos, aportacion, crecimiento)
+    rendimiento = rendimiento_requerido(meta, monto, anos, aportacion, crecimiento)
+    resueltos = np.isfinite(rendimiento)
+    assert resueltos.any()
+    saldo = valor_futuro(monto[resueltos], rendimiento[resueltos], anos[resueltos], aportacion[resueltos],
+                         crecimiento[resueltos])
+    assert np.allclose(saldo, meta[resueltos], rtol=1e-9)
+    # Sin rendimiento alcanzable dentro del intervalo el resultado es NaN
+    assert np.isnan(rendimiento_requerido(1e12, 1_000, 5, 100, maximo=1.0)).all()
@@ -0,0 +1,73 @@
+# tests/test_metricas_referencia.py
+import numpy as np
+import pytest
+
+from metricas_referencia import calcular_metricas_referencia, metricas_fondos, metricas_portafolios, DIAS_POR_ANO
+
+
+def _rendimientos(n=500, columnas=4, semilla=0):
+    generador = np.random.default_rng(semilla)
+    referencia = generador.normal(0.0004, 0.01, n)
+    betas = np.linspace(0.2, 1.5, columnas)
+    rendimientos = 0.0002 + referencia[:, None] * betas + generador.normal(0, 0.005, (n, columnas))
+    return rendimientos, referencia
+
+
+def _a_mano(r, b):
+    # Solo las fechas en que ambas series tienen dato
+    validos = np.isfinite(r) & np.isfinite(b)
+    r, b = r[validos], b[validos]
+    beta = np.cov(r, b)[0, 1] / np.var(b, ddof=1)
+    tracking_error = np.std(r - b, ddof=1) * np.sqrt(DIAS_POR_ANO)
+    return {
+        "beta": beta,
+        "alfa": (r.mean() - beta * b.mean()) * DIAS_POR_ANO * 100,
+        "tracking_error": tracking_error * 100,
+        "information_ratio": (r - b).mean() * DIAS_POR_ANO / tracking_error,
+        "captura_alcista": r[b > 0].mean() / b[b > 0].mean() * 100,
+        "captura_bajista": r[b < 0].mean() / b[b < 0].mean() * 100,
+        "correlacion": np.corrcoef(r, b)[0, 1],
+        "observaciones": len(r),
+    }
+
+
+def test_coincide_con_el_calculo_columna_por_columna():
+    rendimientos, referencia = _rendimientos()
+    rendimientos[:120, 1] = np.nan  # Fondo que empezó después
+    rendimientos[::7, 2] = np.nan
+    referencia[[3, 40]] = np.nan
+
+    metricas = calcular_metricas_referencia(rendimientos, referencia)
+    for columna in range(rendimientos.shape[1]):
+        esperado = _a_mano(rendimientos[:, columna], referencia)
+        for nombre, valor in esperado.items():
+            assert metricas[nombre][columna] == pytest.approx(valor, rel=1e-9), (nombre, columna)
+
+
+def test_la_referencia_contra_si_misma():
+    _, referencia = _rendimientos()
+    metricas = calcular_metricas_referencia(referencia[:, None], referencia)
+    assert metricas["beta"][0] == pytest.approx(1)
+    assert metricas["correlacion"][0] == pytest.approx(1)
+    assert metricas["tracking_error"][0] == pytest.approx(0, abs=1e-9)
+    # Sin tracking error no hay information ratio
+    assert np.isnan(metricas["information_ratio"][0])
+
+
+def test_pocas_observaciones_quedan_en_nan():
+    rendimientos, referencia = _rendimientos(columnas=2)
+    rendimientos[50:, 0] = np.nan
+    metricas = calcular_metricas_referencia(rendimientos, referencia, min_observaciones=60)
+    assert metricas["observaciones"][0] == 50
+    assert np.isnan(metricas["beta"][0]) and np.isfinite(metricas["beta"][1])
+
+
+def test_portafolio_de_un_fondo_es_el_fondo():
+    fondos = metricas_fondos("SPY")
+    assert fondos["SPY"]["beta"] == pytest.approx(1)
+    portafolios = metricas_portafolios(["AGG", "SPY"], [[1.0, 0.0], [0.0, 1.0]], referencia="SPY")
+    for portafolio, simbolo in zip(portafolios, ["AGG", "SPY"]):
+        for nombre, valor in fondos[simbolo].items():
+            assert portafolio[nombre] == pytest.approx(valor, rel=1e-9, nan_ok=True)
+    with pytest.raises(ValueError):
+        metricas_fondos("NO_EXISTE")
@@ -0,0 +1,34 @@
+# tests/test_panel_fondos.py
+import numpy as np
+
+from panel_fondos import PanelFondos, construir_panel
+
+
+def _suma_contra_extremos(panel):
+    for columna in range(len(panel.simbolos)):
+        cierres = panel.precios[:, columna]
+        cierres = cierres[np.isfinite(cierres)]
+        if len(cierres) > 1:
+            assert np.isclose(np.nansum(panel.rendimientos[:, columna]), np.log(cierres[-1] / cierres[0]))
+
+
+def test_rendimientos_con_huecos_en_el_calendario():
+    fechas = np.arange("2024-01-01", "2024-01-07", dtype="datetime64[D]")
+    precios = np.array([[100.0, 10.0],
+                        [np.nan, 11.0],
+                        [110.0, np.nan],
+                        [np.nan, np.nan],
+                        [121.0, 12.0],
+                        [120.0, np.nan]])
+    panel = PanelFondos(fechas, ["A", "B"], precios)
+
+    assert panel.rendimientos.shape == (5, 2)
+    # El rendimiento de A entre el 1 y el 3 de enero se registra el día 3, no se pierde
+    assert np.isnan(panel.rendimientos[0, 0])
+    assert np.isclose(panel.rendimientos[1, 0], np.log(1.1))
+    assert np.isclose(panel.rendimientos[3, 1], np.log(12 / 11))
+    _suma_contra_extremos(panel)
+
+
+def test_rendimientos_del_panel_de_datos():
+    _suma_contra_extremos(construir_panel())
@@ -0,0 +1,70 @@
+# tests/test_proyeccion.py
+import numpy as np
+
+from proyeccion import proyectar_flujos
+
+
+def _simular(monto, tasas_anuales, anos_ahorro, aportacion, crecimiento_aportacion, extraordinarias,
+             retiro, anos_retiro, crecimiento_retiro):
+    # Simulación mes a mes de un solo plan, como referencia para la versión vectorizada
+    saldo, saldos, agotado = monto + extraordinarias.get(0, 0), [monto + extraordinarias.get(0, 0)], -1
+    for mes in range(12 * (anos_ahorro + anos_retiro)):
+        ano = mes // 12
+        saldo *= (1 + tasas_anuales[min(ano, len(tasas_anuales) - 1)]) ** (1 / 12)
+        if ano < anos_ahorro:
+            saldo += aportacion * (1 + crecimiento_aportacion) ** ano
+        else:
+            saldo -= retiro * (1 + crecimiento_retiro) ** (ano - anos_ahorro)
+        if mes % 12 == 11:
+            saldo += extraordinarias.get(ano + 1, 0)
+        if saldo < 0 and agotado < 0:
+            agotado = mes + 1
+        saldos.append(0.0 if agotado >= 0 else saldo)
+    return np.array(saldos), agotado
+
+
+def test_formula_cerrada_sin_crecimiento():
+    monto, tasa, anos, aportacion = 250_000.0, 0.09, 25, 3_000.0
+    mensual = (1 + tasa) ** (1 / 12) - 1
+    esperado = monto * (1 + tasa) ** anos + aportacion * ((1 + mensual) ** (12 * anos) - 1) / mensual
+    plan = proyectar_flujos(monto, tasa, anos, aportacion_mensual=aportacion)
+    assert np.isclose(plan["saldo_al_retiro"][0], esperado, rtol=1e-10)
+    assert np.isclose(plan["total_aportado"][0], monto + 12 * anos * aportacion)
+
+
+def test_muchos_planes_contra_la_simulacion():
+    generador = np.random.default_rng(0)
+    n = 40
+    montos = generador.uniform(0, 1e6, n)
+    tasas = generador.uniform(-0.02, 0.12, n)
+    anos = generador.integers(1, 30, n)
+    aportaciones = generador.uniform(0, 10_000, n)
+    crecimientos = generador.uniform(0, 0.06, n)
+    retiros = generador.uniform(0, 40_000, n)
+    anos_retiro = generador.integers(0, 25, n)
+    extraordinarias = {3: 50_000, 10: 20_000}
+
+    plan = proyectar_flujos(montos, tasas, anos, aportaciones, crecimientos, extraordinarias,
+                            retiros, anos_retiro, 0.03)
+    for i in range(n):
+        saldos, agotado = _simular(montos[i], [tasas[i]], anos[i], aportaciones[i], crecimientos[i],
+                                   extraordinarias, retiros[i], anos_retiro[i], 0.03)
+        meses = len(saldos)
+        assert np.allclose(plan["saldos_mensuales"][i, :meses], saldos, rtol=1e-9, atol=1e-6)
+        assert np.isclose(plan["saldo_al_retiro"][i], saldos[12 * anos[i]], rtol=1e-9, atol=1e-6)
+        assert plan["mes_agotado"][i] == agotado
+
+
+def test_rendimiento_por_ano():
+    # Una trayectoria que reduce el rendimiento cada año; el último se repite si faltan años
+    tasas = np.array([[0.10, 0.08, 0.06]])
+    plan = proyectar_flujos(100_000, tasas, 5, aportacion_mensual=1_000)
+    saldos, _ = _simular(100_000, [0.10, 0.08, 0.06], 5, 1_000, 0, {}, 0, 0, 0)
+    assert np.allclose(plan["saldos_anuales"][0], saldos[::12], rtol=1e-10)
+
+
+def test_retiros_agotan_el_saldo():
+    plan = proyectar_flujos(100_000, 0.0, 0, retiro_mensual=10_000, anos_retiro=2)
+    assert plan["mes_agotado"][0] == 11
+    assert plan["saldo_final"][0] == 0
+    assert np.isclose(plan["total_retirado"][0], 100_000)
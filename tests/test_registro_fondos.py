@@ -0,0 +1,79 @@
+# tests/test_registro_fondos.py
+import os
+import shutil
+
+import pytest
+
+from registro_fondos import (cargar_registro, guardar_registro, fragmento, ruta_datos_fondo, rutas_fondo,
+                             fondos_con_datos, archivos_datos, migrar_a_fragmentos, DIRECTORIO_FRAGMENTOS)
+
+
+def test_fragmento_y_ruta():
+    assert fragmento("SPY") == fragmento("SPY")
+    assert len(fragmento("ILCTRAC.MX")) == 2 and int(fragmento("ILCTRAC.MX"), 16) < 256
+    # El punto del ticker no cambia de carpeta entre el símbolo y su nombre de archivo
+    assert fragmento("ILCTRAC.MX") == fragmento("ILCTRAC_MX")
+    ruta = ruta_datos_fondo("ILCTRAC.MX", "IPC Total Return", directorio="D")
+    assert ruta == os.path.join("D", DIRECTORIO_FRAGMENTOS, fragmento("ILCTRAC.MX"), "ILCTRAC_MX_IPC_Total_Return.json")
+
+
+def _escribir(ruta):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, "w") as f:
+        f.write("{}")
+
+
+def test_rutas_fondo_en_fragmentos_y_en_la_carpeta_plana(tmp_path):
+    directorio = str(tmp_path)
+    fragmentado = ruta_datos_fondo("SPY", "S&P 500", directorio)
+    compacto = ruta_datos_fondo("SPY", "S&P 500", os.path.join(directorio, "compacto"), ".azc")
+    plano = os.path.join(directorio, "AGG_Bonos.json")
+    for ruta in (fragmentado, compacto, plano, os.path.join(directorio, "SPYG_Crecimiento.json")):
+        _escribir(ruta)
+
+    # "SPYG_..." comparte prefijo de texto pero no es del fondo SPY
+    assert rutas_fondo("SPY", directorio) == ([fragmentado], [compacto])
+    assert rutas_fondo("AGG", directorio) == ([plano], [])
+    assert rutas_fondo("EEM", directorio) == ([], [])
+    fondos = [{"simbolo": "SPY"}, {"simbolo": "EEM"}, {"simbolo": "AGG"}]
+    assert fondos_con_datos(fondos, directorio) == [{"simbolo": "SPY"}, {"simbolo": "AGG"}]
+    assert len(archivos_datos(directorio)) == 4
+
+
+def test_migrar_a_fragmentos(tmp_path):
+    directorio = str(tmp_path)
+    shutil.copy(os.path.join("Data", "AGG_AZ_Barclays_Aggregate.json"), tmp_path)
+    (tmp_path / "fondos_no_disponibles.json").write_text('[{"simbolo": "XYZ"}]')
+
+    movidos = migrar_a_fragmentos(directorio)
+    destino = ruta_datos_fondo("AGG", "AZ Barclays Aggregate", directorio)
+    assert movidos == [(os.path.join(directorio, "AGG_AZ_Barclays_Aggregate.json"), destino)]
+    assert rutas_fondo("AGG", directorio) == ([destino], [])
+    # Los reportes sin símbolo se quedan en la carpeta plana
+    assert os.path.exists(tmp_path / "fondos_no_disponibles.json")
+
+
+def test_registro(tmp_path):
+    ruta = str(tmp_path / "registro.csv")
+    fondos = [{"simbolo": "SPY", "nombre": "S&P 500", "descripcion": "Índice, con coma"},
+              {"simbolo": "AGG", "nombre": "Bonos", "descripcion": ""}]
+    guardar_registro(fondos, ruta)
+    assert cargar_registro(ruta) == fondos
+    # La copia devuelta no altera la que está en caché
+    cargar_registro(ruta)[0]["nombre"] = "otro"
+    assert cargar_registro(ruta) == fondos
+
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write("SPY,Repetido,\n")
+    with pytest.raises(ValueError, match="más de una vez"):
+        cargar_registro(ruta)
+
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write("simbolo,nombre\nSPY,S&P 500\n")
+    with pytest.raises(ValueError, match="columnas"):
+        cargar_registro(ruta)
+
+
+def test_registro_del_repositorio():
+    fondos = cargar_registro()
+    assert fondos and len({fondo["simbolo"] for fondo in fondos}) == len(fondos)
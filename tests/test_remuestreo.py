@@ -0,0 +1,69 @@
+# tests/test_remuestreo.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import remuestreo
+from remuestreo import remuestrear, cierres, columnas_diarias, descartar
+
+
+def _historicos(n=400, semilla=0):
+    generador = np.random.default_rng(semilla)
+    fechas = pd.bdate_range("2022-01-03", periods=n)
+    precios = 100 * np.exp(np.cumsum(generador.normal(0, 0.01, n)))
+    filas = []
+    for i, fecha in enumerate(fechas):
+        filas.append({"Date": fecha.strftime("%Y-%m-%d"), "Open": precios[i] * 0.99, "High": precios[i] * 1.01,
+                      "Low": precios[i] * 0.98, "Close": precios[i], "Volume": float(generador.integers(1000, 5000)),
+                      "Dividends": 0.5 if i % 60 == 59 else 0.0, "Stock Splits": 2.0 if i == 100 else 0.0})
+    filas[10]["Close"] = None  # Fila sin cierre: no cuenta para ningún periodo
+    return filas
+
+
+@pytest.mark.parametrize("frecuencia, regla", [("W", "W-SUN"), ("M", "ME"), ("A", "YE")])
+def test_coincide_con_pandas(frecuencia, regla):
+    filas = _historicos()
+    df = pd.DataFrame(filas).dropna(subset=["Close"])
+    df.index = pd.to_datetime(df.pop("Date"))
+    esperado = df.resample(regla).agg({"Open": "first", "High": "max", "Low": "min", "Close": "last",
+                                       "Volume": "sum", "Dividends": "sum"}).dropna(subset=["Close"])
+
+    resultado = remuestrear(filas, frecuencia)
+    for campo in ("Open", "High", "Low", "Close", "Volume", "Dividends"):
+        assert np.allclose(resultado[campo], esperado[campo].to_numpy())
+    assert resultado["dias"].sum() == len(df)
+    assert np.prod(resultado["Stock Splits"]) == 2.0
+
+
+def test_rendimiento_total_sale_de_los_cierres_ajustados():
+    filas = _historicos()
+    resultado = remuestrear(filas, "M")
+    diarios = columnas_diarias(filas)["Close"]
+    # Los dividendos ya están en los cierres ajustados: no se suman otra vez
+    assert np.isclose(resultado["indice_total"][-1], diarios[-1] / diarios[0])
+    assert np.allclose(np.cumprod(1 + resultado["rendimiento_total"]), resultado["indice_total"])
+
+
+def test_cache_solo_con_clave():
+    remuestreo.limpiar_cache()
+    filas = _historicos()
+    remuestrear(filas, "M")
+    assert len(remuestreo._cache) == 0  # Sin clave no se guarda (ni se retiene la lista)
+
+    primero = remuestrear(filas, "M", clave=("F1", "v1"))
+    assert remuestrear(list(filas), "M", clave=("F1", "v1")) is primero
+    assert not primero["Close"].flags.writeable
+    remuestrear(filas, "W", clave=("F2", "v1"))
+
+    descartar({"F1"})
+    assert all(clave[0][0] == "F2" for clave in remuestreo._cache)
+    remuestreo.limpiar_cache()
+
+
+def test_cierres_y_frecuencia_invalida():
+    filas = _historicos()
+    assert len(cierres(filas)) == len(filas) - 1
+    assert np.array_equal(cierres(filas, "M"), remuestrear(filas, "M")["Close"])
+    with pytest.raises(ValueError):
+        remuestrear(filas, "Q")
+    assert len(remuestrear([], "M")["Close"]) == 0
@@ -0,0 +1,66 @@
+# tests/test_vigilante_datos.py
+import os
+import shutil
+
+import pytest
+
+from cache_resultados import CacheResultados
+from manifiesto import version_datos
+from vigilante_datos import VigilanteDatos
+
+ARCHIVOS = ["AGG_AZ_Barclays_Aggregate.json", "DIA_AZ_SPDR_DJIA_Trust.json", "EEM_AZ_Mercados_Emergentes.json"]
+
+
+@pytest.fixture
+def directorio(tmp_path):
+    for nombre in ARCHIVOS:
+        shutil.copy(os.path.join("Data", nombre), tmp_path / nombre)
+    return str(tmp_path)
+
+
+def _tocar(ruta):
+    with open(ruta, "a") as f:
+        f.write("\n")
+
+
+def test_revisar_invalida_solo_el_fondo_que_cambio(directorio):
+    cambios = []
+    vigilante = VigilanteDatos(directorio, intervalo=60, al_cambiar=cambios.append)
+    cache = CacheResultados()
+    cache.guardar(("optimizacion", ("AGG", "DIA"), "v"), 1)
+    cache.guardar(("optimizacion", ("EEM",), "v"), 2)
+    cache.guardar(("panel", (), "v"), 3)
+
+    assert vigilante.revisar() == set()
+    _tocar(os.path.join(directorio, ARCHIVOS[0]))
+    assert vigilante.revisar() == {"AGG"}
+    assert cambios == [{"AGG"}]
+    # Se va lo que incluye al fondo y lo del universo completo; lo demás sigue en caché
+    assert cache.obtener(("optimizacion", ("AGG", "DIA"), "v")) == (False, None)
+    assert cache.obtener(("panel", (), "v")) == (False, None)
+    assert cache.obtener(("optimizacion", ("EEM",), "v")) == (True, 2)
+
+    # Un archivo borrado se reconoce por el símbolo que tenía
+    os.remove(os.path.join(directorio, ARCHIVOS[1]))
+    assert vigilante.revisar() == {"DIA"}
+
+
+def test_publica_y_retira_la_version(directorio):
+    inicial = version_datos(directorio)
+    vigilante = VigilanteDatos(directorio, intervalo=60).iniciar()
+    try:
+        assert version_datos(directorio) == vigilante.version == inicial
+
+        _tocar(os.path.join(directorio, ARCHIVOS[2]))
+        # Hasta la siguiente revisión se sigue usando la versión publicada
+        assert version_datos(directorio) == inicial
+        vigilante.revisar()
+        assert vigilante.version != inicial
+        assert version_datos(directorio) == vigilante.version
+    finally:
+        vigilante.detener()
+
+    # Sin vigilante, la versión se calcula de nuevo con los archivos
+    assert version_datos(directorio) == vigilante.version
+    _tocar(os.path.join(directorio, ARCHIVOS[2]))
+    assert version_datos(directorio) != vigilante.version
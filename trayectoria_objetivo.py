@@ -0,0 +1,107 @@
+# trayectoria_objetivo.py
+"""
+Trayectoria de retiro (target-date): la asignación parte del portafolio del perfil del
+cliente y se mueve hacia el portafolio Conservador conforme se acerca el retiro.
+
+Toda la trayectoria se precalcula como una matriz de pesos (años x fondos), de modo que
+el rendimiento y la volatilidad de cada año salen de un par de productos matriciales y
+la proyección (determinista o simulada) es una sola pasada de `proyectar_flujos`.
+"""
+import numpy as np
+
+from cache_resultados import optimizar_con_cache
+from proyeccion import proyectar_flujos
+
+
+def _pesos_completos(datos_fondos, perfil):
+    # Pesos del optimizador del perfil expresados sobre todos los fondos (cero si no se eligió)
+    seleccionados, pesos, _, _ = optimizar_con_cache(perfil, datos_fondos)
+    pesos_por_simbolo = {fondo.get("simbolo", fondo["nombre"]): peso for fondo, peso in zip(seleccionados or [], pesos or [])}
+    return np.array([pesos_por_simbolo.get(fondo.get("simbolo", fondo["nombre"]), 0.0) for fondo in datos_fondos])
+
+
+def calcular_trayectoria(datos_fondos, perfil, anos, anos_transicion=None, perfil_final="Conservador"):
+    """
+    Calcula la matriz de pesos de la trayectoria de retiro.
+
+    Parámetros:
+    - datos_fondos: Lista de diccionarios con nombre, simbolo, rendimiento y volatilidad (en %).
+    - perfil: Perfil del cliente, punto de partida de la trayectoria.
+    - anos: Años hasta el retiro (filas de la matriz).
+    - anos_transicion: Años finales en los que se reduce el riesgo (por defecto todo el horizonte).
+    - perfil_final: Perfil al que se llega en el último año.
+
+    Retorna:
+    - Matriz (anos x n_fondos); la fila t son los pesos durante el año t y cada fila suma 1.
+    """
+    anos = int(anos)
+    anos_transicion = anos if anos_transicion is None else max(1, min(int(anos_transicion), anos))
+
+    pesos_inicio = _pesos_completos(datos_fondos, perfil)
+    pesos_fin = _pesos_completos(datos_fondos, perfil_final)
+
+    # Avance lineal: 0 mientras no empieza la transición y 1 en el último año antes del retiro
+    t = np.arange(1, anos + 1)
+    avance = np.clip((t - (anos - anos_transicion)) / anos_transicion, 0.0, 1.0)
+    return (1 - avance)[:, None] * pesos_inicio[None, :] + avance[:, None] * pesos_fin[None, :]
+
+
+def metricas_trayectoria(pesos, datos_fondos, covarianza=None):
+    """
+    Rendimiento y volatilidad anual de cada año de la trayectoria.
+
+    Sin matriz de covarianza se usa la misma aproximación que los optimizadores
+    (solo varianzas, sin correlaciones).
+
+    Parámetros:
+    - pesos: Matriz (anos x n_fondos) de `calcular_trayectoria`.
+    - datos_fondos: Misma lista de fondos (rendimiento y volatilidad en %).
+    - covarianza: Matriz (n_fondos x n_fondos) en decimales anuales, opcional.
+
+    Retorna:
+    - (rendimientos, volatilidades): arreglos (anos,) en decimal.
+    """
+    rendimientos_fondos = np.array([fondo["rendimiento"] for fondo in datos_fondos]) / 100
+    if covarianza is None:
+        covarianza = np.diag((np.array([fondo["volatilidad"] for fondo in datos_fondos]) / 100) ** 2)
+
+    rendimientos = pesos @ rendimientos_fondos
+    volatilidades = np.sqrt(np.einsum("ti,ij,tj->t", pesos, covarianza, pesos))
+    return rendimientos, volatilidades
+
+
+def proyectar_trayectoria(pesos, datos_fondos, monto_inicial, anos, simulaciones=0, percentiles=(10, 50, 90),
+                          covarianza=None, semilla=None, **plan):
+    """
+    Proyecta el saldo siguiendo la trayectoria, de forma determinista y, opcionalmente, simulada.
+    Durante los años de retiro se mantiene la asignación del último año (la del perfil final).
+
+    Parámetros:
+    - pesos, datos_fondos, covarianza: Como en `metricas_trayectoria`.
+    - monto_inicial, anos: Monto inicial y años hasta el retiro.
+    - simulaciones: Número de escenarios de Monte Carlo (0 para omitir la simulación).
+    - percentiles: Percentiles del saldo simulado que se reportan.
+    - semilla: Semilla del generador aleatorio.
+    - plan: Argumentos adicionales de `proyectar_flujos` (aportaciones, retiros, etc.).
+
+    Retorna:
+    - Diccionario con "rendimientos" y "volatilidades" por año, "determinista" (saldos
+      anuales) y, si hay simulación, "percentiles" {p: saldos anuales} y
+      "probabilidad_agotar".
+    """
+    rendimientos, volatilidades = metricas_trayectoria(pesos, datos_fondos, covarianza)
+    resultado = {
+        "rendimientos": rendimientos,
+        "volatilidades": volatilidades,
+        "determinista": proyectar_flujos(monto_inicial, rendimientos[None, :], anos, **plan)["saldos_anuales"][0],
+    }
+
+    if simulaciones:
+        # Un escenario por fila: rendimiento anual ~ Normal(rendimiento del año, volatilidad del año)
+        generador = np.random.default_rng(semilla)
+        escenarios = rendimientos[None, :] + volatilidades[None, :] * generador.standard_normal((simulaciones, len(rendimientos)))
+        simulado = proyectar_flujos(np.full(simulaciones, float(monto_inicial)), np.maximum(escenarios, -0.99), anos, **plan)
+        resultado["percentiles"] = dict(zip(percentiles, np.percentile(simulado["saldos_anuales"], percentiles, axis=0)))
+        resultado["probabilidad_agotar"] = float(np.mean(simulado["mes_agotado"] >= 0))
+
+    return resultado
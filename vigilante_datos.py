@@ -0,0 +1,178 @@
+# vigilante_datos.py
+"""
+Invalidación automática de las cachés cuando cambian los archivos de 'Data'.
+
+Un hilo en segundo plano revisa cada pocos segundos el tamaño y la fecha de modificación
+de los archivos de los fondos (JSON y compactos) y la generación del manifiesto. Cuando
+el descargador reescribe algunos fondos, el vigilante descarta exactamente lo que depende
+de ellos:
+
+- su contenido cargado en la caché en proceso (`functions.descartar_archivos`),
+- sus remuestreos (`remuestreo.descartar`),
+- los resultados en caché que los incluyen o que dependen de todo el universo (panel,
+  lista de fondos), en todas las instancias de `CacheResultados`,
+- en el backend compartido, los resultados del universo de versiones anteriores y los
+  que ya pasaron su tiempo de vida (`cache_resultados.invalidar_universo`), para que cada
+  actualización no deje ahí otro panel completo con sus métricas y covarianzas.
+
+Todo lo demás sigue en caché, así que el servidor ya no se reinicia después de cada
+actualización. Las claves de caché llevan la versión de sus fondos (`version_fondos`),
+de modo que aunque el vigilante no esté corriendo nunca se usa un resultado obsoleto;
+el vigilante solo libera la memoria de inmediato.
+
+Mientras corre, el vigilante publica además la versión de 'Data' calculada con su última
+revisión (`manifiesto.publicar_version`), y `version_datos` la usa en lugar de revisar
+todos los archivos en cada consulta. Un cambio se refleja en la versión a más tardar un
+intervalo después.
+"""
+import os
+import threading
+
+from functions import descartar_archivos, leer_encabezado_fondo
+from manifiesto import DIRECTORIO_DATOS, leer_manifiesto, firma_datos, publicar_version
+from registro_fondos import archivos_datos
+from cache_resultados import invalidar_fondos, invalidar_universo
+import remuestreo
+
+
+class VigilanteDatos:
+    """
+    Parámetros:
+    - directorio: Carpeta de los datos.
+    - intervalo: Segundos entre revisiones del hilo en segundo plano.
+    - al_cambiar: Función opcional que recibe el conjunto de símbolos que cambiaron.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_DATOS, intervalo=5.0, al_cambiar=None):
+        self.directorio = directorio
+        self.intervalo = intervalo
+        self.al_cambiar = al_cambiar
+        self._estados = {}   # ruta -> (tamaño, fecha de modificación)
+        self._simbolos = {}  # ruta -> símbolo (None si el archivo no es de un fondo)
+        self._generacion = None
+        self._detener = threading.Event()
+        self._hilo = None
+        self._publicando = False
+        self.revisiones = 0
+        self.invalidaciones = 0
+        self._estados, self._generacion = self._instantanea()
+        self.version = firma_datos(self._generacion, self._estados)
+        for ruta in self._estados:
+            self._simbolo(ruta)  # Para saber qué fondo era un archivo aunque luego se borre
+
+    def _archivos(self):
+        return archivos_datos(self.directorio)
+
+    def _instantanea(self):
+        estados = {}
+        for ruta in self._archivos():
+            try:
+                estado = os.stat(ruta)
+            except FileNotFoundError:
+                continue
+            estados[ruta] = (estado.st_size, estado.st_mtime_ns)
+        manifiesto = leer_manifiesto(os.path.join(self.directorio, ".manifest.json"))
+        return estados, manifiesto.get("generacion", 0)
+
+    def _simbolo(self, ruta):
+        # El símbolo se lee del encabezado una sola vez por archivo y se recuerda para cuando se borre
+        if ruta not in self._simbolos:
+            try:
+                if ruta.endswith(".azc"):
+                    from almacenamiento_compacto import leer_encabezado_compacto
+                    encabezado = leer_encabezado_compacto(ruta)
+                else:
+                    encabezado = leer_encabezado_fondo(ruta)
+                self._simbolos[ruta] = encabezado.get("simbolo") if isinstance(encabezado, dict) else None
+            except (OSError, ValueError):
+                return None
+        return self._simbolos[ruta]
+
+    def revisar(self):
+        """
+        Compara el estado actual de 'Data' con la revisión anterior e invalida lo que cambió.
+
+        Retorna:
+        - Conjunto de símbolos invalidados (vacío si nada cambió).
+        """
+        estados, generacion = self._instantanea()
+        self.revisiones += 1
+        if estados == self._estados and generacion == self._generacion:
+            if self._publicando:
+                publicar_version(self.directorio, self.version)  # Por si una revisión fallida la retiró
+            return set()
+
+        cambiadas = {ruta for ruta in estados.keys() | self._estados.keys() if estados.get(ruta) != self._estados.get(ruta)}
+        # Símbolo anterior (el archivo pudo borrarse o cambiar de fondo) y el actual
+        simbolos = {self._simbolos.get(ruta) for ruta in cambiadas}
+
+        # El manifiesto también dice qué fondos escribió el descargador en la nueva generación
+        if generacion != self._generacion:
+            manifiesto = leer_manifiesto(os.path.join(self.directorio, ".manifest.json"))
+            simbolos |= {simbolo for simbolo, fondo in manifiesto.get("fondos", {}).items()
+                         if fondo.get("generacion") == generacion}
+
+        for ruta in cambiadas:
+            self._simbolos.pop(ruta, None)
+            if ruta in estados:
+                simbolos.add(self._simbolo(ruta))
+        simbolos.discard(None)
+
+        descartar_archivos(cambiadas)
+        remuestreo.descartar(simbolos)
+        self.version = firma_datos(generacion, estados)
+        if self._publicando:
+            publicar_version(self.directorio, self.version)
+        invalidar_fondos(simbolos)
+        invalidar_universo(self.version)
+
+        self._estados, self._generacion = estados, generacion
+        self.invalidaciones += 1
+        if self.al_cambiar is not None:
+            self.al_cambiar(simbolos)
+        return simbolos
+
+    def _ciclo(self):
+        while not self._detener.wait(self.intervalo):
+            try:
+                self.revisar()
+            except Exception as e:  # El hilo no debe morir por un archivo a medio escribir
+                # Sin una revisión confiable, `version_datos` vuelve a revisar los archivos
+                publicar_version(self.directorio, None)
+                print(f"Advertencia: no se pudo revisar '{self.directorio}': {e}")
+
+    def iniciar(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            self._detener.clear()
+            self._publicando = True
+            self.revisar()  # Publica la versión (y descarta lo que haya cambiado mientras estuvo detenido)
+            self._hilo = threading.Thread(target=self._ciclo, name="vigilante_datos", daemon=True)
+            self._hilo.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join()
+        self._publicando = False
+        publicar_version(self.directorio, None)
+
+
+_vigilante = None
+_candado_vigilante = threading.Lock()
+
+
+def iniciar_vigilante(intervalo=None):
+    """
+    Arranca (una sola vez por proceso) el vigilante de 'Data'. El intervalo por defecto se
+    toma de VIGILANTE_DATOS_INTERVALO (segundos).
+
+    Retorna:
+    - La instancia de VigilanteDatos compartida.
+    """
+    global _vigilante
+    with _candado_vigilante:
+        if _vigilante is None:
+            intervalo = intervalo or float(os.environ.get("VIGILANTE_DATOS_INTERVALO", 5))
+            _vigilante = VigilanteDatos(intervalo=intervalo).iniciar()
+        return _vigilante
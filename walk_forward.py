@@ -0,0 +1,236 @@
+# walk_forward.py
+"""
+Evaluación walk-forward de los optimizadores por perfil.
+
+Cada ventana ajusta el optimizador con los rendimientos de un periodo de entrenamiento
+(las mismas métricas anualizadas que usa la app) y evalúa los pesos resultantes en el
+periodo siguiente, que el optimizador no vio. Las ventanas avanzan por el histórico
+guardado en 'Data' y los resultados se resumen por perfil.
+
+Las tareas (perfil x ventana) se reparten en un pool de procesos. El panel de
+rendimientos se publica una sola vez en memoria compartida y cada trabajador se adjunta
+de solo lectura (ver `panel_fondos.py`), así que a los procesos solo viajan índices.
+
+    python walk_forward.py [--entrenamiento 3] [--prueba 6] [--procesos 4] [--salida reporte.json]
+"""
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from functions import OPTIMIZADORES_POR_PERFIL
+from panel_fondos import construir_panel, publicar_panel, liberar_panel, inicializar_trabajador, panel_del_trabajador
+
+
+DIAS_POR_ANO = 252
+MIN_COBERTURA = 0.8  # Fracción mínima de días con rendimiento para que un fondo sea elegible
+
+
+def generar_ventanas(fechas, anos_entrenamiento=3, meses_prueba=6):
+    """
+    Divide el histórico en ventanas consecutivas de entrenamiento y prueba.
+
+    La ventana de prueba de una iteración es el inicio del siguiente avance, así que los
+    periodos de prueba no se traslapan y cubren el histórico una sola vez.
+
+    Parámetros:
+    - fechas: Fechas del panel (datetime64[D]).
+    - anos_entrenamiento: Años de cada periodo de entrenamiento.
+    - meses_prueba: Meses de cada periodo de prueba (y del avance entre ventanas).
+
+    Retorna:
+    - Lista de tuplas (inicio, corte, fin) de índices de filas de rendimientos:
+      entrenamiento = [inicio, corte) y prueba = [corte, fin).
+    """
+    if len(fechas) < 2:
+        return []
+    # La fila i de rendimientos corresponde al cambio del día fechas[i] a fechas[i + 1]
+    fechas_rendimiento = fechas[1:]
+    primer_mes = fechas_rendimiento[0].astype("datetime64[M]")
+    ultimo_dia = fechas_rendimiento[-1]
+
+    ventanas = []
+    paso = 0
+    while True:
+        inicio = (primer_mes + paso * meses_prueba).astype("datetime64[D]")
+        corte = (primer_mes + paso * meses_prueba + 12 * anos_entrenamiento).astype("datetime64[D]")
+        fin = (primer_mes + (paso + 1) * meses_prueba + 12 * anos_entrenamiento).astype("datetime64[D]")
+        if corte > ultimo_dia:
+            break
+        indices = np.searchsorted(fechas_rendimiento, [inicio, corte, fin])
+        if indices[2] > indices[1]:
+            ventanas.append(tuple(int(i) for i in indices))
+        paso += 1
+    return ventanas
+
+
+def _metricas_entrenamiento(rendimientos, simbolos):
+    # Mismas métricas que `calcular_rendimiento_volatilidad`, por columna y sin NaN
+    validos = np.isfinite(rendimientos)
+    cobertura = validos.mean(axis=0)
+    valores = np.where(validos, rendimientos, 0.0)
+    conteos = np.maximum(validos.sum(axis=0), 1)
+    medias = valores.sum(axis=0) / conteos
+    varianzas = np.maximum((valores ** 2).sum(axis=0) / conteos - medias ** 2, 0.0)
+    medias = medias * DIAS_POR_ANO * 100
+    desviaciones = np.sqrt(varianzas * DIAS_POR_ANO) * 100
+    return [
+        {"nombre": simbolo, "simbolo": simbolo, "rendimiento": float(media), "volatilidad": float(desviacion)}
+        for simbolo, media, desviacion, fraccion in zip(simbolos, medias, desviaciones, cobertura)
+        if fraccion >= MIN_COBERTURA and desviacion > 0
+    ]
+
+
+def _metricas_prueba(rendimientos, pesos):
+    # Portafolio rebalanceado diario: los días sin dato de un fondo cuentan como rendimiento cero
+    simples = np.expm1(np.nan_to_num(rendimientos))
+    diarios = np.log1p(simples @ pesos)
+    valor = np.exp(np.cumsum(diarios))
+    maximos = np.maximum.accumulate(np.concatenate([[1.0], valor]))[1:]
+    rendimiento = diarios.mean() * DIAS_POR_ANO * 100
+    volatilidad = diarios.std() * np.sqrt(DIAS_POR_ANO) * 100
+    return {
+        "rendimiento_realizado": float(rendimiento),
+        "volatilidad_realizada": float(volatilidad),
+        "sharpe_realizado": float(rendimiento / volatilidad) if volatilidad > 0 else 0.0,
+        "max_drawdown": float(np.max(1 - valor / maximos) * 100),
+        "rendimiento_acumulado": float((valor[-1] - 1) * 100),
+    }
+
+
+def evaluar_ventana(panel, perfil, inicio, corte, fin, n_fondos=5):
+    """
+    Ajusta el optimizador del perfil en [inicio, corte) y lo evalúa en [corte, fin).
+
+    Retorna:
+    - Diccionario con las fechas de la ventana, lo que el optimizador esperaba
+      (rendimiento y volatilidad en entrenamiento) y lo que se realizó en la prueba.
+    """
+    rendimientos = panel.rendimientos
+    datos_fondos = _metricas_entrenamiento(rendimientos[inicio:corte], panel.simbolos)
+    fila = {
+        "perfil": perfil,
+        "entrenamiento": [str(panel.fechas[inicio + 1]), str(panel.fechas[corte])],
+        "prueba": [str(panel.fechas[corte + 1]), str(panel.fechas[fin])],
+        "fondos_elegibles": len(datos_fondos),
+    }
+    if not datos_fondos:
+        return {**fila, "error": "Ningún fondo tiene suficiente historia en el entrenamiento."}
+
+    optimizador = OPTIMIZADORES_POR_PERFIL[perfil]
+    if perfil == "Personalizado":
+        seleccionados, pesos, esperado, riesgo = optimizador(datos_fondos)
+    else:
+        seleccionados, pesos, esperado, riesgo = optimizador(datos_fondos, n_fondos=n_fondos)
+
+    columnas = panel.columnas([fondo["simbolo"] for fondo in seleccionados])
+    realizado = _metricas_prueba(rendimientos[corte:fin, columnas], np.asarray(pesos))
+    return {
+        **fila,
+        "fondos": [fondo["simbolo"] for fondo in seleccionados],
+        "pesos": [float(peso) for peso in pesos],
+        "rendimiento_esperado": float(esperado),
+        "volatilidad_esperada": float(riesgo),
+        **realizado,
+    }
+
+
+def _tarea(argumentos):
+    # Se ejecuta en el trabajador, con el panel ya adjuntado por `inicializar_trabajador`
+    return evaluar_ventana(panel_del_trabajador(), *argumentos)
+
+
+def ejecutar_walk_forward(perfiles=None, anos_entrenamiento=3, meses_prueba=6, n_fondos=5, procesos=None):
+    """
+    Ejecuta todas las ventanas para todos los perfiles.
+
+    Parámetros:
+    - perfiles: Perfiles a evaluar (por defecto todos, incluido "Personalizado" como referencia).
+    - anos_entrenamiento, meses_prueba: Tamaño de las ventanas.
+    - n_fondos: Fondos que eligen los optimizadores por perfil.
+    - procesos: Procesos del pool (1 para ejecutar en este proceso; None usa todos los núcleos).
+
+    Retorna:
+    - Lista de resultados por (perfil, ventana), en orden de perfil y fecha.
+    """
+    perfiles = list(perfiles or OPTIMIZADORES_POR_PERFIL)
+    panel = construir_panel()
+    tareas = [(perfil, inicio, corte, fin, n_fondos)
+              for perfil in perfiles
+              for inicio, corte, fin in generar_ventanas(panel.fechas, anos_entrenamiento, meses_prueba)]
+
+    if procesos == 1:
+        return [evaluar_ventana(panel, *tarea) for tarea in tareas]
+
+    descriptor = publicar_panel(panel)
+    try:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=inicializar_trabajador, initargs=(descriptor,)) as pool:
+            return list(pool.map(_tarea, tareas, chunksize=max(1, len(tareas) // (4 * (procesos or 4)))))
+    finally:
+        liberar_panel(descriptor)
+
+
+def resumir(resultados):
+    """
+    Resume los resultados por perfil.
+
+    Retorna:
+    - Diccionario {perfil: métricas promedio fuera de muestra}, incluyendo el error de
+      pronóstico (rendimiento realizado menos esperado) y la fracción de ventanas con
+      rendimiento positivo.
+    """
+    resumen = {}
+    for perfil in dict.fromkeys(resultado["perfil"] for resultado in resultados):
+        filas = [r for r in resultados if r["perfil"] == perfil and "error" not in r]
+        if not filas:
+            continue
+        columna = lambda campo: np.array([fila[campo] for fila in filas])
+        resumen[perfil] = {
+            "ventanas": len(filas),
+            "rendimiento_realizado": float(columna("rendimiento_realizado").mean()),
+            "volatilidad_realizada": float(columna("volatilidad_realizada").mean()),
+            "sharpe_realizado": float(columna("sharpe_realizado").mean()),
+            "peor_drawdown": float(columna("max_drawdown").max()),
+            "ventanas_positivas": float((columna("rendimiento_acumulado") > 0).mean()),
+            "error_rendimiento": float((columna("rendimiento_realizado") - columna("rendimiento_esperado")).mean()),
+            "error_volatilidad": float((columna("volatilidad_realizada") - columna("volatilidad_esperada")).mean()),
+        }
+    return resumen
+
+
+def imprimir_reporte(resumen):
+    encabezado = (f"{'Perfil':<14}{'Ventanas':>9}{'Rend. %':>9}{'Vol. %':>8}{'Sharpe':>8}"
+                  f"{'Peor DD %':>11}{'% posit.':>10}{'Err. rend.':>12}{'Err. vol.':>11}")
+    print(encabezado)
+    print("-" * len(encabezado))
+    for perfil, fila in resumen.items():
+        print(f"{perfil:<14}{fila['ventanas']:>9}{fila['rendimiento_realizado']:>9.2f}{fila['volatilidad_realizada']:>8.2f}"
+              f"{fila['sharpe_realizado']:>8.2f}{fila['peor_drawdown']:>11.2f}{fila['ventanas_positivas'] * 100:>10.0f}"
+              f"{fila['error_rendimiento']:>12.2f}{fila['error_volatilidad']:>11.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluación walk-forward de los optimizadores por perfil.")
+    parser.add_argument("--entrenamiento", type=int, default=3, help="Años de entrenamiento por ventana.")
+    parser.add_argument("--prueba", type=int, default=6, help="Meses de prueba (y de avance) por ventana.")
+    parser.add_argument("--n-fondos", type=int, default=5)
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool (1 = sin pool).")
+    parser.add_argument("--salida", help="Archivo JSON para guardar los resultados por ventana y el resumen.")
+    argumentos = parser.parse_args()
+
+    inicio = time.perf_counter()
+    resultados = ejecutar_walk_forward(anos_entrenamiento=argumentos.entrenamiento, meses_prueba=argumentos.prueba,
+                                       n_fondos=argumentos.n_fondos, procesos=argumentos.procesos)
+    resumen = resumir(resultados)
+    if not resumen:
+        print("No hay historia suficiente para ninguna ventana.")
+        sys.exit(1)
+
+    imprimir_reporte(resumen)
+    print(f"\n{len(resultados)} evaluaciones en {time.perf_counter() - inicio:.2f} s")
+
+    if argumentos.salida:
+        with open(argumentos.salida, 'w') as f:
+            json.dump({"resumen": resumen, "ventanas": resultados}, f, indent=4)